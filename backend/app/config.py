@@ -25,9 +25,40 @@ class Settings(BaseSettings):
     DOWNLOAD_DIR: str = "./downloads"
     SQLITE_DB_PATH: str = "./data/xivmind.db"
 
+    DOWNLOAD_MAX_CONCURRENT: int = 4
+    DOWNLOAD_PER_HOST_LIMIT: int = 2
+    DOWNLOAD_INTERACTIVE_BURST: int = 4
+    DOWNLOAD_TIMEOUT: float = 300.0
+    DOWNLOAD_PROGRESS_INTERVAL: float = 0.25
+    DOWNLOAD_STATUS_FLUSH_INTERVAL: float = 1.0
+    DOWNLOAD_WS_SEND_TIMEOUT: float = 5.0
+    DOWNLOAD_SEGMENTS: int = 4
+    DOWNLOAD_SEGMENT_MIN_SIZE: int = 4 * 1024 * 1024
+    DOWNLOAD_CHUNK_SIZE_MIN: int = 64 * 1024
+    DOWNLOAD_CHUNK_SIZE_MAX: int = 1024 * 1024
+    DOWNLOAD_MAX_RETRIES: int = 3
+    DOWNLOAD_RETRY_BASE_DELAY: float = 1.0
+
+    FULLTEXT_INDEX_ENABLED: bool = True
+    FULLTEXT_WORKERS: int = 2
+    FULLTEXT_CHUNK_WORDS: int = 200
+    FULLTEXT_CHUNK_OVERLAP: int = 40
+    FULLTEXT_MAX_CHUNKS: int = 500
+
     ARXIV_MAX_RETRIES: int = 3
     ARXIV_RETRY_BASE_DELAY: float = 1.0
     ARXIV_BATCH_SIZE: int = 50
+    
+    FETCH_LOCK_ENABLED: bool = False
+    FETCH_LOCK_TTL: float = 600.0
+    FETCH_LOCK_POLL_INTERVAL: float = 1.0
+    
+    PREFETCH_ENABLED: bool = False
+    PREFETCH_CATEGORIES: str = "cs*"
+    PREFETCH_TIME_UTC: str = "01:30"
+    PREFETCH_ON_START: bool = True
+    PREFETCH_GENERATE_EMBEDDINGS: bool = True
+    PREFETCH_WARM_GRAPH: bool = True
 
     OPENAI_API_KEY: str = ""
     OPENAI_EMBEDDING_MODEL: str = "text-embedding-ada-002"
@@ -44,12 +75,29 @@ class Settings(BaseSettings):
     LLM_MODEL: str = "gpt-4o-mini"
     LLM_TEMPERATURE: float = 0.7
     LLM_MAX_TOKENS: int = 2048
+    LLM_PROMPT_CACHE_ENABLED: bool = True
+    LLM_PROVIDER_CONCURRENCY: str = "openai=16,anthropic=8,glm=8,ollama=2"
+    LLM_PROVIDER_TOKENS_PER_MINUTE: str = ""
+    LLM_MAX_RETRIES: int = 3
+    LLM_RETRY_BASE_DELAY: float = 1.0
+    LLM_RETRY_MAX_DELAY: float = 30.0
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    LLM_CIRCUIT_RESET_SECONDS: float = 30.0
+    LLM_FALLBACK_PROVIDER: str = ""
+    LLM_FALLBACK_MODEL: str = ""
+    
+    ASK_CONTEXT_TOKEN_BUDGET: int = 2000
+    ASK_MAX_PASSAGE_TOKENS: int = 400
+    ASK_PASSAGE_CANDIDATES: int = 20
     
     GLM_API_KEY: str = ""
     GLM_BASE_URL: str = "https://open.bigmodel.cn/api/paas/v4"
     
     OLLAMA_BASE_URL: str = "http://localhost:11434"
     OLLAMA_MODEL: str = "llama3"
+    OLLAMA_KEEP_ALIVE: str = "30m"
+    OLLAMA_HEALTH_TTL_SECONDS: float = 30.0
+    OLLAMA_PRELOAD_ON_START: bool = True
     
     MILVUS_QUERY_BATCH_SIZE: int = 3000
     
@@ -57,6 +105,12 @@ class Settings(BaseSettings):
     SKILLS_WATCH_ENABLED: bool = True
     SKILLS_WATCH_DEBOUNCE_MS: int = 250
     SKILLS_RELOAD_ON_START: bool = True
+    SKILL_CACHE_ENABLED: bool = True
+    SKILL_CACHE_PATH: str = "./data/skill_cache.db"
+    SKILL_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    SKILL_CACHE_MAX_ENTRIES: int = 5000
+    SKILL_BATCH_CONCURRENCY: int = 8
+    SKILL_BATCH_MAX_PAPERS: int = 500
     
     SUBAGENTS_DIR: str = os.path.join(os.path.dirname(os.path.dirname(__file__)), "subagents")
     SUBAGENTS_WATCH_ENABLED: bool = True
@@ -64,6 +118,23 @@ class Settings(BaseSettings):
     SUBAGENTS_RELOAD_ON_START: bool = True
     SUBAGENTS_MAX_TURNS: int = 10
     SUBAGENTS_DEFAULT_MODEL: str = "glm-4"
+    SUBAGENTS_MAX_PARALLEL_TOOLS: int = 4
+    SUBAGENTS_TOOL_TIMEOUT: float = 60.0
+    SUBAGENTS_TASK_WORKERS: int = 4
+    SUBAGENTS_TASK_QUEUE_SIZE: int = 100
+    SUBAGENTS_TASK_RETENTION_SECONDS: int = 3600
+    SUBAGENTS_TASK_HEARTBEAT_SECONDS: float = 15.0
+    SUBAGENTS_CONTEXT_TOKEN_BUDGET: int = 8000
+    SUBAGENTS_TOOL_RESULT_TOKENS: int = 400
+    SUBAGENTS_SUMMARY_TOKENS: int = 800
+    SUBAGENTS_SUMMARY_PROVIDER: str = ""
+    SUBAGENTS_SUMMARY_MODEL: str = ""
+    SUBAGENTS_JOURNAL_ENABLED: bool = True
+    SUBAGENTS_JOURNAL_PATH: str = "./data/subagent_journal.db"
+    SUBAGENTS_JOURNAL_RETENTION_SECONDS: int = 7 * 24 * 3600
+    SUBAGENTS_RESUME_ON_START: bool = False
+    SUBAGENTS_LLM_CONCURRENCY: int = 8
+    SUBAGENTS_PLAN_MAX_NODES: int = 20
 
     class Config:
         env_file = ".env"
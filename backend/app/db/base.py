@@ -76,11 +76,26 @@ class DownloadRepository(BaseRepository):
         """Update download task status."""
         pass
 
+    @abstractmethod
+    def update_status_batch(self, updates: List[Dict[str, Any]]) -> int:
+        """Apply several status updates (keyed by task_id) at once."""
+        pass
+
     @abstractmethod
     def reset_incomplete_tasks(self) -> int:
         """Reset all incomplete tasks to failed status."""
         pass
 
+    @abstractmethod
+    def get_active_by_paper_ids(self, paper_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get the newest pending or downloading task for each paper ID."""
+        pass
+
+    @abstractmethod
+    def add_batch(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create multiple download tasks at once."""
+        pass
+
 
 class PaperRepository(BaseRepository):
     """Abstract repository for papers."""
@@ -264,3 +279,48 @@ class PaperEmbeddingRepository(ABC):
     ) -> List[str]:
         """Get paper IDs that don't have embeddings yet."""
         pass
+
+
+class PaperChunkRepository(ABC):
+    """Abstract repository for full-text passage embeddings."""
+
+    @abstractmethod
+    def replace_chunks(
+        self,
+        paper_id: str,
+        chunks: List[Dict[str, Any]],
+        model_name: str,
+        source_sha256: str = "",
+    ) -> int:
+        """Replace all chunks of a paper; chunks carry chunk_index, page, text and embedding."""
+        pass
+
+    @abstractmethod
+    def get_chunks(self, paper_id: str) -> List[Dict[str, Any]]:
+        """Get the chunks of a paper in document order, without embeddings."""
+        pass
+
+    @abstractmethod
+    def get_source_checksum(self, paper_id: str) -> Optional[str]:
+        """Get the SHA-256 of the PDF a paper's chunks were extracted from."""
+        pass
+
+    @abstractmethod
+    def search_chunks(
+        self,
+        query_embedding: List[float],
+        top_k: int = 10,
+        paper_ids: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Search for passages similar to a query embedding."""
+        pass
+
+    @abstractmethod
+    def delete_chunks(self, paper_id: str) -> bool:
+        """Delete all chunks of a paper."""
+        pass
+
+    @abstractmethod
+    def count_chunks(self) -> int:
+        """Get total number of chunks."""
+        pass
@@ -1,8 +1,9 @@
-from app.db.base import BookmarkRepository, DownloadRepository, PaperRepository, PaperEmbeddingRepository
+from app.db.base import BookmarkRepository, DownloadRepository, PaperRepository, PaperEmbeddingRepository, PaperChunkRepository
 from app.db.milvus.bookmark_repo import MilvusBookmarkRepository
 from app.db.milvus.download_repo import MilvusDownloadRepository
 from app.db.milvus.paper_repo import MilvusPaperRepository
 from app.db.milvus.paper_embedding_repo import MilvusPaperEmbeddingRepository
+from app.db.milvus.paper_chunk_repo import MilvusPaperChunkRepository
 from app.db.sqlite.bookmark_repo import SQLiteBookmarkRepository
 from app.db.sqlite.download_repo import SQLiteDownloadRepository
 from app.db.sqlite.paper_repo import SQLitePaperRepository
@@ -13,6 +14,7 @@ _bookmark_repo: BookmarkRepository | None = None
 _download_repo: DownloadRepository | None = None
 _paper_repo: PaperRepository | None = None
 _paper_embedding_repo: PaperEmbeddingRepository | None = None
+_paper_chunk_repo: PaperChunkRepository | None = None
 
 
 def get_bookmark_repository() -> BookmarkRepository:
@@ -71,9 +73,18 @@ def get_paper_embedding_repository() -> PaperEmbeddingRepository:
     return _paper_embedding_repo
 
 
+def get_paper_chunk_repository() -> PaperChunkRepository:
+    global _paper_chunk_repo
+    if _paper_chunk_repo is None:
+        _paper_chunk_repo = MilvusPaperChunkRepository()
+    
+    return _paper_chunk_repo
+
+
 def reset_repositories():
-    global _bookmark_repo, _download_repo, _paper_repo, _paper_embedding_repo
+    global _bookmark_repo, _download_repo, _paper_repo, _paper_embedding_repo, _paper_chunk_repo
     _bookmark_repo = None
     _download_repo = None
     _paper_repo = None
     _paper_embedding_repo = None
+    _paper_chunk_repo = None
@@ -3,6 +3,7 @@ from app.db.milvus.client import milvus_client, Collection
 from app.config import get_settings
 from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime
+import json
 import uuid
 
 settings = get_settings()
@@ -79,6 +80,40 @@ class MilvusDownloadRepository(DownloadRepository):
             "updated_at": now,
         }
 
+    def add_batch(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not items:
+            return []
+
+        collection = self._get_collection()
+        now = datetime.utcnow().isoformat()
+        tasks = [
+            {
+                "id": str(uuid.uuid4()),
+                "paper_id": self._safe_str(item.get("paper_id")),
+                "arxiv_id": self._safe_str(item.get("arxiv_id")),
+                "title": self._safe_str(item.get("title"), 1024),
+                "pdf_url": self._safe_str(item.get("pdf_url")),
+                "status": "pending",
+                "progress": 0,
+                "file_path": "",
+                "file_size": 0,
+                "error_message": "",
+                "created_at": now,
+                "updated_at": now,
+            }
+            for item in items
+        ]
+
+        fields = [
+            "id", "paper_id", "arxiv_id", "title", "pdf_url", "status", "progress",
+            "file_path", "file_size", "error_message", "created_at", "updated_at",
+        ]
+        insert_data = [[task[name] for task in tasks] for name in fields]
+        insert_data.append([[0.0] * 8 for _ in tasks])
+
+        collection.insert(insert_data)
+        return tasks
+
     def remove(self, id: str) -> bool:
         collection = self._get_collection()
         collection.load()
@@ -136,6 +171,26 @@ class MilvusDownloadRepository(DownloadRepository):
         )
         return [self._entity_to_response(r) for r in results]
 
+    def get_active_by_paper_ids(self, paper_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        if not paper_ids:
+            return {}
+
+        collection = self._get_collection()
+        collection.load()
+        unique_ids = list(dict.fromkeys(paper_ids))
+        results = []
+        for i in range(0, len(unique_ids), 500):
+            chunk = unique_ids[i:i + 500]
+            results.extend(collection.query(
+                expr=f'paper_id in {json.dumps(chunk)} and (status == "pending" or status == "downloading")',
+                output_fields=["*"],
+            ))
+
+        active: Dict[str, Dict[str, Any]] = {}
+        for entity in sorted(results, key=lambda e: e.get("created_at", "")):
+            active[entity.get("paper_id", "")] = self._entity_to_response(entity)
+        return active
+
     def update_status(
         self,
         task_id: str,
@@ -184,6 +239,20 @@ class MilvusDownloadRepository(DownloadRepository):
         collection.insert(insert_data)
         return True
 
+    def update_status_batch(self, updates: List[Dict[str, Any]]) -> int:
+        updated = 0
+        for update in updates:
+            if self.update_status(
+                update["task_id"],
+                update["status"],
+                update.get("progress", 0),
+                update.get("file_path"),
+                update.get("file_size", 0),
+                update.get("error_message"),
+            ):
+                updated += 1
+        return updated
+
     def reset_incomplete_tasks(self) -> int:
         collection = self._get_collection()
         collection.load()
@@ -0,0 +1,165 @@
+from typing import Dict, List, Optional, Any
+from datetime import datetime
+from pymilvus import Collection
+import logging
+
+from app.db.base import PaperChunkRepository
+from app.db.milvus.client import milvus_client
+from app.db.milvus.schemas import PaperChunkSchema
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+CHUNK_OUTPUT_FIELDS = ["chunk_id", "paper_id", "chunk_index", "page", "text", "embedding_model", "source_sha256", "created_at"]
+
+
+def _truncate_utf8(text: str, max_bytes: int) -> str:
+    encoded = text.encode("utf-8")
+    if len(encoded) <= max_bytes:
+        return text
+    return encoded[:max_bytes].decode("utf-8", errors="ignore")
+
+
+class MilvusPaperChunkRepository(PaperChunkRepository):
+    """Repository for full-text passage embeddings in Milvus."""
+    
+    def __init__(self):
+        self._collection: Optional[Collection] = None
+    
+    def _get_collection(self) -> Collection:
+        if not self._collection:
+            self._collection = milvus_client.get_collection("paper_chunks")
+        return self._collection
+    
+    @staticmethod
+    def _chunk_id(paper_id: str, chunk_index: int) -> str:
+        return f"{paper_id}#{chunk_index:05d}"
+    
+    @staticmethod
+    def _to_dict(row: Dict[str, Any]) -> Dict[str, Any]:
+        return {field: row.get(field) for field in CHUNK_OUTPUT_FIELDS}
+    
+    def replace_chunks(
+        self,
+        paper_id: str,
+        chunks: List[Dict[str, Any]],
+        model_name: str,
+        source_sha256: str = "",
+    ) -> int:
+        collection = self._get_collection()
+        collection.load()
+        collection.delete(f'paper_id == "{paper_id}"')
+        
+        if not chunks:
+            collection.flush()
+            return 0
+        
+        now = datetime.utcnow().isoformat()
+        batch_size = settings.MILVUS_QUERY_BATCH_SIZE
+        for i in range(0, len(chunks), batch_size):
+            batch = chunks[i:i + batch_size]
+            collection.insert([
+                [self._chunk_id(paper_id, c["chunk_index"]) for c in batch],
+                [paper_id] * len(batch),
+                [c["chunk_index"] for c in batch],
+                [c.get("page", 0) for c in batch],
+                [_truncate_utf8(c["text"], PaperChunkSchema.TEXT_MAX_LENGTH) for c in batch],
+                [c["embedding"] for c in batch],
+                [model_name] * len(batch),
+                [source_sha256] * len(batch),
+                [now] * len(batch),
+            ])
+        collection.flush()
+        return len(chunks)
+    
+    def get_chunks(self, paper_id: str) -> List[Dict[str, Any]]:
+        collection = self._get_collection()
+        collection.load()
+        
+        results = collection.query(
+            expr=f'paper_id == "{paper_id}"',
+            output_fields=CHUNK_OUTPUT_FIELDS,
+        )
+        return sorted((self._to_dict(r) for r in results), key=lambda c: c["chunk_index"])
+    
+    def get_source_checksum(self, paper_id: str) -> Optional[str]:
+        collection = self._get_collection()
+        collection.load()
+        
+        results = collection.query(
+            expr=f'paper_id == "{paper_id}"',
+            output_fields=["source_sha256"],
+            limit=1,
+        )
+        if results:
+            return results[0].get("source_sha256")
+        return None
+    
+    def search_chunks(
+        self,
+        query_embedding: List[float],
+        top_k: int = 10,
+        paper_ids: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for passages similar to a query embedding.
+        
+        Args:
+            query_embedding: Query embedding vector
+            top_k: Number of passages to return
+            paper_ids: Optional list of paper IDs to restrict the search to
+        
+        Returns:
+            List of passages with similarity scores
+        """
+        collection = self._get_collection()
+        collection.load()
+        
+        search_params = {
+            "metric_type": "COSINE",
+            "params": {"nprobe": 32},
+        }
+        
+        expr = None
+        if paper_ids:
+            if len(paper_ids) > settings.MILVUS_QUERY_BATCH_SIZE:
+                logger.warning(f"paper_ids filter truncated from {len(paper_ids)} to {settings.MILVUS_QUERY_BATCH_SIZE} to avoid Milvus query size limit")
+                paper_ids = paper_ids[:settings.MILVUS_QUERY_BATCH_SIZE]
+            ids_str = ", ".join([f'"{pid}"' for pid in paper_ids])
+            expr = f'paper_id in [{ids_str}]'
+        
+        results = collection.search(
+            data=[query_embedding],
+            anns_field="embedding",
+            param=search_params,
+            limit=top_k,
+            expr=expr,
+            output_fields=CHUNK_OUTPUT_FIELDS,
+        )
+        
+        passages = []
+        if results and len(results) > 0:
+            for hit in results[0]:
+                passage = {field: hit.entity.get(field) for field in CHUNK_OUTPUT_FIELDS}
+                passage["similarity_score"] = hit.score
+                passages.append(passage)
+        
+        return passages
+    
+    def delete_chunks(self, paper_id: str) -> bool:
+        collection = self._get_collection()
+        collection.load()
+        
+        try:
+            collection.delete(f'paper_id == "{paper_id}"')
+            collection.flush()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to delete chunks for {paper_id}: {e}")
+            return False
+    
+    def count_chunks(self) -> int:
+        collection = self._get_collection()
+        collection.load()
+        return collection.num_entities
@@ -5,6 +5,7 @@ from .papers import PaperSchema
 from .date_index import DateIndexSchema
 from .embedding_index import EmbeddingIndexSchema
 from .paper_embeddings import PaperEmbeddingSchema
+from .paper_chunks import PaperChunkSchema
 from .registry import SchemaRegistry
 
 __all__ = [
@@ -15,5 +16,6 @@ __all__ = [
     "DateIndexSchema",
     "EmbeddingIndexSchema",
     "PaperEmbeddingSchema",
+    "PaperChunkSchema",
     "SchemaRegistry",
 ]
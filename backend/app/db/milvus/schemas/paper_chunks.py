@@ -0,0 +1,44 @@
+from typing import List
+from pymilvus import FieldSchema, DataType
+from .base import BaseCollectionSchema
+from app.config import get_settings
+
+
+class PaperChunkSchema(BaseCollectionSchema):
+    """Schema for paper_chunks collection."""
+    
+    TEXT_MAX_LENGTH = 8192
+    
+    @property
+    def collection_name(self) -> str:
+        return "paper_chunks"
+    
+    @property
+    def schema_version(self) -> int:
+        return 1
+    
+    @property
+    def description(self) -> str:
+        return "Full-text passage embeddings extracted from downloaded PDFs"
+    
+    @property
+    def embedding_dim(self) -> int:
+        settings = get_settings()
+        return settings.EMBEDDING_DIM
+    
+    @property
+    def index_nlist(self) -> int:
+        return 256
+    
+    def get_fields(self) -> List[FieldSchema]:
+        return [
+            FieldSchema(name="chunk_id", dtype=DataType.VARCHAR, max_length=160, is_primary=True),
+            FieldSchema(name="paper_id", dtype=DataType.VARCHAR, max_length=128),
+            FieldSchema(name="chunk_index", dtype=DataType.INT64),
+            FieldSchema(name="page", dtype=DataType.INT64),
+            FieldSchema(name="text", dtype=DataType.VARCHAR, max_length=self.TEXT_MAX_LENGTH),
+            FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=self.embedding_dim),
+            FieldSchema(name="embedding_model", dtype=DataType.VARCHAR, max_length=64),
+            FieldSchema(name="source_sha256", dtype=DataType.VARCHAR, max_length=64),
+            FieldSchema(name="created_at", dtype=DataType.VARCHAR, max_length=64),
+        ]
@@ -6,6 +6,7 @@ from .papers import PaperSchema
 from .date_index import DateIndexSchema
 from .embedding_index import EmbeddingIndexSchema
 from .paper_embeddings import PaperEmbeddingSchema
+from .paper_chunks import PaperChunkSchema
 
 
 class SchemaRegistry:
@@ -42,3 +43,4 @@ SchemaRegistry.register(PaperSchema())
 SchemaRegistry.register(DateIndexSchema())
 SchemaRegistry.register(EmbeddingIndexSchema())
 SchemaRegistry.register(PaperEmbeddingSchema())
+SchemaRegistry.register(PaperChunkSchema())
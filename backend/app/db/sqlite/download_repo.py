@@ -8,6 +8,8 @@ from contextlib import contextmanager
 
 
 class SQLiteDownloadRepository(DownloadRepository):
+    QUERY_CHUNK_SIZE = 500
+
     def __init__(self, db_path: str):
         self._db_path = db_path
         self._ensure_db_dir()
@@ -74,40 +76,12 @@ class SQLiteDownloadRepository(DownloadRepository):
             "updated_at": row["updated_at"] or "",
         }
 
-    def add(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        task_id = str(uuid.uuid4())
-        now = datetime.utcnow().isoformat()
-
-        title = self._safe_str(data.get("title"), 1024)
-
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO downloads (
-                    id, paper_id, arxiv_id, title, pdf_url, status, progress,
-                    file_path, file_size, error_message, created_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                task_id,
-                self._safe_str(data.get("paper_id")),
-                self._safe_str(data.get("arxiv_id")),
-                title,
-                self._safe_str(data.get("pdf_url")),
-                "pending",
-                0,
-                "",
-                0,
-                "",
-                now,
-                now,
-            ))
-            conn.commit()
-
+    def _new_task(self, data: Dict[str, Any], now: str) -> Dict[str, Any]:
         return {
-            "id": task_id,
+            "id": str(uuid.uuid4()),
             "paper_id": self._safe_str(data.get("paper_id")),
             "arxiv_id": self._safe_str(data.get("arxiv_id")),
-            "title": title,
+            "title": self._safe_str(data.get("title"), 1024),
             "pdf_url": self._safe_str(data.get("pdf_url")),
             "status": "pending",
             "progress": 0,
@@ -118,6 +92,40 @@ class SQLiteDownloadRepository(DownloadRepository):
             "updated_at": now,
         }
 
+    _INSERT_SQL = '''
+        INSERT INTO downloads (
+            id, paper_id, arxiv_id, title, pdf_url, status, progress,
+            file_path, file_size, error_message, created_at, updated_at
+        ) VALUES (
+            :id, :paper_id, :arxiv_id, :title, :pdf_url, :status, :progress,
+            :file_path, :file_size, :error_message, :created_at, :updated_at
+        )
+    '''
+
+    def add(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        task = self._new_task(data, datetime.utcnow().isoformat())
+
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(self._INSERT_SQL, task)
+            conn.commit()
+
+        return task
+
+    def add_batch(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not items:
+            return []
+
+        now = datetime.utcnow().isoformat()
+        tasks = [self._new_task(item, now) for item in items]
+
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(self._INSERT_SQL, tasks)
+            conn.commit()
+
+        return tasks
+
     def remove(self, id: str) -> bool:
         with self._get_connection() as conn:
             cursor = conn.cursor()
@@ -168,6 +176,26 @@ class SQLiteDownloadRepository(DownloadRepository):
             rows = cursor.fetchall()
             return [self._row_to_response(row) for row in rows]
 
+    def get_active_by_paper_ids(self, paper_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        if not paper_ids:
+            return {}
+
+        active: Dict[str, Dict[str, Any]] = {}
+        unique_ids = list(dict.fromkeys(paper_ids))
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            for i in range(0, len(unique_ids), self.QUERY_CHUNK_SIZE):
+                chunk = unique_ids[i:i + self.QUERY_CHUNK_SIZE]
+                placeholders = ", ".join(["?"] * len(chunk))
+                cursor.execute(f'''
+                    SELECT * FROM downloads
+                    WHERE paper_id IN ({placeholders}) AND status IN ('pending', 'downloading')
+                    ORDER BY created_at ASC
+                ''', chunk)
+                for row in cursor.fetchall():
+                    active[row["paper_id"]] = self._row_to_response(row)
+        return active
+
     def update_status(
         self,
         task_id: str,
@@ -208,6 +236,37 @@ class SQLiteDownloadRepository(DownloadRepository):
             conn.commit()
             return cursor.rowcount > 0
 
+    def update_status_batch(self, updates: List[Dict[str, Any]]) -> int:
+        if not updates:
+            return 0
+
+        now = datetime.utcnow().isoformat()
+        updated = 0
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            for update in updates:
+                update_fields = ['status = ?', 'progress = ?', 'updated_at = ?']
+                update_values = [update["status"], update.get("progress", 0), now]
+
+                if update.get("file_path") is not None:
+                    update_fields.append('file_path = ?')
+                    update_values.append(update["file_path"])
+                if update.get("file_size"):
+                    update_fields.append('file_size = ?')
+                    update_values.append(update["file_size"])
+                if update.get("error_message") is not None:
+                    update_fields.append('error_message = ?')
+                    update_values.append(update["error_message"])
+
+                update_values.append(update["task_id"])
+                cursor.execute(
+                    f'UPDATE downloads SET {", ".join(update_fields)} WHERE id = ?',
+                    update_values
+                )
+                updated += cursor.rowcount
+            conn.commit()
+        return updated
+
     def reset_incomplete_tasks(self) -> int:
         now = datetime.utcnow().isoformat()
         with self._get_connection() as conn:
@@ -0,0 +1,44 @@
+"""
+Shared service instances.
+
+Services that hold repositories and clients are created once per process
+and handed out by the getters below, instead of being constructed on
+every request, tool call or skill run. Routers take them as FastAPI
+dependencies, ``Depends(get_paper_service)``, so tests swap them through
+``app.dependency_overrides``; services, tools and skills call the getters
+directly.
+"""
+import logging
+import threading
+from typing import Optional
+
+from app.services.paper_service import PaperService
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_paper_service: Optional[PaperService] = None
+
+
+def get_paper_service() -> PaperService:
+    """Return the shared PaperService, creating it on first use."""
+    global _paper_service
+    if _paper_service is None:
+        with _lock:
+            if _paper_service is None:
+                _paper_service = PaperService()
+    return _paper_service
+
+
+def init_dependencies():
+    """Create the shared services up front so the first request does not pay for it."""
+    paper_service = get_paper_service()
+    logger.info(
+        f"Initialized shared services: PaperService "
+        f"({type(paper_service.paper_repo).__name__}, {type(paper_service.embedding_repo).__name__})"
+    )
+
+
+def reset_dependencies():
+    global _paper_service
+    _paper_service = None
@@ -1,5 +1,10 @@
 import asyncio
-from typing import Dict, Optional, Callable, Any
+import base64
+import hashlib
+import json
+import os
+import re
+from typing import Dict, List, Optional, Callable, Any
 from dataclasses import dataclass, field
 from datetime import datetime
 import httpx
@@ -9,7 +14,11 @@ import logging
 
 from app.services import download_service
 from app.config import get_settings
-from app.models import DownloadStatus
+from app.models import DownloadStatus, DownloadPriority
+from app.download_scheduler import DownloadScheduler
+from app.download_status_writer import DownloadStatusWriter
+from app.pdf_store import PDFStore
+from app.fulltext_indexer import fulltext_indexer
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +36,42 @@ class DownloadTask:
     created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
     updated_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
     cancel_flag: bool = False
+    checksum: str = ""
+
+
+@dataclass
+class DownloadSegment:
+    """An inclusive byte range of a download and how much of it is on disk."""
+    start: int
+    end: int
+    written: int = 0
+    
+    @property
+    def offset(self) -> int:
+        return self.start + self.written
+    
+    @property
+    def remaining(self) -> int:
+        return max(0, self.end - self.offset + 1)
+    
+    @property
+    def done(self) -> bool:
+        return self.remaining == 0
+
+
+@dataclass
+class _Transfer:
+    part_path: Path
+    state_path: Path
+    filename: str
+    total: int
+    segments: List[DownloadSegment] = field(default_factory=list)
+    content_md5: Optional[str] = None
+    unsized_bytes: int = 0
+    
+    @property
+    def downloaded(self) -> int:
+        return sum(seg.written for seg in self.segments) + self.unsized_bytes
 
 
 class DownloadManager:
@@ -42,21 +87,53 @@ class DownloadManager:
         if self._initialized:
             return
         self._initialized = True
+        settings = get_settings()
         self._tasks: Dict[str, DownloadTask] = {}
-        self._running_tasks: Dict[str, asyncio.Task] = {}
+        self._scheduler = DownloadScheduler(
+            max_concurrent=settings.DOWNLOAD_MAX_CONCURRENT,
+            per_host_limit=settings.DOWNLOAD_PER_HOST_LIMIT,
+            interactive_burst=settings.DOWNLOAD_INTERACTIVE_BURST,
+        )
+        self._status = DownloadStatusWriter(
+            lambda updates: download_service.update_tasks_status_batch(updates),
+            interval=settings.DOWNLOAD_STATUS_FLUSH_INTERVAL,
+        )
+        self._pdf_store: Optional[PDFStore] = None
         self._lock = asyncio.Lock()
         self._progress_callbacks: Dict[str, list] = {}
     
     def get_task(self, task_id: str) -> Optional[DownloadTask]:
         return self._tasks.get(task_id)
     
+    def apply_live_status(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Overlay the in-memory state of a task onto a stored row, which may lag behind."""
+        task = self._tasks.get(item.get("id"))
+        if task is None:
+            return item
+        
+        item["status"] = task.status
+        item["progress"] = task.progress
+        item["error_message"] = task.error_message
+        if task.file_path:
+            item["file_path"] = task.file_path
+        if task.file_size:
+            item["file_size"] = task.file_size
+        return item
+    
+    async def flush_status(self) -> int:
+        return await self._status.flush()
+    
+    async def shutdown(self):
+        """Persist buffered status updates before the application exits."""
+        await self._status.close()
+    
     def get_all_tasks(self) -> list:
         return list(self._tasks.values())
     
     def add_progress_callback(self, task_id: str, callback: Callable):
-        if task_id not in self._progress_callbacks:
-            self._progress_callbacks[task_id] = []
-        self._progress_callbacks[task_id].append(callback)
+        callbacks = self._progress_callbacks.setdefault(task_id, [])
+        if callback not in callbacks:
+            callbacks.append(callback)
     
     def remove_progress_callback(self, task_id: str, callback: Callable):
         if task_id in self._progress_callbacks:
@@ -67,7 +144,11 @@ class DownloadManager:
     
     async def _notify_progress(self, task_id: str, progress: int, status: str):
         if task_id in self._progress_callbacks:
-            for callback in self._progress_callbacks[task_id]:
+            callbacks = list(self._progress_callbacks[task_id])
+            if status in (DownloadStatus.COMPLETED.value, DownloadStatus.FAILED.value):
+                # Final event for this run; retry re-registers its callbacks
+                del self._progress_callbacks[task_id]
+            for callback in callbacks:
                 try:
                     if asyncio.iscoroutinefunction(callback):
                         await callback(task_id, progress, status)
@@ -76,9 +157,15 @@ class DownloadManager:
                 except Exception as e:
                     logger.error(f"Error in progress callback: {e}")
     
-    async def start_download(self, task_id: str, pdf_url: str, paper_id: str) -> bool:
+    async def start_download(
+        self,
+        task_id: str,
+        pdf_url: str,
+        paper_id: str,
+        priority: str = DownloadPriority.INTERACTIVE.value,
+    ) -> bool:
         async with self._lock:
-            if task_id in self._running_tasks:
+            if self._scheduler.is_scheduled(task_id):
                 return False
             
             task = DownloadTask(
@@ -89,10 +176,314 @@ class DownloadManager:
             )
             self._tasks[task_id] = task
             
-            async_task = asyncio.create_task(self._download_worker(task))
-            self._running_tasks[task_id] = async_task
+            stored = self.get_pdf_store().lookup(paper_id)
+            if stored:
+                task.checksum = stored["sha256"]
+                await self._mark_completed(task, stored["path"], stored["size"])
+                logger.info(f"Served {paper_id} from PDF store ({stored['sha256'][:12]})")
+                return True
             
-            return True
+            return self._scheduler.submit(
+                task_id, pdf_url, lambda: self._download_worker(task), priority=priority
+            )
+    
+    @staticmethod
+    def _chunk_size_for(total_size: int) -> int:
+        """Pick a read size of roughly 1% of the file, within the configured bounds."""
+        settings = get_settings()
+        if total_size <= 0:
+            return settings.DOWNLOAD_CHUNK_SIZE_MIN
+        return max(
+            settings.DOWNLOAD_CHUNK_SIZE_MIN,
+            min(settings.DOWNLOAD_CHUNK_SIZE_MAX, total_size // 100),
+        )
+    
+    @staticmethod
+    def _filename_from_response(response: httpx.Response, task: DownloadTask) -> str:
+        content_disp = response.headers.get("content-disposition", "")
+        if "filename=" in content_disp:
+            match = re.search(r'filename="?([^";\n]+)"?', content_disp)
+            if match:
+                return os.path.basename(match.group(1))
+        return f"{task.paper_id}.pdf"
+    
+    @staticmethod
+    def _partial_paths(task_id: str) -> tuple[Path, Path]:
+        download_dir = Path(get_settings().DOWNLOAD_DIR)
+        return download_dir / f"{task_id}.part", download_dir / f"{task_id}.part.json"
+    
+    def _load_transfer(self, task: DownloadTask) -> Optional[_Transfer]:
+        """Load resume state for a task if its partial file is still usable."""
+        part_path, state_path = self._partial_paths(task.task_id)
+        if not part_path.exists() or not state_path.exists():
+            return None
+        
+        try:
+            state = json.loads(state_path.read_text(encoding="utf-8"))
+            if state.get("pdf_url") != task.pdf_url:
+                return None
+            if part_path.stat().st_size != state["total"]:
+                return None
+            return _Transfer(
+                part_path=part_path,
+                state_path=state_path,
+                filename=state["filename"],
+                total=state["total"],
+                segments=[DownloadSegment(*seg) for seg in state["segments"]],
+                content_md5=state.get("content_md5"),
+            )
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unusable resume state for {task.task_id}: {e}")
+            return None
+    
+    @staticmethod
+    def _save_transfer(task: DownloadTask, transfer: _Transfer):
+        if transfer.total <= 0:
+            return
+        state = {
+            "pdf_url": task.pdf_url,
+            "filename": transfer.filename,
+            "total": transfer.total,
+            "content_md5": transfer.content_md5,
+            "segments": [[seg.start, seg.end, seg.written] for seg in transfer.segments],
+        }
+        try:
+            transfer.state_path.write_text(json.dumps(state), encoding="utf-8")
+        except OSError as e:
+            logger.warning(f"Failed to save resume state for {task.task_id}: {e}")
+    
+    def get_pdf_store(self) -> PDFStore:
+        root = str(Path(get_settings().DOWNLOAD_DIR) / "store")
+        if self._pdf_store is None or str(self._pdf_store.root) != root:
+            self._pdf_store = PDFStore(root)
+        return self._pdf_store
+    
+    def release_file(self, task: Dict[str, Any]):
+        """
+        Give up the file of a download task that is being deleted.
+        
+        Files in the PDF store may be shared with other tasks for the same
+        paper, so the manifest entry is only dropped when no other task
+        references it and the blob itself is left to ``PDFStore.gc``.
+        Files outside the store (older downloads) are deleted directly.
+        """
+        file_path = task.get("file_path")
+        if not file_path:
+            return
+        
+        store = self.get_pdf_store()
+        if store.contains_path(file_path):
+            others = [
+                other for other in download_service.get_all_tasks_by_paper_id(task["paper_id"])
+                if other["id"] != task["id"] and other.get("file_path") == file_path
+            ]
+            if not others:
+                store.remove(task["paper_id"])
+        elif os.path.exists(file_path):
+            try:
+                os.remove(file_path)
+            except OSError as e:
+                logger.warning(f"Failed to delete file {file_path}: {e}")
+    
+    def discard_partial(self, task_id: str):
+        """Remove partial download data so the next attempt starts from byte zero."""
+        for path in self._partial_paths(task_id):
+            try:
+                path.unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning(f"Failed to delete partial file {path}: {e}")
+    
+    async def _report_progress(self, task: DownloadTask, transfer: _Transfer):
+        if transfer.total <= 0:
+            return
+        
+        progress = min(100, int((transfer.downloaded / transfer.total) * 100))
+        if progress == task.progress:
+            return
+        
+        task.progress = progress
+        task.updated_at = datetime.utcnow().isoformat()
+        
+        await self._status.update(task.task_id, status=task.status, progress=progress)
+        if progress % 5 == 0 or progress == 100:
+            self._save_transfer(task, transfer)
+        
+        await self._notify_progress(task.task_id, progress, task.status)
+    
+    async def _write_segment(
+        self,
+        response: httpx.Response,
+        task: DownloadTask,
+        transfer: _Transfer,
+        segment: DownloadSegment,
+    ):
+        chunk_size = self._chunk_size_for(transfer.total)
+        async with aiofiles.open(transfer.part_path, "r+b") as f:
+            await f.seek(segment.offset)
+            async for chunk in response.aiter_bytes(chunk_size=chunk_size):
+                if task.cancel_flag:
+                    raise Exception("Download cancelled")
+                
+                chunk = chunk[:segment.remaining]
+                await f.write(chunk)
+                segment.written += len(chunk)
+                await self._report_progress(task, transfer)
+                
+                if segment.done:
+                    break
+    
+    async def _fetch_segment(
+        self,
+        client: httpx.AsyncClient,
+        task: DownloadTask,
+        transfer: _Transfer,
+        segment: DownloadSegment,
+    ):
+        """Fetch one byte range, resuming from its offset after network errors."""
+        settings = get_settings()
+        attempt = 0
+        
+        while not segment.done:
+            if task.cancel_flag:
+                raise Exception("Download cancelled")
+            
+            written_before = segment.written
+            try:
+                headers = {"Range": f"bytes={segment.offset}-{segment.end}"}
+                async with client.stream("GET", task.pdf_url, headers=headers) as response:
+                    whole_file = segment.offset == 0 and segment.end == transfer.total - 1
+                    if response.status_code == 200 and whole_file:
+                        pass
+                    elif response.status_code != 206:
+                        raise Exception(f"HTTP {response.status_code} for range request")
+                    await self._write_segment(response, task, transfer, segment)
+            except httpx.TransportError as e:
+                attempt = 0 if segment.written > written_before else attempt + 1
+                if attempt > settings.DOWNLOAD_MAX_RETRIES:
+                    raise
+                delay = settings.DOWNLOAD_RETRY_BASE_DELAY * (2 ** max(attempt - 1, 0))
+                logger.warning(
+                    f"Connection error for {task.paper_id} at byte {segment.offset}: {e}, "
+                    f"resuming in {delay}s"
+                )
+                await asyncio.sleep(delay)
+    
+    async def _fetch_segments(self, client: httpx.AsyncClient, task: DownloadTask, transfer: _Transfer):
+        pending = [seg for seg in transfer.segments if not seg.done]
+        workers = [
+            asyncio.create_task(self._fetch_segment(client, task, transfer, seg))
+            for seg in pending
+        ]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+        finally:
+            self._save_transfer(task, transfer)
+    
+    async def _start_transfer(self, client: httpx.AsyncClient, task: DownloadTask) -> _Transfer:
+        """Issue the first request and either stream it or switch to segmented fetch."""
+        settings = get_settings()
+        part_path, state_path = self._partial_paths(task.task_id)
+        
+        async with client.stream("GET", task.pdf_url) as response:
+            if response.status_code != 200:
+                raise Exception(f"HTTP {response.status_code}")
+            
+            encoded = response.headers.get("content-encoding", "identity").lower() != "identity"
+            total = 0 if encoded else int(response.headers.get("content-length", 0))
+            accepts_ranges = response.headers.get("accept-ranges", "").lower() == "bytes"
+            
+            transfer = _Transfer(
+                part_path=part_path,
+                state_path=state_path,
+                filename=self._filename_from_response(response, task),
+                total=total,
+                content_md5=response.headers.get("content-md5"),
+            )
+            
+            if total <= 0:
+                async with aiofiles.open(part_path, "wb") as f:
+                    async for chunk in response.aiter_bytes(chunk_size=settings.DOWNLOAD_CHUNK_SIZE_MIN):
+                        if task.cancel_flag:
+                            raise Exception("Download cancelled")
+                        await f.write(chunk)
+                        transfer.unsized_bytes += len(chunk)
+                return transfer
+            
+            with open(part_path, "wb") as f:
+                f.truncate(total)
+            
+            segments = settings.DOWNLOAD_SEGMENTS
+            if not (accepts_ranges and segments > 1 and total >= settings.DOWNLOAD_SEGMENT_MIN_SIZE):
+                transfer.segments = [DownloadSegment(0, total - 1)]
+                if accepts_ranges:
+                    self._save_transfer(task, transfer)
+                try:
+                    await self._write_segment(response, task, transfer, transfer.segments[0])
+                except httpx.TransportError:
+                    if not accepts_ranges:
+                        raise
+                    logger.warning(f"Connection dropped for {task.paper_id}, resuming with range requests")
+                if transfer.segments[0].done:
+                    return transfer
+        
+        if not transfer.segments:
+            segment_size = -(-total // segments)
+            transfer.segments = [
+                DownloadSegment(start, min(start + segment_size, total) - 1)
+                for start in range(0, total, segment_size)
+            ]
+            logger.info(f"Downloading {task.paper_id} in {len(transfer.segments)} segments ({total} bytes)")
+        
+        self._save_transfer(task, transfer)
+        await self._fetch_segments(client, task, transfer)
+        return transfer
+    
+    @staticmethod
+    def _hash_file(path: Path) -> tuple[str, str]:
+        sha256 = hashlib.sha256()
+        md5 = hashlib.md5()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                sha256.update(block)
+                md5.update(block)
+        return sha256.hexdigest(), base64.b64encode(md5.digest()).decode("ascii")
+    
+    async def _validate_transfer(self, transfer: _Transfer) -> str:
+        """Check size and checksum of a finished transfer; returns the SHA-256 digest."""
+        size = transfer.part_path.stat().st_size
+        if transfer.total > 0:
+            if transfer.downloaded != transfer.total or size != transfer.total:
+                raise Exception(
+                    f"Incomplete download: expected {transfer.total} bytes, got {transfer.downloaded}"
+                )
+        
+        sha256, md5_b64 = await asyncio.to_thread(self._hash_file, transfer.part_path)
+        if transfer.content_md5 and transfer.content_md5 != md5_b64:
+            raise Exception("Checksum mismatch: Content-MD5 does not match downloaded data")
+        return sha256
+    
+    async def _mark_completed(self, task: DownloadTask, file_path: str, file_size: int):
+        task.status = DownloadStatus.COMPLETED.value
+        task.progress = 100
+        task.file_path = file_path
+        task.file_size = file_size
+        task.updated_at = datetime.utcnow().isoformat()
+        await self._status.update(
+            task.task_id, 
+            status=task.status, 
+            progress=100,
+            file_path=task.file_path,
+            file_size=task.file_size
+        )
+        await self._notify_progress(task.task_id, 100, task.status)
+        
+        if get_settings().FULLTEXT_INDEX_ENABLED:
+            fulltext_indexer.submit(task.paper_id, task.file_path, task.checksum)
     
     async def _download_worker(self, task: DownloadTask):
         settings = get_settings()
@@ -102,81 +493,57 @@ class DownloadManager:
         try:
             task.status = DownloadStatus.DOWNLOADING.value
             task.updated_at = datetime.utcnow().isoformat()
-            download_service.update_task_status(task.task_id, status=task.status, progress=0)
+            await self._status.update(task.task_id, status=task.status, progress=0)
             await self._notify_progress(task.task_id, 0, task.status)
             
-            async with httpx.AsyncClient(timeout=300.0, follow_redirects=True) as client:
-                async with client.stream("GET", task.pdf_url) as response:
-                    if response.status_code != 200:
-                        raise Exception(f"HTTP {response.status_code}")
-                    
-                    content_disp = response.headers.get("content-disposition", "")
-                    if "filename=" in content_disp:
-                        import re
-                        match = re.search(r'filename="?([^";\n]+)"?', content_disp)
-                        if match:
-                            filename = match.group(1)
-                        else:
-                            filename = f"{task.paper_id}.pdf"
-                    else:
-                        filename = f"{task.paper_id}.pdf"
-                    
-                    file_path = download_dir / filename
-                    total_size = int(response.headers.get("content-length", 0))
-                    downloaded = 0
-                    last_progress = 0
-                    
-                    async with aiofiles.open(file_path, "wb") as f:
-                        async for chunk in response.aiter_bytes(chunk_size=8192):
-                            if task.cancel_flag:
-                                raise Exception("Download cancelled")
-                            
-                            await f.write(chunk)
-                            downloaded += len(chunk)
-                            
-                            if total_size > 0:
-                                progress = int((downloaded / total_size) * 100)
-                                if progress != last_progress:
-                                    last_progress = progress
-                                    task.progress = progress
-                                    task.updated_at = datetime.utcnow().isoformat()
-                                    
-                                    if progress % 5 == 0 or progress == 100:
-                                        download_service.update_task_status(task.task_id, status=task.status, progress=progress)
-                                    
-                                    await self._notify_progress(task.task_id, progress, task.status)
-            
-            task.status = DownloadStatus.COMPLETED.value
-            task.progress = 100
-            task.file_path = str(file_path)
-            task.file_size = downloaded
-            task.updated_at = datetime.utcnow().isoformat()
-            download_service.update_task_status(
-                task.task_id, 
-                status=task.status, 
-                progress=100,
-                file_path=task.file_path,
-                file_size=task.file_size
+            async with httpx.AsyncClient(timeout=settings.DOWNLOAD_TIMEOUT, follow_redirects=True) as client:
+                transfer = self._load_transfer(task)
+                if transfer:
+                    logger.info(
+                        f"Resuming download {task.paper_id} at {transfer.downloaded}/{transfer.total} bytes"
+                    )
+                    await self._fetch_segments(client, task, transfer)
+                else:
+                    transfer = await self._start_transfer(client, task)
+            
+            task.checksum = await self._validate_transfer(transfer)
+            
+            file_path = await asyncio.to_thread(
+                self.get_pdf_store().add,
+                task.paper_id,
+                transfer.part_path,
+                task.checksum,
+                transfer.downloaded,
+                transfer.filename,
             )
-            await self._notify_progress(task.task_id, 100, task.status)
-            logger.info(f"Download completed: {task.paper_id} ({task.file_size} bytes)")
+            transfer.state_path.unlink(missing_ok=True)
+            
+            await self._mark_completed(task, str(file_path), transfer.downloaded)
+            logger.info(f"Download completed: {task.paper_id} ({task.file_size} bytes, sha256={task.checksum})")
             
         except Exception as e:
             task.status = DownloadStatus.FAILED.value
             task.error_message = str(e)
             task.updated_at = datetime.utcnow().isoformat()
-            download_service.update_task_status(
+            await self._status.update(
                 task.task_id, 
                 status=task.status, 
                 error_message=task.error_message
             )
             await self._notify_progress(task.task_id, task.progress, task.status)
             logger.error(f"Download failed: {task.paper_id} - {e}")
-        
-        finally:
-            async with self._lock:
-                if task.task_id in self._running_tasks:
-                    del self._running_tasks[task.task_id]
+    
+    async def start_downloads(
+        self,
+        tasks: List[Dict[str, Any]],
+        priority: str = DownloadPriority.BULK.value,
+    ) -> int:
+        """Queue several persisted download tasks; returns how many were newly queued."""
+        queued = 0
+        for task in tasks:
+            if await self.start_download(task["id"], task["pdf_url"], task["paper_id"], priority=priority):
+                queued += 1
+        return queued
     
     async def cancel_download(self, task_id: str) -> bool:
         async with self._lock:
@@ -185,11 +552,12 @@ class DownloadManager:
             
             task = self._tasks[task_id]
             task.cancel_flag = True
+            self._scheduler.cancel(task_id)
             task.status = DownloadStatus.FAILED.value
             task.error_message = "Download cancelled by user"
             task.updated_at = datetime.utcnow().isoformat()
             
-            download_service.update_task_status(
+            await self._status.update(
                 task_id, 
                 status=task.status, 
                 error_message=task.error_message
@@ -216,7 +584,7 @@ class DownloadManager:
         task.cancel_flag = False
         task.updated_at = datetime.utcnow().isoformat()
         
-        download_service.update_task_status(
+        await self._status.update(
             task_id, 
             status=task.status, 
             progress=0,
@@ -226,10 +594,20 @@ class DownloadManager:
         return await self.start_download(task_id, task.pdf_url, task.paper_id)
     
     def is_task_running(self, task_id: str) -> bool:
-        return task_id in self._running_tasks
+        return self._scheduler.is_scheduled(task_id)
     
     def get_running_count(self) -> int:
-        return len(self._running_tasks)
+        return self._scheduler.active_count()
+    
+    def get_running_task_ids(self) -> List[str]:
+        return self._scheduler.active_keys()
+    
+    def get_queue_metrics(self) -> Dict[str, Any]:
+        return {
+            **self._scheduler.get_metrics(),
+            "status_writes": self._status.get_stats(),
+            "fulltext": fulltext_indexer.get_stats(),
+        }
     
     async def load_pending_tasks(self):
         tasks, _ = download_service.get_all_tasks(limit=1000)
@@ -242,7 +620,12 @@ class DownloadManager:
                     status=DownloadStatus.PENDING.value,
                 )
                 self._tasks[task_data["id"]] = task
-                await self.start_download(task_data["id"], task_data["pdf_url"], task_data["paper_id"])
+                await self.start_download(
+                    task_data["id"],
+                    task_data["pdf_url"],
+                    task_data["paper_id"],
+                    priority=DownloadPriority.BULK.value,
+                )
 
 
 download_manager = DownloadManager()
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+from urllib.parse import urlparse
+
+from app.models import DownloadPriority
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _QueuedDownload:
+    key: str
+    host: str
+    priority: str
+    factory: Callable[[], Awaitable[Any]]
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class DownloadScheduler:
+    """
+    Admission control for download workers.
+
+    Downloads wait in one queue per priority class and start only while the
+    global and per-host limits allow. Within a class the queue round-robins
+    across hosts, so one busy mirror cannot hold up the rest. Interactive
+    downloads go first, but after ``interactive_burst`` interactive starts in
+    a row a waiting bulk download is let through so bulk jobs still progress.
+    """
+
+    PRIORITY_ORDER = [DownloadPriority.INTERACTIVE.value, DownloadPriority.BULK.value]
+
+    def __init__(self, max_concurrent: int = 4, per_host_limit: int = 2, interactive_burst: int = 4):
+        self.max_concurrent = max(1, max_concurrent)
+        self.per_host_limit = max(1, per_host_limit)
+        self.interactive_burst = max(1, interactive_burst)
+        self._queues: Dict[str, "OrderedDict[str, Deque[_QueuedDownload]]"] = {
+            priority: OrderedDict() for priority in self.PRIORITY_ORDER
+        }
+        self._queued: Dict[str, _QueuedDownload] = {}
+        self._active: Dict[str, asyncio.Task] = {}
+        self._active_hosts: Dict[str, int] = {}
+        self._interactive_streak = 0
+        self._submitted = 0
+        self._started = 0
+        self._finished = 0
+        self._total_wait = 0.0
+
+    @staticmethod
+    def _host_of(url: str) -> str:
+        return (urlparse(url).hostname or "").lower()
+
+    def submit(
+        self,
+        key: str,
+        url: str,
+        factory: Callable[[], Awaitable[Any]],
+        priority: str = DownloadPriority.INTERACTIVE.value,
+    ) -> bool:
+        """Queue a download; returns False if the key is already queued or running."""
+        if self.is_scheduled(key):
+            return False
+        if priority not in self._queues:
+            raise ValueError(f"Unknown download priority: {priority}")
+
+        entry = _QueuedDownload(key=key, host=self._host_of(url), priority=priority, factory=factory)
+        self._queues[priority].setdefault(entry.host, deque()).append(entry)
+        self._queued[key] = entry
+        self._submitted += 1
+        self._dispatch()
+        return True
+
+    def cancel(self, key: str) -> bool:
+        """Drop a download that has not started yet."""
+        entry = self._queued.pop(key, None)
+        if entry is None:
+            return False
+
+        host_queues = self._queues[entry.priority]
+        host_queue = host_queues.get(entry.host)
+        if host_queue is not None:
+            try:
+                host_queue.remove(entry)
+            except ValueError:
+                pass
+            if not host_queue:
+                del host_queues[entry.host]
+        return True
+
+    def _host_has_capacity(self, host: str) -> bool:
+        return self._active_hosts.get(host, 0) < self.per_host_limit
+
+    def _pop_from(self, priority: str) -> Optional[_QueuedDownload]:
+        host_queues = self._queues[priority]
+        for host in list(host_queues.keys()):
+            if not self._host_has_capacity(host):
+                continue
+            host_queue = host_queues.pop(host)
+            entry = host_queue.popleft()
+            if host_queue:
+                # Re-append so the next pick from this class starts with another host
+                host_queues[host] = host_queue
+            return entry
+        return None
+
+    def _next_entry(self) -> Optional[_QueuedDownload]:
+        order = self.PRIORITY_ORDER
+        if self._interactive_streak >= self.interactive_burst:
+            order = list(reversed(order))
+
+        for priority in order:
+            entry = self._pop_from(priority)
+            if entry is not None:
+                return entry
+        return None
+
+    def _dispatch(self):
+        while len(self._active) < self.max_concurrent:
+            entry = self._next_entry()
+            if entry is None:
+                break
+
+            del self._queued[entry.key]
+            if entry.priority == DownloadPriority.INTERACTIVE.value:
+                self._interactive_streak += 1
+            else:
+                self._interactive_streak = 0
+
+            self._active_hosts[entry.host] = self._active_hosts.get(entry.host, 0) + 1
+            self._started += 1
+            self._total_wait += time.monotonic() - entry.enqueued_at
+            self._active[entry.key] = asyncio.create_task(self._run(entry))
+
+    async def _run(self, entry: _QueuedDownload):
+        try:
+            await entry.factory()
+        except Exception as e:
+            logger.error(f"Download worker for {entry.key} raised: {e}")
+        finally:
+            self._active.pop(entry.key, None)
+            remaining = self._active_hosts.get(entry.host, 1) - 1
+            if remaining > 0:
+                self._active_hosts[entry.host] = remaining
+            else:
+                self._active_hosts.pop(entry.host, None)
+            self._finished += 1
+            self._dispatch()
+
+    def is_queued(self, key: str) -> bool:
+        return key in self._queued
+
+    def is_active(self, key: str) -> bool:
+        return key in self._active
+
+    def is_scheduled(self, key: str) -> bool:
+        return key in self._queued or key in self._active
+
+    def active_keys(self) -> List[str]:
+        return list(self._active.keys())
+
+    def active_count(self) -> int:
+        return len(self._active)
+
+    def queued_count(self) -> int:
+        return len(self._queued)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        queues = {}
+        for priority, host_queues in self._queues.items():
+            entries = [entry for host_queue in host_queues.values() for entry in host_queue]
+            oldest = min((entry.enqueued_at for entry in entries), default=None)
+            queues[priority] = {
+                "depth": len(entries),
+                "oldest_wait_seconds": round(now - oldest, 3) if oldest is not None else 0.0,
+            }
+
+        return {
+            "max_concurrent": self.max_concurrent,
+            "per_host_limit": self.per_host_limit,
+            "active": len(self._active),
+            "queued": len(self._queued),
+            "active_by_host": dict(self._active_hosts),
+            "queues": queues,
+            "submitted_total": self._submitted,
+            "started_total": self._started,
+            "finished_total": self._finished,
+            "avg_wait_seconds": round(self._total_wait / self._started, 3) if self._started else 0.0,
+        }
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from app.models import DownloadStatus
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {DownloadStatus.COMPLETED.value, DownloadStatus.FAILED.value}
+
+
+class DownloadStatusWriter:
+    """
+    Write-behind buffer for download status rows.
+
+    Updates are merged per task in memory. A background flusher writes
+    everything that changed since the previous flush in one batch every
+    ``interval`` seconds, in a worker thread. Completed and failed states are
+    flushed right away, so the stored outcome of a download never lags
+    behind. The flusher exits when there is nothing left to write.
+    """
+
+    def __init__(self, write_batch: Callable[[List[Dict[str, Any]]], Any], interval: float = 1.0):
+        self._write_batch = write_batch
+        self.interval = interval
+        self._dirty: Dict[str, Dict[str, Any]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self._updates = 0
+        self._rows_written = 0
+        self._batches = 0
+        self._errors = 0
+
+    async def update(
+        self,
+        task_id: str,
+        status: str,
+        progress: int = 0,
+        file_path: Optional[str] = None,
+        file_size: int = 0,
+        error_message: Optional[str] = None,
+    ):
+        """Record a status change; same arguments as DownloadService.update_task_status."""
+        entry = self._dirty.setdefault(task_id, {"task_id": task_id})
+        entry["status"] = status
+        entry["progress"] = progress
+        if file_path is not None:
+            entry["file_path"] = file_path
+        if file_size:
+            entry["file_size"] = file_size
+        if error_message is not None:
+            entry["error_message"] = error_message
+        self._updates += 1
+
+        if status in TERMINAL_STATUSES:
+            await self.flush()
+        elif self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while self._dirty:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write all pending updates in one batch; returns the number of rows written."""
+        async with self._flush_lock:
+            if not self._dirty:
+                return 0
+
+            batch = list(self._dirty.values())
+            self._dirty = {}
+            try:
+                await asyncio.to_thread(self._write_batch, batch)
+            except Exception as e:
+                self._errors += 1
+                logger.error(f"Failed to persist {len(batch)} download status updates: {e}")
+                for entry in batch:
+                    # Keep anything newer that arrived while the write was running
+                    newer = self._dirty.get(entry["task_id"], {})
+                    self._dirty[entry["task_id"]] = {**entry, **newer}
+                return 0
+
+            self._rows_written += len(batch)
+            self._batches += 1
+            return len(batch)
+
+    async def close(self):
+        """Stop the flusher and write whatever is still pending."""
+        if self._flusher and not self._flusher.done():
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+        self._flusher = None
+        await self.flush()
+
+    def pending_count(self) -> int:
+        return len(self._dirty)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._dirty),
+            "updates": self._updates,
+            "rows_written": self._rows_written,
+            "batches": self._batches,
+            "errors": self._errors,
+        }
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config import get_settings
+from app.db.base import PaperChunkRepository
+from app.db.factory import get_paper_chunk_repository
+from app.pdf_text import extract_pdf_chunks
+from app.services.embedding_service import embedding_service
+
+logger = logging.getLogger(__name__)
+
+
+class FulltextIndexer:
+    """
+    Turns downloaded PDFs into passage embeddings.
+
+    Text extraction is CPU-bound pure Python, so it runs in a process pool
+    and never holds the event loop or the GIL of the API process. The
+    extracted text is split into overlapping word windows, embedded in
+    batches and stored in the chunk repository under the paper ID. Papers
+    whose stored chunks already come from the same PDF (by SHA-256) are
+    skipped, so serving a PDF from the store does not re-index it.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        chunk_words: int = 200,
+        chunk_overlap: int = 40,
+        max_chunks: int = 500,
+        embed_batch_size: int = 32,
+        repo_factory: Callable[[], PaperChunkRepository] = get_paper_chunk_repository,
+    ):
+        self.workers = max(1, workers)
+        self.chunk_words = chunk_words
+        self.chunk_overlap = chunk_overlap
+        self.max_chunks = max_chunks
+        self.embed_batch_size = max(1, embed_batch_size)
+        self._repo_factory = repo_factory
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._indexed = 0
+        self._skipped = 0
+        self._failed = 0
+        self._chunks_written = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        return self._semaphore
+
+    def submit(self, paper_id: str, pdf_path: str, checksum: str = "") -> bool:
+        """Index a paper in the background; returns False if it is already being indexed."""
+        if paper_id in self._pending:
+            return False
+
+        task = asyncio.create_task(self._run(paper_id, pdf_path, checksum))
+        self._pending[paper_id] = task
+        return True
+
+    async def _run(self, paper_id: str, pdf_path: str, checksum: str):
+        try:
+            await self.index_paper(paper_id, pdf_path, checksum)
+        except Exception as e:
+            logger.error(f"Full-text indexing failed for {paper_id}: {e}")
+        finally:
+            self._pending.pop(paper_id, None)
+
+    async def _extract(self, pdf_path: str) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                self._get_pool(), extract_pdf_chunks, pdf_path, self.chunk_words, self.chunk_overlap
+            )
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory on a pathological PDF); start a fresh pool
+            self._pool = None
+            raise
+
+    async def index_paper(
+        self,
+        paper_id: str,
+        pdf_path: str,
+        checksum: str = "",
+        force: bool = False,
+    ) -> Dict[str, Any]:
+        """Extract, chunk, embed and store the full text of one PDF."""
+        repo = self._repo_factory()
+        async with self._get_semaphore():
+            if checksum and not force:
+                existing = await asyncio.to_thread(repo.get_source_checksum, paper_id)
+                if existing == checksum:
+                    self._skipped += 1
+                    return {"paper_id": paper_id, "status": "unchanged", "chunks": 0}
+
+            try:
+                extracted = await self._extract(pdf_path)
+                chunks = extracted["chunks"]
+                if len(chunks) > self.max_chunks:
+                    logger.info(f"Truncating {paper_id} from {len(chunks)} to {self.max_chunks} chunks")
+                    chunks = chunks[:self.max_chunks]
+
+                model_name = ""
+                for i in range(0, len(chunks), self.embed_batch_size):
+                    batch = chunks[i:i + self.embed_batch_size]
+                    embeddings, model_name = await asyncio.to_thread(
+                        embedding_service.encode_batch, [c["text"] for c in batch]
+                    )
+                    for chunk, embedding in zip(batch, embeddings):
+                        chunk["embedding"] = embedding
+
+                written = await asyncio.to_thread(repo.replace_chunks, paper_id, chunks, model_name, checksum)
+            except Exception:
+                self._failed += 1
+                raise
+
+            self._indexed += 1
+            self._chunks_written += written
+            logger.info(f"Indexed full text of {paper_id}: {extracted['pages']} pages, {written} chunks")
+            return {"paper_id": paper_id, "status": "indexed", "pages": extracted["pages"], "chunks": written}
+
+    async def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        paper_ids: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Return the passages most similar to a query, optionally within some papers."""
+        query_embedding, _ = await asyncio.to_thread(embedding_service.encode, query)
+        repo = self._repo_factory()
+        return await asyncio.to_thread(repo.search_chunks, query_embedding, top_k, paper_ids)
+
+    def is_pending(self, paper_id: str) -> bool:
+        return paper_id in self._pending
+
+    async def shutdown(self):
+        """Cancel queued indexing jobs and stop the worker processes."""
+        for task in list(self._pending.values()):
+            task.cancel()
+        if self._pending:
+            await asyncio.gather(*self._pending.values(), return_exceptions=True)
+        self._pending.clear()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "pending": len(self._pending),
+            "indexed": self._indexed,
+            "skipped": self._skipped,
+            "failed": self._failed,
+            "chunks_written": self._chunks_written,
+        }
+
+
+_settings = get_settings()
+fulltext_indexer = FulltextIndexer(
+    workers=_settings.FULLTEXT_WORKERS,
+    chunk_words=_settings.FULLTEXT_CHUNK_WORDS,
+    chunk_overlap=_settings.FULLTEXT_CHUNK_OVERLAP,
+    max_chunks=_settings.FULLTEXT_MAX_CHUNKS,
+    embed_batch_size=_settings.EMBEDDING_BATCH_SIZE,
+)
@@ -0,0 +1,177 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """
+    Persistent cache of LLM responses for deterministic skills.
+
+    Entries are keyed on a SHA-256 of the rendered prompt, the model and the
+    temperature, so a changed template, paper or parameter is a new key
+    and never needs explicit invalidation. Entries older than
+    ``ttl_seconds`` are treated as missing. Once more than ``max_entries``
+    are stored, the least recently used ones are evicted. Hit and miss
+    counters are kept in memory, overall and per skill.
+    """
+
+    def __init__(self, db_path: str, ttl_seconds: int = 7 * 24 * 3600, max_entries: int = 5000):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+        self._expired = 0
+        self._evictions = 0
+        self._by_skill: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0})
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._init_tables()
+
+    @contextmanager
+    def _get_connection(self):
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_tables(self):
+        with self._get_connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS llm_response_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    skill_id TEXT,
+                    model TEXT,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed_at ON llm_response_cache(accessed_at)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_created_at ON llm_response_cache(created_at)')
+            conn.commit()
+
+    @staticmethod
+    def make_key(prompt: str, model: str, temperature: Optional[float]) -> str:
+        payload = json.dumps([prompt, model, temperature], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _record(self, skill_id: str, hit: bool):
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+            if skill_id:
+                self._by_skill[skill_id]["hits" if hit else "misses"] += 1
+
+    def get(self, key: str, skill_id: str = "") -> Optional[str]:
+        """Return the cached response for key, or None if it is missing or expired."""
+        now = time.time()
+        with self._get_connection() as conn:
+            row = conn.execute(
+                'SELECT response, created_at FROM llm_response_cache WHERE cache_key = ?', (key,)
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl_seconds:
+                conn.execute('DELETE FROM llm_response_cache WHERE cache_key = ?', (key,))
+                conn.commit()
+                with self._lock:
+                    self._expired += 1
+                row = None
+            elif row is not None:
+                conn.execute('UPDATE llm_response_cache SET accessed_at = ? WHERE cache_key = ?', (now, key))
+                conn.commit()
+
+        self._record(skill_id, row is not None)
+        return row[0] if row is not None else None
+
+    def put(self, key: str, response: str, skill_id: str = "", model: str = ""):
+        """Store a response and evict expired and least recently used entries."""
+        now = time.time()
+        with self._get_connection() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO llm_response_cache (
+                    cache_key, skill_id, model, response, created_at, accessed_at
+                ) VALUES (?, ?, ?, ?, ?, ?)
+            ''', (key, skill_id, model, response, now, now))
+            expired = conn.execute(
+                'DELETE FROM llm_response_cache WHERE created_at < ?', (now - self.ttl_seconds,)
+            ).rowcount
+            count = conn.execute('SELECT COUNT(*) FROM llm_response_cache').fetchone()[0]
+            evicted = 0
+            if count > self.max_entries:
+                evicted = conn.execute('''
+                    DELETE FROM llm_response_cache WHERE cache_key IN (
+                        SELECT cache_key FROM llm_response_cache ORDER BY accessed_at ASC LIMIT ?
+                    )
+                ''', (count - self.max_entries,)).rowcount
+            conn.commit()
+
+        with self._lock:
+            self._writes += 1
+            self._expired += expired
+            self._evictions += evicted
+
+    def clear(self, skill_id: Optional[str] = None) -> int:
+        """Delete all entries, or only those of one skill; returns the number deleted."""
+        with self._get_connection() as conn:
+            if skill_id:
+                cursor = conn.execute('DELETE FROM llm_response_cache WHERE skill_id = ?', (skill_id,))
+            else:
+                cursor = conn.execute('DELETE FROM llm_response_cache')
+            conn.commit()
+            return cursor.rowcount
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._get_connection() as conn:
+            entries = conn.execute('SELECT COUNT(*) FROM llm_response_cache').fetchone()[0]
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "writes": self._writes,
+                "expired": self._expired,
+                "evictions": self._evictions,
+                "by_skill": {skill: dict(counts) for skill, counts in self._by_skill.items()},
+            }
+
+
+_llm_response_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_response_cache() -> Optional[LLMResponseCache]:
+    """Return the shared skill response cache, or None when caching is disabled."""
+    global _llm_response_cache
+    settings = get_settings()
+    if not settings.SKILL_CACHE_ENABLED:
+        return None
+    if _llm_response_cache is None:
+        _llm_response_cache = LLMResponseCache(
+            settings.SKILL_CACHE_PATH,
+            ttl_seconds=settings.SKILL_CACHE_TTL_SECONDS,
+            max_entries=settings.SKILL_CACHE_MAX_ENTRIES,
+        )
+    return _llm_response_cache
+
+
+def reset_llm_response_cache():
+    global _llm_response_cache
+    _llm_response_cache = None
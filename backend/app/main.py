@@ -50,6 +50,9 @@ async def lifespan(app: FastAPI):
     if reset_count > 0:
         logging.info(f"Reset {reset_count} incomplete download tasks to failed status")
     
+    from app.dependencies import init_dependencies
+    init_dependencies()
+    
     logging.info("Initializing SubAgents...")
     from app.services.subagents import (
         register_default_agents,
@@ -62,8 +65,37 @@ async def lifespan(app: FastAPI):
     load_dynamic_agents()
     start_agent_watcher()
     
+    import asyncio
+    from app.services.subagents import subagent_manager
+    router_warmup = asyncio.create_task(subagent_manager.warm_router())
+    llm_warmup = None
+    if settings.OLLAMA_PRELOAD_ON_START:
+        from app.services.llm_service import llm_service
+        llm_warmup = asyncio.create_task(llm_service.warm_up())
+    if settings.SUBAGENTS_RESUME_ON_START:
+        resumed = subagent_manager.resume_interrupted_tasks()
+        logging.info(f"Resumed {resumed} interrupted SubAgent tasks")
+    
+    from app.services.prefetch_scheduler import start_prefetch_scheduler, stop_prefetch_scheduler
+    if await start_prefetch_scheduler():
+        logging.info("arXiv prefetch scheduler started")
+    
     logging.info("Application startup complete")
     yield
+    
+    await stop_prefetch_scheduler()
+    router_warmup.cancel()
+    if llm_warmup is not None:
+        llm_warmup.cancel()
+    
+    from app.download_manager import download_manager
+    await download_manager.shutdown()
+    
+    from app.fulltext_indexer import fulltext_indexer
+    await fulltext_indexer.shutdown()
+    
+    from app.services.subagents import subagent_manager
+    await subagent_manager.shutdown()
 
 
 app = FastAPI(
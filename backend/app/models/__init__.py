@@ -1,7 +1,16 @@
 from .common import MessageResponse
 from .paper import PaperBase, Paper
 from .bookmark import BookmarkCreate, BookmarkResponse, BookmarkListResponse
-from .download import DownloadStatus, DownloadTaskCreate, DownloadTaskResponse, DownloadTaskListResponse
+from .download import (
+    DownloadStatus,
+    DownloadPriority,
+    DownloadTaskCreate,
+    DownloadTaskResponse,
+    DownloadTaskListResponse,
+    DownloadBatchSearch,
+    DownloadBatchCreate,
+    DownloadBatchResponse,
+)
 from .search import (
     SearchResult,
     SemanticSearchRequest,
@@ -14,6 +23,8 @@ from .embedding import (
     GenerateEmbeddingsResponse,
     EmbeddingIndexResponse,
     EmbeddingIndexesResponse,
+    PaperChunk,
+    PaperChunksResponse,
 )
 from .llm import (
     AskRequest,
@@ -37,6 +48,15 @@ from .subagent import (
     SubAgentListResponse,
     SubAgentExecuteRequest,
     SubAgentExecuteResponse,
+    SubAgentPlanNodeRequest,
+    SubAgentPlanRequest,
+    SubAgentPlanNodeResponse,
+    SubAgentPlanResponse,
+    SubAgentRouteRequest,
+    SubAgentRouteScore,
+    SubAgentRouteResponse,
+    SubAgentTaskInfo,
+    SubAgentTaskListResponse,
     SubAgentCreateRequest,
     SubAgentSaveRequest,
     SubAgentReloadResponse,
@@ -44,6 +64,7 @@ from .subagent import (
 
 __all__ = [
     "DownloadStatus",
+    "DownloadPriority",
     "MessageResponse",
     "PaperBase",
     "Paper",
@@ -53,6 +74,9 @@ __all__ = [
     "DownloadTaskCreate",
     "DownloadTaskResponse",
     "DownloadTaskListResponse",
+    "DownloadBatchSearch",
+    "DownloadBatchCreate",
+    "DownloadBatchResponse",
     "SearchResult",
     "SemanticSearchRequest",
     "SemanticSearchResult",
@@ -62,6 +86,8 @@ __all__ = [
     "GenerateEmbeddingsResponse",
     "EmbeddingIndexResponse",
     "EmbeddingIndexesResponse",
+    "PaperChunk",
+    "PaperChunksResponse",
     "AskRequest",
     "PaperReference",
     "AskResponse",
@@ -79,6 +105,15 @@ __all__ = [
     "SubAgentListResponse",
     "SubAgentExecuteRequest",
     "SubAgentExecuteResponse",
+    "SubAgentPlanNodeRequest",
+    "SubAgentPlanRequest",
+    "SubAgentPlanNodeResponse",
+    "SubAgentPlanResponse",
+    "SubAgentRouteRequest",
+    "SubAgentRouteScore",
+    "SubAgentRouteResponse",
+    "SubAgentTaskInfo",
+    "SubAgentTaskListResponse",
     "SubAgentCreateRequest",
     "SubAgentSaveRequest",
     "SubAgentReloadResponse",
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
@@ -11,11 +11,17 @@ class DownloadStatus(str, Enum):
     FAILED = "failed"
 
 
+class DownloadPriority(str, Enum):
+    INTERACTIVE = "interactive"
+    BULK = "bulk"
+
+
 class DownloadTaskCreate(BaseModel):
     paper_id: str
     arxiv_id: Optional[str] = None
     title: str
     pdf_url: str
+    priority: DownloadPriority = DownloadPriority.INTERACTIVE
 
 
 class DownloadTaskResponse(BaseModel):
@@ -36,3 +42,25 @@ class DownloadTaskResponse(BaseModel):
 class DownloadTaskListResponse(BaseModel):
     total: int
     items: List[DownloadTaskResponse]
+
+
+class DownloadBatchSearch(BaseModel):
+    category: Optional[str] = None
+    date_from: Optional[str] = None
+    date_to: Optional[str] = None
+    limit: int = Field(1000, ge=1, le=10000)
+
+
+class DownloadBatchCreate(BaseModel):
+    paper_ids: List[str] = []
+    all_bookmarks: bool = False
+    search: Optional[DownloadBatchSearch] = None
+    priority: DownloadPriority = DownloadPriority.BULK
+
+
+class DownloadBatchResponse(BaseModel):
+    requested: int
+    created: int
+    existing: int
+    not_found: List[str] = []
+    items: List[DownloadTaskResponse]
@@ -28,3 +28,19 @@ class EmbeddingIndexResponse(BaseModel):
 
 class EmbeddingIndexesResponse(BaseModel):
     indexes: List[EmbeddingIndexResponse]
+
+
+class PaperChunk(BaseModel):
+    chunk_index: int
+    page: int = 0
+    text: str
+    embedding_model: Optional[str] = None
+    similarity_score: Optional[float] = None
+
+
+class PaperChunksResponse(BaseModel):
+    paper_id: str
+    chunks: List[PaperChunk]
+    total: int
+    indexing: bool = False
+    error: Optional[str] = None
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List
 
 
@@ -44,6 +44,91 @@ class SubAgentExecuteResponse(BaseModel):
     model: Optional[str] = None
     provider: Optional[str] = None
     turns_used: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cache_write_tokens: int = 0
+
+
+class SubAgentPlanNodeRequest(BaseModel):
+    id: str = Field(..., description="Node ID, referenced by depends_on and {{id}} placeholders")
+    agent_id: str = Field(..., description="SubAgent that runs this node")
+    instruction: str = Field(..., description="Task instruction; {{id}} is replaced with that node's output")
+    depends_on: List[str] = Field([], description="Nodes whose output and papers this node receives")
+    paper_ids: Optional[List[str]] = Field(None, description="Additional paper IDs to use as context")
+    context: Optional[dict] = Field(None, description="Additional context for the task")
+    provider: Optional[str] = Field(None, description="LLM provider to use")
+    model: Optional[str] = Field(None, description="Specific model to use")
+    max_turns: Optional[int] = Field(None, description="Maximum number of turns")
+    inherit_papers: bool = Field(True, description="Add the papers of the nodes it depends on")
+    paper_offset: int = Field(0, ge=0, description="Skip this many inherited papers")
+    paper_limit: Optional[int] = Field(None, ge=1, description="Use at most this many inherited papers")
+
+    @field_validator("context")
+    @classmethod
+    def variables_must_be_an_object(cls, context: Optional[dict]) -> Optional[dict]:
+        if context and context.get("variables") is not None and not isinstance(context["variables"], dict):
+            raise ValueError("context.variables must be an object")
+        return context
+
+
+class SubAgentPlanRequest(BaseModel):
+    nodes: List[SubAgentPlanNodeRequest] = Field(..., description="SubAgent tasks and their dependencies")
+    max_concurrency: Optional[int] = Field(None, ge=1, description="Most nodes of this plan running at once")
+
+
+class SubAgentPlanNodeResponse(BaseModel):
+    node_id: str
+    depends_on: List[str] = []
+    started_at: float = 0.0
+    completed_at: float = 0.0
+    paper_ids: List[str] = []
+    result: SubAgentExecuteResponse
+
+
+class SubAgentPlanResponse(BaseModel):
+    plan_id: str
+    status: str
+    nodes: List[SubAgentPlanNodeResponse]
+    elapsed_seconds: float = 0.0
+    critical_path: List[str] = []
+    critical_path_seconds: float = 0.0
+
+
+class SubAgentRouteRequest(BaseModel):
+    instruction: str = Field(..., description="Task instruction to route")
+    top_k: int = Field(3, ge=1, le=50, description="Number of ranked agents to return")
+
+
+class SubAgentRouteScore(BaseModel):
+    agent_id: str
+    score: float
+
+
+class SubAgentRouteResponse(BaseModel):
+    agent_id: Optional[str] = None
+    method: str = "embedding"
+    scores: List[SubAgentRouteScore] = []
+
+
+class SubAgentTaskInfo(BaseModel):
+    task_id: str
+    agent_id: str
+    status: str
+    instruction: str = ""
+    provider: Optional[str] = None
+    model: Optional[str] = None
+    created_at: Optional[str] = None
+    started_at: Optional[str] = None
+    completed_at: Optional[str] = None
+    turns_used: int = 0
+    events: int = 0
+    result: Optional[SubAgentExecuteResponse] = None
+
+
+class SubAgentTaskListResponse(BaseModel):
+    tasks: List[SubAgentTaskInfo]
+    total: int
 
 
 class SubAgentCreateRequest(BaseModel):
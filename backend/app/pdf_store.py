@@ -0,0 +1,237 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_VERSION_RE = re.compile(r"^(?P<base>.+?)(?P<version>v\d+)?$")
+
+
+def split_paper_version(paper_id: str) -> tuple[str, str]:
+    """Split "2301.12345v2" into ("2301.12345", "v2"); unversioned IDs get ""."""
+    match = _VERSION_RE.match(paper_id)
+    return match.group("base"), match.group("version") or ""
+
+
+class PDFStore:
+    """
+    Content-addressed storage for downloaded PDFs.
+
+    Files are stored once per SHA-256 digest under ``<root>/<aa>/<bb>/<digest>.pdf``.
+    A SQLite manifest next to the blobs maps each paper version to its blob,
+    size and original filename. Downloading the same paper again is
+    answered from the manifest. ``verify`` checks blobs against the
+    manifest and ``gc`` deletes blobs that no paper references any more.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._db_path = str(self.root / "manifest.db")
+        self._init_tables()
+
+    @contextmanager
+    def _get_connection(self):
+        conn = sqlite3.connect(self._db_path, timeout=30.0)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_tables(self):
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS pdf_manifest (
+                    paper_id TEXT PRIMARY KEY,
+                    base_id TEXT NOT NULL,
+                    version TEXT,
+                    sha256 TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    filename TEXT,
+                    created_at TEXT,
+                    verified_at TEXT
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_pdf_manifest_sha256 ON pdf_manifest(sha256)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_pdf_manifest_base_id ON pdf_manifest(base_id)')
+            conn.commit()
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.root / sha256[:2] / sha256[2:4] / f"{sha256}.pdf"
+
+    @staticmethod
+    def _row_to_entry(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "paper_id": row["paper_id"],
+            "base_id": row["base_id"],
+            "version": row["version"] or "",
+            "sha256": row["sha256"],
+            "size": row["size"],
+            "filename": row["filename"] or "",
+            "created_at": row["created_at"] or "",
+            "verified_at": row["verified_at"] or "",
+        }
+
+    def lookup(self, paper_id: str) -> Optional[Dict[str, Any]]:
+        """Return the manifest entry for a paper version if its blob is present and intact in size."""
+        with self._get_connection() as conn:
+            row = conn.execute('SELECT * FROM pdf_manifest WHERE paper_id = ?', (paper_id,)).fetchone()
+        if row is None:
+            return None
+
+        entry = self._row_to_entry(row)
+        path = self.blob_path(entry["sha256"])
+        try:
+            if path.stat().st_size != entry["size"]:
+                return None
+        except OSError:
+            return None
+        entry["path"] = str(path)
+        return entry
+
+    def add(self, paper_id: str, source: Path, sha256: str, size: int, filename: str = "") -> Path:
+        """
+        Move a verified file into the store and record it for paper_id.
+
+        If a blob with the same digest already exists the source file is
+        discarded instead, so identical PDFs are stored once.
+        """
+        target = self.blob_path(sha256)
+        if target.exists() and target.stat().st_size == size:
+            Path(source).unlink(missing_ok=True)
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(source, target)
+
+        base_id, version = split_paper_version(paper_id)
+        now = datetime.utcnow().isoformat()
+        with self._get_connection() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO pdf_manifest (
+                    paper_id, base_id, version, sha256, size, filename, created_at, verified_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (paper_id, base_id, version, sha256, size, filename, now, now))
+            conn.commit()
+        return target
+
+    def remove(self, paper_id: str) -> bool:
+        """Drop the manifest entry for paper_id; the blob is reclaimed by gc once unreferenced."""
+        with self._get_connection() as conn:
+            cursor = conn.execute('DELETE FROM pdf_manifest WHERE paper_id = ?', (paper_id,))
+            conn.commit()
+            return cursor.rowcount > 0
+
+    def contains_path(self, path: str) -> bool:
+        try:
+            return Path(path).resolve().is_relative_to(self.root.resolve())
+        except OSError:
+            return False
+
+    def list_entries(self) -> List[Dict[str, Any]]:
+        with self._get_connection() as conn:
+            rows = conn.execute('SELECT * FROM pdf_manifest ORDER BY paper_id').fetchall()
+        return [self._row_to_entry(row) for row in rows]
+
+    @staticmethod
+    def _hash_file(path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def verify(self, full: bool = False) -> Dict[str, Any]:
+        """
+        Check every manifest entry against its blob.
+
+        The default pass only compares sizes. ``full`` also rehashes each
+        blob. Entries whose blob is missing or corrupt are removed, and so
+        are corrupt blobs, so the paper is downloaded again next time.
+        """
+        entries = self.list_entries()
+        checked_blobs: Dict[str, bool] = {}
+        missing: List[str] = []
+        corrupt: List[str] = []
+
+        for entry in entries:
+            sha256 = entry["sha256"]
+            if sha256 not in checked_blobs:
+                path = self.blob_path(sha256)
+                if not path.exists():
+                    checked_blobs[sha256] = False
+                    missing.append(sha256)
+                elif path.stat().st_size != entry["size"] or (full and self._hash_file(path) != sha256):
+                    checked_blobs[sha256] = False
+                    corrupt.append(sha256)
+                    path.unlink(missing_ok=True)
+                else:
+                    checked_blobs[sha256] = True
+
+        bad = {sha for sha, ok in checked_blobs.items() if not ok}
+        now = datetime.utcnow().isoformat()
+        with self._get_connection() as conn:
+            for sha256 in bad:
+                conn.execute('DELETE FROM pdf_manifest WHERE sha256 = ?', (sha256,))
+            conn.execute('UPDATE pdf_manifest SET verified_at = ?', (now,))
+            conn.commit()
+
+        if bad:
+            logger.warning(f"PDF store verify: {len(missing)} missing, {len(corrupt)} corrupt blobs")
+        return {
+            "entries": len(entries),
+            "blobs": len(checked_blobs),
+            "missing": missing,
+            "corrupt": corrupt,
+            "removed_entries": sum(1 for e in entries if e["sha256"] in bad),
+            "full": full,
+        }
+
+    def gc(self) -> Dict[str, Any]:
+        """Delete blobs that are not referenced by any manifest entry."""
+        with self._get_connection() as conn:
+            referenced = {row[0] for row in conn.execute('SELECT DISTINCT sha256 FROM pdf_manifest')}
+
+        removed = 0
+        freed = 0
+        for path in self.root.glob("*/*/*.pdf"):
+            if path.stem in referenced:
+                continue
+            try:
+                freed += path.stat().st_size
+                path.unlink()
+                removed += 1
+            except OSError as e:
+                logger.warning(f"Failed to delete unreferenced blob {path}: {e}")
+
+        for directory in sorted(self.root.glob("*/*"), reverse=True) + sorted(self.root.glob("*")):
+            if directory.is_dir():
+                try:
+                    directory.rmdir()
+                except OSError:
+                    pass
+
+        return {"removed_blobs": removed, "freed_bytes": freed, "referenced_blobs": len(referenced)}
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._get_connection() as conn:
+            entries, blobs, logical = conn.execute(
+                'SELECT COUNT(*), COUNT(DISTINCT sha256), COALESCE(SUM(size), 0) FROM pdf_manifest'
+            ).fetchone()
+            stored = conn.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT sha256, size FROM pdf_manifest)'
+            ).fetchone()[0]
+        return {
+            "root": str(self.root),
+            "entries": entries,
+            "blobs": blobs,
+            "logical_bytes": logical,
+            "stored_bytes": stored,
+        }
@@ -0,0 +1,67 @@
+import logging
+import re
+from typing import Any, Dict, List, Tuple
+
+from pypdf import PdfReader
+
+logger = logging.getLogger(__name__)
+
+
+def _clean_text(text: str) -> str:
+    # Re-join words hyphenated across line breaks, then normalise whitespace
+    text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)
+    text = re.sub(r"[ \t\f\v]+", " ", text)
+    text = re.sub(r" ?\n ?", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+def extract_pdf_pages(path: str) -> List[str]:
+    """Extract the text of every page of a PDF file."""
+    reader = PdfReader(path)
+    pages = []
+    for page in reader.pages:
+        try:
+            text = page.extract_text() or ""
+        except Exception as e:
+            logger.debug(f"Failed to extract text from a page: {e}")
+            text = ""
+        pages.append(_clean_text(text))
+    return pages
+
+
+def chunk_pages(pages: List[str], chunk_words: int = 200, overlap_words: int = 40) -> List[Dict[str, Any]]:
+    """
+    Split page texts into overlapping word windows.
+
+    Each chunk holds up to ``chunk_words`` words and repeats the last
+    ``overlap_words`` words of the previous chunk, so a passage cut at a
+    boundary is still retrievable whole. Chunks record the 1-based page on
+    which they start.
+    """
+    chunk_words = max(1, chunk_words)
+    overlap_words = max(0, min(overlap_words, chunk_words - 1))
+    words: List[Tuple[str, int]] = [
+        (word, page_number)
+        for page_number, text in enumerate(pages, start=1)
+        for word in text.split()
+    ]
+
+    chunks = []
+    step = chunk_words - overlap_words
+    for start in range(0, len(words), step):
+        window = words[start:start + chunk_words]
+        chunks.append({
+            "chunk_index": len(chunks),
+            "page": window[0][1],
+            "text": " ".join(word for word, _ in window),
+        })
+        if start + chunk_words >= len(words):
+            break
+    return chunks
+
+
+def extract_pdf_chunks(path: str, chunk_words: int = 200, overlap_words: int = 40) -> Dict[str, Any]:
+    """Extract and chunk a PDF; runs in a worker process, so it only takes and returns plain data."""
+    pages = extract_pdf_pages(path)
+    return {"pages": len(pages), "chunks": chunk_pages(pages, chunk_words, overlap_words)}
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+
+class _Client:
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.wakeup = asyncio.Event()
+        self.sender: Optional[asyncio.Task] = None
+        self.last_sent = 0.0
+
+
+class ProgressBus:
+    """
+    Fan-out of download progress events to websocket clients.
+
+    ``publish`` never awaits. It stores the latest event per task for every
+    client and wakes that client's sender task. Each sender flushes at most
+    one frame per ``interval`` with the newest state of every task that
+    changed since the previous frame. A slow socket therefore holds at most
+    one pending event per task and never delays the download loop or other
+    clients. A socket that cannot take a frame within ``send_timeout`` is
+    dropped.
+    """
+
+    def __init__(self, interval: float = 0.25, send_timeout: float = 5.0):
+        self.interval = interval
+        self.send_timeout = send_timeout
+        self._clients: Dict[WebSocket, _Client] = {}
+        self._published = 0
+        self._sent = 0
+        self._frames = 0
+        self._dropped_clients = 0
+
+    @property
+    def active_connections(self) -> list[WebSocket]:
+        return list(self._clients.keys())
+
+    async def connect(self, websocket: WebSocket):
+        await websocket.accept()
+        client = _Client(websocket)
+        client.sender = asyncio.create_task(self._send_loop(client))
+        self._clients[websocket] = client
+
+    def disconnect(self, websocket: WebSocket):
+        client = self._clients.pop(websocket, None)
+        if client and client.sender and client.sender is not asyncio.current_task():
+            client.sender.cancel()
+
+    def publish(self, message: Dict[str, Any], key: Optional[str] = None):
+        """Queue a message for every client, replacing any unsent message with the same key."""
+        key = key or message.get("task_id") or message.get("type", "")
+        self._published += 1
+        for client in self._clients.values():
+            client.pending[key] = message
+            client.wakeup.set()
+
+    async def broadcast(self, message: Dict[str, Any]):
+        self.publish(message)
+
+    async def _send_loop(self, client: _Client):
+        try:
+            while True:
+                await client.wakeup.wait()
+
+                wait = client.last_sent + self.interval - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+                client.wakeup.clear()
+                frame = list(client.pending.values())
+                client.pending = {}
+                client.last_sent = time.monotonic()
+
+                await asyncio.wait_for(self._send_frame(client.websocket, frame), self.send_timeout)
+                self._frames += 1
+                self._sent += len(frame)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.warning(f"Dropping progress websocket client: {e!r}")
+            self._dropped_clients += 1
+            self.disconnect(client.websocket)
+
+    @staticmethod
+    async def _send_frame(websocket: WebSocket, frame: list):
+        for message in frame:
+            await websocket.send_json(message)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "clients": len(self._clients),
+            "published": self._published,
+            "sent": self._sent,
+            "frames": self._frames,
+            "dropped_clients": self._dropped_clients,
+        }
@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Query, HTTPException, Body
+from fastapi import APIRouter, Query, HTTPException, Body, Depends
 from typing import Optional
 import logging
 
+from app.dependencies import get_paper_service
 from app.services.paper_service import PaperService
+from app.services.graph_service import graph_service
 from app.services.llm_service import llm_service
+from app.fulltext_indexer import fulltext_indexer
+from app.db.factory import get_paper_chunk_repository
+from app.config import get_settings
+from app.sse import sse_response
 from app.models import (
     SemanticSearchRequest,
     SemanticSearchResponse,
@@ -13,13 +19,14 @@ from app.models import (
     AskRequest,
     AskResponse,
     PaperReference,
+    PaperChunksResponse,
 )
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/arxiv", tags=["arxiv"])
 
-_paper_service = PaperService()
+_settings = get_settings()
 
 
 @router.get("/query")
@@ -29,6 +36,7 @@ async def query_papers(
     start: int = Query(0, ge=0, description="Start index for pagination"),
     max_results: int = Query(50, ge=1, le=500, description="Maximum papers to return"),
     fetch_category: str = Query("cs*", description="Category to fetch from arXiv (e.g., 'cs*', 'physics*', or empty for all)"),
+    paper_service: PaperService = Depends(get_paper_service),
 ):
     """
     Query papers for a specific date.
@@ -37,7 +45,7 @@ async def query_papers(
     - If no local data, fetches papers for that date from arXiv with fetch_category filter, stores them, then returns filtered results
     """
     try:
-        result = await _paper_service.query_papers(
+        result = await paper_service.query_papers(
             date=date,
             category=category,
             start=start,
@@ -56,63 +64,82 @@ async def query_papers(
 
 
 @router.get("/paper/{paper_id}")
-async def get_paper(paper_id: str):
+async def get_paper(paper_id: str, paper_service: PaperService = Depends(get_paper_service)):
     """Get a single paper by ID."""
-    paper = _paper_service.get_paper_by_id(paper_id)
+    paper = paper_service.get_paper_by_id(paper_id)
     if not paper:
         raise HTTPException(status_code=404, detail="Paper not found")
     return paper
 
 
 @router.delete("/cache/date/{date}")
-async def clear_date_cache(date: str):
+async def clear_date_cache(date: str, paper_service: PaperService = Depends(get_paper_service)):
     """Clear cache for a specific date."""
-    _paper_service.clear_date_index(date)
+    paper_service.clear_date_index(date)
+    graph_service.clear_cache(date)
     return {"message": f"Cache cleared for {date}"}
 
 
 @router.delete("/cache/date")
-async def clear_all_date_cache():
+async def clear_all_date_cache(paper_service: PaperService = Depends(get_paper_service)):
     """Clear all date index cache."""
-    _paper_service.clear_all_date_index()
+    paper_service.clear_all_date_index()
+    graph_service.clear_cache()
     return {"message": "All date index cache cleared"}
 
 
 @router.get("/date-indexes")
-async def get_date_indexes():
+async def get_date_indexes(paper_service: PaperService = Depends(get_paper_service)):
     """Get all date index records."""
-    return {"indexes": _paper_service.get_all_date_indexes()}
+    return {"indexes": paper_service.get_all_date_indexes()}
 
 
 @router.get("/statistics")
-async def get_statistics():
+async def get_statistics(paper_service: PaperService = Depends(get_paper_service)):
     """Get statistics about stored papers."""
-    return _paper_service.get_statistics()
+    return paper_service.get_statistics()
 
 
 @router.post("/fetch/{date}")
 async def fetch_papers_for_date(
     date: str,
-    category: str = Query("cs*", description="Category to fetch from arXiv (e.g., 'cs*', 'physics*', or empty string for all)")
+    category: str = Query("cs*", description="Category to fetch from arXiv (e.g., 'cs*', 'physics*', or empty string for all)"),
+    paper_service: PaperService = Depends(get_paper_service),
 ):
     """
     Manually fetch and store papers for a specific date.
     Date format: YYYY-MM-DD
     Category: arXiv category pattern (e.g., 'cs*' for all CS, 'cs.LG' for ML, '' for all)
     """
-    result = await _paper_service.fetch_papers_for_date(date, category)
+    result = await paper_service.fetch_papers_for_date(date, category)
+    if result.get("success"):
+        graph_service.clear_cache(result.get("date", date))
     return result
 
 
+@router.get("/prefetch/status")
+async def get_prefetch_status():
+    """Get the status of the scheduled arXiv prefetch."""
+    from app.services.prefetch_scheduler import get_prefetch_scheduler
+    
+    scheduler = get_prefetch_scheduler()
+    if not scheduler:
+        return {"enabled": False}
+    return {"enabled": True, **scheduler.get_status()}
+
+
 @router.post("/search", response_model=SemanticSearchResponse)
-async def search_papers_semantic(request: SemanticSearchRequest = Body(...)):
+async def search_papers_semantic(
+    request: SemanticSearchRequest = Body(...),
+    paper_service: PaperService = Depends(get_paper_service),
+):
     """
     Search papers using semantic similarity.
     
     Uses embedding-based semantic search to find papers that match the query
     in meaning, not just keywords.
     """
-    result = await _paper_service.search_papers_semantic(
+    result = await paper_service.search_papers_semantic(
         query=request.query,
         top_k=request.top_k,
         category=request.category,
@@ -126,28 +153,48 @@ async def search_papers_semantic(request: SemanticSearchRequest = Body(...)):
 async def get_similar_papers(
     paper_id: str,
     top_k: int = Query(5, ge=1, le=20, description="Number of similar papers to return"),
+    paper_service: PaperService = Depends(get_paper_service),
 ):
     """
     Get papers similar to a given paper.
     
     Finds papers with similar content based on embedding similarity.
     """
-    result = await _paper_service.get_similar_papers(
+    result = await paper_service.get_similar_papers(
         paper_id=paper_id,
         top_k=top_k,
     )
     return result
 
 
+@router.get("/paper/{paper_id}/chunks", response_model=PaperChunksResponse)
+async def get_paper_chunks(paper_id: str):
+    """
+    Get the full-text passages indexed for a downloaded paper.
+    
+    Passages are extracted from the PDF when its download completes.
+    """
+    indexing = fulltext_indexer.is_pending(paper_id)
+    try:
+        chunks = get_paper_chunk_repository().get_chunks(paper_id)
+    except Exception as e:
+        logger.error(f"Failed to load chunks for {paper_id}: {e}")
+        return PaperChunksResponse(paper_id=paper_id, chunks=[], total=0, indexing=indexing, error=str(e))
+    return PaperChunksResponse(paper_id=paper_id, chunks=chunks, total=len(chunks), indexing=indexing)
+
+
 @router.post("/embeddings/generate", response_model=GenerateEmbeddingsResponse)
-async def generate_embeddings(request: GenerateEmbeddingsRequest = Body(...)):
+async def generate_embeddings(
+    request: GenerateEmbeddingsRequest = Body(...),
+    paper_service: PaperService = Depends(get_paper_service),
+):
     """
     Generate embeddings for papers.
     
     Generates vector embeddings for papers that don't have them yet.
     Can optionally filter by date or date range.
     """
-    result = await _paper_service.generate_embeddings(
+    result = await paper_service.generate_embeddings(
         date=request.date,
         date_from=request.date_from,
         date_to=request.date_to,
@@ -157,30 +204,71 @@ async def generate_embeddings(request: GenerateEmbeddingsRequest = Body(...)):
     return result
 
 
+NO_PAPERS_ANSWER = (
+    "I couldn't find any relevant papers in the database to answer your question. "
+    "Try searching for papers first or rephrase your question."
+)
+
+
+async def _find_ask_sources(request: AskRequest, paper_service: PaperService) -> tuple[list, list]:
+    """Search the papers and full-text passages used to answer a question."""
+    search_result = await paper_service.search_papers_semantic(
+        query=request.question,
+        top_k=request.top_k,
+    )
+    
+    papers = search_result.get("papers", [])
+    
+    passages = []
+    if papers and _settings.FULLTEXT_INDEX_ENABLED:
+        try:
+            passages = await fulltext_indexer.search(
+                request.question,
+                top_k=_settings.ASK_PASSAGE_CANDIDATES,
+                paper_ids=[p["id"] for p in papers if p.get("id")],
+            )
+        except Exception as e:
+            logger.warning(f"Full-text passage search unavailable, using abstracts only: {e}")
+    
+    return papers, passages
+
+
+def _build_references(request: AskRequest, papers: list) -> list:
+    references = []
+    if request.include_references:
+        for paper in papers[:request.top_k]:
+            references.append(PaperReference(
+                id=paper.get("id", ""),
+                title=paper.get("title", ""),
+                authors=paper.get("authors", []),
+                published=paper.get("published"),
+                relevance_score=paper.get("similarity_score", 0.0),
+            ))
+    return references
+
+
 @router.post("/ask", response_model=AskResponse)
-async def ask_question(request: AskRequest = Body(...)):
+async def ask_question(
+    request: AskRequest = Body(...),
+    paper_service: PaperService = Depends(get_paper_service),
+):
     """
     Ask a question and get AI-powered answer with paper references.
     
     1. Uses semantic search to find relevant papers
-    2. Builds context from paper abstracts
+    2. Builds a token-budgeted context from the abstract sentences and
+       full-text passages most relevant to the question
     3. Calls LLM to generate answer
     4. Returns answer with paper references
     
     Optional: Specify provider and model to use a specific LLM.
     """
     try:
-        search_result = await _paper_service.search_papers_semantic(
-            query=request.question,
-            top_k=request.top_k,
-        )
-        
-        papers = search_result.get("papers", [])
+        papers, passages = await _find_ask_sources(request, paper_service)
         
         if not papers:
             return AskResponse(
-                answer="I couldn't find any relevant papers in the database to answer your question. "
-                       "Try searching for papers first or rephrase your question.",
+                answer=NO_PAPERS_ANSWER,
                 references=[],
                 model=None,
             )
@@ -190,22 +278,12 @@ async def ask_question(request: AskRequest = Body(...)):
             papers=papers,
             provider=request.provider,
             model=request.model,
+            passages=passages,
         )
         
-        references = []
-        if request.include_references:
-            for paper in papers[:request.top_k]:
-                references.append(PaperReference(
-                    id=paper.get("id", ""),
-                    title=paper.get("title", ""),
-                    authors=paper.get("authors", []),
-                    published=paper.get("published"),
-                    relevance_score=paper.get("similarity_score", 0.0),
-                ))
-        
         return AskResponse(
             answer=answer,
-            references=references,
+            references=_build_references(request, papers),
             model=llm_service.get_model_name(provider=request.provider, model=request.model),
         )
         
@@ -218,15 +296,65 @@ async def ask_question(request: AskRequest = Body(...)):
         )
 
 
+@router.post("/ask/stream")
+async def ask_question_stream(
+    request: AskRequest = Body(...),
+    paper_service: PaperService = Depends(get_paper_service),
+):
+    """
+    Ask a question and stream the answer as Server-Sent Events.
+    
+    Uses the same retrieval as /ask. Events:
+    
+    - references: {"references": [...]} once the papers are found
+    - delta: {"content": "..."} for each piece of the answer
+    - done: {"model": "..."} when the answer is complete
+    - error: {"error": "..."} if the search or the LLM fails
+    """
+    async def events():
+        try:
+            papers, passages = await _find_ask_sources(request, paper_service)
+        except Exception as e:
+            logger.error(f"Error in ask stream endpoint: {e}")
+            yield {"type": "error", "error": str(e)}
+            return
+        
+        references = _build_references(request, papers)
+        yield {"type": "references", "references": [r.model_dump() for r in references]}
+        
+        if not papers:
+            yield {"type": "delta", "content": NO_PAPERS_ANSWER}
+            yield {"type": "done", "model": None}
+            return
+        
+        try:
+            async for delta in llm_service.stream_question(
+                question=request.question,
+                papers=papers,
+                provider=request.provider,
+                model=request.model,
+                passages=passages,
+            ):
+                yield {"type": "delta", "content": delta}
+        except Exception as e:
+            logger.error(f"Error in ask stream endpoint: {e}")
+            yield {"type": "error", "error": str(e)}
+            return
+        
+        yield {"type": "done", "model": llm_service.get_model_name(provider=request.provider, model=request.model)}
+    
+    return sse_response(events())
+
+
 @router.get("/embedding-indexes")
-async def get_embedding_indexes():
+async def get_embedding_indexes(paper_service: PaperService = Depends(get_paper_service)):
     """
     Get all embedding indexes.
     
     Returns a list of all dates that have embedding indexes generated.
     """
     try:
-        indexes = _paper_service.get_embedding_indexes()
+        indexes = paper_service.get_embedding_indexes()
         return {"indexes": indexes}
     except Exception as e:
         logger.error(f"Error getting embedding indexes: {e}")
@@ -234,13 +362,13 @@ async def get_embedding_indexes():
 
 
 @router.get("/embedding-indexes/{date}")
-async def get_embedding_index(date: str):
+async def get_embedding_index(date: str, paper_service: PaperService = Depends(get_paper_service)):
     """
     Get embedding index for a specific date.
     
     Returns the embedding index information for the given date.
     """
-    index = _paper_service.get_embedding_index(date)
+    index = paper_service.get_embedding_index(date)
     if not index:
         raise HTTPException(status_code=404, detail="Embedding index not found")
     return index
@@ -1,46 +1,41 @@
-from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
+from typing import Any, Dict, List, Tuple
 from app.models import (
     DownloadTaskCreate,
     DownloadTaskResponse,
     DownloadTaskListResponse,
+    DownloadBatchCreate,
+    DownloadBatchResponse,
     MessageResponse,
     DownloadStatus,
 )
-from app.services import download_service
+from app.services import download_service, bookmark_service
+from app.dependencies import get_paper_service
+from app.services.paper_service import PaperService
 from app.download_manager import download_manager
+from app.progress_bus import ProgressBus
+from app.config import get_settings
+import asyncio
 import json
+import re
 import subprocess
 import platform
 import os
 
 router = APIRouter(prefix="/downloads", tags=["downloads"])
 
+BATCH_LOOKUP_CHUNK_SIZE = 500
 
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: list[WebSocket] = []
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-
-    def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except:
-                pass
-
-
-ws_manager = ConnectionManager()
+_settings = get_settings()
+ws_manager = ProgressBus(
+    interval=_settings.DOWNLOAD_PROGRESS_INTERVAL,
+    send_timeout=_settings.DOWNLOAD_WS_SEND_TIMEOUT,
+)
 
 
-async def progress_callback(task_id: str, progress: int, status: str):
-    await ws_manager.broadcast({
+def progress_callback(task_id: str, progress: int, status: str):
+    ws_manager.publish({
         "type": "progress",
         "task_id": task_id,
         "progress": progress,
@@ -63,6 +58,8 @@ async def websocket_endpoint(websocket: WebSocket):
             except json.JSONDecodeError:
                 pass
     except WebSocketDisconnect:
+        pass
+    finally:
         ws_manager.disconnect(websocket)
 
 
@@ -83,14 +80,98 @@ async def create_download_task(task: DownloadTaskCreate):
             result["id"],
             task.pdf_url,
             task.paper_id,
+            priority=task.priority.value,
         )
         download_manager.add_progress_callback(result["id"], progress_callback)
+        download_manager.apply_live_status(result)
         
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _collect_batch_papers(
+    request: DownloadBatchCreate,
+    paper_service: PaperService,
+) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """Resolve a batch request into download metadata keyed by paper ID."""
+    papers: Dict[str, Dict[str, Any]] = {}
+    
+    if request.all_bookmarks:
+        offset = 0
+        while True:
+            bookmarks, total = bookmark_service.get_all_bookmarks(limit=1000, offset=offset)
+            for bookmark in bookmarks:
+                papers.setdefault(bookmark["paper_id"], {
+                    "paper_id": bookmark["paper_id"],
+                    "arxiv_id": bookmark.get("arxiv_id"),
+                    "title": bookmark.get("title", ""),
+                    "pdf_url": bookmark.get("pdf_url", ""),
+                })
+            offset += len(bookmarks)
+            if not bookmarks or offset >= total:
+                break
+    
+    lookup_ids = [pid for pid in dict.fromkeys(request.paper_ids) if pid not in papers]
+    if request.search:
+        search_ids = paper_service.paper_repo.get_paper_ids_by_filters(
+            category=request.search.category,
+            date_from=request.search.date_from,
+            date_to=request.search.date_to,
+            limit=request.search.limit,
+        )
+        lookup_ids.extend(pid for pid in search_ids if pid not in papers)
+        lookup_ids = list(dict.fromkeys(lookup_ids))
+    
+    for i in range(0, len(lookup_ids), BATCH_LOOKUP_CHUNK_SIZE):
+        chunk = lookup_ids[i:i + BATCH_LOOKUP_CHUNK_SIZE]
+        for paper in paper_service.get_papers_by_ids(chunk):
+            papers[paper["id"]] = {
+                "paper_id": paper["id"],
+                "arxiv_id": re.sub(r"v\d+$", "", paper["id"]),
+                "title": paper.get("title", ""),
+                "pdf_url": paper.get("pdf_url", ""),
+            }
+    
+    not_found = [pid for pid in lookup_ids if pid not in papers]
+    without_pdf = [pid for pid, paper in papers.items() if not paper["pdf_url"]]
+    for pid in without_pdf:
+        del papers[pid]
+    
+    return papers, not_found + without_pdf
+
+
+@router.post("/batch", response_model=DownloadBatchResponse)
+async def create_download_tasks_batch(
+    request: DownloadBatchCreate,
+    paper_service: PaperService = Depends(get_paper_service),
+):
+    if not request.paper_ids and not request.all_bookmarks and not request.search:
+        raise HTTPException(status_code=400, detail="Provide paper_ids, all_bookmarks or search")
+    
+    try:
+        papers, not_found = _collect_batch_papers(request, paper_service)
+        
+        existing = download_service.get_active_tasks_by_paper_ids(list(papers.keys()))
+        new_papers = [paper for pid, paper in papers.items() if pid not in existing]
+        created = download_service.create_tasks_batch(new_papers)
+        
+        await download_manager.start_downloads(created, priority=request.priority.value)
+        for task in created:
+            download_manager.add_progress_callback(task["id"], progress_callback)
+            download_manager.apply_live_status(task)
+        
+        return {
+            "requested": len(papers) + len(not_found),
+            "created": len(created),
+            "existing": len(existing),
+            "not_found": not_found,
+            "items": created + list(existing.values()),
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("", response_model=DownloadTaskListResponse)
 async def get_download_tasks(
     limit: int = Query(default=100, ge=1, le=1000),
@@ -98,17 +179,49 @@ async def get_download_tasks(
 ):
     try:
         items, total = download_service.get_all_tasks(limit=limit, offset=offset)
+        for item in items:
+            download_manager.apply_live_status(item)
         return DownloadTaskListResponse(total=total, items=items)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/status")
+async def get_download_queue_status():
+    return download_manager.get_queue_metrics()
+
+
+@router.get("/store/stats")
+async def get_pdf_store_stats():
+    try:
+        return download_manager.get_pdf_store().get_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/store/verify")
+async def verify_pdf_store(full: bool = Query(default=False)):
+    try:
+        return await asyncio.to_thread(download_manager.get_pdf_store().verify, full)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/store/gc")
+async def gc_pdf_store():
+    try:
+        return await asyncio.to_thread(download_manager.get_pdf_store().gc)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/{task_id}", response_model=DownloadTaskResponse)
 async def get_download_task(task_id: str):
     try:
         result = download_service.get_task(task_id)
         if not result:
             raise HTTPException(status_code=404, detail="Task not found")
+        download_manager.apply_live_status(result)
         return result
     except HTTPException:
         raise
@@ -126,12 +239,8 @@ async def delete_download_task(task_id: str):
         if download_manager.is_task_running(task_id):
             await download_manager.cancel_download(task_id)
         
-        file_path = task.get("file_path")
-        if file_path and os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-            except OSError as e:
-                print(f"Warning: Failed to delete file {file_path}: {e}")
+        download_manager.release_file(task)
+        download_manager.discard_partial(task_id)
         
         download_service.delete_task(task_id)
         return MessageResponse(message="Download task deleted successfully")
@@ -154,7 +263,9 @@ async def retry_download_task(task_id: str):
         
         download_manager.add_progress_callback(task_id, progress_callback)
         
-        return download_service.get_task(task_id)
+        result = download_service.get_task(task_id)
+        download_manager.apply_live_status(result)
+        return result
     except HTTPException:
         raise
     except Exception as e:
@@ -168,7 +279,9 @@ async def cancel_download_task(task_id: str):
         if not success:
             raise HTTPException(status_code=404, detail="Task not found or not running")
         
-        return download_service.get_task(task_id)
+        result = download_service.get_task(task_id)
+        download_manager.apply_live_status(result)
+        return result
     except HTTPException:
         raise
     except Exception as e:
@@ -184,7 +297,7 @@ async def get_running_status():
                 "task_id": task_id,
                 "paper_id": download_manager.get_task(task_id).paper_id if download_manager.get_task(task_id) else None,
             }
-            for task_id in download_manager._running_tasks.keys()
+            for task_id in download_manager.get_running_task_ids()
         ]
     }
 
@@ -201,7 +314,10 @@ async def open_download_file(task_id: str):
             raise HTTPException(status_code=404, detail="File path not found")
         
         if not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail="File does not exist")
+            stored = download_manager.get_pdf_store().lookup(task.get("paper_id", ""))
+            if not stored:
+                raise HTTPException(status_code=404, detail="File does not exist")
+            file_path = stored["path"]
         
         system = platform.system()
         if system == "Windows":
@@ -32,6 +32,18 @@ async def get_llm_providers():
     )
 
 
+@router.get("/stats")
+async def get_llm_stats():
+    """
+    Get per-provider call counters.
+    
+    Shows calls, retries, rate limit responses, calls answered by the
+    fallback provider, time spent waiting for a concurrency slot or for
+    the tokens-per-minute limit, and the state of each circuit breaker.
+    """
+    return {"providers": llm_service.get_guard_stats()}
+
+
 @router.get("/ollama/status")
 async def get_ollama_status(
     model: Optional[str] = Query(None, description="Model to check availability for")
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, HTTPException, Body
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from app.services.skill_service import skill_service
+from app.sse import sse_response
 
 router = APIRouter(prefix="/skills", tags=["skills"])
 
@@ -13,6 +14,17 @@ class SkillExecuteRequest(BaseModel):
     params: Optional[Dict[str, Any]] = None
     provider: Optional[str] = None
     model: Optional[str] = None
+    use_cache: bool = True
+
+
+class SkillBatchExecuteRequest(BaseModel):
+    paper_ids: List[str]
+    context: Optional[Dict[str, Any]] = None
+    params: Optional[Dict[str, Any]] = None
+    provider: Optional[str] = None
+    model: Optional[str] = None
+    use_cache: bool = True
+    concurrency: Optional[int] = Field(None, ge=1, le=64)
 
 
 class SkillExecuteResponse(BaseModel):
@@ -49,6 +61,28 @@ async def get_skills_by_category():
     return skill_service.get_skills_by_category()
 
 
+@router.get("/cache/stats")
+async def get_skill_cache_stats():
+    """
+    Get skill response cache metrics.
+    
+    Returns the number of cached responses and hit, miss and eviction
+    counts, overall and per skill.
+    """
+    return skill_service.get_cache_stats()
+
+
+@router.delete("/cache")
+async def clear_skill_cache(skill_id: Optional[str] = None):
+    """
+    Clear cached skill responses.
+    
+    Args:
+        skill_id: Only clear responses of this skill.
+    """
+    return skill_service.clear_cache(skill_id)
+
+
 @router.get("/{skill_id}")
 async def get_skill(skill_id: str):
     """
@@ -151,6 +185,7 @@ async def execute_skill(
         context=request.context,
         provider=request.provider,
         model=request.model,
+        use_cache=request.use_cache,
         **params
     )
     
@@ -161,3 +196,62 @@ async def execute_skill(
         )
     
     return result
+
+
+@router.post("/{skill_id}/execute/stream")
+async def execute_skill_stream(
+    skill_id: str,
+    request: SkillExecuteRequest = Body(default=SkillExecuteRequest())
+):
+    """
+    Execute a skill and stream its output as Server-Sent Events.
+    
+    Args:
+        skill_id: The unique identifier of the skill to execute.
+        request: The execution request containing paper IDs and parameters.
+    
+    Events:
+        delta: {"content": "..."} for each piece of generated text.
+        result: {"data": {...}} with the same result as /execute.
+        error: {"error": "..."} if the skill could not be executed.
+    """
+    params = request.params or {}
+    
+    return sse_response(skill_service.stream_skill(
+        skill_id=skill_id,
+        paper_ids=request.paper_ids,
+        context=request.context,
+        provider=request.provider,
+        model=request.model,
+        use_cache=request.use_cache,
+        **params
+    ))
+
+
+@router.post("/{skill_id}/execute-batch")
+async def execute_skill_batch(skill_id: str, request: SkillBatchExecuteRequest = Body(...)):
+    """
+    Execute a skill for many papers and stream per-paper results as Server-Sent Events.
+    
+    Args:
+        skill_id: The unique identifier of the skill to execute.
+        request: Paper IDs, shared parameters and an optional concurrency limit.
+    
+    Events:
+        start: {"skill_id": "...", "total": N}
+        result: {"index": i, "paper_id": "...", "data": {...}} per paper, in completion order.
+        done: {"total": N, "succeeded": S, "failed": F, "elapsed": seconds}
+        error: {"error": "..."} if the batch could not be started.
+    """
+    params = request.params or {}
+    
+    return sse_response(skill_service.execute_skill_batch(
+        skill_id=skill_id,
+        paper_ids=request.paper_ids,
+        context=request.context,
+        provider=request.provider,
+        model=request.model,
+        use_cache=request.use_cache,
+        concurrency=request.concurrency,
+        **params
+    ))
@@ -1,12 +1,21 @@
 from fastapi import APIRouter, HTTPException, Query
 from typing import Optional, List
 
-from app.services.subagents import subagent_manager
+from app.config import get_settings
+from app.services.subagents import subagent_manager, TaskQueueFullError, SubAgentPlan, SubAgentPlanError
+from app.sse import sse_response
 from app.models import (
     SubAgentInfo,
     SubAgentListResponse,
     SubAgentExecuteRequest,
     SubAgentExecuteResponse,
+    SubAgentPlanRequest,
+    SubAgentPlanNodeResponse,
+    SubAgentPlanResponse,
+    SubAgentRouteRequest,
+    SubAgentRouteResponse,
+    SubAgentTaskInfo,
+    SubAgentTaskListResponse,
     SubAgentCreateRequest,
     SubAgentSaveRequest,
     SubAgentReloadResponse,
@@ -29,6 +38,117 @@ async def list_subagents():
     )
 
 
+@router.get("/tasks", response_model=SubAgentTaskListResponse)
+async def list_subagent_tasks(agent_id: Optional[str] = Query(None, description="Only tasks of this SubAgent")):
+    """
+    List background SubAgent tasks, newest first.
+    
+    Finished tasks are listed until SUBAGENTS_TASK_RETENTION_SECONDS after they end.
+    """
+    tasks = subagent_manager.list_tasks(agent_id)
+    return SubAgentTaskListResponse(
+        tasks=[SubAgentTaskInfo(**task) for task in tasks],
+        total=len(tasks)
+    )
+
+
+@router.get("/tasks/stats")
+async def get_subagent_task_stats():
+    """
+    Get background task runner statistics (workers, running, queued, finished counts).
+    """
+    return subagent_manager.get_task_stats()
+
+
+@router.get("/tasks/resumable", response_model=SubAgentTaskListResponse)
+async def list_resumable_subagent_tasks(
+    agent_id: Optional[str] = Query(None, description="Only tasks of this SubAgent"),
+):
+    """
+    List journaled tasks that were interrupted, failed or cancelled and can be resumed.
+    """
+    tasks = subagent_manager.list_resumable_tasks(agent_id)
+    return SubAgentTaskListResponse(
+        tasks=[SubAgentTaskInfo(**task) for task in tasks],
+        total=len(tasks)
+    )
+
+
+@router.get("/tasks/{task_id}", response_model=SubAgentTaskInfo)
+async def get_subagent_task(task_id: str):
+    """
+    Get the status of a background SubAgent task, and its result once finished.
+    
+    Args:
+        task_id: The task ID returned when the task was submitted
+    """
+    task = subagent_manager.get_task(task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail=f"Task '{task_id}' not found")
+    return SubAgentTaskInfo(**task)
+
+
+@router.get("/tasks/{task_id}/events")
+async def stream_subagent_task_events(
+    task_id: str,
+    after: int = Query(0, ge=0, description="Only send events with a higher seq, to resume a stream"),
+):
+    """
+    Stream a background task's events as server-sent events.
+    
+    Events recorded so far are replayed, then new ones follow as they happen:
+    queued, started, resumed, turn, llm_response, tool_call, tool_result and a final
+    done event with the status and output. Every event carries a ``seq``
+    number; reconnect with ``after`` set to the last one received to resume.
+    
+    Args:
+        task_id: The task ID returned when the task was submitted
+    """
+    if not subagent_manager.get_task(task_id):
+        raise HTTPException(status_code=404, detail=f"Task '{task_id}' not found")
+    
+    heartbeat = get_settings().SUBAGENTS_TASK_HEARTBEAT_SECONDS or None
+    return sse_response(subagent_manager.stream_task_events(task_id, after=after, heartbeat=heartbeat))
+
+
+@router.post("/tasks/{task_id}/cancel", response_model=SubAgentTaskInfo)
+async def cancel_subagent_task(task_id: str):
+    """
+    Cancel a queued or running background task.
+    
+    Args:
+        task_id: The task ID returned when the task was submitted
+    """
+    task = await subagent_manager.cancel_task(task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail=f"Task '{task_id}' not found")
+    return SubAgentTaskInfo(**task)
+
+
+@router.post("/tasks/{task_id}/resume", response_model=SubAgentTaskInfo, status_code=202)
+async def resume_subagent_task(task_id: str):
+    """
+    Resume an interrupted, failed or cancelled task in the background.
+    
+    The task continues after the last turn it finished, with the messages,
+    papers and variables it had then, so earlier LLM calls are not repeated.
+    
+    Args:
+        task_id: The task ID returned when the task was submitted
+    """
+    try:
+        result = subagent_manager.resume_task(task_id)
+    except TaskQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"No resumable task '{task_id}'")
+    if not result.pop("success"):
+        raise HTTPException(status_code=409, detail=result.get("error", "Failed to resume SubAgent task"))
+    
+    return SubAgentTaskInfo(**result)
+
+
 @router.get("/{agent_id}", response_model=SubAgentInfo)
 async def get_subagent(agent_id: str):
     """
@@ -162,22 +282,72 @@ async def execute_subagent(agent_id: str, request: SubAgentExecuteRequest):
         model=result.model,
         provider=result.provider,
         turns_used=result.turns_used,
+        prompt_tokens=result.prompt_tokens,
+        completion_tokens=result.completion_tokens,
+        cached_tokens=result.cached_tokens,
+        cache_write_tokens=result.cache_write_tokens,
     )
 
 
+@router.post("/{agent_id}/tasks", response_model=SubAgentTaskInfo, status_code=202)
+async def submit_subagent_task(agent_id: str, request: SubAgentExecuteRequest):
+    """
+    Start a SubAgent task in the background.
+    
+    Returns at once with a task ID. Follow the run with
+    GET /tasks/{task_id}/events and fetch the result with GET /tasks/{task_id}.
+    
+    Args:
+        agent_id: The unique identifier of the SubAgent
+    """
+    if not subagent_manager.get_agent(agent_id):
+        raise HTTPException(status_code=404, detail=f"SubAgent '{agent_id}' not found")
+    
+    try:
+        result = subagent_manager.submit_task(
+            agent_id=agent_id,
+            instruction=request.instruction,
+            paper_ids=request.paper_ids,
+            context=request.context,
+            provider=request.provider,
+            model=request.model,
+            max_turns=request.max_turns,
+        )
+    except TaskQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    
+    if not result.pop("success"):
+        raise HTTPException(status_code=400, detail=result.get("error", "Failed to start SubAgent task"))
+    
+    return SubAgentTaskInfo(**result)
+
+
+@router.post("/route", response_model=SubAgentRouteResponse)
+async def route_task(request: SubAgentRouteRequest):
+    """
+    Rank SubAgents by how well their profile matches an instruction.
+    
+    Shows which agent /delegate would choose, without running it.
+    """
+    route = await subagent_manager.route_task(request.instruction, top_k=request.top_k)
+    if not route.get("agent_id"):
+        raise HTTPException(status_code=404, detail="No SubAgents available")
+    return SubAgentRouteResponse(**route)
+
+
 @router.post("/delegate", response_model=SubAgentExecuteResponse)
 async def delegate_task(request: SubAgentExecuteRequest):
     """
     Delegate a task to the most suitable SubAgent.
     
-    The system will automatically select an appropriate SubAgent based on the task.
+    The agent whose description, skills and tools are most similar to the
+    instruction (by embedding) is chosen, then runs the task.
     """
-    agents = subagent_manager.get_all_agents()
-    if not agents:
+    route = await subagent_manager.route_task(request.instruction, top_k=1)
+    agent_id = route.get("agent_id")
+    if not agent_id:
         raise HTTPException(status_code=404, detail="No SubAgents available")
     
-    agent_id = agents[0]["id"]
-    
     result = await subagent_manager.execute_agent(
         agent_id=agent_id,
         instruction=request.instruction,
@@ -197,6 +367,64 @@ async def delegate_task(request: SubAgentExecuteRequest):
         model=result.model,
         provider=result.provider,
         turns_used=result.turns_used,
+        prompt_tokens=result.prompt_tokens,
+        completion_tokens=result.completion_tokens,
+        cached_tokens=result.cached_tokens,
+        cache_write_tokens=result.cache_write_tokens,
+    )
+
+
+@router.post("/plans", response_model=SubAgentPlanResponse)
+async def execute_plan(request: SubAgentPlanRequest):
+    """
+    Run several SubAgent tasks that depend on each other in one request.
+    
+    The nodes form a DAG. A node starts as soon as the nodes in its
+    depends_on have completed and receives their outputs and papers, so
+    independent nodes run concurrently.
+    """
+    plan = SubAgentPlan(
+        nodes=[
+            {**node.model_dump(), "context": node.context or {}}
+            for node in request.nodes
+        ],
+        max_concurrency=request.max_concurrency,
+    )
+    try:
+        result = await subagent_manager.execute_plan(plan)
+    except SubAgentPlanError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return SubAgentPlanResponse(
+        plan_id=result.plan_id,
+        status=result.status.value,
+        nodes=[
+            SubAgentPlanNodeResponse(
+                node_id=node.node_id,
+                depends_on=node.depends_on,
+                started_at=node.started_at,
+                completed_at=node.completed_at,
+                paper_ids=[paper.get("id") for paper in node.result.papers if paper.get("id")],
+                result=SubAgentExecuteResponse(
+                    task_id=node.result.task_id,
+                    agent_id=node.result.agent_id,
+                    status=node.result.status.value,
+                    output=node.result.output,
+                    error=node.result.error,
+                    model=node.result.model,
+                    provider=node.result.provider,
+                    turns_used=node.result.turns_used,
+                    prompt_tokens=node.result.prompt_tokens,
+                    completion_tokens=node.result.completion_tokens,
+                    cached_tokens=node.result.cached_tokens,
+                    cache_write_tokens=node.result.cache_write_tokens,
+                ),
+            )
+            for node in result.nodes
+        ],
+        elapsed_seconds=result.elapsed_seconds,
+        critical_path=result.critical_path,
+        critical_path_seconds=result.critical_path_seconds,
     )
 
 
@@ -0,0 +1,246 @@
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+_CJK_RE = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]")
+_WORD_RE = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*|[㐀-䶿一-鿿]")
+_SENTENCE_RE = re.compile(r"(?<=[.!?。！？])\s+(?=[A-Z0-9\"'(\[一-鿿])")
+
+_STOPWORDS = frozenset("""
+a an and are as at be been by can do does for from has have how i if in into is it its
+of on or our that the their there these this those to was we what when where which while
+who why will with you your about between than then them they paper papers show shows
+""".split())
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token count estimate without a tokenizer model.
+
+    BPE tokenizers average about four characters per token for English
+    prose and about one token per CJK character.
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def split_sentences(text: str) -> List[str]:
+    text = re.sub(r"\s+", " ", text or "").strip()
+    if not text:
+        return []
+    return [s.strip() for s in _SENTENCE_RE.split(text) if s.strip()]
+
+
+def _terms(text: str) -> List[str]:
+    return [t for t in _WORD_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+@dataclass
+class _Passage:
+    paper_index: int
+    text: str
+    order: float
+    source: str
+    relevance: float = 0.0
+    score: float = 0.0
+    page: int = 0
+    tokens: int = 0
+
+
+class ContextBuilder:
+    """
+    Builds the /ask prompt context from the passages most relevant to the question.
+
+    Candidates are the sentences of each paper's abstract and full-text
+    chunks found by vector search when the paper has been downloaded and
+    indexed. Both are scored with BM25 against the question, on a scale
+    where an average-length passage containing every question term once is
+    1.0, so matching only a few terms stays well below it. A chunk's
+    relevance is the higher of that and its cosine similarity. Each
+    candidate's score mixes its own relevance with the paper's search
+    similarity. The best candidates are packed greedily into
+    ``token_budget``. Anything less relevant than ``min_relative_score`` of
+    the best candidate is left out, so a large budget is not filled with
+    filler. A paper's header (title, authors, year) is charged to the budget
+    the first time one of its passages is chosen. The output lists papers in
+    search order and their passages in document order.
+    """
+
+    HEADER = "Here are the most relevant passages from papers in the database:\n"
+    EMPTY = "No relevant papers found in the database."
+
+    def __init__(
+        self,
+        token_budget: int = 2000,
+        max_passage_tokens: int = 400,
+        paper_weight: float = 0.4,
+        min_relative_score: float = 0.5,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        self.token_budget = token_budget
+        self.max_passage_tokens = max_passage_tokens
+        self.paper_weight = paper_weight
+        self.min_relative_score = min_relative_score
+        self.k1 = k1
+        self.b = b
+
+    @staticmethod
+    def _paper_header(number: int, paper: Dict[str, Any]) -> str:
+        title = paper.get("title", "Unknown Title")
+        authors = paper.get("authors", [])
+        authors_str = ", ".join(authors[:3]) if authors else "Unknown Authors"
+        if len(authors) > 3:
+            authors_str += " et al."
+        published = paper.get("published", "")
+        year = published[:4] if published else "Unknown Year"
+        return f"\nPaper {number}:\nTitle: {title}\nAuthors: {authors_str}\nYear: {year}\n"
+
+    def _truncate(self, text: str) -> str:
+        if estimate_tokens(text) <= self.max_passage_tokens:
+            return text
+        words = text.split()
+        kept: List[str] = []
+        used = 0
+        for word in words:
+            cost = estimate_tokens(word) + 1
+            if used + cost > self.max_passage_tokens:
+                break
+            kept.append(word)
+            used += cost
+        return " ".join(kept) + " ..."
+
+    def _score_lexical(self, question: str, passages: List[_Passage]):
+        query = set(_terms(question))
+        docs = [Counter(_terms(p.text)) for p in passages]
+        if not query or not docs:
+            return
+
+        avg_len = sum(sum(d.values()) for d in docs) / len(docs) or 1.0
+        df = Counter(term for d in docs for term in query if term in d)
+        n = len(docs)
+        raw = []
+        for doc in docs:
+            length = sum(doc.values())
+            score = 0.0
+            for term in query:
+                tf = doc.get(term, 0)
+                if not tf:
+                    continue
+                idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+                score += idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / avg_len))
+            raw.append(score)
+
+        # An average-length passage with every question term once scores
+        # sum(idf), where terms no passage contains get the top idf. Scaling
+        # by that, rather than by the best score, keeps a weak best match
+        # from reaching 1.0 and outranking chunks scored by cosine similarity
+        ideal = sum(math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5)) for term in query) or 1.0
+        for passage, score in zip(passages, raw):
+            passage.relevance = max(passage.relevance, min(1.0, score / ideal))
+
+    def _candidates(
+        self,
+        question: str,
+        papers: List[Dict[str, Any]],
+        passages: Optional[List[Dict[str, Any]]],
+    ) -> List[_Passage]:
+        index_by_id = {paper.get("id"): i for i, paper in enumerate(papers)}
+
+        sentences: List[_Passage] = []
+        for i, paper in enumerate(papers):
+            for order, sentence in enumerate(split_sentences(paper.get("abstract", ""))):
+                sentences.append(_Passage(paper_index=i, text=sentence, order=order, source="abstract"))
+
+        chunks: List[_Passage] = []
+        for hit in passages or []:
+            i = index_by_id.get(hit.get("paper_id"))
+            text = (hit.get("text") or "").strip()
+            if i is None or not text:
+                continue
+            chunks.append(_Passage(
+                paper_index=i,
+                text=text,
+                # Full-text passages follow the abstract
+                order=1000 + (hit.get("chunk_index") or 0),
+                source="fulltext",
+                relevance=max(0.0, float(hit.get("similarity_score") or 0.0)),
+                page=hit.get("page") or 0,
+            ))
+
+        candidates = sentences + chunks
+        # Chunks keep their vector similarity if it beats their term match
+        self._score_lexical(question, candidates)
+        for passage in candidates:
+            similarity = max(0.0, float(papers[passage.paper_index].get("similarity_score") or 0.0))
+            passage.score = self.paper_weight * similarity + (1 - self.paper_weight) * passage.relevance
+            passage.text = self._truncate(passage.text)
+            passage.tokens = estimate_tokens(passage.text) + 1
+        return candidates
+
+    def select(
+        self,
+        question: str,
+        papers: List[Dict[str, Any]],
+        passages: Optional[List[Dict[str, Any]]] = None,
+    ) -> Dict[int, List[_Passage]]:
+        """Choose passages per paper index within the token budget."""
+        candidates = self._candidates(question, papers, passages)
+        # Stable on ties: earlier papers and earlier sentences win
+        candidates.sort(key=lambda p: (-p.score, p.paper_index, p.order))
+
+        remaining = self.token_budget - estimate_tokens(self.HEADER)
+        # Filler is judged on relevance alone; every passage of a paper shares
+        # its search similarity, which would otherwise lift them all over the cutoff
+        cutoff = max((p.relevance for p in candidates), default=0.0) * self.min_relative_score
+        chosen: Dict[int, List[_Passage]] = {}
+        for passage in candidates:
+            if passage.relevance < cutoff:
+                continue
+            cost = passage.tokens
+            if passage.paper_index not in chosen:
+                cost += estimate_tokens(self._paper_header(passage.paper_index + 1, papers[passage.paper_index]))
+            if cost > remaining:
+                continue
+            chosen.setdefault(passage.paper_index, []).append(passage)
+            remaining -= cost
+        return chosen
+
+    def build(
+        self,
+        question: str,
+        papers: List[Dict[str, Any]],
+        passages: Optional[List[Dict[str, Any]]] = None,
+    ) -> str:
+        if not papers:
+            return self.EMPTY
+
+        chosen = self.select(question, papers, passages)
+        if not chosen:
+            return self.EMPTY
+
+        parts = [self.HEADER]
+        for number, paper_index in enumerate(sorted(chosen), 1):
+            parts.append(self._paper_header(number, papers[paper_index]))
+            selected = sorted(chosen[paper_index], key=lambda p: p.order)
+
+            abstract = [p for p in selected if p.source == "abstract"]
+            if abstract:
+                text, previous = "", None
+                for p in abstract:
+                    if previous is not None:
+                        text += " " if p.order == previous + 1 else " ... "
+                    text += p.text
+                    previous = p.order
+                parts.append(f"Abstract: {text}\n")
+
+            for p in selected:
+                if p.source == "fulltext":
+                    location = f" (p. {p.page})" if p.page else ""
+                    parts.append(f"Excerpt{location}: {p.text}\n")
+
+        return "\n".join(parts)
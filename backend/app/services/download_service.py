@@ -32,6 +32,9 @@ class DownloadService:
             task_id, status, progress, file_path, file_size, error_message
         )
 
+    def update_tasks_status_batch(self, updates: List[Dict[str, Any]]) -> int:
+        return self._repository.update_status_batch(updates)
+
     def get_task_by_paper_id(self, paper_id: str) -> Optional[Dict[str, Any]]:
         return self._repository.get_by_paper_id(paper_id)
 
@@ -41,5 +44,11 @@ class DownloadService:
     def reset_incomplete_tasks(self) -> int:
         return self._repository.reset_incomplete_tasks()
 
+    def get_active_tasks_by_paper_ids(self, paper_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        return self._repository.get_active_by_paper_ids(paper_ids)
+
+    def create_tasks_batch(self, tasks_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return self._repository.add_batch(tasks_data)
+
 
 download_service = DownloadService()
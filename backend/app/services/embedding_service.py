@@ -4,6 +4,7 @@ from typing import List, Optional, Tuple
 from abc import ABC, abstractmethod
 
 from app.config import get_settings
+from app.services.llm_resilience import CircuitBreaker
 
 _settings = get_settings()
 os.environ['HF_ENDPOINT'] = _settings.HF_ENDPOINT
@@ -183,6 +184,9 @@ class EmbeddingService:
         self.settings = get_settings()
         self._primary_provider: Optional[EmbeddingProvider] = None
         self._fallback_provider: Optional[EmbeddingProvider] = None
+        # While open, requests go straight to the fallback instead of waiting
+        # for the failing primary provider every time
+        self._primary_breaker = CircuitBreaker(failure_threshold=3, reset_seconds=60.0)
         self._initialized = False
     
     def _initialize(self):
@@ -226,10 +230,15 @@ class EmbeddingService:
         """
         self._initialize()
         
+        if self._fallback_provider and not self._primary_breaker.allow():
+            return self._fallback_provider.encode(text), self._fallback_provider.get_model_name()
+        
         try:
             embedding = self._primary_provider.encode(text)
+            self._primary_breaker.record_success()
             return embedding, self._primary_provider.get_model_name()
         except Exception as e:
+            self._primary_breaker.record_failure()
             if self._fallback_provider:
                 logger.warning(f"Primary provider failed, using fallback: {e}")
                 embedding = self._fallback_provider.encode(text)
@@ -248,10 +257,15 @@ class EmbeddingService:
         if not texts:
             return [], ""
         
+        if self._fallback_provider and not self._primary_breaker.allow():
+            return self._fallback_provider.encode_batch(texts), self._fallback_provider.get_model_name()
+        
         try:
             embeddings = self._primary_provider.encode_batch(texts)
+            self._primary_breaker.record_success()
             return embeddings, self._primary_provider.get_model_name()
         except Exception as e:
+            self._primary_breaker.record_failure()
             if self._fallback_provider:
                 logger.warning(f"Primary provider failed, using fallback: {e}")
                 embeddings = self._fallback_provider.encode_batch(texts)
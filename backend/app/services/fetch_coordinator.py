@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into one in-flight coroutine.
+
+    The first caller for a key starts the work; every caller that arrives
+    while it is running awaits the same task and receives the same result
+    (or exception). The work runs as its own task, so a caller that gets
+    cancelled does not abort the fetch for everyone else.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._forget(k, _t))
+        else:
+            logger.info(f"Joining in-flight fetch for {key}")
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def is_inflight(self, key: str) -> bool:
+        return key in self._inflight
+
+    def inflight_count(self) -> int:
+        return len(self._inflight)
+
+
+class SQLiteAdvisoryLock:
+    """
+    Cross-process advisory lock backed by a SQLite table.
+
+    Used to serialize date fetches between uvicorn workers that share the
+    same host. Locks carry an expiry so a crashed worker cannot hold a key
+    forever; an expired lock is taken over by the next caller.
+    """
+
+    def __init__(self, db_path: str, busy_timeout: float = 1.0):
+        self._db_path = db_path
+        self.busy_timeout = busy_timeout
+        self._ensure_db_dir()
+        self._init_tables()
+
+    def _ensure_db_dir(self):
+        db_dir = os.path.dirname(self._db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+
+    @contextmanager
+    def _get_connection(self, timeout: float = 30.0):
+        conn = sqlite3.connect(self._db_path, timeout=timeout, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_tables(self):
+        with self._get_connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS advisory_locks (
+                    lock_key TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            ''')
+
+    def try_acquire(self, key: str, owner: str, ttl: float) -> bool:
+        """
+        Try to take the lock for key; returns True if owner now holds it.
+
+        Waits at most ``busy_timeout`` seconds for another writer and returns
+        False if the table stays busy, so callers keep polling instead of
+        blocking on SQLite's lock.
+        """
+        now = time.time()
+        with self._get_connection(timeout=self.busy_timeout) as conn:
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+            except sqlite3.OperationalError as e:
+                logger.debug(f"Advisory lock table busy for {key}: {e}")
+                return False
+            try:
+                conn.execute(
+                    'DELETE FROM advisory_locks WHERE lock_key = ? AND expires_at < ?',
+                    (key, now),
+                )
+                cursor = conn.execute(
+                    'INSERT OR IGNORE INTO advisory_locks (lock_key, owner, expires_at) VALUES (?, ?, ?)',
+                    (key, owner, now + ttl),
+                )
+                acquired = cursor.rowcount > 0
+                conn.execute('COMMIT')
+                return acquired
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+    def release(self, key: str, owner: str) -> bool:
+        """Release the lock if it is still held by owner."""
+        with self._get_connection() as conn:
+            cursor = conn.execute(
+                'DELETE FROM advisory_locks WHERE lock_key = ? AND owner = ?',
+                (key, owner),
+            )
+            return cursor.rowcount > 0
@@ -1,6 +1,6 @@
 import logging
 from typing import List, Dict, Any, Optional, Tuple
-from collections import Counter
+from collections import Counter, OrderedDict
 
 from app.db.factory import get_paper_repository, get_paper_embedding_repository
 from app.services.embedding_service import embedding_service
@@ -61,9 +61,25 @@ def truncate_label(text: str, max_length: int = 25) -> str:
 
 
 class GraphService:
+    GRAPH_CACHE_SIZE = 32
+
     def __init__(self):
         self.paper_repo = get_paper_repository()
         self.embedding_repo = get_paper_embedding_repository()
+        self._graph_cache: "OrderedDict[Tuple[str, float, Optional[str], int], KnowledgeGraphData]" = OrderedDict()
+
+    def clear_cache(self, date: Optional[str] = None) -> int:
+        """Drop cached graphs for a date, or all cached graphs if no date is given."""
+        if date is None:
+            count = len(self._graph_cache)
+            self._graph_cache.clear()
+            return count
+        
+        normalized_date = self._normalize_date(date)
+        keys = [k for k in self._graph_cache if k[0] == normalized_date]
+        for key in keys:
+            del self._graph_cache[key]
+        return len(keys)
 
     def _normalize_date(self, date_str: str) -> str:
         import re
@@ -265,6 +281,12 @@ class GraphService:
     ) -> KnowledgeGraphData:
         normalized_date = self._normalize_date(date)
         
+        cache_key = (normalized_date, threshold, category, max_papers)
+        cached = self._graph_cache.get(cache_key)
+        if cached is not None:
+            self._graph_cache.move_to_end(cache_key)
+            return cached
+        
         papers = await self.get_papers_for_graph(normalized_date, category, max_papers)
         
         if not papers:
@@ -285,7 +307,13 @@ class GraphService:
         
         similarities = self.calculate_similarity_matrix(embeddings, threshold)
         
-        return self.build_graph(papers, similarities, normalized_date)
+        graph = self.build_graph(papers, similarities, normalized_date)
+        
+        self._graph_cache[cache_key] = graph
+        if len(self._graph_cache) > self.GRAPH_CACHE_SIZE:
+            self._graph_cache.popitem(last=False)
+        
+        return graph
 
     async def get_similarity_matrix(
         self,
@@ -0,0 +1,323 @@
+import asyncio
+import email.utils
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 529 is Anthropic's "overloaded"
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 429, 500, 502, 503, 504, 529})
+# Connection and timeout errors of httpx, openai and anthropic
+RETRYABLE_ERROR_NAMES = frozenset({
+    "APIConnectionError", "APITimeoutError", "ConnectError", "ConnectTimeout",
+    "ReadError", "ReadTimeout", "RemoteProtocolError", "PoolTimeout",
+})
+
+
+def parse_provider_limits(spec: str) -> Dict[str, int]:
+    """Parse "openai=8,ollama=1" into {"openai": 8, "ollama": 1}."""
+    limits = {}
+    for item in spec.split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip().isdigit():
+            limits[name.strip().lower()] = max(1, int(value))
+    return limits
+
+
+def status_code_of(error: BaseException) -> Optional[int]:
+    """The HTTP status of an openai, anthropic or httpx error, if it has one."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    status = status_code_of(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def retry_after_of(error: BaseException) -> Optional[float]:
+    """Seconds the server asked to wait, from Retry-After or retry-after-ms."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return max(0.0, float(headers["retry-after-ms"]) / 1000)
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            retry_at = email.utils.parsedate_to_datetime(value)
+            return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider whose circuit breaker is open."""
+    
+    def __init__(self, provider: str, retry_in: float):
+        super().__init__(f"LLM provider '{provider}' is unavailable after repeated failures, retry in {retry_in:.0f}s")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+class TokenBucket:
+    """
+    Tokens-per-minute limiter.
+    
+    Holds up to one minute's worth of tokens and refills continuously.
+    A request reserves its estimated size up front; once the real usage
+    is known the difference is settled, so underestimates delay the next
+    requests instead of overrunning the provider's limit.
+    """
+    
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    async def acquire(self, tokens: int) -> float:
+        """Wait until ``tokens`` are available and take them; returns the seconds waited."""
+        tokens = min(float(tokens), self.capacity)
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        waited = 0.0
+        # Callers queue on the lock, so a large request is not starved by small ones
+        async with self._lock:
+            self._refill()
+            while self.tokens < tokens:
+                delay = (tokens - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+                self._refill()
+            self.tokens -= tokens
+        return waited
+    
+    def settle(self, reserved: int, used: int):
+        """Correct a reservation once the real token count is known."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + min(float(reserved), self.capacity) - used)
+
+
+class CircuitBreaker:
+    """
+    Stops calling a provider after ``failure_threshold`` failures in a row.
+    
+    While open, calls fail at once. After ``reset_seconds`` one trial call
+    is let through; it closes the breaker if it succeeds and opens it
+    again if it fails.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+    
+    def retry_in(self) -> float:
+        return max(0.0, self._opened_at + self.reset_seconds - time.monotonic())
+    
+    def allow(self) -> bool:
+        if self.state == self.OPEN and self.retry_in() == 0:
+            self.state = self.HALF_OPEN
+            self._trial_running = False
+        if self.state == self.HALF_OPEN:
+            if self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+        return self.state == self.CLOSED
+    
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trial_running = False
+    
+    def abandon_trial(self):
+        """Let another call through after a trial call was cancelled."""
+        self._trial_running = False
+    
+    def record_failure(self) -> bool:
+        """Count a failure; returns True if this opened the breaker."""
+        self.failures += 1
+        self._trial_running = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            opened = self.state != self.OPEN
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+            if opened:
+                self.opened += 1
+            return opened
+        return False
+
+
+class ProviderGuard:
+    """
+    Concurrency limit, rate limit, retries and circuit breaker for one provider.
+    
+    ``call`` waits for one of ``concurrency`` slots and, with a
+    ``tokens_per_minute`` limit, for room in the token bucket. Rate limit,
+    overload, server and connection errors are retried up to
+    ``max_retries`` times with full-jitter exponential backoff, or after
+    the server's Retry-After when it sends one. Failures that remain count
+    towards the circuit breaker; other errors, such as a bad request, are
+    raised at once and do not.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        concurrency: int = 8,
+        tokens_per_minute: int = 0,
+        max_retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+    ):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max(0, max_retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.bucket = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.breaker = CircuitBreaker(failure_threshold, reset_seconds)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self.counters: Dict[str, float] = {
+            "calls": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "short_circuited": 0,
+            "fallbacks": 0,
+            "queued_seconds": 0.0,
+            "throttled_seconds": 0.0,
+        }
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+    
+    def check_circuit(self):
+        """Raise CircuitOpenError if the provider should not be called now."""
+        if not self.breaker.allow():
+            self.counters["short_circuited"] += 1
+            raise CircuitOpenError(self.name, self.breaker.retry_in())
+        self.counters["calls"] += 1
+    
+    def backoff(self, attempt: int, error: BaseException) -> float:
+        retry_after = retry_after_of(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+    
+    async def acquire(self, estimated_tokens: int = 0):
+        """Take a concurrency slot and reserve tokens; pair with ``release``."""
+        started = time.monotonic()
+        await self._get_semaphore().acquire()
+        self._in_flight += 1
+        self.counters["queued_seconds"] += time.monotonic() - started
+        if self.bucket is not None and estimated_tokens:
+            self.counters["throttled_seconds"] += await self.bucket.acquire(estimated_tokens)
+    
+    def release(self, estimated_tokens: int = 0, used_tokens: Optional[int] = None):
+        if self.bucket is not None and estimated_tokens and used_tokens is not None:
+            self.bucket.settle(estimated_tokens, used_tokens)
+        self._in_flight -= 1
+        self._get_semaphore().release()
+    
+    def record_success(self):
+        self.counters["succeeded"] += 1
+        self.breaker.record_success()
+    
+    def record_failure(self, error: BaseException):
+        self.counters["failed"] += 1
+        if not is_retryable(error):
+            # The provider answered, the request itself was wrong
+            self.breaker.record_success()
+        elif self.breaker.record_failure():
+            logger.warning(
+                f"[LLM Guard] Circuit opened for {self.name} after {self.breaker.failures} failures: {error}"
+            )
+    
+    def should_retry(self, attempt: int, error: BaseException) -> bool:
+        if status_code_of(error) == 429:
+            self.counters["rate_limited"] += 1
+        return attempt < self.max_retries and is_retryable(error)
+    
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        estimated_tokens: int = 0,
+        used_tokens: Optional[Callable[[T], Optional[int]]] = None,
+    ) -> T:
+        """Run ``fn`` under the limits, retrying transient errors."""
+        self.check_circuit()
+        attempt = 0
+        while True:
+            await self.acquire(estimated_tokens)
+            used = None
+            try:
+                result = await fn()
+                used = used_tokens(result) if used_tokens else None
+            except Exception as e:
+                self.release(estimated_tokens)
+                if not self.should_retry(attempt, e):
+                    self.record_failure(e)
+                    raise
+                delay = self.backoff(attempt, e)
+                attempt += 1
+                self.counters["retries"] += 1
+                logger.warning(
+                    f"[LLM Guard] {self.name} call failed ({e}), retry {attempt}/{self.max_retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self.release(estimated_tokens)
+                self.breaker.abandon_trial()
+                raise
+            self.release(estimated_tokens, used)
+            self.record_success()
+            return result
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **{key: round(value, 3) if isinstance(value, float) else value for key, value in self.counters.items()},
+            "in_flight": self._in_flight,
+            "concurrency": self.concurrency,
+            "tokens_per_minute": int(self.bucket.capacity) if self.bucket else 0,
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "circuit_opened": self.breaker.opened,
+        }
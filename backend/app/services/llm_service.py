@@ -1,15 +1,212 @@
+import asyncio
+import json
 import logging
-from typing import List, Dict, Any, Optional
+import time
+from dataclasses import asdict, dataclass, field
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable, Tuple
 from abc import ABC, abstractmethod
 
 from app.config import get_settings
+from app.services.context_builder import ContextBuilder, estimate_tokens
+from app.services.llm_resilience import CircuitOpenError, ProviderGuard, is_retryable, parse_provider_limits
 
 logger = logging.getLogger(__name__)
 
+# Anthropic keeps a cached prefix for five minutes after its last use
+EPHEMERAL_CACHE = {"type": "ephemeral"}
+
+
+@dataclass
+class LLMUsage:
+    """Token counts reported by a provider for one or more calls."""
+    
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # Prompt tokens served from the provider's prefix cache
+    cached_tokens: int = 0
+    # Prompt tokens written to the prefix cache (Anthropic only)
+    cache_write_tokens: int = 0
+    calls: int = 0
+    
+    def add(self, other: "LLMUsage"):
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.cached_tokens += other.cached_tokens
+        self.cache_write_tokens += other.cache_write_tokens
+        self.calls += other.calls
+    
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+@dataclass
+class LLMToolCall:
+    """A native tool call requested by the model."""
+    
+    id: str
+    name: str
+    arguments: Dict[str, Any]
+
+
+@dataclass
+class LLMCompletion:
+    """Text, native tool calls and token usage of one LLM call."""
+    
+    text: str
+    tool_calls: List[LLMToolCall] = field(default_factory=list)
+    usage: LLMUsage = field(default_factory=LLMUsage)
+
+
+def _parse_arguments(arguments: Any) -> Dict[str, Any]:
+    """Tool-call arguments as a dict; arguments that are not a JSON object are kept under "raw"."""
+    if isinstance(arguments, dict):
+        return arguments
+    try:
+        parsed = json.loads(arguments) if arguments else {}
+    except json.JSONDecodeError:
+        return {"raw": arguments}
+    return parsed if isinstance(parsed, dict) else {"raw": arguments}
+
+
+def _tool_result_text(message: Dict[str, Any]) -> str:
+    return f"[{message.get('name') or 'tool'} result]\n{message['content']}"
+
+
+def _text_tool_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Rewrite native tool calls and results as text, for a provider without tools.
+    
+    Calls are written in the ``[TOOL: name(arguments)]`` text protocol and
+    results are sent as user messages.
+    """
+    converted = []
+    for msg in messages:
+        if msg.get("tool_calls"):
+            calls = "\n".join(
+                f"[TOOL: {call['name']}({json.dumps(call['arguments'], ensure_ascii=False)})]"
+                for call in msg["tool_calls"]
+            )
+            converted.append({"role": "assistant", "content": f"{msg['content'] or ''}\n{calls}".strip()})
+        elif msg["role"] == "tool":
+            converted.append({"role": "user", "content": _tool_result_text(msg)})
+        else:
+            converted.append(msg)
+    return converted
+
+
+def _openai_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Convert llm_service messages to the OpenAI chat format.
+    
+    Tool calls become ``function`` calls. A tool result that answers no
+    native call (the text protocol) is sent as a user message, since the
+    API only accepts ``tool`` messages right after the call they answer.
+    """
+    converted = []
+    announced = set()
+    for msg in messages:
+        if msg.get("tool_calls"):
+            announced.update(call["id"] for call in msg["tool_calls"])
+            converted.append({
+                "role": "assistant",
+                "content": msg["content"] or None,
+                "tool_calls": [
+                    {
+                        "id": call["id"],
+                        "type": "function",
+                        "function": {
+                            "name": call["name"],
+                            "arguments": json.dumps(call["arguments"], ensure_ascii=False),
+                        },
+                    }
+                    for call in msg["tool_calls"]
+                ],
+            })
+        elif msg["role"] == "tool":
+            if msg.get("tool_call_id") in announced:
+                converted.append({"role": "tool", "tool_call_id": msg["tool_call_id"], "content": msg["content"]})
+            else:
+                converted.append({"role": "user", "content": _tool_result_text(msg)})
+        else:
+            converted.append({"role": msg["role"], "content": msg["content"]})
+    return converted
+
+
+def _openai_tools(tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [{"type": "function", "function": tool} for tool in tools]
+
+
+def _openai_completion(response) -> LLMCompletion:
+    message = response.choices[0].message
+    return LLMCompletion(
+        text=message.content or "",
+        tool_calls=[
+            LLMToolCall(id=call.id, name=call.function.name, arguments=_parse_arguments(call.function.arguments))
+            for call in (getattr(message, "tool_calls", None) or [])
+        ],
+        usage=_openai_usage(response.usage),
+    )
+
+
+def _anthropic_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Convert the non-system llm_service messages to the Anthropic format.
+    
+    Tool calls become ``tool_use`` blocks of the assistant message, and the
+    results of one turn are sent together as ``tool_result`` blocks of a
+    single user message.
+    """
+    converted: List[Dict[str, Any]] = []
+    announced = set()
+    for msg in messages:
+        if msg["role"] == "system":
+            continue
+        if msg.get("tool_calls"):
+            announced.update(call["id"] for call in msg["tool_calls"])
+            blocks = [{"type": "text", "text": msg["content"]}] if msg["content"] else []
+            blocks.extend(
+                {"type": "tool_use", "id": call["id"], "name": call["name"], "input": call["arguments"]}
+                for call in msg["tool_calls"]
+            )
+            converted.append({"role": "assistant", "content": blocks})
+        elif msg["role"] == "tool" and msg.get("tool_call_id") in announced:
+            block = {"type": "tool_result", "tool_use_id": msg["tool_call_id"], "content": msg["content"]}
+            previous = converted[-1] if converted else None
+            if (
+                previous
+                and previous["role"] == "user"
+                and isinstance(previous["content"], list)
+                and previous["content"][-1].get("type") == "tool_result"
+            ):
+                previous["content"].append(block)
+            else:
+                converted.append({"role": "user", "content": [block]})
+        elif msg["role"] == "tool":
+            converted.append({"role": "user", "content": _tool_result_text(msg)})
+        else:
+            converted.append({"role": msg["role"], "content": msg["content"]})
+    return converted
+
+
+def _openai_usage(usage) -> LLMUsage:
+    """Read the usage block of an OpenAI-compatible chat completion."""
+    if usage is None:
+        return LLMUsage(calls=1)
+    details = getattr(usage, "prompt_tokens_details", None)
+    return LLMUsage(
+        prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+        completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        cached_tokens=getattr(details, "cached_tokens", 0) or 0,
+        calls=1,
+    )
+
 
 class LLMProvider(ABC):
     """Abstract base class for LLM providers."""
     
+    # Whether complete() accepts native tool schemas through ``tools``
+    supports_tools = False
+    
     @abstractmethod
     async def generate(
         self, 
@@ -19,6 +216,36 @@ class LLMProvider(ABC):
         """Generate response from messages."""
         pass
     
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Generate a response as an async iterator of text deltas.
+        
+        Providers without native streaming yield the complete response once.
+        """
+        yield await self.generate(messages, **kwargs)
+    
+    async def complete(
+        self,
+        messages: List[Dict[str, Any]],
+        **kwargs
+    ) -> LLMCompletion:
+        """
+        Generate a response and report the tool calls and tokens it used.
+        
+        With ``cache_prefix=True`` the provider marks or keeps the prompt
+        prefix for reuse by its prompt cache where the API supports it;
+        ``cache_key`` groups requests that share a prefix. Providers with
+        ``supports_tools`` accept ``tools``, a list of function schemas
+        (name, description and JSON schema ``parameters``), and return the
+        calls the model makes. Providers that do not report usage return
+        empty counts.
+        """
+        return LLMCompletion(text=await self.generate(messages, **kwargs), usage=LLMUsage(calls=1))
+    
     @abstractmethod
     def get_model_name(self) -> str:
         """Return the model name."""
@@ -28,6 +255,8 @@ class LLMProvider(ABC):
 class OpenAIProvider(LLMProvider):
     """OpenAI LLM provider."""
     
+    supports_tools = True
+    
     def __init__(self, api_key: str, model: str, temperature: float = 0.7, max_tokens: int = 2048):
         self.api_key = api_key
         self.model = model
@@ -46,16 +275,51 @@ class OpenAIProvider(LLMProvider):
         messages: List[Dict[str, str]], 
         **kwargs
     ) -> str:
+        completion = await self.complete(messages, **kwargs)
+        return completion.text
+    
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        **kwargs
+    ) -> LLMCompletion:
+        client = self._get_client()
+        
+        params = {
+            "model": self.model,
+            "messages": _openai_messages(messages),
+            "temperature": kwargs.get("temperature", self.temperature),
+            "max_tokens": kwargs.get("max_tokens", self.max_tokens),
+        }
+        if kwargs.get("tools"):
+            params["tools"] = _openai_tools(kwargs["tools"])
+        if kwargs.get("cache_prefix") and kwargs.get("cache_key"):
+            # Prompts of 1024+ tokens are cached automatically; the key keeps
+            # requests sharing a prefix on the same cache shard
+            params["extra_body"] = {"prompt_cache_key": kwargs["cache_key"]}
+        
+        response = await client.chat.completions.create(**params)
+        
+        return _openai_completion(response)
+    
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        **kwargs
+    ) -> AsyncIterator[str]:
         client = self._get_client()
         
         response = await client.chat.completions.create(
             model=self.model,
-            messages=messages,
+            messages=_openai_messages(messages),
             temperature=kwargs.get("temperature", self.temperature),
             max_tokens=kwargs.get("max_tokens", self.max_tokens),
+            stream=True,
         )
         
-        return response.choices[0].message.content
+        async for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
     
     def get_model_name(self) -> str:
         return self.model
@@ -64,6 +328,8 @@ class OpenAIProvider(LLMProvider):
 class AnthropicProvider(LLMProvider):
     """Anthropic Claude LLM provider."""
     
+    supports_tools = True
+    
     def __init__(self, api_key: str, model: str, temperature: float = 0.7, max_tokens: int = 2048):
         self.api_key = api_key
         self.model = model
@@ -82,25 +348,83 @@ class AnthropicProvider(LLMProvider):
         messages: List[Dict[str, str]], 
         **kwargs
     ) -> str:
+        completion = await self.complete(messages, **kwargs)
+        return completion.text
+    
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        **kwargs
+    ) -> LLMCompletion:
         client = self._get_client()
         
-        system_message = ""
-        chat_messages = []
-        for msg in messages:
-            if msg["role"] == "system":
-                system_message = msg["content"]
-            else:
-                chat_messages.append(msg)
+        response = await client.messages.create(**self._request_params(messages, **kwargs))
         
-        response = await client.messages.create(
-            model=self.model,
-            max_tokens=kwargs.get("max_tokens", self.max_tokens),
-            temperature=kwargs.get("temperature", self.temperature),
-            system=system_message if system_message else None,
-            messages=chat_messages,
-        )
+        text = "".join(block.text for block in response.content if block.type == "text")
+        tool_calls = [
+            LLMToolCall(id=block.id, name=block.name, arguments=_parse_arguments(block.input))
+            for block in response.content if block.type == "tool_use"
+        ]
+        usage = response.usage
+        cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", 0) or 0
+        return LLMCompletion(text=text, tool_calls=tool_calls, usage=LLMUsage(
+            # input_tokens only counts the tokens after the last cache breakpoint
+            prompt_tokens=(getattr(usage, "input_tokens", 0) or 0) + cache_read + cache_write,
+            completion_tokens=getattr(usage, "output_tokens", 0) or 0,
+            cached_tokens=cache_read,
+            cache_write_tokens=cache_write,
+            calls=1,
+        ))
+    
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        **kwargs
+    ) -> AsyncIterator[str]:
+        client = self._get_client()
         
-        return response.content[0].text
+        async with client.messages.stream(**self._request_params(messages, **kwargs)) as response:
+            async for text in response.text_stream:
+                if text:
+                    yield text
+    
+    def _request_params(self, messages: List[Dict[str, Any]], **kwargs) -> Dict[str, Any]:
+        system_parts = [msg["content"] for msg in messages if msg["role"] == "system" and msg["content"]]
+        chat_messages = _anthropic_messages(messages)
+        
+        if kwargs.get("cache_prefix"):
+            # Two cache breakpoints: the system prompt, which is shared by every
+            # turn, and the newest message, so the next turn reads the whole
+            # conversation so far from the cache
+            system = [{"type": "text", "text": part} for part in system_parts] or None
+            if system:
+                system[-1]["cache_control"] = EPHEMERAL_CACHE
+            if chat_messages:
+                last = chat_messages[-1]
+                blocks = last["content"] if isinstance(last["content"], list) else [
+                    {"type": "text", "text": last["content"]}
+                ]
+                chat_messages[-1] = {
+                    "role": last["role"],
+                    "content": blocks[:-1] + [{**blocks[-1], "cache_control": EPHEMERAL_CACHE}],
+                }
+        else:
+            system = "\n\n".join(system_parts) or None
+        
+        params = {
+            "model": self.model,
+            "max_tokens": kwargs.get("max_tokens", self.max_tokens),
+            "temperature": kwargs.get("temperature", self.temperature),
+            "system": system,
+            "messages": chat_messages,
+        }
+        if kwargs.get("tools"):
+            params["tools"] = [
+                {"name": tool["name"], "description": tool["description"], "input_schema": tool["parameters"]}
+                for tool in kwargs["tools"]
+            ]
+        return params
     
     def get_model_name(self) -> str:
         return self.model
@@ -109,6 +433,8 @@ class AnthropicProvider(LLMProvider):
 class GLMProvider(LLMProvider):
     """ZhipuAI GLM LLM provider (OpenAI-compatible API)."""
     
+    supports_tools = True
+    
     def __init__(self, api_key: str, model: str, base_url: str, temperature: float = 0.7, max_tokens: int = 2048):
         self.api_key = api_key
         self.model = model
@@ -131,31 +457,87 @@ class GLMProvider(LLMProvider):
         messages: List[Dict[str, str]], 
         **kwargs
     ) -> str:
+        completion = await self.complete(messages, **kwargs)
+        return completion.text
+    
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        **kwargs
+    ) -> LLMCompletion:
+        client = self._get_client()
+        
+        params = {
+            "model": self.model,
+            "messages": _openai_messages(messages),
+            "temperature": kwargs.get("temperature", self.temperature),
+            "max_tokens": kwargs.get("max_tokens", self.max_tokens),
+        }
+        if kwargs.get("tools"):
+            params["tools"] = _openai_tools(kwargs["tools"])
+        
+        # GLM caches repeated prompt prefixes implicitly and reports hits like OpenAI
+        response = await client.chat.completions.create(**params)
+        
+        return _openai_completion(response)
+    
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        **kwargs
+    ) -> AsyncIterator[str]:
         client = self._get_client()
         
         response = await client.chat.completions.create(
             model=self.model,
-            messages=messages,
+            messages=_openai_messages(messages),
             temperature=kwargs.get("temperature", self.temperature),
             max_tokens=kwargs.get("max_tokens", self.max_tokens),
+            stream=True,
         )
         
-        return response.choices[0].message.content
+        async for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
     
     def get_model_name(self) -> str:
         return self.model
 
 
 class OllamaProvider(LLMProvider):
-    """Local Ollama LLM provider."""
+    """
+    Local Ollama LLM provider.
     
-    def __init__(self, base_url: str, model: str, temperature: float = 0.7, max_tokens: int = 2048):
+    The result of ``/api/tags``, which tells whether the service is up and
+    which models it has, is cached for ``health_ttl`` seconds. Once it is
+    stale, a healthy result is still served while one background request
+    refreshes it, so generation does not pay a round trip per call; an
+    unhealthy one is checked again before the next call. ``start_warm_up``
+    loads the model into memory ahead of the first request, and calls made
+    while it runs wait for it instead of stalling behind the load.
+    """
+    
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        keep_alive: str = "",
+        health_ttl: float = 30.0,
+    ):
         self.base_url = base_url.rstrip("/")
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.keep_alive = keep_alive
+        self.health_ttl = health_ttl
         self._client = None
         self._available_models: Optional[List[str]] = None
+        self._status: Optional[tuple[bool, str]] = None
+        self._checked_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._warm_up_task: Optional[asyncio.Task] = None
     
     def _get_client(self):
         if self._client is None:
@@ -165,106 +547,389 @@ class OllamaProvider(LLMProvider):
     
     async def _get_available_models(self) -> List[str]:
         """Get list of available models from Ollama."""
-        if self._available_models is not None:
-            return self._available_models
-        
+        await self.check_available()
+        return self._available_models or []
+    
+    async def _refresh(self) -> tuple[bool, str]:
+        """Fetch the model list once and resolve the configured model against it."""
         try:
             client = self._get_client()
-            response = await client.get(f"{self.base_url}/api/tags")
-            if response.status_code == 200:
+            
+            response = await client.get(f"{self.base_url}/api/tags", timeout=5.0)
+            if response.status_code != 200:
+                self._available_models = []
+                status = (False, f"Ollama service returned status {response.status_code}")
+            else:
                 data = response.json()
                 self._available_models = [m.get("name", "") for m in data.get("models", [])]
-            else:
-                self._available_models = []
-        except Exception:
+                status = self._resolve_model(self._available_models)
+        
+        except Exception as e:
             self._available_models = []
+            status = (False, f"Cannot connect to Ollama service ({self.base_url}): {str(e)}")
+        
+        self._status = status
+        self._checked_at = time.monotonic()
+        return status
+    
+    def _resolve_model(self, model_names: List[str]) -> tuple[bool, str]:
+        if self.model in model_names:
+            return True, ""
+        
+        model_base = self.model.split(":")[0]
+        matching_model = next((m for m in model_names if m.startswith(model_base + ":") or m == model_base), None)
+        
+        if matching_model:
+            self.model = matching_model
+            return True, ""
         
-        return self._available_models
+        available = ", ".join(model_names) if model_names else "none"
+        return False, f"Model '{self.model}' not found. Available models: {available}"
+    
+    def _start_refresh(self) -> asyncio.Task:
+        # Concurrent callers share one request
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+        return self._refresh_task
+    
+    def invalidate(self):
+        """Forget the cached status, so the next call checks the service again."""
+        self._status = None
     
-    async def check_available(self) -> tuple[bool, str]:
+    async def check_available(self, force: bool = False) -> tuple[bool, str]:
         """Check if Ollama service and model are available.
         
+        Args:
+            force: Ask the service even if the cached result is fresh
+        
         Returns:
             Tuple of (is_available, error_message)
         """
+        if self._status is not None and not force:
+            if time.monotonic() - self._checked_at < self.health_ttl:
+                return self._status
+            if self._status[0]:
+                self._start_refresh()
+                return self._status
+        # Shielded so a cancelled caller does not cancel the shared request
+        return await asyncio.shield(self._start_refresh())
+    
+    async def warm_up(self) -> bool:
+        """Load the model into memory; returns whether it was loaded."""
+        available, error = await self.check_available(force=True)
+        if not available:
+            logger.warning(f"Skipping Ollama warm-up: {error}")
+            return False
+        
+        # A generate request without a prompt only loads the model
+        payload: Dict[str, Any] = {"model": self.model}
+        if self.keep_alive:
+            payload["keep_alive"] = self.keep_alive
         try:
-            client = self._get_client()
-            
-            response = await client.get(f"{self.base_url}/api/tags", timeout=5.0)
-            if response.status_code != 200:
-                return False, f"Ollama service returned status {response.status_code}"
-            
-            data = response.json()
-            models = data.get("models", [])
-            model_names = [m.get("name", "") for m in models]
-            
-            if self.model in model_names:
-                return True, ""
-            
-            model_base = self.model.split(":")[0]
-            matching_model = next((m for m in model_names if m.startswith(model_base + ":") or m == model_base), None)
-            
-            if matching_model:
-                self.model = matching_model
-                return True, ""
-            
-            available = ", ".join(model_names) if model_names else "none"
-            return False, f"Model '{self.model}' not found. Available models: {available}"
-            
+            response = await self._get_client().post(f"{self.base_url}/api/generate", json=payload)
+            response.raise_for_status()
         except Exception as e:
-            return False, f"Cannot connect to Ollama service ({self.base_url}): {str(e)}"
+            logger.warning(f"Failed to load Ollama model {self.model}: {e}")
+            return False
+        
+        logger.info(f"Ollama model {self.model} loaded")
+        return True
     
-    async def generate(
-        self, 
-        messages: List[Dict[str, str]], 
-        **kwargs
-    ) -> str:
-        import json
+    def start_warm_up(self) -> asyncio.Task:
+        """Start loading the model in the background; generation waits for it."""
+        if self._warm_up_task is None:
+            self._warm_up_task = asyncio.create_task(self.warm_up())
+        return self._warm_up_task
+    
+    @property
+    def ready(self) -> bool:
+        """Whether the service was last seen up and no warm-up is still running."""
+        warming = self._warm_up_task is not None and not self._warm_up_task.done()
+        return bool(self._status and self._status[0]) and not warming
+    
+    async def _wait_until_ready(self):
+        if self._warm_up_task is not None and not self._warm_up_task.done():
+            await asyncio.shield(self._warm_up_task)
         
         available, error = await self.check_available()
         if not available:
             raise ValueError(f"Ollama not available: {error}")
-        
-        client = self._get_client()
-        
+    
+    def _chat_payload(self, messages: List[Dict[str, str]], stream: bool, **kwargs) -> Dict[str, Any]:
         payload = {
             "model": self.model,
             "messages": messages,
-            "stream": False,
+            "stream": stream,
             "options": {
                 "temperature": kwargs.get("temperature", self.temperature),
                 "num_predict": kwargs.get("max_tokens", self.max_tokens),
             }
         }
+        if self.keep_alive:
+            # Ollama reuses the KV cache of a matching prompt prefix while the
+            # model stays loaded, so keep it loaded between turns and tasks
+            payload["keep_alive"] = self.keep_alive
+        return payload
+    
+    async def generate(
+        self, 
+        messages: List[Dict[str, str]], 
+        **kwargs
+    ) -> str:
+        completion = await self.complete(messages, **kwargs)
+        return completion.text
+    
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        **kwargs
+    ) -> LLMCompletion:
+        await self._wait_until_ready()
         
-        response = await client.post(
-            f"{self.base_url}/api/chat",
-            json=payload,
-        )
+        client = self._get_client()
+        
+        try:
+            response = await client.post(
+                f"{self.base_url}/api/chat",
+                json=self._chat_payload(messages, stream=False, **kwargs),
+            )
+        except Exception as e:
+            # The service may have gone away, check it again before the next call
+            if is_retryable(e):
+                self.invalidate()
+            raise
         
         if response.status_code == 404:
+            self.invalidate()
             raise ValueError(f"Model '{self.model}' not found. Please run: ollama pull {self.model}")
         
         response.raise_for_status()
         
         result = response.json()
-        return result["message"]["content"]
+        # prompt_eval_count only covers tokens not served from the KV cache,
+        # and Ollama does not report the cached part separately
+        return LLMCompletion(text=result["message"]["content"], usage=LLMUsage(
+            prompt_tokens=result.get("prompt_eval_count", 0) or 0,
+            completion_tokens=result.get("eval_count", 0) or 0,
+            calls=1,
+        ))
+    
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        **kwargs
+    ) -> AsyncIterator[str]:
+        await self._wait_until_ready()
+        
+        client = self._get_client()
+        
+        try:
+            async with client.stream(
+                "POST",
+                f"{self.base_url}/api/chat",
+                json=self._chat_payload(messages, stream=True, **kwargs),
+            ) as response:
+                if response.status_code == 404:
+                    self.invalidate()
+                    raise ValueError(f"Model '{self.model}' not found. Please run: ollama pull {self.model}")
+                response.raise_for_status()
+                
+                # Ollama streams one JSON object per line
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise ValueError(f"Ollama error: {chunk['error']}")
+                    content = chunk.get("message", {}).get("content", "")
+                    if content:
+                        yield content
+                    if chunk.get("done"):
+                        break
+        except Exception as e:
+            if is_retryable(e):
+                self.invalidate()
+            raise
     
     def get_model_name(self) -> str:
         return f"ollama/{self.model}"
     
     async def close(self):
+        for task in (self._refresh_task, self._warm_up_task):
+            if task is not None and not task.done():
+                task.cancel()
         if self._client:
             await self._client.aclose()
             self._client = None
 
 
+class GuardedProvider(LLMProvider):
+    """
+    Routes a provider's calls through the ProviderGuard of its provider.
+    
+    Calls share the guard's concurrency slots, token bucket, retries and
+    circuit breaker with every other model of the same provider. When the
+    breaker is open, or a call still fails with a transient error after
+    its retries, the ``fallback`` provider answers instead, if one is
+    configured. Streams are retried and fall back only until their first
+    delta. A fallback without ``supports_tools`` gets no ``tools`` and the
+    conversation's tool calls and results as text. Other attributes are
+    read from the wrapped provider.
+    
+    ``complete``, ``generate`` and ``stream`` take an optional
+    ``answered_by`` list that the model name of the provider that answered
+    is appended to, so callers can tell a fallback answer apart.
+    """
+    
+    def __init__(
+        self,
+        provider: LLMProvider,
+        guard: ProviderGuard,
+        fallback: Optional[Callable[[], Optional[LLMProvider]]] = None,
+    ):
+        self.provider = provider
+        self.guard = guard
+        self.fallback = fallback
+    
+    def __getattr__(self, name: str):
+        if name == "provider":
+            raise AttributeError(name)
+        return getattr(self.provider, name)
+    
+    @property
+    def supports_tools(self) -> bool:
+        return self.provider.supports_tools
+    
+    def get_model_name(self) -> str:
+        return self.provider.get_model_name()
+    
+    def _estimate_tokens(self, messages: List[Dict[str, Any]], **kwargs) -> int:
+        prompt = sum(estimate_tokens(str(message.get("content") or "")) for message in messages)
+        return prompt + int(kwargs.get("max_tokens") or getattr(self.provider, "max_tokens", 0) or 0)
+    
+    @staticmethod
+    def _used_tokens(completion: LLMCompletion) -> Optional[int]:
+        used = completion.usage.prompt_tokens + completion.usage.completion_tokens
+        return used or None
+    
+    def _get_fallback(self, error: Exception) -> Optional[LLMProvider]:
+        if self.fallback is None or not (isinstance(error, CircuitOpenError) or is_retryable(error)):
+            return None
+        fallback = self.fallback()
+        if fallback is not None:
+            self.guard.counters["fallbacks"] += 1
+            logger.warning(
+                f"[LLM Guard] {self.guard.name} failed ({error}), falling back to {fallback.get_model_name()}"
+            )
+        return fallback
+    
+    @staticmethod
+    def _fallback_request(
+        fallback: LLMProvider,
+        messages: List[Dict[str, Any]],
+        kwargs: Dict[str, Any],
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        if fallback.supports_tools:
+            return messages, kwargs
+        kwargs = {key: value for key, value in kwargs.items() if key != "tools"}
+        return _text_tool_messages(messages), kwargs
+    
+    async def generate(
+        self,
+        messages: List[Dict[str, str]],
+        **kwargs
+    ) -> str:
+        completion = await self.complete(messages, **kwargs)
+        return completion.text
+    
+    async def complete(
+        self,
+        messages: List[Dict[str, Any]],
+        **kwargs
+    ) -> LLMCompletion:
+        answered_by = kwargs.pop("answered_by", None)
+        answering: LLMProvider = self.provider
+        try:
+            completion = await self.guard.call(
+                lambda: self.provider.complete(messages, **kwargs),
+                estimated_tokens=self._estimate_tokens(messages, **kwargs),
+                used_tokens=self._used_tokens,
+            )
+        except Exception as e:
+            fallback = self._get_fallback(e)
+            if fallback is None:
+                raise
+            answering = fallback
+            messages, kwargs = self._fallback_request(fallback, messages, kwargs)
+            completion = await fallback.complete(messages, **kwargs)
+        if answered_by is not None:
+            answered_by.append(answering.get_model_name())
+        return completion
+    
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        **kwargs
+    ) -> AsyncIterator[str]:
+        answered_by = kwargs.pop("answered_by", None)
+        estimated = self._estimate_tokens(messages, **kwargs)
+        try:
+            self.guard.check_circuit()
+        except CircuitOpenError as e:
+            fallback = self._get_fallback(e)
+            if fallback is None:
+                raise
+            if answered_by is not None:
+                answered_by.append(fallback.get_model_name())
+            messages, kwargs = self._fallback_request(fallback, messages, kwargs)
+            async for delta in fallback.stream(messages, **kwargs):
+                yield delta
+            return
+        
+        attempt = 0
+        while True:
+            await self.guard.acquire(estimated)
+            started = False
+            try:
+                async for delta in self.provider.stream(messages, **kwargs):
+                    started = True
+                    yield delta
+            except Exception as e:
+                self.guard.release(estimated)
+                if started or not self.guard.should_retry(attempt, e):
+                    self.guard.record_failure(e)
+                    fallback = None if started else self._get_fallback(e)
+                    if fallback is None:
+                        raise
+                    if answered_by is not None:
+                        answered_by.append(fallback.get_model_name())
+                    messages, kwargs = self._fallback_request(fallback, messages, kwargs)
+                    async for delta in fallback.stream(messages, **kwargs):
+                        yield delta
+                    return
+                delay = self.guard.backoff(attempt, e)
+                attempt += 1
+                self.guard.counters["retries"] += 1
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # Also reached when the consumer stops reading early
+                self.guard.release(estimated)
+                self.guard.breaker.abandon_trial()
+                raise
+            self.guard.release(estimated)
+            self.guard.record_success()
+            if answered_by is not None:
+                answered_by.append(self.provider.get_model_name())
+            return
+
+
 class LLMService:
     """Service for generating responses using LLM."""
     
     SYSTEM_PROMPT = """You are a helpful AI research assistant specialized in academic papers from arXiv. 
 Your role is to help users understand research papers, answer questions about scientific topics, 
-and provide insights based on the paper abstracts provided in the context.
+and provide insights based on the paper abstracts and excerpts provided in the context.
 
 When answering questions:
 1. Be accurate and cite relevant papers from the context when applicable
@@ -273,7 +938,7 @@ When answering questions:
 4. When referencing papers, use the format: [Title] (Authors, Year)
 
 Always be helpful, accurate, and scholarly in your responses."""
-    
+
     PROVIDER_CONFIG = {
         "openai": {
             "name": "OpenAI",
@@ -301,6 +966,11 @@ Always be helpful, accurate, and scholarly in your responses."""
         self.settings = get_settings()
         self._provider: Optional[LLMProvider] = None
         self._providers_cache: Dict[str, LLMProvider] = {}
+        self._guards: Dict[str, ProviderGuard] = {}
+        self.context_builder = ContextBuilder(
+            token_budget=self.settings.ASK_CONTEXT_TOKEN_BUDGET,
+            max_passage_tokens=self.settings.ASK_MAX_PASSAGE_TOKENS,
+        )
     
     def _create_provider(self, provider_name: str, model: Optional[str] = None) -> LLMProvider:
         """Create a provider instance."""
@@ -344,19 +1014,92 @@ Always be helpful, accurate, and scholarly in your responses."""
                 model=model or self.settings.OLLAMA_MODEL or "llama3",
                 temperature=self.settings.LLM_TEMPERATURE,
                 max_tokens=self.settings.LLM_MAX_TOKENS,
+                keep_alive=self.settings.OLLAMA_KEEP_ALIVE,
+                health_ttl=self.settings.OLLAMA_HEALTH_TTL_SECONDS,
             )
         
         else:
             raise ValueError(f"Unsupported LLM provider: {provider}. Supported: openai, anthropic, glm, ollama")
     
+    def _get_guard(self, provider_name: str) -> ProviderGuard:
+        """The guard shared by all models of a provider, created on first use."""
+        name = provider_name.lower()
+        if name not in self._guards:
+            concurrency = parse_provider_limits(self.settings.LLM_PROVIDER_CONCURRENCY)
+            tokens_per_minute = parse_provider_limits(self.settings.LLM_PROVIDER_TOKENS_PER_MINUTE)
+            self._guards[name] = ProviderGuard(
+                name,
+                concurrency=concurrency.get(name, 8),
+                tokens_per_minute=tokens_per_minute.get(name, 0),
+                max_retries=self.settings.LLM_MAX_RETRIES,
+                base_delay=self.settings.LLM_RETRY_BASE_DELAY,
+                max_delay=self.settings.LLM_RETRY_MAX_DELAY,
+                failure_threshold=self.settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+                reset_seconds=self.settings.LLM_CIRCUIT_RESET_SECONDS,
+            )
+        return self._guards[name]
+    
+    def _guarded(self, provider_name: str, model: Optional[str] = None, fallback: bool = True) -> GuardedProvider:
+        name = provider_name.lower()
+        fallback_name = self.settings.LLM_FALLBACK_PROVIDER.lower()
+        get_fallback = None
+        if fallback and fallback_name and fallback_name != name:
+            get_fallback = self._get_fallback_provider
+        return GuardedProvider(self._create_provider(name, model), self._get_guard(name), get_fallback)
+    
+    def _get_fallback_provider(self) -> Optional[LLMProvider]:
+        """The configured fallback provider, or None if it cannot be created."""
+        cache_key = f"fallback:{self.settings.LLM_FALLBACK_PROVIDER.lower()}"
+        if cache_key not in self._providers_cache:
+            try:
+                self._providers_cache[cache_key] = self._guarded(
+                    self.settings.LLM_FALLBACK_PROVIDER,
+                    self.settings.LLM_FALLBACK_MODEL or None,
+                    fallback=False,
+                )
+            except ValueError as e:
+                logger.warning(f"LLM fallback provider unavailable: {e}")
+                return None
+        return self._providers_cache[cache_key]
+    
+    async def warm_up(self):
+        """Load the Ollama model ahead of the first request if it is the default or fallback provider."""
+        try:
+            if self.settings.LLM_PROVIDER.lower() == "ollama":
+                provider = self._get_provider()
+            elif self.settings.LLM_FALLBACK_PROVIDER.lower() == "ollama":
+                provider = self._get_fallback_provider()
+            else:
+                return
+        except ValueError as e:
+            logger.warning(f"Skipping LLM warm-up: {e}")
+            return
+        if provider is not None:
+            await provider.start_warm_up()
+    
+    def get_guard_stats(self) -> Dict[str, Any]:
+        """Concurrency, rate limit, retry and circuit breaker counters per provider."""
+        return {name: guard.get_stats() for name, guard in self._guards.items()}
+    
     def _initialize(self):
         if self._provider is not None:
             return
         
         provider = self.settings.LLM_PROVIDER.lower()
-        self._provider = self._create_provider(provider)
+        self._provider = self._guarded(provider)
         logger.info(f"Initialized {provider} provider with model: {self._provider.get_model_name()}")
     
+    def _get_provider(self, provider: Optional[str] = None, model: Optional[str] = None) -> LLMProvider:
+        """Return the default provider, or a cached instance of the requested one."""
+        if provider:
+            cache_key = f"{provider}:{model or 'default'}"
+            if cache_key not in self._providers_cache:
+                self._providers_cache[cache_key] = self._guarded(provider, model)
+            return self._providers_cache[cache_key]
+        
+        self._initialize()
+        return self._provider
+    
     def get_providers(self) -> List[Dict[str, Any]]:
         """Get list of all available LLM providers."""
         providers = []
@@ -388,36 +1131,14 @@ Always be helpful, accurate, and scholarly in your responses."""
         except Exception:
             return False
     
-    def _build_context(self, papers: List[Dict[str, Any]]) -> str:
-        """Build context string from papers."""
-        if not papers:
-            return "No relevant papers found in the database."
-        
-        context_parts = ["Here are some relevant papers from the database:\n"]
-        
-        for i, paper in enumerate(papers[:10], 1):
-            title = paper.get("title", "Unknown Title")
-            authors = paper.get("authors", [])
-            authors_str = ", ".join(authors[:3]) if authors else "Unknown Authors"
-            if len(authors) > 3:
-                authors_str += " et al."
-            
-            abstract = paper.get("abstract", "No abstract available.")
-            if len(abstract) > 500:
-                abstract = abstract[:500] + "..."
-            
-            published = paper.get("published", "")
-            year = published[:4] if published else "Unknown Year"
-            
-            context_parts.append(f"""
-Paper {i}:
-Title: {title}
-Authors: {authors_str}
-Year: {year}
-Abstract: {abstract}
-""")
-        
-        return "\n".join(context_parts)
+    def _build_context(
+        self,
+        papers: List[Dict[str, Any]],
+        question: str = "",
+        passages: Optional[List[Dict[str, Any]]] = None,
+    ) -> str:
+        """Build context string from the passages of papers most relevant to the question."""
+        return self.context_builder.build(question, papers, passages)
     
     async def ask_question(
         self, 
@@ -425,6 +1146,7 @@ Abstract: {abstract}
         papers: List[Dict[str, Any]],
         provider: Optional[str] = None,
         model: Optional[str] = None,
+        passages: Optional[List[Dict[str, Any]]] = None,
         **kwargs
     ) -> str:
         """
@@ -435,23 +1157,40 @@ Abstract: {abstract}
             papers: List of relevant papers to use as context
             provider: Optional provider to use (overrides default)
             model: Optional model to use
+            passages: Optional full-text passages of those papers from chunk search
             **kwargs: Additional parameters for the LLM
         
         Returns:
             Generated answer string
         """
-        if provider:
-            cache_key = f"{provider}:{model or 'default'}"
-            if cache_key not in self._providers_cache:
-                self._providers_cache[cache_key] = self._create_provider(provider, model)
-            active_provider = self._providers_cache[cache_key]
-        else:
-            self._initialize()
-            active_provider = self._provider
-        
-        context = self._build_context(papers)
+        active_provider = self._get_provider(provider, model)
+        messages = self._ask_messages(question, papers, passages)
+        return await active_provider.generate(messages, **kwargs)
+    
+    async def stream_question(
+        self,
+        question: str,
+        papers: List[Dict[str, Any]],
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        passages: Optional[List[Dict[str, Any]]] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Stream the answer of ask_question as text deltas."""
+        active_provider = self._get_provider(provider, model)
+        messages = self._ask_messages(question, papers, passages)
+        async for delta in active_provider.stream(messages, **kwargs):
+            yield delta
+    
+    def _ask_messages(
+        self,
+        question: str,
+        papers: List[Dict[str, Any]],
+        passages: Optional[List[Dict[str, Any]]] = None,
+    ) -> List[Dict[str, str]]:
+        context = self._build_context(papers, question, passages)
         
-        messages = [
+        return [
             {"role": "system", "content": self.SYSTEM_PROMPT},
             {"role": "user", "content": f"""Context:
 {context}
@@ -462,19 +1201,18 @@ Please answer the question based on the provided context. If the context doesn't
 enough information to fully answer the question, please say so and provide what information 
 is available. Reference specific papers when relevant."""}
         ]
-        
-        return await active_provider.generate(messages, **kwargs)
     
     def get_model_name(self, provider: Optional[str] = None, model: Optional[str] = None) -> str:
         """Return the current model name."""
-        if provider:
-            cache_key = f"{provider}:{model or 'default'}"
-            if cache_key not in self._providers_cache:
-                self._providers_cache[cache_key] = self._create_provider(provider, model)
-            return self._providers_cache[cache_key].get_model_name()
-        
-        self._initialize()
-        return self._provider.get_model_name()
+        return self._get_provider(provider, model).get_model_name()
+    
+    def supports_tools(self, provider: Optional[str] = None, model: Optional[str] = None) -> bool:
+        """Whether the provider takes native tool schemas; others need tools described in the prompt."""
+        return self._get_provider(provider, model).supports_tools
+    
+    def get_temperature(self, provider: Optional[str] = None, model: Optional[str] = None) -> Optional[float]:
+        """Sampling temperature the provider uses by default."""
+        return getattr(self._get_provider(provider, model), "temperature", None)
     
     def is_available(self, provider: Optional[str] = None) -> bool:
         """Check if LLM service is available.
@@ -505,28 +1243,38 @@ is available. Reference specific papers when relevant."""}
             prompt: The prompt to send to the LLM
             provider: Optional provider to use (overrides default)
             model: Optional model to use
-            **kwargs: Additional parameters for the LLM
+            **kwargs: Additional parameters for the LLM, and ``answered_by``, a
+                     list the model name of the provider that answered is
+                     appended to (a fallback provider may answer instead)
         
         Returns:
             Generated response string
         """
-        if provider:
-            cache_key = f"{provider}:{model or 'default'}"
-            if cache_key not in self._providers_cache:
-                self._providers_cache[cache_key] = self._create_provider(provider, model)
-            active_provider = self._providers_cache[cache_key]
-        else:
-            self._initialize()
-            active_provider = self._provider
+        active_provider = self._get_provider(provider, model)
         
         messages = [{"role": "user", "content": prompt}]
         return await active_provider.generate(messages, **kwargs)
-
+    
+    async def stream(
+        self,
+        prompt: str,
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Stream the response to a simple prompt as text deltas."""
+        active_provider = self._get_provider(provider, model)
+        messages = [{"role": "user", "content": prompt}]
+        async for delta in active_provider.stream(messages, **kwargs):
+            yield delta
+    
     async def generate_with_messages(
         self,
         messages: List[Dict[str, str]],
         provider: Optional[str] = None,
         model: Optional[str] = None,
+        usage: Optional[LLMUsage] = None,
+        tool_calls: Optional[List[LLMToolCall]] = None,
         **kwargs
     ) -> str:
         """
@@ -541,21 +1289,38 @@ is available. Reference specific papers when relevant."""}
                      Roles can be 'system', 'user', 'assistant', or 'tool'.
             provider: Optional provider to use (overrides default)
             model: Optional model to use
-            **kwargs: Additional parameters for the LLM (temperature, max_tokens, etc.)
+            usage: Optional LLMUsage that the tokens of this call are added to
+            tool_calls: Optional list that the native tool calls of the response
+                       are appended to (pass the schemas as ``tools``)
+            **kwargs: Additional parameters for the LLM (temperature, max_tokens,
+                     tools, cache_prefix and cache_key for prompt caching, etc.)
         
         Returns:
             Generated response string
         """
-        if provider:
-            cache_key = f"{provider}:{model or 'default'}"
-            if cache_key not in self._providers_cache:
-                self._providers_cache[cache_key] = self._create_provider(provider, model)
-            active_provider = self._providers_cache[cache_key]
-        else:
-            self._initialize()
-            active_provider = self._provider
+        active_provider = self._get_provider(provider, model)
         
-        return await active_provider.generate(messages, **kwargs)
+        if usage is None and tool_calls is None:
+            return await active_provider.generate(messages, **kwargs)
+        
+        completion = await active_provider.complete(messages, **kwargs)
+        if usage is not None:
+            usage.add(completion.usage)
+        if tool_calls is not None:
+            tool_calls.extend(completion.tool_calls)
+        return completion.text
+    
+    async def stream_with_messages(
+        self,
+        messages: List[Dict[str, str]],
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Stream the response to structured messages as text deltas."""
+        active_provider = self._get_provider(provider, model)
+        async for delta in active_provider.stream(messages, **kwargs):
+            yield delta
 
 
 llm_service = LLMService()
@@ -1,4 +1,7 @@
+import asyncio
 import logging
+import os
+import uuid
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timezone
 import re
@@ -7,10 +10,21 @@ from app.config import get_settings
 from app.db.factory import get_paper_repository, get_paper_embedding_repository
 from app.services.arxiv_client import ArxivClient
 from app.services.embedding_service import embedding_service
+from app.services.fetch_coordinator import SingleFlight, SQLiteAdvisoryLock
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+_date_fetches = SingleFlight()
+_fetch_lock: Optional[SQLiteAdvisoryLock] = None
+
+
+def _get_fetch_lock() -> SQLiteAdvisoryLock:
+    global _fetch_lock
+    if _fetch_lock is None:
+        _fetch_lock = SQLiteAdvisoryLock(settings.SQLITE_DB_PATH)
+    return _fetch_lock
+
 
 class PaperService:
     def __init__(self):
@@ -47,13 +61,19 @@ class PaperService:
         except ValueError:
             return False
 
-    async def _fetch_and_store_papers(self, date: str, category: str) -> Dict[str, Any]:
+    async def _fetch_and_store_papers(self, date: str, category: str, merge: bool = False) -> Dict[str, Any]:
         """
         Fetch papers from arXiv and store them.
         
+        With ``merge`` the papers are added to a date that is already
+        indexed: its count grows by the newly inserted papers and a failed
+        fetch leaves the index as it was.
+        
         Returns:
             Dict with 'count' and 'inserted' keys, or 'error' on failure.
         """
+        existing = self.paper_repo.get_date_index(date) if merge else None
+        existing_count = existing.get("total_count", 0) if existing else 0
         try:
             logger.info(f"Fetching {category or 'all'} papers for {date}")
             papers = await self.arxiv_client.fetch_all_papers_for_date(date, category)
@@ -61,16 +81,79 @@ class PaperService:
             if papers:
                 inserted = self.paper_repo.insert_papers_batch(papers)
                 logger.info(f"Inserted {inserted} papers for {date}")
-                self.paper_repo.insert_date_index(date, len(papers))
+                total = existing_count + inserted if merge else len(papers)
+                self.paper_repo.insert_date_index(date, total)
                 return {"count": len(papers), "inserted": inserted}
             else:
-                self.paper_repo.insert_date_index(date, 0)
+                if not merge:
+                    self.paper_repo.insert_date_index(date, 0)
                 return {"count": 0, "inserted": 0}
         except Exception as e:
             logger.error(f"Failed to fetch papers for {date}: {e}")
-            self.paper_repo.insert_date_index(date, 0)
+            if not merge:
+                self.paper_repo.insert_date_index(date, 0)
             return {"count": 0, "inserted": 0, "error": str(e)}
 
+    async def _fetch_once(self, date: str, category: str, merge: bool = False) -> Dict[str, Any]:
+        """
+        Fetch a date at most once across concurrent callers.
+        
+        Concurrent requests for the same (date, category) await a single
+        in-flight fetch. When FETCH_LOCK_ENABLED is set, an SQLite advisory
+        lock additionally serializes the fetch across worker processes.
+        """
+        key = f"{date}:{category or ''}"
+        return await _date_fetches.do(key, lambda: self._fetch_with_lock(key, date, category, merge))
+
+    async def _fetch_with_lock(self, key: str, date: str, category: str, merge: bool = False) -> Dict[str, Any]:
+        if not settings.FETCH_LOCK_ENABLED:
+            return await self._fetch_and_store_papers(date, category, merge)
+        
+        lock = _get_fetch_lock()
+        owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+        before = self.paper_repo.get_date_index(date)
+        waited = False
+        
+        # SQLite calls run in a thread so a busy lock table cannot block the event loop
+        while not await asyncio.to_thread(lock.try_acquire, key, owner, settings.FETCH_LOCK_TTL):
+            waited = True
+            await asyncio.sleep(settings.FETCH_LOCK_POLL_INTERVAL)
+        
+        try:
+            if waited:
+                current = self.paper_repo.get_date_index(date)
+                if current is not None and current != before:
+                    logger.info(f"Papers for {date} were fetched by another worker")
+                    return {"count": current.get("total_count", 0), "inserted": 0}
+            return await self._fetch_and_store_papers(date, category, merge)
+        finally:
+            await asyncio.to_thread(lock.release, key, owner)
+
+    async def ensure_papers_for_date(self, date: str, fetch_category: str = "cs*") -> bool:
+        """
+        Make sure papers for a normalized date are stored locally.
+        
+        Returns True if a fetch from arXiv was performed.
+        """
+        date_info = self.paper_repo.get_date_index(date)
+        
+        if date_info and date_info.get("total_count", 0) > 0:
+            return False
+        
+        logger.info(f"No local data for {date}, fetching from arXiv with category {fetch_category}")
+        await self._fetch_once(date, fetch_category)
+        return True
+
+    async def add_category_for_date(self, date: str, category: str) -> Dict[str, Any]:
+        """
+        Fetch one more category for a date and add its papers to the date.
+        
+        The date index only records whether a date was fetched, not for
+        which categories, so this always asks arXiv; papers that are
+        already stored are skipped on insert.
+        """
+        return await self._fetch_once(date, category, merge=True)
+
     async def query_papers(
         self,
         date: str,
@@ -110,11 +193,7 @@ class PaperService:
                 "max_results": max_results,
             }
         
-        date_info = self.paper_repo.get_date_index(normalized_date)
-        
-        if not date_info or date_info.get("total_count", 0) == 0:
-            logger.info(f"No local data for {normalized_date}, fetching from arXiv with category {fetch_category}")
-            await self._fetch_and_store_papers(normalized_date, fetch_category)
+        await self.ensure_papers_for_date(normalized_date, fetch_category)
         
         papers, total = self.paper_repo.query_papers_by_date(
             date=normalized_date,
@@ -173,7 +252,7 @@ class PaperService:
         
         self.paper_repo.delete_date_index(normalized_date)
         
-        result = await self._fetch_and_store_papers(normalized_date, category)
+        result = await self._fetch_once(normalized_date, category)
         
         if "error" in result:
             return {
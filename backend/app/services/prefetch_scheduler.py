@@ -0,0 +1,194 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchScheduler:
+    """
+    Background scheduler that prefetches arXiv announcement days.
+
+    arXiv publishes new submissions once per day around 00:00 UTC. Shortly
+    after that window the scheduler fetches the submission day that just
+    closed for every configured category set, generates embeddings for it
+    and builds the default knowledge graph, so the first visitor of the day
+    is served from local storage.
+    """
+
+    def __init__(
+        self,
+        categories: Optional[List[str]] = None,
+        run_at_utc: str = "01:30",
+        generate_embeddings: bool = True,
+        warm_graph: bool = True,
+        run_on_start: bool = True,
+    ):
+        self.categories = categories or ["cs*"]
+        self.run_hour, self.run_minute = self._parse_time(run_at_utc)
+        self.generate_embeddings = generate_embeddings
+        self.warm_graph = warm_graph
+        self.run_on_start = run_on_start
+        self._running = False
+        self._task: Optional[asyncio.Task] = None
+        self._last_run: Optional[Dict[str, Any]] = None
+
+    @staticmethod
+    def _parse_time(value: str) -> tuple[int, int]:
+        try:
+            hour_str, minute_str = value.strip().split(":")
+            hour, minute = int(hour_str), int(minute_str)
+        except ValueError:
+            raise ValueError(f"Invalid prefetch time (expected HH:MM): {value}")
+        if not (0 <= hour < 24 and 0 <= minute < 60):
+            raise ValueError(f"Invalid prefetch time (expected HH:MM): {value}")
+        return hour, minute
+
+    def next_run_time(self, now: Optional[datetime] = None) -> datetime:
+        """Return the next scheduled run time (UTC) after now."""
+        now = now or datetime.now(timezone.utc)
+        candidate = now.replace(hour=self.run_hour, minute=self.run_minute, second=0, microsecond=0)
+        if candidate <= now:
+            candidate += timedelta(days=1)
+        return candidate
+
+    @staticmethod
+    def target_date(now: Optional[datetime] = None) -> str:
+        """Return the submission day that closed before the latest announcement."""
+        now = now or datetime.now(timezone.utc)
+        return (now.date() - timedelta(days=1)).isoformat()
+
+    async def start(self):
+        """Start the scheduler loop."""
+        if self._running:
+            return
+
+        self._running = True
+        self._task = asyncio.create_task(self._run_loop())
+        logger.info(
+            f"PrefetchScheduler started: categories={self.categories}, "
+            f"daily at {self.run_hour:02d}:{self.run_minute:02d} UTC"
+        )
+
+    async def stop(self):
+        """Stop the scheduler loop."""
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        logger.info("PrefetchScheduler stopped")
+
+    async def _run_loop(self):
+        if self.run_on_start:
+            await self._safe_prefetch(self.target_date())
+
+        while self._running:
+            now = datetime.now(timezone.utc)
+            next_run = self.next_run_time(now)
+            delay = (next_run - now).total_seconds()
+            logger.info(f"Next arXiv prefetch at {next_run.isoformat()} (in {delay:.0f}s)")
+            await asyncio.sleep(delay)
+
+            if not self._running:
+                break
+            await self._safe_prefetch(self.target_date())
+
+    async def _safe_prefetch(self, date: str):
+        try:
+            await self.prefetch_date(date)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Prefetch for {date} failed: {e}")
+
+    async def prefetch_date(self, date: str) -> Dict[str, Any]:
+        """Fetch papers, embeddings and the default graph for a single date."""
+        from app.dependencies import get_paper_service
+        from app.services.graph_service import graph_service
+
+        paper_service = get_paper_service()
+        result: Dict[str, Any] = {
+            "date": date,
+            "fetched": [],
+            "embeddings_generated": 0,
+            "graph_warmed": False,
+        }
+
+        main_category, *extra_categories = self.categories
+        if await paper_service.ensure_papers_for_date(date, main_category):
+            result["fetched"].append(main_category)
+        # The date index is keyed by date only, so once the first category
+        # is stored ensure_papers_for_date would skip the others
+        for category in extra_categories:
+            fetched = await paper_service.add_category_for_date(date, category)
+            if "error" not in fetched:
+                result["fetched"].append(category)
+
+        if self.generate_embeddings:
+            embedding_result = await paper_service.generate_embeddings(date=date)
+            result["embeddings_generated"] = embedding_result.get("generated_count", 0)
+
+        if self.warm_graph:
+            if result["fetched"]:
+                graph_service.clear_cache(date)
+            await graph_service.get_graph_data(date=date)
+            result["graph_warmed"] = True
+
+        self._last_run = {**result, "finished_at": datetime.now(timezone.utc).isoformat()}
+        logger.info(
+            f"Prefetched {date}: fetched={result['fetched']}, "
+            f"embeddings={result['embeddings_generated']}, graph_warmed={result['graph_warmed']}"
+        )
+        return result
+
+    def is_running(self) -> bool:
+        return self._running
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "running": self._running,
+            "categories": self.categories,
+            "run_at_utc": f"{self.run_hour:02d}:{self.run_minute:02d}",
+            "next_run": self.next_run_time().isoformat() if self._running else None,
+            "last_run": self._last_run,
+        }
+
+
+_prefetch_scheduler: Optional[PrefetchScheduler] = None
+
+
+def get_prefetch_scheduler() -> Optional[PrefetchScheduler]:
+    return _prefetch_scheduler
+
+
+async def start_prefetch_scheduler() -> Optional[PrefetchScheduler]:
+    """Create and start the prefetch scheduler if enabled in settings."""
+    global _prefetch_scheduler
+    settings = get_settings()
+    if not settings.PREFETCH_ENABLED:
+        return None
+
+    categories = [c.strip() for c in settings.PREFETCH_CATEGORIES.split(",") if c.strip()]
+    _prefetch_scheduler = PrefetchScheduler(
+        categories=categories,
+        run_at_utc=settings.PREFETCH_TIME_UTC,
+        generate_embeddings=settings.PREFETCH_GENERATE_EMBEDDINGS,
+        warm_graph=settings.PREFETCH_WARM_GRAPH,
+        run_on_start=settings.PREFETCH_ON_START,
+    )
+    await _prefetch_scheduler.start()
+    return _prefetch_scheduler
+
+
+async def stop_prefetch_scheduler():
+    global _prefetch_scheduler
+    if _prefetch_scheduler:
+        await _prefetch_scheduler.stop()
+        _prefetch_scheduler = None
@@ -1,13 +1,17 @@
+import asyncio
 import logging
-from typing import Dict, Any, List, Optional
+import time
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator
 
 from .skills.registry import SkillRegistry
 from .skills.base import SkillProvider
 from .skills.loader import SkillLoader
 from .skills.watcher import SkillWatcher
 from .paper_service import PaperService
+from app.dependencies import get_paper_service
 from .skills.implementations import SummarySkill, TranslationSkill, CitationSkill, RelatedPapersSkill
 from app.config import get_settings
+from app.llm_cache import get_llm_response_cache
 
 logger = logging.getLogger(__name__)
 
@@ -65,8 +69,8 @@ load_dynamic_skills()
 class SkillService:
     """Service for managing and executing skills."""
     
-    def __init__(self):
-        self.paper_service = PaperService()
+    def __init__(self, paper_service: Optional[PaperService] = None):
+        self.paper_service = paper_service or get_paper_service()
         self._watcher: Optional[SkillWatcher] = None
     
     def get_all_skills(self) -> List[Dict[str, Any]]:
@@ -127,48 +131,78 @@ class SkillService:
             "message": "Skill saved and reloaded" if success else "Skill saved but reload failed"
         }
     
-    async def execute_skill(
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hit-rate metrics of the skill response cache."""
+        cache = get_llm_response_cache()
+        if cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **cache.get_stats()}
+    
+    def clear_cache(self, skill_id: Optional[str] = None) -> Dict[str, Any]:
+        """Drop cached responses, for one skill or all of them."""
+        cache = get_llm_response_cache()
+        if cache is None:
+            return {"success": True, "deleted": 0}
+        return {"success": True, "deleted": cache.clear(skill_id)}
+    
+    def _prepare_execution(
         self,
         skill_id: str,
-        paper_ids: Optional[List[str]] = None,
-        context: Optional[Dict[str, Any]] = None,
-        provider: Optional[str] = None,
-        model: Optional[str] = None,
-        **kwargs
-    ) -> Dict[str, Any]:
-        """Execute a skill by ID."""
+        paper_ids: Optional[List[str]],
+        context: Optional[Dict[str, Any]],
+        provider: Optional[str],
+        model: Optional[str],
+        use_cache: bool = True,
+    ) -> Tuple[Optional[SkillProvider], Dict[str, Any], Optional[str]]:
+        """Look up a skill and build its context; returns (skill, context, error)."""
         skill = SkillRegistry.get(skill_id)
         if not skill:
-            return {
-                "error": f"Skill not found: {skill_id}",
-                "success": False
-            }
+            return None, {}, f"Skill not found: {skill_id}"
         
         if not skill.is_available():
-            return {
-                "error": f"Skill not available: {skill_id}",
-                "success": False
-            }
+            return None, {}, f"Skill not available: {skill_id}"
         
         context = context or {}
         context["llm_provider"] = provider
         context["llm_model"] = model
+        context["use_cache"] = use_cache
         
         if skill.requires_paper and paper_ids:
             try:
                 papers = self.paper_service.get_papers_by_ids(paper_ids)
                 if not papers:
-                    return {
-                        "error": "No papers found for the provided IDs",
-                        "success": False
-                    }
+                    return None, context, "No papers found for the provided IDs"
                 context["papers"] = papers
             except Exception as e:
                 logger.error(f"Failed to get papers: {e}")
-                return {
-                    "error": f"Failed to get papers: {str(e)}",
-                    "success": False
-                }
+                return None, context, f"Failed to get papers: {str(e)}"
+        
+        return skill, context, None
+    
+    async def execute_skill(
+        self,
+        skill_id: str,
+        paper_ids: Optional[List[str]] = None,
+        context: Optional[Dict[str, Any]] = None,
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        use_cache: bool = True,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Execute a skill by ID.
+        
+        LLM output of cacheable skills is served from the response cache
+        unless use_cache is False.
+        """
+        skill, context, error = self._prepare_execution(
+            skill_id, paper_ids, context, provider, model, use_cache
+        )
+        if error:
+            return {
+                "error": error,
+                "success": False
+            }
         
         try:
             result = await skill.execute(context, paper_ids, **kwargs)
@@ -179,6 +213,125 @@ class SkillService:
                 "error": f"Failed to execute skill: {str(e)}",
                 "success": False
             }
+    
+    async def stream_skill(
+        self,
+        skill_id: str,
+        paper_ids: Optional[List[str]] = None,
+        context: Optional[Dict[str, Any]] = None,
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        use_cache: bool = True,
+        **kwargs
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Execute a skill by ID as a stream of events.
+        
+        Yields "delta" events while an LLM skill generates and a final "result"
+        event with the same dict execute_skill returns. Failures before or
+        during execution are sent as an "error" event.
+        """
+        skill, context, error = self._prepare_execution(
+            skill_id, paper_ids, context, provider, model, use_cache
+        )
+        if error:
+            yield {"type": "error", "error": error}
+            return
+        
+        try:
+            async for event in skill.stream(context, paper_ids, **kwargs):
+                yield event
+        except Exception as e:
+            logger.error(f"Failed to stream skill {skill_id}: {e}")
+            yield {"type": "error", "error": f"Failed to execute skill: {str(e)}"}
+
+    
+    async def execute_skill_batch(
+        self,
+        skill_id: str,
+        paper_ids: List[str],
+        context: Optional[Dict[str, Any]] = None,
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        use_cache: bool = True,
+        concurrency: Optional[int] = None,
+        **kwargs
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Execute a skill once per paper and yield each result as it completes.
+        
+        Papers are loaded in one query. At most ``concurrency`` papers run at
+        a time; their LLM calls share the provider's limits with every other
+        caller through its ProviderGuard. Cached responses are reused, so
+        repeated papers are cheap.
+        
+        Yields a "start" event, one "result" event per paper (with its index
+        in paper_ids), then a "done" event with counts. Errors that stop the
+        whole batch are sent as an "error" event.
+        """
+        settings = get_settings()
+        paper_ids = list(dict.fromkeys(paper_ids or []))
+        if not paper_ids:
+            yield {"type": "error", "error": "No paper IDs provided"}
+            return
+        if len(paper_ids) > settings.SKILL_BATCH_MAX_PAPERS:
+            yield {"type": "error", "error": f"Too many papers: {len(paper_ids)} > {settings.SKILL_BATCH_MAX_PAPERS}"}
+            return
+        
+        skill, context, error = self._prepare_execution(skill_id, None, context, provider, model, use_cache)
+        if error:
+            yield {"type": "error", "error": error}
+            return
+        if not skill.requires_paper:
+            yield {"type": "error", "error": f"Skill does not take papers: {skill_id}"}
+            return
+        
+        try:
+            papers = await asyncio.to_thread(self.paper_service.get_papers_by_ids, paper_ids)
+        except Exception as e:
+            logger.error(f"Failed to get papers: {e}")
+            yield {"type": "error", "error": f"Failed to get papers: {str(e)}"}
+            return
+        papers_by_id = {paper.get("id"): paper for paper in papers}
+        
+        batch_semaphore = asyncio.Semaphore(max(1, concurrency or settings.SKILL_BATCH_CONCURRENCY))
+        
+        async def run(index: int, paper_id: str) -> Tuple[int, str, Dict[str, Any]]:
+            paper = papers_by_id.get(paper_id)
+            if paper is None:
+                return index, paper_id, {"error": f"Paper not found: {paper_id}", "success": False}
+            
+            async with batch_semaphore:
+                try:
+                    result = await skill.execute({**context, "papers": [paper]}, [paper_id], **kwargs)
+                except Exception as e:
+                    logger.error(f"Failed to execute skill {skill_id} for {paper_id}: {e}")
+                    result = {"error": f"Failed to execute skill: {str(e)}", "success": False}
+            return index, paper_id, result
+        
+        started = time.monotonic()
+        yield {"type": "start", "skill_id": skill_id, "total": len(paper_ids)}
+        
+        tasks = [asyncio.create_task(run(i, paper_id)) for i, paper_id in enumerate(paper_ids)]
+        succeeded = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, paper_id, result = await next_done
+                if result.get("success", False):
+                    succeeded += 1
+                yield {"type": "result", "index": index, "paper_id": paper_id, "data": result}
+        finally:
+            # The client went away or the stream was closed early
+            for task in tasks:
+                task.cancel()
+        
+        yield {
+            "type": "done",
+            "total": len(paper_ids),
+            "succeeded": succeeded,
+            "failed": len(paper_ids) - succeeded,
+            "elapsed": round(time.monotonic() - started, 3),
+        }
 
 
 skill_service = SkillService()
@@ -1,5 +1,6 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator, Callable, Tuple
 
 
 class SkillProvider(ABC):
@@ -48,6 +49,11 @@ class SkillProvider(ABC):
         """JSON Schema for output validation."""
         return None
     
+    @property
+    def cache_enabled(self) -> bool:
+        """Whether LLM responses of this skill may be served from the response cache."""
+        return True
+    
     @abstractmethod
     async def execute(
         self,
@@ -58,6 +64,104 @@ class SkillProvider(ABC):
         """Execute the skill."""
         pass
     
+    async def stream(
+        self,
+        context: Dict[str, Any],
+        paper_ids: Optional[List[str]] = None,
+        **kwargs
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Execute the skill as a stream of events.
+        
+        Skills that call an LLM yield {"type": "delta", "content": ...} for each
+        piece of generated text. Every stream ends with {"type": "result",
+        "data": ...} holding the same dict that execute() returns. By default
+        the skill is executed and only the result is sent.
+        """
+        result = await self.execute(context, paper_ids, **kwargs)
+        yield {"type": "result", "data": result}
+    
+    def _response_cache(self, prompt: str, context: Dict[str, Any]) -> Tuple[Any, str, str]:
+        """Return (cache, key, model) for prompt, or (None, "", "") when caching does not apply."""
+        from app.llm_cache import get_llm_response_cache
+        from app.services.llm_service import llm_service
+        
+        if not self.cache_enabled or context.get("use_cache") is False:
+            return None, "", ""
+        cache = get_llm_response_cache()
+        if cache is None:
+            return None, "", ""
+        
+        provider = context.get("llm_provider")
+        model = context.get("llm_model")
+        model_name = llm_service.get_model_name(provider=provider, model=model)
+        temperature = llm_service.get_temperature(provider=provider, model=model)
+        return cache, cache.make_key(prompt, model_name, temperature), model_name
+    
+    @staticmethod
+    def _answered_by_cached_model(answered_by: List[str], model_name: str) -> bool:
+        """False when a fallback provider answered, so its output is not cached under the primary model."""
+        return all(name == model_name for name in answered_by)
+    
+    async def _generate(self, prompt: str, context: Dict[str, Any]) -> str:
+        """Generate an LLM completion of prompt, answered from the response cache when possible."""
+        from app.services.llm_service import llm_service
+        
+        cache, key, model_name = self._response_cache(prompt, context)
+        if cache is not None:
+            cached = await asyncio.to_thread(cache.get, key, self.id)
+            if cached is not None:
+                return cached
+        
+        answered_by: List[str] = []
+        result = await llm_service.generate(
+            prompt,
+            provider=context.get("llm_provider"),
+            model=context.get("llm_model"),
+            answered_by=answered_by,
+        )
+        
+        if cache is not None and result and self._answered_by_cached_model(answered_by, model_name):
+            await asyncio.to_thread(cache.put, key, result, self.id, model_name)
+        return result
+    
+    async def _stream_generation(
+        self,
+        prompt: str,
+        context: Dict[str, Any],
+        make_result: Callable[[str], Dict[str, Any]],
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream an LLM completion of prompt, then the result built from the full text.
+        
+        A cached response is sent as a single delta.
+        """
+        from app.services.llm_service import llm_service
+        
+        cache, key, model_name = self._response_cache(prompt, context)
+        if cache is not None:
+            cached = await asyncio.to_thread(cache.get, key, self.id)
+            if cached is not None:
+                yield {"type": "delta", "content": cached}
+                yield {"type": "result", "data": make_result(cached)}
+                return
+        
+        parts = []
+        answered_by: List[str] = []
+        async for delta in llm_service.stream(
+            prompt,
+            provider=context.get("llm_provider"),
+            model=context.get("llm_model"),
+            answered_by=answered_by,
+        ):
+            parts.append(delta)
+            yield {"type": "delta", "content": delta}
+        
+        text = "".join(parts)
+        if cache is not None and text and self._answered_by_cached_model(answered_by, model_name):
+            await asyncio.to_thread(cache.put, key, text, self.id, model_name)
+        yield {"type": "result", "data": make_result(text)}
+    
     def is_available(self) -> bool:
         """Check if skill is available."""
         return True
@@ -77,4 +181,5 @@ class SkillProvider(ABC):
             "requires_paper": self.requires_paper,
             "available": self.is_available(),
             "input_schema": self.input_schema,
+            "cache_enabled": self.cache_enabled,
         }
@@ -1,8 +1,8 @@
-import re
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator
 from datetime import datetime
 from .base import SkillProvider
+from .template import compile_template
 
 logger = logging.getLogger(__name__)
 
@@ -20,9 +20,12 @@ class DynamicSkill(SkillProvider):
         self._requires_paper = config.get("requires_paper", True)
         self._input_schema = config.get("input_schema")
         self._template = config.get("template", "")
+        # Parsed once per load or reload instead of on every render
+        self._compiled_template = compile_template(self._template)
         self._file_path = config.get("file_path", "")
         self._loaded_at = config.get("loaded_at", datetime.now().isoformat())
         self._source = config.get("source", "dynamic")
+        self._cache_enabled = config.get("cache", True)
     
     @property
     def id(self) -> str:
@@ -52,6 +55,10 @@ class DynamicSkill(SkillProvider):
     def input_schema(self) -> Optional[Dict[str, Any]]:
         return self._input_schema
     
+    @property
+    def cache_enabled(self) -> bool:
+        return self._cache_enabled
+    
     @property
     def file_path(self) -> str:
         return self._file_path
@@ -72,8 +79,7 @@ class DynamicSkill(SkillProvider):
     
     def render_template(self, context: Dict[str, Any], **kwargs) -> str:
         """Render the prompt template with context and parameters."""
-        template = self._template
-        if not template:
+        if not self._template:
             return ""
         
         paper = context.get("papers", [{}])[0] if context.get("papers") else {}
@@ -92,84 +98,7 @@ class DynamicSkill(SkillProvider):
             **kwargs
         }
         
-        template = self._render_conditionals(template, render_context)
-        
-        for key, value in render_context.items():
-            if isinstance(value, dict):
-                for sub_key, sub_value in value.items():
-                    placeholder = f"{{{key}.{sub_key}}}"
-                    template = template.replace(placeholder, str(sub_value or ""))
-            else:
-                placeholder = f"{{{key}}}"
-                template = template.replace(placeholder, str(value or ""))
-        
-        return template
-    
-    def _render_conditionals(self, template: str, context: Dict[str, Any]) -> str:
-        """Render conditional blocks in template."""
-        if_elif_else_pattern = re.compile(
-            r'\{if\s+(\w+)\s*==\s*"([^"]+)"\}(.*?)\{elif\s+\w+\s*==\s*"([^"]+)"\}(.*?)\{else\}(.*?)\{endif\}',
-            re.DOTALL
-        )
-        
-        def replace_if_elif_else(match):
-            var_name = match.group(1)
-            if_value = match.group(2)
-            if_content = match.group(3)
-            elif_value = match.group(4)
-            elif_content = match.group(5)
-            else_content = match.group(6)
-            
-            actual_value = context.get(var_name, "")
-            
-            if actual_value == if_value:
-                return if_content
-            elif actual_value == elif_value:
-                return elif_content
-            else:
-                return else_content
-        
-        template = if_elif_else_pattern.sub(replace_if_elif_else, template)
-        
-        if_else_pattern = re.compile(
-            r'\{if\s+(\w+)\s*==\s*"([^"]+)"\}(.*?)\{else\}(.*?)\{endif\}',
-            re.DOTALL
-        )
-        
-        def replace_if_else(match):
-            var_name = match.group(1)
-            expected_value = match.group(2)
-            if_content = match.group(3)
-            else_content = match.group(4)
-            
-            actual_value = context.get(var_name, "")
-            
-            if actual_value == expected_value:
-                return if_content
-            else:
-                return else_content
-        
-        template = if_else_pattern.sub(replace_if_else, template)
-        
-        simple_if_pattern = re.compile(
-            r'\{if\s+(\w+)\}(.*?)\{else\}(.*?)\{endif\}',
-            re.DOTALL
-        )
-        
-        def replace_simple_if(match):
-            var_name = match.group(1)
-            if_content = match.group(2)
-            else_content = match.group(3)
-            
-            actual_value = context.get(var_name)
-            if actual_value:
-                return if_content
-            else:
-                return else_content
-        
-        template = simple_if_pattern.sub(replace_simple_if, template)
-        
-        return template
+        return self._compiled_template.render(render_context)
     
     async def execute(
         self,
@@ -178,40 +107,63 @@ class DynamicSkill(SkillProvider):
         **kwargs
     ) -> Dict[str, Any]:
         """Execute the skill by rendering template and calling LLM."""
-        from app.services.llm_service import llm_service
-        
         papers = context.get("papers", [])
         if not papers and self._requires_paper:
             return {"error": "No papers provided", "success": False}
         
-        provider = context.get("llm_provider")
-        model = context.get("llm_model")
-        
         prompt = self.render_template(context, **kwargs)
         
         if not prompt:
             return {"error": "Failed to render prompt template", "success": False}
         
         try:
-            result = await llm_service.generate(prompt, provider=provider, model=model)
-            
-            response = {
-                "success": True,
-                "skill_id": self._id,
-                "skill_name": self._name,
-                "result": result
-            }
-            
-            if papers:
-                response["paper_id"] = papers[0].get("id")
-                response["paper_title"] = papers[0].get("title")
-            
-            return response
+            result = await self._generate(prompt, context)
+            return self._build_response(papers, result)
             
         except Exception as e:
             logger.error(f"Failed to execute skill {self._id}: {e}")
             return {"error": str(e), "success": False}
     
+    def _build_response(self, papers: List[Dict[str, Any]], result: str) -> Dict[str, Any]:
+        response = {
+            "success": True,
+            "skill_id": self._id,
+            "skill_name": self._name,
+            "result": result
+        }
+        
+        if papers:
+            response["paper_id"] = papers[0].get("id")
+            response["paper_title"] = papers[0].get("title")
+        
+        return response
+    
+    async def stream(
+        self,
+        context: Dict[str, Any],
+        paper_ids: Optional[List[str]] = None,
+        **kwargs
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream the LLM output for the rendered template, then the full result."""
+        papers = context.get("papers", [])
+        if not papers and self._requires_paper:
+            yield {"type": "result", "data": {"error": "No papers provided", "success": False}}
+            return
+        
+        prompt = self.render_template(context, **kwargs)
+        if not prompt:
+            yield {"type": "result", "data": {"error": "Failed to render prompt template", "success": False}}
+            return
+        
+        try:
+            async for event in self._stream_generation(
+                prompt, context, lambda result: self._build_response(papers, result)
+            ):
+                yield event
+        except Exception as e:
+            logger.error(f"Failed to stream skill {self._id}: {e}")
+            yield {"type": "result", "data": {"error": str(e), "success": False}}
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert skill to dictionary for API response."""
         base_dict = super().to_dict()
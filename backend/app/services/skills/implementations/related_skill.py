@@ -47,14 +47,14 @@ class RelatedPapersSkill(SkillProvider):
         top_k: int = 5,
         **kwargs
     ) -> Dict[str, Any]:
-        from app.services.paper_service import PaperService
+        from app.dependencies import get_paper_service
         
         papers = context.get("papers", [])
         if not papers:
             return {"error": "No papers provided", "success": False}
         
         paper = papers[0]
-        paper_service = PaperService()
+        paper_service = get_paper_service()
         
         title = paper.get("title", "")
         abstract = paper.get("abstract", "")
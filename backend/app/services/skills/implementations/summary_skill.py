@@ -1,4 +1,4 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator
 from ..base import SkillProvider
 
 
@@ -39,26 +39,9 @@ class SummarySkill(SkillProvider):
             }
         }
     
-    async def execute(
-        self,
-        context: Dict[str, Any],
-        paper_ids: Optional[List[str]] = None,
-        detail_level: str = "brief",
-        **kwargs
-    ) -> Dict[str, Any]:
-        from app.services.llm_service import llm_service
-        
-        papers = context.get("papers", [])
-        if not papers:
-            return {"error": "No papers provided", "success": False}
-        
-        paper = papers[0]
-        
-        provider = context.get("llm_provider")
-        model = context.get("llm_model")
-        
+    def _build_prompt(self, paper: Dict[str, Any], detail_level: str) -> str:
         if detail_level == "detailed":
-            prompt = f"""Please provide a detailed summary of the following paper:
+            return f"""Please provide a detailed summary of the following paper:
 
 Title: {paper.get('title', '')}
 Abstract: {paper.get('abstract', '')}
@@ -73,8 +56,8 @@ Please include:
 7. Conclusions and Future Work
 
 Format the response in clear sections with markdown headings."""
-        else:
-            prompt = f"""Please provide a brief summary of the following paper:
+        
+        return f"""Please provide a brief summary of the following paper:
 
 Title: {paper.get('title', '')}
 Abstract: {paper.get('abstract', '')}
@@ -86,13 +69,50 @@ Please include:
 4. Conclusions
 
 Keep the summary concise and to the point."""
-        
-        result = await llm_service.generate(prompt, provider=provider, model=model)
-        
+    
+    def _build_result(self, paper: Dict[str, Any], summary: str, detail_level: str) -> Dict[str, Any]:
         return {
             "paper_id": paper.get("id"),
             "paper_title": paper.get("title", ""),
-            "summary": result,
+            "summary": summary,
             "detail_level": detail_level,
             "success": True
         }
+    
+    async def execute(
+        self,
+        context: Dict[str, Any],
+        paper_ids: Optional[List[str]] = None,
+        detail_level: str = "brief",
+        **kwargs
+    ) -> Dict[str, Any]:
+        papers = context.get("papers", [])
+        if not papers:
+            return {"error": "No papers provided", "success": False}
+        
+        paper = papers[0]
+        
+        prompt = self._build_prompt(paper, detail_level)
+        result = await self._generate(prompt, context)
+        
+        return self._build_result(paper, result, detail_level)
+    
+    async def stream(
+        self,
+        context: Dict[str, Any],
+        paper_ids: Optional[List[str]] = None,
+        detail_level: str = "brief",
+        **kwargs
+    ) -> AsyncIterator[Dict[str, Any]]:
+        papers = context.get("papers", [])
+        if not papers:
+            yield {"type": "result", "data": {"error": "No papers provided", "success": False}}
+            return
+        
+        paper = papers[0]
+        async for event in self._stream_generation(
+            self._build_prompt(paper, detail_level),
+            context,
+            lambda summary: self._build_result(paper, summary, detail_level),
+        ):
+            yield event
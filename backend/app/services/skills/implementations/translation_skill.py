@@ -1,4 +1,4 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator
 from ..base import SkillProvider
 
 
@@ -40,37 +40,20 @@ class TranslationSkill(SkillProvider):
             "required": ["target_language"]
         }
     
-    async def execute(
-        self,
-        context: Dict[str, Any],
-        paper_ids: Optional[List[str]] = None,
-        target_language: str = "Chinese",
-        **kwargs
-    ) -> Dict[str, Any]:
-        from app.services.llm_service import llm_service
-        
-        papers = context.get("papers", [])
-        if not papers:
-            return {"error": "No papers provided", "success": False}
-        
-        paper = papers[0]
-        
-        provider = context.get("llm_provider")
-        model = context.get("llm_model")
-        
-        language_prompts = {
-            "Chinese": "中文",
-            "English": "English",
-            "Japanese": "日本語",
-            "Korean": "한국어",
-            "German": "Deutsch",
-            "French": "Français",
-            "Spanish": "Español"
-        }
-        
-        target_lang_name = language_prompts.get(target_language, target_language)
+    LANGUAGE_NAMES = {
+        "Chinese": "中文",
+        "English": "English",
+        "Japanese": "日本語",
+        "Korean": "한국어",
+        "German": "Deutsch",
+        "French": "Français",
+        "Spanish": "Español"
+    }
+    
+    def _build_prompt(self, paper: Dict[str, Any], target_language: str) -> str:
+        target_lang_name = self.LANGUAGE_NAMES.get(target_language, target_language)
         
-        prompt = f"""Please translate the following paper content to {target_lang_name}:
+        return f"""Please translate the following paper content to {target_lang_name}:
 
 Title: {paper.get('title', '')}
 
@@ -83,13 +66,50 @@ Requirements:
 4. Format the output clearly with "Title:" and "Abstract:" sections
 
 Please provide the translation:"""
-        
-        result = await llm_service.generate(prompt, provider=provider, model=model)
-        
+    
+    def _build_result(self, paper: Dict[str, Any], translation: str, target_language: str) -> Dict[str, Any]:
         return {
             "paper_id": paper.get("id"),
             "paper_title": paper.get("title", ""),
             "target_language": target_language,
-            "translation": result,
+            "translation": translation,
             "success": True
         }
+    
+    async def execute(
+        self,
+        context: Dict[str, Any],
+        paper_ids: Optional[List[str]] = None,
+        target_language: str = "Chinese",
+        **kwargs
+    ) -> Dict[str, Any]:
+        papers = context.get("papers", [])
+        if not papers:
+            return {"error": "No papers provided", "success": False}
+        
+        paper = papers[0]
+        
+        prompt = self._build_prompt(paper, target_language)
+        result = await self._generate(prompt, context)
+        
+        return self._build_result(paper, result, target_language)
+    
+    async def stream(
+        self,
+        context: Dict[str, Any],
+        paper_ids: Optional[List[str]] = None,
+        target_language: str = "Chinese",
+        **kwargs
+    ) -> AsyncIterator[Dict[str, Any]]:
+        papers = context.get("papers", [])
+        if not papers:
+            yield {"type": "result", "data": {"error": "No papers provided", "success": False}}
+            return
+        
+        paper = papers[0]
+        async for event in self._stream_generation(
+            self._build_prompt(paper, target_language),
+            context,
+            lambda translation: self._build_result(paper, translation, target_language),
+        ):
+            yield event
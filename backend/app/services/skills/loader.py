@@ -70,6 +70,7 @@ class SkillLoader:
                 "category": frontmatter.get("category", "general"),
                 "requires_paper": frontmatter.get("requires_paper", True),
                 "input_schema": xivmind_meta.get("input_schema"),
+                "cache": xivmind_meta.get("cache", True),
                 "template": self._extract_template(body),
                 "body": body,
                 "file_path": str(skill_path),
@@ -0,0 +1,165 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+# One pass over the template finds every tag:
+#   {if var}, {if var == "value"}, {elif ...}, {else}, {endif}, {key}, {key.sub}
+_TAG_RE = re.compile(
+    r'\{(?:'
+    r'(?P<branch>if|elif)\s+(?P<var>\w+(?:\.\w+)?)(?:\s*==\s*"(?P<value>[^"]+)")?'
+    r'|(?P<keyword>else|endif)'
+    r'|(?P<key>\w+)(?:\.(?P<sub>\w+))?'
+    r')\}'
+)
+
+# (variable, sub key, expected value or None for a truthiness test)
+Test = Tuple[str, Optional[str], Optional[str]]
+# A program is a list of ops: literal text, ("var", key, sub, source) or ("if", block)
+Op = Union[str, tuple]
+
+
+class TemplateSyntaxError(ValueError):
+    """Unbalanced {if}/{elif}/{else}/{endif} tags."""
+
+
+class _Block:
+    def __init__(self, test: Test):
+        self.branches: List[Tuple[Test, List[Op]]] = [(test, [])]
+        self.else_program: Optional[List[Op]] = None
+
+    @property
+    def current(self) -> List[Op]:
+        return self.else_program if self.else_program is not None else self.branches[-1][1]
+
+
+def _lookup(context: Dict[str, Any], key: str, sub: Optional[str]) -> Tuple[bool, Any]:
+    if key not in context:
+        return False, None
+    value = context[key]
+    if sub is None:
+        return True, value
+    if isinstance(value, dict) and sub in value:
+        return True, value[sub]
+    return False, None
+
+
+class CompiledTemplate:
+    """
+    A SKILL.md prompt template parsed once into a render program.
+
+    Rendering walks the program instead of running the conditional
+    regexes and one ``str.replace`` pass per placeholder on every call.
+    Output matches the original renderer: ``{key}`` and ``{key.sub}``
+    become ``str(value or "")``, and placeholders without a value are kept
+    as written. ``{if var == "x"}`` compares with ``==`` and ``{if var}``
+    tests truthiness. In addition, branches may be nested, chains may have
+    any number of ``{elif}`` tags and ``{else}`` is optional.
+    """
+
+    __slots__ = ("source", "_program")
+
+    def __init__(self, source: str, program: List[Op]):
+        self.source = source
+        self._program = program
+
+    def render(self, context: Dict[str, Any]) -> str:
+        out: List[str] = []
+        self._render(self._program, context, out)
+        return "".join(out)
+
+    def _render(self, program: List[Op], context: Dict[str, Any], out: List[str]):
+        for op in program:
+            if type(op) is str:
+                out.append(op)
+            elif op[0] == "var":
+                _, key, sub, source = op
+                found, value = _lookup(context, key, sub)
+                if not found or (sub is None and isinstance(value, dict)):
+                    out.append(source)
+                else:
+                    out.append(str(value or ""))
+            else:
+                block = op[1]
+                for test, body in block.branches:
+                    if self._test(test, context):
+                        self._render(body, context, out)
+                        break
+                else:
+                    if block.else_program:
+                        self._render(block.else_program, context, out)
+
+    @staticmethod
+    def _test(test: Test, context: Dict[str, Any]) -> bool:
+        var, sub, expected = test
+        _, value = _lookup(context, var, sub)
+        if expected is None:
+            return bool(value)
+        return value == expected
+
+
+def _parse(source: str, conditionals: bool = True) -> List[Op]:
+    program: List[Op] = []
+    stack: List[_Block] = []
+
+    def emit(op: Op):
+        target = stack[-1].current if stack else program
+        if type(op) is str and target and type(target[-1]) is str:
+            target[-1] += op
+        else:
+            target.append(op)
+
+    position = 0
+    for match in _TAG_RE.finditer(source):
+        if match.start() > position:
+            emit(source[position:match.start()])
+        position = match.end()
+
+        if match.group("key"):
+            emit(("var", match.group("key"), match.group("sub"), match.group(0)))
+            continue
+        if not conditionals:
+            emit(match.group(0))
+            continue
+
+        var, _, sub = (match.group("var") or "").partition(".")
+        test: Test = (var, sub or None, match.group("value"))
+        branch = match.group("branch")
+        keyword = match.group("keyword")
+
+        if branch == "if":
+            block = _Block(test)
+            emit(("if", block))
+            stack.append(block)
+        elif not stack:
+            raise TemplateSyntaxError(f"{match.group(0)} without a matching {{if}} at offset {match.start()}")
+        elif branch == "elif":
+            if stack[-1].else_program is not None:
+                raise TemplateSyntaxError(f"{{elif}} after {{else}} at offset {match.start()}")
+            stack[-1].branches.append((test, []))
+        elif keyword == "else":
+            if stack[-1].else_program is not None:
+                raise TemplateSyntaxError(f"Second {{else}} at offset {match.start()}")
+            stack[-1].else_program = []
+        else:
+            stack.pop()
+
+    if stack:
+        raise TemplateSyntaxError("Unclosed {if} block")
+    if position < len(source):
+        emit(source[position:])
+    return program
+
+
+def compile_template(source: str, strict: bool = False) -> CompiledTemplate:
+    """
+    Compile a prompt template.
+
+    Unbalanced conditional tags raise TemplateSyntaxError when ``strict``.
+    Otherwise they are kept as literal text, as the original renderer
+    did, and only placeholders are substituted.
+    """
+    try:
+        return CompiledTemplate(source, _parse(source))
+    except TemplateSyntaxError:
+        if strict:
+            raise
+        return CompiledTemplate(source, _parse(source, conditionals=False))
@@ -7,12 +7,20 @@ from .types import (
     SubAgentTask,
     SubAgentResult,
     SubAgentExecutionContext,
+    SubAgentPlanNode,
+    SubAgentPlan,
+    SubAgentPlanNodeResult,
+    SubAgentPlanResult,
 )
 from .base import SubAgentBase
 from .context import SubAgentContextManager, ContextSummarizer
 from .loader import SubAgentLoader
 from .registry import SubAgentRegistry, DynamicSubAgent
+from .journal import SubAgentJournal
 from .executor import SubAgentExecutor
+from .plan import SubAgentPlanExecutor, SubAgentPlanError
+from .runner import SubAgentRun, SubAgentTaskRunner, TaskQueueFullError
+from .routing import SubAgentRouter
 from .manager import (
     SubAgentManager,
     subagent_manager,
@@ -31,13 +39,24 @@ __all__ = [
     "SubAgentTask",
     "SubAgentResult",
     "SubAgentExecutionContext",
+    "SubAgentPlanNode",
+    "SubAgentPlan",
+    "SubAgentPlanNodeResult",
+    "SubAgentPlanResult",
     "SubAgentBase",
     "SubAgentContextManager",
     "ContextSummarizer",
     "SubAgentLoader",
     "SubAgentRegistry",
     "DynamicSubAgent",
+    "SubAgentJournal",
     "SubAgentExecutor",
+    "SubAgentPlanExecutor",
+    "SubAgentPlanError",
+    "SubAgentRun",
+    "SubAgentTaskRunner",
+    "TaskQueueFullError",
+    "SubAgentRouter",
     "SubAgentManager",
     "subagent_manager",
     "register_default_agents",
@@ -42,6 +42,14 @@ class SubAgentBase(ABC):
     def max_turns(self) -> int:
         return self._config.max_turns
     
+    @property
+    def max_parallel_tools(self) -> int:
+        """How many tool calls from one turn may run at the same time."""
+        if self._config.max_parallel_tools:
+            return max(1, self._config.max_parallel_tools)
+        from app.config import get_settings
+        return max(1, get_settings().SUBAGENTS_MAX_PARALLEL_TOOLS)
+    
     @property
     def temperature(self) -> float:
         return self._config.temperature
@@ -176,6 +184,7 @@ Abstract: {abstract}
             "skills": self.skills,
             "tools": self.tools,
             "max_turns": self.max_turns,
+            "max_parallel_tools": self.max_parallel_tools,
             "temperature": self.temperature,
             "model": self.model,
             "provider": self.provider,
@@ -4,6 +4,9 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime
 from pathlib import Path
 
+from app.config import get_settings
+from app.services.context_builder import estimate_tokens
+
 from .types import (
     SubAgentExecutionContext,
     SubAgentMessage,
@@ -147,78 +150,288 @@ class SubAgentContextManager:
         return count
 
 
+_ROLE_NAMES = {
+    "en": {
+        SubAgentMessageRole.SYSTEM: "System",
+        SubAgentMessageRole.USER: "User",
+        SubAgentMessageRole.ASSISTANT: "Assistant",
+        SubAgentMessageRole.TOOL: "Tool",
+    },
+    "zh": {
+        SubAgentMessageRole.SYSTEM: "系统",
+        SubAgentMessageRole.USER: "用户",
+        SubAgentMessageRole.ASSISTANT: "助手",
+        SubAgentMessageRole.TOOL: "工具",
+    },
+}
+
+_SUMMARY_HEADERS = {"en": "[Conversation History Summary]", "zh": "[历史对话摘要]"}
+
+_SUMMARY_PROMPTS = {
+    "en": (
+        "Summarize the earlier part of a conversation between a research assistant, "
+        "its user and its tools, so the assistant can continue the task. Keep facts, "
+        "paper IDs, decisions and open questions. Use at most {words} words."
+    ),
+    "zh": "请总结研究助手与用户、工具之间较早的对话，以便助手继续完成任务。保留事实、论文 ID、结论和未解决的问题。不超过 {words} 字。",
+}
+
+# Role and framing tokens each chat message costs on top of its content
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_message_tokens(message: SubAgentMessage) -> int:
+    return estimate_tokens(message.content) + MESSAGE_OVERHEAD_TOKENS
+
+
 class ContextSummarizer:
-    """Summarizer for compressing context when it gets too long."""
+    """
+    Keeps a SubAgent conversation within a token budget.
     
-    def __init__(self, max_messages: int = 50, keep_recent: int = 10):
+    Compaction starts once the estimated prompt exceeds ``token_budget``
+    (or has more than ``max_messages`` messages). It then works down to
+    ``target_ratio`` of the budget, so it does not run again on the very
+    next turn. The system prompt, the paper context and the user's
+    instruction are never touched. Compaction has three steps:
+    
+    1. Tool results the assistant has already answered that exceed
+       ``tool_result_tokens`` are collapsed to a short reference. Papers
+       they mention are listed by ID and title from ``context.papers``.
+    2. The oldest remaining messages are folded into a single summary
+       message of at most ``summary_tokens``. The summary is written by
+       ``summary_model`` when one is configured. Otherwise it is built
+       from the start of each folded message.
+    3. As a last resort, the largest remaining messages are truncated.
+    """
+    
+    def __init__(
+        self,
+        max_messages: int = 50,
+        keep_recent: int = 10,
+        token_budget: int = 8000,
+        target_ratio: float = 0.6,
+        tool_result_tokens: int = 400,
+        summary_tokens: int = 800,
+        summary_provider: Optional[str] = None,
+        summary_model: Optional[str] = None,
+    ):
         self.max_messages = max_messages
         self.keep_recent = keep_recent
+        self.token_budget = token_budget
+        self.target_ratio = target_ratio
+        self.tool_result_tokens = tool_result_tokens
+        self.summary_tokens = summary_tokens
+        self.summary_provider = summary_provider or None
+        self.summary_model = summary_model or None
+    
+    @classmethod
+    def from_settings(cls) -> "ContextSummarizer":
+        settings = get_settings()
+        return cls(
+            token_budget=settings.SUBAGENTS_CONTEXT_TOKEN_BUDGET,
+            tool_result_tokens=settings.SUBAGENTS_TOOL_RESULT_TOKENS,
+            summary_tokens=settings.SUBAGENTS_SUMMARY_TOKENS,
+            summary_provider=settings.SUBAGENTS_SUMMARY_PROVIDER,
+            summary_model=settings.SUBAGENTS_SUMMARY_MODEL,
+        )
+    
+    @staticmethod
+    def count_tokens(messages: List[SubAgentMessage]) -> int:
+        return sum(estimate_message_tokens(msg) for msg in messages)
     
     def should_summarize(self, context: SubAgentExecutionContext) -> bool:
-        return len(context.messages) > self.max_messages
+        if len(context.messages) > self.max_messages:
+            return True
+        return self.count_tokens(context.messages) > self.token_budget
     
-    def summarize_messages(
+    @staticmethod
+    def _pinned_count(messages: List[SubAgentMessage]) -> int:
+        """Leading system messages and the first user message."""
+        for i, msg in enumerate(messages):
+            if msg.role == SubAgentMessageRole.USER:
+                return i + 1
+        return 0
+    
+    @staticmethod
+    def _truncate(text: str, max_tokens: int) -> str:
+        if estimate_tokens(text) <= max_tokens:
+            return text
+        kept: List[str] = []
+        used = 0
+        for word in text.split():
+            cost = estimate_tokens(word) + 1
+            if used + cost > max_tokens:
+                break
+            kept.append(word)
+            used += cost
+        return " ".join(kept) + " ..."
+    
+    def _collapse_tool_result(
+        self,
+        message: SubAgentMessage,
+        papers: List[Dict[str, Any]],
+        language: str,
+    ) -> SubAgentMessage:
+        content = message.content
+        first_line = self._truncate(content.strip().split("\n", 1)[0], 40)
+        tokens = estimate_tokens(content)
+        name = message.name or "tool"
+        
+        if language == "zh":
+            lines = [f"[已折叠较早的 {name} 工具结果，约 {tokens} tokens] {first_line}"]
+        else:
+            lines = [f"[Earlier {name} result collapsed, about {tokens} tokens] {first_line}"]
+        
+        referenced = [p for p in papers if p.get("id") and p["id"] in content][:10]
+        if referenced:
+            lines.append("涉及的论文：" if language == "zh" else "Papers referenced:")
+            for paper in referenced:
+                lines.append(f"- {paper['id']}: {self._truncate(paper.get('title', ''), 20)}")
+        
+        return message.model_copy(update={"content": "\n".join(lines)})
+    
+    def _extractive_summary(
         self,
         messages: List[SubAgentMessage],
-        keep_recent: Optional[int] = None,
-        language: str = "en"
-    ) -> List[SubAgentMessage]:
-        if len(messages) <= self.max_messages:
-            return messages
+        language: str,
+        max_tokens: Optional[int] = None,
+    ) -> str:
+        role_names = _ROLE_NAMES.get(language, _ROLE_NAMES["en"])
+        header = _SUMMARY_HEADERS.get(language, _SUMMARY_HEADERS["en"])
+        lines: List[str] = []
+        for msg in messages:
+            if msg.role == SubAgentMessageRole.SYSTEM and msg.content.startswith(header):
+                # An earlier summary: carry its lines over instead of truncating it again
+                lines.extend(line for line in msg.content[len(header):].splitlines() if line.strip())
+                continue
+            role_name = role_names.get(msg.role, msg.role.value)
+            content = " ".join(msg.content.split())
+            content = content[:200] + "..." if len(content) > 200 else content
+            if msg.tool_calls:
+                calls = ", ".join(
+                    f"{call.name}({json.dumps(call.arguments, ensure_ascii=False)[:80]})" for call in msg.tool_calls
+                )
+                content = f"{content} [TOOL: {calls}]".strip()
+            lines.append(f"{role_name}: {content}")
         
-        keep = keep_recent or self.keep_recent
-        recent_messages = messages[-keep:]
-        old_messages = messages[:-keep]
+        # Over the cap, the oldest lines go first
+        budget = (max_tokens or self.summary_tokens) - estimate_tokens(header)
+        kept: List[str] = []
+        for line in reversed(lines):
+            cost = estimate_tokens(line) + 1
+            if cost > budget:
+                break
+            kept.append(line)
+            budget -= cost
+        return header + "\n" + "\n".join(reversed(kept))
+    
+    async def _llm_summary(self, messages: List[SubAgentMessage], language: str) -> Optional[str]:
+        if not self.summary_model:
+            return None
         
-        if language == "zh":
-            return self._summarize_zh(old_messages, recent_messages)
-        return self._summarize_en(old_messages, recent_messages)
+        from app.services.llm_service import llm_service
+        
+        header = _SUMMARY_HEADERS.get(language, _SUMMARY_HEADERS["en"])
+        prompt = _SUMMARY_PROMPTS.get(language, _SUMMARY_PROMPTS["en"]).format(words=int(self.summary_tokens * 0.7))
+        transcript = self._extractive_summary(messages, language, max_tokens=self.summary_tokens * 4)
+        try:
+            summary = await llm_service.generate_with_messages(
+                messages=[
+                    {"role": "system", "content": prompt},
+                    {"role": "user", "content": transcript},
+                ],
+                provider=self.summary_provider,
+                model=self.summary_model,
+                temperature=0.2,
+            )
+        except Exception as e:
+            logger.warning(f"Context summary with {self.summary_model} failed, using extractive summary: {e}")
+            return None
+        if not summary or not summary.strip():
+            return None
+        return header + "\n" + self._truncate(summary.strip(), self.summary_tokens)
     
-    def _summarize_en(
+    async def compact(
         self,
-        old_messages: List[SubAgentMessage],
-        recent_messages: List[SubAgentMessage]
+        context: SubAgentExecutionContext,
+        language: str = "en",
     ) -> List[SubAgentMessage]:
-        summary_parts = ["[Conversation History Summary]\n"]
-        for msg in old_messages:
-            role_name = {
-                SubAgentMessageRole.SYSTEM: "System",
-                SubAgentMessageRole.USER: "User",
-                SubAgentMessageRole.ASSISTANT: "Assistant",
-                SubAgentMessageRole.TOOL: "Tool",
-            }.get(msg.role, msg.role.value)
-            
-            content = msg.content[:200] + "..." if len(msg.content) > 200 else msg.content
-            summary_parts.append(f"{role_name}: {content}\n")
+        """Return the context's messages compacted to the target share of the token budget."""
+        messages = list(context.messages)
+        target = int(self.token_budget * self.target_ratio)
+        pinned = self._pinned_count(messages)
+        before = self.count_tokens(messages)
         
-        summary_message = SubAgentMessage(
-            role=SubAgentMessageRole.SYSTEM,
-            content="\n".join(summary_parts),
-            timestamp=datetime.now()
+        # 1. Collapse tool results the assistant has already responded to
+        last_assistant = max(
+            (i for i, msg in enumerate(messages) if msg.role == SubAgentMessageRole.ASSISTANT), default=-1
         )
+        for i in range(pinned, last_assistant):
+            msg = messages[i]
+            if msg.role == SubAgentMessageRole.TOOL and estimate_tokens(msg.content) > self.tool_result_tokens:
+                messages[i] = self._collapse_tool_result(msg, context.papers, language)
         
-        return [summary_message] + recent_messages
+        # 2. Fold the oldest messages into a summary, keeping at least the latest exchange
+        if self.count_tokens(messages) > target or len(messages) > self.max_messages:
+            head, body = messages[:pinned], messages[pinned:]
+            keep_min = min(len(body), 2)
+            fold = 0
+            remaining = self.count_tokens(body)
+            limit = target - self.count_tokens(head) - self.summary_tokens
+            while fold < len(body) - keep_min and (
+                remaining > limit or pinned + 1 + len(body) - fold > self.max_messages
+            ):
+                remaining -= estimate_message_tokens(body[fold])
+                fold += 1
+            # Never separate tool results from the assistant message that asked for them
+            while fold < len(body) - keep_min and body[fold].role == SubAgentMessageRole.TOOL:
+                fold += 1
+            if fold:
+                folded = body[:fold]
+                content = await self._llm_summary(folded, language) or self._extractive_summary(folded, language)
+                summary = SubAgentMessage(
+                    role=SubAgentMessageRole.SYSTEM,
+                    content=content,
+                    timestamp=datetime.now()
+                )
+                messages = head + [summary] + body[fold:]
+        
+        # 3. Truncate the largest messages if the latest exchange alone is still too big
+        if self.count_tokens(messages) > self.token_budget:
+            overflow = self.count_tokens(messages) - target
+            candidates = sorted(range(pinned, len(messages)), key=lambda i: -estimate_tokens(messages[i].content))
+            for i in candidates:
+                if overflow <= 0:
+                    break
+                tokens = estimate_tokens(messages[i].content)
+                keep = max(self.tool_result_tokens, tokens - overflow)
+                if keep < tokens:
+                    messages[i] = messages[i].model_copy(update={"content": self._truncate(messages[i].content, keep)})
+                    overflow -= tokens - estimate_tokens(messages[i].content)
+        
+        logger.info(
+            f"[SubAgent Context] Compacted {len(context.messages)} messages / {before} tokens "
+            f"to {len(messages)} messages / {self.count_tokens(messages)} tokens"
+        )
+        return messages
     
-    def _summarize_zh(
+    def summarize_messages(
         self,
-        old_messages: List[SubAgentMessage],
-        recent_messages: List[SubAgentMessage]
+        messages: List[SubAgentMessage],
+        keep_recent: Optional[int] = None,
+        language: str = "en"
     ) -> List[SubAgentMessage]:
-        summary_parts = ["[历史对话摘要]\n"]
-        for msg in old_messages:
-            role_name = {
-                SubAgentMessageRole.SYSTEM: "系统",
-                SubAgentMessageRole.USER: "用户",
-                SubAgentMessageRole.ASSISTANT: "助手",
-                SubAgentMessageRole.TOOL: "工具",
-            }.get(msg.role, msg.role.value)
-            
-            content = msg.content[:200] + "..." if len(msg.content) > 200 else msg.content
-            summary_parts.append(f"{role_name}: {content}\n")
+        """Fold all but the most recent messages into one summary message."""
+        if len(messages) <= self.max_messages:
+            return messages
+        
+        keep = keep_recent or self.keep_recent
+        recent_messages = messages[-keep:]
+        old_messages = messages[:-keep]
         
         summary_message = SubAgentMessage(
             role=SubAgentMessageRole.SYSTEM,
-            content="\n".join(summary_parts),
+            content=self._extractive_summary(old_messages, language),
             timestamp=datetime.now()
         )
         
@@ -1,7 +1,14 @@
+import asyncio
+import contextlib
+import functools
 import logging
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, List, Optional
 from datetime import datetime
 
+from app.config import get_settings
+from app.services.llm_service import LLMUsage
+
 from .base import SubAgentBase
 from .types import (
     SubAgentTask,
@@ -13,22 +20,57 @@ from .types import (
     SubAgentExecutionContext,
 )
 from .context import SubAgentContextManager, ContextSummarizer
+from .journal import SubAgentJournal
 from .tools import ToolRegistry
 
 logger = logging.getLogger(__name__)
 
+# Receives progress events while a task runs:
+# {"type": "resumed" | "turn" | "llm_response" | "tool_call" | "tool_result", ...}
+EventCallback = Callable[[Dict[str, Any]], None]
+
 
 class SubAgentExecutor:
     """Executor for running SubAgent tasks."""
     
-    def __init__(self):
+    def __init__(self, journal: Optional[SubAgentJournal] = None, llm_concurrency: Optional[int] = None):
         self.context_manager = SubAgentContextManager()
-        self.summarizer = ContextSummarizer()
+        self.summarizer = ContextSummarizer.from_settings()
+        # Set by the manager when journaling is enabled; None keeps contexts in memory only
+        self.journal = journal
+        self._journal_writer: Optional[ThreadPoolExecutor] = None
+        # LLM calls in flight across every task this executor runs; 0 means no limit
+        if llm_concurrency is None:
+            llm_concurrency = get_settings().SUBAGENTS_LLM_CONCURRENCY
+        self.llm_concurrency = max(0, llm_concurrency)
+        self._llm_semaphore: Optional[asyncio.Semaphore] = None
+        # Set when the server stops; tasks cancelled then stay "running" in
+        # the journal, so the next start resumes them
+        self.shutting_down = False
+    
+    def _llm_slot(self):
+        """Wait for a free slot in the shared LLM concurrency budget."""
+        if not self.llm_concurrency:
+            return contextlib.nullcontext()
+        if self._llm_semaphore is None:
+            self._llm_semaphore = asyncio.Semaphore(self.llm_concurrency)
+        return self._llm_semaphore
     
-    async def execute(self, agent: SubAgentBase, task: SubAgentTask) -> SubAgentResult:
+    async def execute(
+        self,
+        agent: SubAgentBase,
+        task: SubAgentTask,
+        on_event: Optional[EventCallback] = None,
+    ) -> SubAgentResult:
         started_at = datetime.now()
         
-        context = agent.create_context(task)
+        context = await self._load_checkpoint(task.id)
+        if context is not None:
+            logger.info(f"[SubAgent Resume] Task {task.id} continues after turn {context.current_turn}")
+            self._emit(on_event, {"type": "resumed", "turn": context.current_turn})
+        else:
+            context = agent.create_context(task)
+            await self._record("start", task, context)
         self.context_manager.update_context(context)
         
         result = SubAgentResult(
@@ -40,36 +82,108 @@ class SubAgentExecutor:
             model=task.model or agent.model,
         )
         
+        usage = LLMUsage()
         try:
-            output = await self._run_conversation(agent, context, task)
+            output = await self._run_conversation(agent, context, task, on_event, usage)
             
             result.status = SubAgentStatus.COMPLETED
             result.output = output
             result.messages = context.messages
             result.turns_used = context.current_turn
-            
+            result.papers = context.papers
+            await self._record("finish", task.id, SubAgentStatus.COMPLETED, output=output)
+        
+        except asyncio.CancelledError:
+            if self.shutting_down:
+                logger.info(f"[SubAgent Journal] Task {task.id} interrupted by shutdown, will resume on restart")
+            else:
+                await self._record("finish", task.id, SubAgentStatus.CANCELLED, error="Task was cancelled")
+            raise
         except Exception as e:
             logger.error(f"SubAgent {agent.id} execution failed: {e}")
             result.status = SubAgentStatus.FAILED
             result.error = str(e)
+            await self._record("finish", task.id, SubAgentStatus.FAILED, error=str(e))
+        finally:
+            # Also runs when the task is cancelled, so no context is left behind
+            self.context_manager.remove_context(task.id)
         
+        result.prompt_tokens = usage.prompt_tokens
+        result.completion_tokens = usage.completion_tokens
+        result.cached_tokens = usage.cached_tokens
+        result.cache_write_tokens = usage.cache_write_tokens
         result.completed_at = datetime.now()
         
-        self.context_manager.remove_context(task.id)
-        
         return result
     
+    async def _journal_call(self, method: str, *args, **kwargs):
+        """Run a journal method off the event loop."""
+        if self._journal_writer is None:
+            # One thread runs the calls in the order they were made, so a
+            # cancelled task's finish cannot overtake its last checkpoint
+            self._journal_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="subagent-journal")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._journal_writer, functools.partial(getattr(self.journal, method), *args, **kwargs)
+        )
+    
+    async def _load_checkpoint(self, task_id: str) -> Optional[SubAgentExecutionContext]:
+        """The journaled context of an unfinished task with this ID, if there is one."""
+        if self.journal is None:
+            return None
+        try:
+            # The resumed run repeats the unfinished turn, so its old rows must go
+            restored = await self._journal_call("load", task_id, discard_unfinished=True)
+        except Exception as e:
+            logger.warning(f"[SubAgent Journal] Failed to load task {task_id}: {e}")
+            return None
+        return restored[1] if restored else None
+    
+    async def _record(self, method: str, *args, **kwargs):
+        """Write to the journal; a journal error is logged and never fails the task."""
+        if self.journal is None:
+            return
+        try:
+            await self._journal_call(method, *args, **kwargs)
+        except Exception as e:
+            logger.warning(f"[SubAgent Journal] {method} failed: {e}")
+    
+    @staticmethod
+    def _emit(on_event: Optional[EventCallback], event: Dict[str, Any]):
+        if on_event is None:
+            return
+        try:
+            on_event(event)
+        except Exception as e:
+            logger.warning(f"SubAgent event callback failed: {e}")
+    
     async def _run_conversation(
         self,
         agent: SubAgentBase,
         context: SubAgentExecutionContext,
-        task: SubAgentTask
+        task: SubAgentTask,
+        on_event: Optional[EventCallback] = None,
+        usage: Optional[LLMUsage] = None,
     ) -> str:
         from app.services.llm_service import llm_service
         
         provider = task.provider or agent.provider
         model = task.model or agent.model
         
+        # The system prompt, paper context and instruction lead every turn and
+        # never change, and later turns only append, so each call can reuse
+        # the provider's cached prefix of the previous one
+        cache_hints = {}
+        if get_settings().LLM_PROMPT_CACHE_ENABLED:
+            cache_hints = {"cache_prefix": True, "cache_key": f"xivmind-subagent-{agent.id}"}
+        
+        # Providers with native tool calling get the agent's tools as function
+        # schemas and return structured calls. The [TOOL: ...] text protocol
+        # stays as a fallback, for Ollama and for prompts that still ask for it.
+        tool_schemas = []
+        if agent.tools and llm_service.supports_tools(provider, model):
+            tool_schemas = ToolRegistry.get_schemas(agent.tools)
+        
         context.provider = provider
         context.model = model
         
@@ -80,49 +194,79 @@ class SubAgentExecutor:
         
         while not self.context_manager.is_turn_limit_reached(context.task_id):
             self.context_manager.increment_turn(context.task_id)
+            self._emit(on_event, {"type": "turn", "turn": context.current_turn})
             
             if self.summarizer.should_summarize(context):
                 language = getattr(agent._config, 'language', 'en') or 'en'
-                context.messages = self.summarizer.summarize_messages(context.messages, language=language)
+                context.messages = await self.summarizer.compact(context, language=language)
+                await self._record("replace_messages", context.task_id, context.current_turn, context.messages)
             
             messages = context.get_messages_for_llm()
             logger.info(f"[SubAgent LLM Call] Turn {context.current_turn}, Messages: {len(messages)}")
             
+            turn_usage = LLMUsage()
+            native_calls = []
+            tool_hints = {"tools": tool_schemas, "tool_calls": native_calls} if tool_schemas else {}
             try:
-                response = await llm_service.generate_with_messages(
-                    messages=messages,
-                    provider=provider,
-                    model=model,
-                    temperature=agent.temperature,
-                )
+                async with self._llm_slot():
+                    response = await llm_service.generate_with_messages(
+                        messages=messages,
+                        provider=provider,
+                        model=model,
+                        temperature=agent.temperature,
+                        usage=turn_usage,
+                        **cache_hints,
+                        **tool_hints,
+                    )
                 logger.info(f"[SubAgent LLM Response] Turn {context.current_turn}, Response: {response[:300]}...")
             except Exception as e:
                 logger.error(f"LLM call failed: {e}")
                 raise
             
-            context.add_message(SubAgentMessageRole.ASSISTANT, response)
+            if usage is not None:
+                usage.add(turn_usage)
+            if turn_usage.calls:
+                logger.info(
+                    f"[SubAgent LLM Usage] Turn {context.current_turn}, Prompt: {turn_usage.prompt_tokens}, "
+                    f"Cached: {turn_usage.cached_tokens}, Completion: {turn_usage.completion_tokens}"
+                )
+            
+            tool_calls = [
+                SubAgentToolCall(id=call.id, name=call.name, arguments=call.arguments) for call in native_calls
+            ]
+            context.add_message(SubAgentMessageRole.ASSISTANT, response, tool_calls=tool_calls)
+            await self._record("append", context.task_id, context.current_turn, context.messages[-1:])
+            self._emit(on_event, {
+                "type": "llm_response",
+                "turn": context.current_turn,
+                "content": response,
+                "usage": turn_usage.to_dict(),
+            })
             
-            if not response or not response.strip():
+            if not tool_calls and (not response or not response.strip()):
                 logger.warning(f"[SubAgent Empty Response] Turn {context.current_turn}, LLM returned empty response")
                 if context.current_turn >= context.max_turns:
                     return "The model returned an empty response. Please try again or use a different model."
+                await self._record("checkpoint", context)
                 continue
             
             if self._should_stop(response):
                 logger.info(f"[SubAgent Stop] Found stop marker in response")
                 return response
             
-            tool_calls = self._extract_tool_calls(response)
+            tool_calls = tool_calls or self._extract_tool_calls(response)
             if tool_calls:
                 logger.info(f"[SubAgent Tool Calls] Found {len(tool_calls)} tool calls")
-                for tool_call in tool_calls:
-                    tool_result = await self._execute_tool(agent, tool_call, context)
+                tool_results = await self._execute_tools(agent, tool_calls, context, on_event)
+                for tool_call, tool_result in zip(tool_calls, tool_results):
                     context.add_message(
                         SubAgentMessageRole.TOOL,
                         tool_result,
                         name=tool_call.name,
                         tool_call_id=tool_call.id,
                     )
+                await self._record("append", context.task_id, context.current_turn, context.messages[-len(tool_calls):])
+                await self._record("checkpoint", context)
             else:
                 return response
         
@@ -162,6 +306,70 @@ class SubAgentExecutor:
         
         return tool_calls
     
+    async def _execute_tools(
+        self,
+        agent: SubAgentBase,
+        tool_calls: List[SubAgentToolCall],
+        context: SubAgentExecutionContext,
+        on_event: Optional[EventCallback] = None,
+    ) -> List[str]:
+        """
+        Run the tool calls of one turn concurrently and return their results in call order.
+        
+        At most agent.max_parallel_tools calls run at once. Each call gets its
+        own shallow copy of the context. Changes the tools make to papers
+        or variables are merged back in call order, so the context ends up
+        as it would after running the calls one by one. A tool_call event
+        is emitted for every call up front and a tool_result event as each
+        call finishes.
+        """
+        turn = context.current_turn
+        for tool_call in tool_calls:
+            self._emit(on_event, {
+                "type": "tool_call",
+                "turn": turn,
+                "id": tool_call.id,
+                "name": tool_call.name,
+                "arguments": tool_call.arguments,
+            })
+        
+        async def call(tool_call: SubAgentToolCall, call_context: SubAgentExecutionContext) -> str:
+            result = await self._execute_tool(agent, tool_call, call_context)
+            self._emit(on_event, {
+                "type": "tool_result",
+                "turn": turn,
+                "id": tool_call.id,
+                "name": tool_call.name,
+                "result": result,
+            })
+            return result
+        
+        if len(tool_calls) == 1:
+            return [await call(tool_calls[0], context)]
+        
+        semaphore = asyncio.Semaphore(agent.max_parallel_tools)
+        original_papers = context.papers
+        original_variables = dict(context.variables)
+        call_contexts = [context.model_copy(update={"variables": dict(original_variables)}) for _ in tool_calls]
+        
+        async def run(tool_call: SubAgentToolCall, call_context: SubAgentExecutionContext) -> str:
+            async with semaphore:
+                return await call(tool_call, call_context)
+        
+        results = await asyncio.gather(*(
+            run(tool_call, call_context) for tool_call, call_context in zip(tool_calls, call_contexts)
+        ))
+        
+        for call_context in call_contexts:
+            if call_context.papers is not original_papers:
+                context.papers = call_context.papers
+            context.variables.update({
+                key: value for key, value in call_context.variables.items()
+                if key not in original_variables or original_variables[key] != value
+            })
+        
+        return list(results)
+    
     async def _execute_tool(
         self,
         agent: SubAgentBase,
@@ -182,10 +390,15 @@ class SubAgentExecutor:
             logger.warning(f"[SubAgent Tool Error] {error_msg}")
             return error_msg
         
+        timeout = tool.timeout or get_settings().SUBAGENTS_TOOL_TIMEOUT
         try:
-            result = await tool.execute(tool_call.arguments, context)
+            result = await asyncio.wait_for(tool.execute(tool_call.arguments, context), timeout=timeout)
             logger.info(f"[SubAgent Tool Result] Tool: {tool_call.name}, Result: {str(result)[:500]}...")
             return result
+        except asyncio.TimeoutError:
+            error_msg = f"Error: Tool '{tool_call.name}' timed out after {timeout:g}s"
+            logger.warning(f"[SubAgent Tool Timeout] {error_msg}")
+            return error_msg
         except Exception as e:
             error_msg = f"Error executing tool: {str(e)}"
             logger.error(f"[SubAgent Tool Exception] Tool: {tool_call.name}, Error: {e}")
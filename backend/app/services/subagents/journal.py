@@ -0,0 +1,314 @@
+import json
+import logging
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import get_settings
+
+from .types import SubAgentExecutionContext, SubAgentMessage, SubAgentStatus, SubAgentTask
+
+logger = logging.getLogger(__name__)
+
+RESUMABLE_STATUSES = (SubAgentStatus.RUNNING.value, SubAgentStatus.FAILED.value, SubAgentStatus.CANCELLED.value)
+
+
+class SubAgentJournal:
+    """
+    Append-only SQLite journal of SubAgent execution contexts.
+    
+    Every message is written as its own row as soon as it is added to the
+    context, and a checkpoint is recorded when a turn has finished, i.e.
+    the assistant response and all of its tool results are in. ``load``
+    rebuilds a context as of its last checkpoint, so a task that crashed
+    with the process, failed or was cancelled continues with its next turn
+    instead of repeating the LLM calls it already made. Rows written after
+    the checkpoint belong to an unfinished turn; they are ignored, and
+    deleted when the task is resumed, since the resumed run repeats that
+    turn and writes its messages again.
+    
+    Once a task completes, its message rows are folded into one transcript
+    row. Finished tasks are purged after ``retention_seconds``.
+    """
+    
+    def __init__(self, db_path: str, retention_seconds: float = 7 * 24 * 3600):
+        self.db_path = db_path
+        self.retention_seconds = retention_seconds
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._init_tables()
+    
+    @contextmanager
+    def _get_connection(self):
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    def _init_tables(self):
+        with self._get_connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS subagent_journal_tasks (
+                    task_id TEXT PRIMARY KEY,
+                    agent_id TEXT NOT NULL,
+                    task TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    turn INTEGER NOT NULL DEFAULT 0,
+                    max_turns INTEGER NOT NULL,
+                    provider TEXT,
+                    model TEXT,
+                    papers TEXT NOT NULL DEFAULT '[]',
+                    variables TEXT NOT NULL DEFAULT '{}',
+                    output TEXT,
+                    error TEXT,
+                    transcript TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS subagent_journal_messages (
+                    task_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    turn INTEGER NOT NULL,
+                    message TEXT NOT NULL,
+                    PRIMARY KEY (task_id, seq)
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_subagent_journal_status ON subagent_journal_tasks(status)')
+            conn.commit()
+    
+    @staticmethod
+    def _insert_messages(conn, task_id: str, turn: int, messages: List[SubAgentMessage]):
+        start = conn.execute(
+            'SELECT COALESCE(MAX(seq), 0) FROM subagent_journal_messages WHERE task_id = ?', (task_id,)
+        ).fetchone()[0]
+        conn.executemany(
+            'INSERT INTO subagent_journal_messages (task_id, seq, turn, message) VALUES (?, ?, ?, ?)',
+            [(task_id, start + i, turn, msg.model_dump_json()) for i, msg in enumerate(messages, 1)],
+        )
+    
+    def start(self, task: SubAgentTask, context: SubAgentExecutionContext):
+        """Record a new task together with its initial messages."""
+        now = time.time()
+        # The papers are kept with each checkpoint, not twice
+        stored_task = task.model_copy(update={
+            "context": {key: value for key, value in task.context.items() if key != "papers"},
+        })
+        with self._get_connection() as conn:
+            conn.execute('DELETE FROM subagent_journal_messages WHERE task_id = ?', (task.id,))
+            conn.execute('''
+                INSERT OR REPLACE INTO subagent_journal_tasks (
+                    task_id, agent_id, task, status, turn, max_turns, provider, model,
+                    papers, variables, created_at, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                task.id,
+                context.agent_id,
+                stored_task.model_dump_json(),
+                SubAgentStatus.RUNNING.value,
+                context.current_turn,
+                context.max_turns,
+                context.provider,
+                context.model,
+                json.dumps(context.papers, ensure_ascii=False, default=str),
+                json.dumps(context.variables, ensure_ascii=False, default=str),
+                now,
+                now,
+            ))
+            self._insert_messages(conn, task.id, context.current_turn, context.messages)
+            conn.commit()
+    
+    def append(self, task_id: str, turn: int, messages: List[SubAgentMessage]):
+        """Append messages added during a turn."""
+        with self._get_connection() as conn:
+            self._insert_messages(conn, task_id, turn, messages)
+            conn.commit()
+    
+    def replace_messages(self, task_id: str, turn: int, messages: List[SubAgentMessage]):
+        """Replace all messages after the context was compacted at the start of ``turn``."""
+        with self._get_connection() as conn:
+            conn.execute('DELETE FROM subagent_journal_messages WHERE task_id = ?', (task_id,))
+            self._insert_messages(conn, task_id, turn - 1, messages)
+            conn.commit()
+    
+    def checkpoint(self, context: SubAgentExecutionContext):
+        """Mark the context's current turn as finished."""
+        with self._get_connection() as conn:
+            conn.execute('''
+                UPDATE subagent_journal_tasks
+                SET turn = ?, papers = ?, variables = ?, provider = ?, model = ?, status = ?, updated_at = ?
+                WHERE task_id = ?
+            ''', (
+                context.current_turn,
+                json.dumps(context.papers, ensure_ascii=False, default=str),
+                json.dumps(context.variables, ensure_ascii=False, default=str),
+                context.provider,
+                context.model,
+                SubAgentStatus.RUNNING.value,
+                time.time(),
+                context.task_id,
+            ))
+            conn.commit()
+    
+    def finish(self, task_id: str, status: SubAgentStatus, output: str = "", error: Optional[str] = None):
+        """
+        Record how a task ended.
+        
+        A completed task's message rows are folded into its transcript;
+        failed and cancelled tasks keep them so they can be resumed.
+        """
+        status = SubAgentStatus(status)
+        with self._get_connection() as conn:
+            transcript = None
+            if status == SubAgentStatus.COMPLETED:
+                rows = conn.execute(
+                    'SELECT message FROM subagent_journal_messages WHERE task_id = ? ORDER BY seq', (task_id,)
+                ).fetchall()
+                transcript = "[" + ",".join(row[0] for row in rows) + "]"
+                conn.execute('DELETE FROM subagent_journal_messages WHERE task_id = ?', (task_id,))
+            conn.execute('''
+                UPDATE subagent_journal_tasks
+                SET status = ?, output = ?, error = ?, transcript = COALESCE(?, transcript), updated_at = ?
+                WHERE task_id = ?
+            ''', (status.value, output, error, transcript, time.time(), task_id))
+            conn.commit()
+    
+    def load(
+        self,
+        task_id: str,
+        discard_unfinished: bool = False,
+    ) -> Optional[Tuple[SubAgentTask, SubAgentExecutionContext]]:
+        """
+        Rebuild an unfinished task and its context as of the last checkpoint, or None.
+        
+        With ``discard_unfinished`` the rows of the turn after the checkpoint
+        are deleted; pass it only when the task is about to run again.
+        """
+        with self._get_connection() as conn:
+            row = conn.execute('''
+                SELECT task, status, turn, max_turns, provider, model, papers, variables, agent_id
+                FROM subagent_journal_tasks WHERE task_id = ?
+            ''', (task_id,)).fetchone()
+            if row is None or row[1] not in RESUMABLE_STATUSES:
+                return None
+            if discard_unfinished:
+                conn.execute(
+                    'DELETE FROM subagent_journal_messages WHERE task_id = ? AND turn > ?', (task_id, row[2])
+                )
+                conn.commit()
+            messages = conn.execute(
+                'SELECT message FROM subagent_journal_messages WHERE task_id = ? AND turn <= ? ORDER BY seq',
+                (task_id, row[2]),
+            ).fetchall()
+        
+        task = SubAgentTask.model_validate_json(row[0])
+        papers = json.loads(row[6])
+        task.context["papers"] = papers
+        context = SubAgentExecutionContext(
+            agent_id=row[8],
+            task_id=task_id,
+            messages=[SubAgentMessage.model_validate_json(message[0]) for message in messages],
+            variables=json.loads(row[7]),
+            papers=papers,
+            current_turn=row[2],
+            max_turns=row[3],
+            provider=row[4],
+            model=row[5],
+        )
+        return task, context
+    
+    def get_transcript(self, task_id: str) -> Optional[List[SubAgentMessage]]:
+        """All recorded messages of a task, completed or not."""
+        with self._get_connection() as conn:
+            row = conn.execute(
+                'SELECT transcript FROM subagent_journal_tasks WHERE task_id = ?', (task_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[0] is not None:
+                return [SubAgentMessage.model_validate(message) for message in json.loads(row[0])]
+            rows = conn.execute(
+                'SELECT message FROM subagent_journal_messages WHERE task_id = ? ORDER BY seq', (task_id,)
+            ).fetchall()
+        return [SubAgentMessage.model_validate_json(message[0]) for message in rows]
+    
+    def list_resumable(self, agent_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Tasks that were interrupted, failed or cancelled, newest first."""
+        query = '''
+            SELECT task_id, agent_id, task, status, turn, provider, model, created_at, updated_at
+            FROM subagent_journal_tasks WHERE status IN (?, ?, ?)
+        '''
+        params: List[Any] = list(RESUMABLE_STATUSES)
+        if agent_id:
+            query += ' AND agent_id = ?'
+            params.append(agent_id)
+        query += ' ORDER BY updated_at DESC'
+        with self._get_connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        
+        return [{
+            "task_id": row[0],
+            "agent_id": row[1],
+            "instruction": json.loads(row[2]).get("instruction", ""),
+            "status": row[3],
+            "turns_used": row[4],
+            "provider": row[5],
+            "model": row[6],
+            "created_at": datetime.fromtimestamp(row[7]).isoformat(),
+            "updated_at": datetime.fromtimestamp(row[8]).isoformat(),
+        } for row in rows]
+    
+    def purge(self) -> int:
+        """Delete tasks that finished more than retention_seconds ago; returns how many."""
+        cutoff = time.time() - self.retention_seconds
+        with self._get_connection() as conn:
+            expired = [row[0] for row in conn.execute(
+                'SELECT task_id FROM subagent_journal_tasks WHERE status != ? AND updated_at < ?',
+                (SubAgentStatus.RUNNING.value, cutoff),
+            ).fetchall()]
+            conn.executemany('DELETE FROM subagent_journal_messages WHERE task_id = ?', [(t,) for t in expired])
+            conn.executemany('DELETE FROM subagent_journal_tasks WHERE task_id = ?', [(t,) for t in expired])
+            conn.commit()
+        if expired:
+            logger.info(f"[SubAgent Journal] Purged {len(expired)} finished tasks")
+        return len(expired)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._get_connection() as conn:
+            statuses = dict(conn.execute(
+                'SELECT status, COUNT(*) FROM subagent_journal_tasks GROUP BY status'
+            ).fetchall())
+            messages = conn.execute('SELECT COUNT(*) FROM subagent_journal_messages').fetchone()[0]
+        return {
+            "tasks": sum(statuses.values()),
+            "by_status": statuses,
+            "message_rows": messages,
+            "retention_seconds": self.retention_seconds,
+        }
+
+
+_subagent_journal: Optional[SubAgentJournal] = None
+
+
+def get_subagent_journal() -> Optional[SubAgentJournal]:
+    """Return the shared SubAgent journal, or None when journaling is disabled."""
+    global _subagent_journal
+    settings = get_settings()
+    if not settings.SUBAGENTS_JOURNAL_ENABLED:
+        return None
+    if _subagent_journal is None:
+        _subagent_journal = SubAgentJournal(
+            settings.SUBAGENTS_JOURNAL_PATH,
+            retention_seconds=settings.SUBAGENTS_JOURNAL_RETENTION_SECONDS,
+        )
+        _subagent_journal.purge()
+    return _subagent_journal
+
+
+def reset_subagent_journal():
+    global _subagent_journal
+    _subagent_journal = None
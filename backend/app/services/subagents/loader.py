@@ -149,6 +149,7 @@ class SubAgentLoader:
         tools: Optional[List[str]] = None,
         system_prompt: str = "",
     ) -> bool:
+        body = system_prompt or f"# {name}\\n\\nWrite your system prompt here..."
         template = f"""---
 id: {agent_id}
 name: {name}
@@ -162,7 +163,7 @@ max_turns: 10
 temperature: 0.7
 ---
 
-{system_prompt or f"# {name}\\n\\nWrite your system prompt here..."}
+{body}
 """
         return self.save_agent_raw(agent_id, template)
     
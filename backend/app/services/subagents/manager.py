@@ -1,14 +1,19 @@
+import asyncio
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 from pathlib import Path
 
 from app.config import get_settings
 
 from .base import SubAgentBase
-from .types import SubAgentTask, SubAgentResult, SubAgentConfig
+from .types import SubAgentTask, SubAgentResult, SubAgentConfig, SubAgentPlan, SubAgentPlanResult
 from .registry import SubAgentRegistry
 from .loader import SubAgentLoader
 from .executor import SubAgentExecutor
+from .journal import get_subagent_journal
+from .plan import SubAgentPlanExecutor
+from .runner import SubAgentTaskRunner
+from .routing import SubAgentRouter
 
 logger = logging.getLogger(__name__)
 
@@ -75,6 +80,8 @@ class SubAgentManager:
     def __init__(self):
         self._executor = SubAgentExecutor()
         self._loader: Optional[SubAgentLoader] = None
+        self._runner: Optional[SubAgentTaskRunner] = None
+        self._router = SubAgentRouter()
         self._initialized = False
     
     def _ensure_initialized(self):
@@ -83,8 +90,23 @@ class SubAgentManager:
         
         settings = get_settings()
         self._loader = SubAgentLoader(settings.SUBAGENTS_DIR)
+        try:
+            self._executor.journal = get_subagent_journal()
+        except Exception as e:
+            logger.warning(f"SubAgent journal unavailable, tasks cannot be resumed: {e}")
         self._initialized = True
     
+    def _get_runner(self) -> SubAgentTaskRunner:
+        if self._runner is None:
+            settings = get_settings()
+            self._runner = SubAgentTaskRunner(
+                self._executor,
+                max_workers=settings.SUBAGENTS_TASK_WORKERS,
+                max_queued=settings.SUBAGENTS_TASK_QUEUE_SIZE,
+                retention_seconds=settings.SUBAGENTS_TASK_RETENTION_SECONDS,
+            )
+        return self._runner
+    
     def get_all_agents(self) -> List[Dict[str, Any]]:
         self._ensure_initialized()
         return [agent.to_dict() for agent in SubAgentRegistry.get_available()]
@@ -197,7 +219,41 @@ class SubAgentManager:
             "message": "SubAgent reloaded" if success else "SubAgent not found or reload failed"
         }
     
-    async def execute_agent(
+    async def route_task(self, instruction: str, top_k: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Choose the SubAgent whose profile best matches an instruction.
+        
+        Falls back to the first available agent when embeddings cannot be computed.
+        """
+        self._ensure_initialized()
+        
+        try:
+            ranking = await asyncio.to_thread(self._router.rank, instruction, top_k)
+            if ranking:
+                return {
+                    "agent_id": ranking[0][0],
+                    "method": "embedding",
+                    "scores": [{"agent_id": agent_id, "score": round(score, 4)} for agent_id, score in ranking],
+                }
+        except Exception as e:
+            logger.warning(f"SubAgent routing by embedding failed, using the first agent: {e}")
+        
+        agents = SubAgentRegistry.get_available()
+        return {
+            "agent_id": agents[0].id if agents else None,
+            "method": "fallback",
+            "scores": [],
+        }
+    
+    async def warm_router(self):
+        """Embed all agent profiles ahead of the first delegated task."""
+        try:
+            embedded = await asyncio.to_thread(self._router.refresh)
+            logger.info(f"SubAgent router ready ({embedded} agent profiles embedded)")
+        except Exception as e:
+            logger.warning(f"Failed to warm up SubAgent router: {e}")
+    
+    def _prepare_task(
         self,
         agent_id: str,
         instruction: str,
@@ -206,31 +262,21 @@ class SubAgentManager:
         provider: Optional[str] = None,
         model: Optional[str] = None,
         max_turns: Optional[int] = None,
-    ) -> SubAgentResult:
+    ) -> Tuple[Optional[SubAgentBase], Optional[SubAgentTask], Optional[str]]:
+        """Resolve the agent and load the papers; returns (agent, task, error)."""
         self._ensure_initialized()
         
         agent = SubAgentRegistry.get(agent_id)
         if not agent:
-            return SubAgentResult(
-                task_id="",
-                agent_id=agent_id,
-                status="failed",
-                error=f"SubAgent '{agent_id}' not found"
-            )
+            return None, None, f"SubAgent '{agent_id}' not found"
         
         if not agent.is_available():
-            return SubAgentResult(
-                task_id="",
-                agent_id=agent_id,
-                status="failed",
-                error=f"SubAgent '{agent_id}' is not available"
-            )
+            return None, None, f"SubAgent '{agent_id}' is not available"
         
         papers = []
         if paper_ids:
-            from app.services.paper_service import PaperService
-            paper_service = PaperService()
-            papers = paper_service.get_papers_by_ids(paper_ids)
+            from app.dependencies import get_paper_service
+            papers = get_paper_service().get_papers_by_ids(paper_ids)
             logging.info(f"[SubAgent Manager] Loading papers for IDs: {paper_ids}, Found: {len(papers)} papers")
             if papers:
                 for p in papers[:3]:
@@ -248,9 +294,134 @@ class SubAgentManager:
             model=model,
             max_turns=max_turns,
         )
+        return agent, task, None
+    
+    async def execute_agent(
+        self,
+        agent_id: str,
+        instruction: str,
+        paper_ids: Optional[List[str]] = None,
+        context: Optional[Dict[str, Any]] = None,
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        max_turns: Optional[int] = None,
+    ) -> SubAgentResult:
+        agent, task, error = self._prepare_task(
+            agent_id, instruction, paper_ids, context, provider, model, max_turns
+        )
+        if error:
+            return SubAgentResult(
+                task_id="",
+                agent_id=agent_id,
+                status="failed",
+                error=error
+            )
         
         return await self._executor.execute(agent, task)
     
+    def submit_task(
+        self,
+        agent_id: str,
+        instruction: str,
+        paper_ids: Optional[List[str]] = None,
+        context: Optional[Dict[str, Any]] = None,
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        max_turns: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Start a SubAgent task in the background.
+        
+        Raises TaskQueueFullError when too many tasks are already waiting.
+        """
+        agent, task, error = self._prepare_task(
+            agent_id, instruction, paper_ids, context, provider, model, max_turns
+        )
+        if error:
+            return {"success": False, "error": error}
+        
+        run = self._get_runner().submit(agent, task)
+        return {"success": True, **run.to_dict(include_result=False)}
+    
+    def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        run = self._get_runner().get(task_id)
+        return run.to_dict() if run else None
+    
+    def list_tasks(self, agent_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        return [run.to_dict(include_result=False) for run in self._get_runner().list(agent_id)]
+    
+    async def cancel_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        run = await self._get_runner().cancel(task_id)
+        return run.to_dict() if run else None
+    
+    def stream_task_events(
+        self,
+        task_id: str,
+        after: int = 0,
+        heartbeat: Optional[float] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        return self._get_runner().events(task_id, after=after, heartbeat=heartbeat)
+    
+    def get_task_stats(self) -> Dict[str, Any]:
+        stats = self._get_runner().get_stats()
+        if self._executor.journal is not None:
+            stats["journal"] = self._executor.journal.get_stats()
+        return stats
+    
+    def list_resumable_tasks(self, agent_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Journaled tasks that were interrupted, failed or cancelled and are not running now."""
+        self._ensure_initialized()
+        journal = self._executor.journal
+        if journal is None:
+            return []
+        runner = self._get_runner()
+        tasks = journal.list_resumable(agent_id)
+        return [task for task in tasks if runner.get(task["task_id"]) is None or runner.get(task["task_id"]).done]
+    
+    def resume_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Continue a journaled task in the background from its last finished turn.
+        
+        Returns None when the journal holds no unfinished task with this ID.
+        """
+        self._ensure_initialized()
+        journal = self._executor.journal
+        restored = journal.load(task_id) if journal is not None else None
+        if restored is None:
+            return None
+        
+        task, _ = restored
+        run = self._get_runner().get(task_id)
+        if run is not None and not run.done:
+            return {"success": False, "error": f"Task '{task_id}' is still running"}
+        
+        agent = SubAgentRegistry.get(task.agent_id)
+        if not agent:
+            return {"success": False, "error": f"SubAgent '{task.agent_id}' not found"}
+        
+        run = self._get_runner().submit(agent, task)
+        logger.info(f"[SubAgent Manager] Resuming task {task_id} for agent {task.agent_id}")
+        return {"success": True, **run.to_dict(include_result=False)}
+    
+    def resume_interrupted_tasks(self) -> int:
+        """Resume the tasks that were still running when the server stopped; returns how many."""
+        resumed = 0
+        for task in self.list_resumable_tasks():
+            if task["status"] != "running":
+                continue
+            try:
+                result = self.resume_task(task["task_id"])
+            except Exception as e:
+                logger.warning(f"Failed to resume SubAgent task {task['task_id']}: {e}")
+                continue
+            if result and result.get("success"):
+                resumed += 1
+        return resumed
+    
+    async def shutdown(self):
+        if self._runner is not None:
+            await self._runner.shutdown()
+    
     async def delegate_task(
         self,
         agent_id: str,
@@ -274,6 +445,20 @@ class SubAgentManager:
             **kwargs
         )
     
+    async def execute_plan(self, plan: SubAgentPlan) -> SubAgentPlanResult:
+        """
+        Run a DAG of SubAgent tasks, independent nodes concurrently.
+        
+        Raises SubAgentPlanError when the plan is not a valid DAG of known agents.
+        """
+        self._ensure_initialized()
+        planner = SubAgentPlanExecutor(
+            self._executor,
+            self._prepare_task,
+            max_nodes=get_settings().SUBAGENTS_PLAN_MAX_NODES,
+        )
+        return await planner.execute(plan)
+    
     def get_agents_by_skill(self, skill_id: str) -> List[Dict[str, Any]]:
         self._ensure_initialized()
         agents = SubAgentRegistry.get_by_skill(skill_id)
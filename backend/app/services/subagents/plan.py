@@ -0,0 +1,245 @@
+import asyncio
+import contextlib
+import logging
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .base import SubAgentBase
+from .executor import SubAgentExecutor
+from .registry import SubAgentRegistry
+from .types import (
+    SubAgentPlan,
+    SubAgentPlanNode,
+    SubAgentPlanNodeResult,
+    SubAgentPlanResult,
+    SubAgentResult,
+    SubAgentStatus,
+    SubAgentTask,
+)
+
+logger = logging.getLogger(__name__)
+
+# Same signature as SubAgentManager._prepare_task:
+# (agent_id, instruction, paper_ids, context, provider, model, max_turns) -> (agent, task, error)
+PrepareTask = Callable[..., Tuple[Optional[SubAgentBase], Optional[SubAgentTask], Optional[str]]]
+
+PLACEHOLDER = re.compile(r"\{\{\s*([\w.-]+)\s*\}\}")
+
+
+class SubAgentPlanError(ValueError):
+    """Raised when a plan is not a valid DAG of SubAgent tasks."""
+
+
+class SubAgentPlanExecutor:
+    """
+    Runs a DAG of SubAgent tasks in one request.
+    
+    Every node is started as soon as the nodes it depends on have
+    finished, not level by level, so independent branches overlap and the
+    plan takes about as long as its slowest chain of dependencies. The
+    only limits are the executor's shared LLM concurrency budget and an
+    optional per-plan cap on nodes running at once. A node that raises
+    is reported as failed without stopping the others, and a node whose
+    dependency did not complete is not run and is reported as cancelled.
+    """
+    
+    def __init__(self, executor: SubAgentExecutor, prepare_task: PrepareTask, max_nodes: int = 20):
+        self.executor = executor
+        self.prepare_task = prepare_task
+        self.max_nodes = max_nodes
+    
+    def validate(self, plan: SubAgentPlan) -> List[str]:
+        """Check the plan and return its node IDs in a dependency order."""
+        if not plan.nodes:
+            raise SubAgentPlanError("Plan has no nodes")
+        if len(plan.nodes) > self.max_nodes:
+            raise SubAgentPlanError(f"Plan has {len(plan.nodes)} nodes, at most {self.max_nodes} are allowed")
+        
+        nodes: Dict[str, SubAgentPlanNode] = {}
+        for node in plan.nodes:
+            if node.id in nodes:
+                raise SubAgentPlanError(f"Duplicate node ID '{node.id}'")
+            nodes[node.id] = node
+        
+        for node in plan.nodes:
+            for dependency in node.depends_on:
+                if dependency not in nodes:
+                    raise SubAgentPlanError(f"Node '{node.id}' depends on unknown node '{dependency}'")
+            if not SubAgentRegistry.get(node.agent_id):
+                raise SubAgentPlanError(f"Node '{node.id}' uses unknown SubAgent '{node.agent_id}'")
+        
+        remaining = {node.id: set(node.depends_on) for node in plan.nodes}
+        order = []
+        while remaining:
+            ready = [node_id for node_id, dependencies in remaining.items() if not dependencies]
+            if not ready:
+                raise SubAgentPlanError(f"Plan has a dependency cycle between {sorted(remaining)}")
+            for node_id in ready:
+                order.append(node_id)
+                del remaining[node_id]
+            for dependencies in remaining.values():
+                dependencies.difference_update(ready)
+        return order
+    
+    async def execute(self, plan: SubAgentPlan) -> SubAgentPlanResult:
+        order = self.validate(plan)
+        nodes = {node.id: node for node in plan.nodes}
+        limit = asyncio.Semaphore(plan.max_concurrency) if plan.max_concurrency else None
+        started = time.monotonic()
+        timings: Dict[str, Tuple[float, float]] = {}
+        runs: Dict[str, asyncio.Task] = {}
+        
+        async def run(node: SubAgentPlanNode) -> SubAgentResult:
+            upstream = {dependency: await runs[dependency] for dependency in node.depends_on}
+            incomplete = [
+                dependency for dependency, result in upstream.items()
+                if result.status != SubAgentStatus.COMPLETED
+            ]
+            if incomplete:
+                return SubAgentResult(
+                    task_id="",
+                    agent_id=node.agent_id,
+                    status=SubAgentStatus.CANCELLED,
+                    error=f"Not run because '{incomplete[0]}' did not complete",
+                )
+            
+            async with limit or contextlib.nullcontext():
+                node_started = time.monotonic() - started
+                logger.info(f"[SubAgent Plan] {plan.id}: starting node {node.id} ({node.agent_id})")
+                try:
+                    result = await self._run_node(plan, node, upstream)
+                except Exception as e:
+                    # One broken node must not abort its independent siblings
+                    logger.error(f"[SubAgent Plan] {plan.id}: node {node.id} raised: {e}")
+                    result = SubAgentResult(
+                        task_id="", agent_id=node.agent_id, status=SubAgentStatus.FAILED, error=str(e)
+                    )
+                timings[node.id] = (node_started, time.monotonic() - started)
+                logger.info(
+                    f"[SubAgent Plan] {plan.id}: node {node.id} {result.status.value} "
+                    f"after {timings[node.id][1] - node_started:.2f}s"
+                )
+            return result
+        
+        # Dependencies come first in order, so each node can await their tasks
+        for node_id in order:
+            runs[node_id] = asyncio.create_task(run(nodes[node_id]))
+        try:
+            await asyncio.gather(*runs.values())
+        finally:
+            for task in runs.values():
+                task.cancel()
+        
+        results = [
+            SubAgentPlanNodeResult(
+                node_id=node.id,
+                depends_on=node.depends_on,
+                result=runs[node.id].result(),
+                started_at=timings.get(node.id, (0.0, 0.0))[0],
+                completed_at=timings.get(node.id, (0.0, 0.0))[1],
+            )
+            for node in plan.nodes
+        ]
+        critical_path, critical_seconds = self._critical_path(order, nodes, timings)
+        completed = all(node.result.status == SubAgentStatus.COMPLETED for node in results)
+        
+        return SubAgentPlanResult(
+            plan_id=plan.id,
+            status=SubAgentStatus.COMPLETED if completed else SubAgentStatus.FAILED,
+            nodes=results,
+            elapsed_seconds=time.monotonic() - started,
+            critical_path=critical_path,
+            critical_path_seconds=critical_seconds,
+        )
+    
+    async def _run_node(
+        self,
+        plan: SubAgentPlan,
+        node: SubAgentPlanNode,
+        upstream: Dict[str, SubAgentResult],
+    ) -> SubAgentResult:
+        context: Dict[str, Any] = dict(node.context)
+        if upstream:
+            context["variables"] = {
+                **(context.get("variables") or {}),
+                "upstream": {dependency: result.output for dependency, result in upstream.items()},
+            }
+        
+        agent, task, error = self.prepare_task(
+            node.agent_id,
+            self.compose_instruction(node, upstream),
+            node.paper_ids,
+            context,
+            node.provider,
+            node.model,
+            node.max_turns,
+        )
+        if error:
+            return SubAgentResult(task_id="", agent_id=node.agent_id, status=SubAgentStatus.FAILED, error=error)
+        
+        if node.inherit_papers and upstream:
+            papers = task.context.get("papers", [])
+            seen = {paper.get("id") for paper in papers}
+            for paper in self.inherited_papers(node, upstream):
+                if paper.get("id") not in seen:
+                    seen.add(paper.get("id"))
+                    papers.append(paper)
+            task.context["papers"] = papers
+        
+        # Timestamp IDs of nodes started together could collide
+        task.id = f"{plan.id}-{node.id}"
+        return await self.executor.execute(agent, task)
+    
+    @staticmethod
+    def compose_instruction(node: SubAgentPlanNode, upstream: Dict[str, SubAgentResult]) -> str:
+        """Fill ``{{node_id}}`` placeholders with upstream outputs and append the unreferenced ones."""
+        referenced = set()
+        
+        def replace(match: re.Match) -> str:
+            node_id = match.group(1)
+            if node_id not in upstream:
+                return match.group(0)
+            referenced.add(node_id)
+            return upstream[node_id].output
+        
+        instruction = PLACEHOLDER.sub(replace, node.instruction)
+        for dependency in node.depends_on:
+            if dependency not in referenced:
+                instruction += f"\n\n[Output of {dependency}]\n{upstream[dependency].output}"
+        return instruction
+    
+    @staticmethod
+    def inherited_papers(node: SubAgentPlanNode, upstream: Dict[str, SubAgentResult]) -> List[Dict[str, Any]]:
+        """The upstream papers a node receives, deduplicated and sliced."""
+        papers, seen = [], set()
+        for dependency in node.depends_on:
+            for paper in upstream[dependency].papers:
+                if paper.get("id") not in seen:
+                    seen.add(paper.get("id"))
+                    papers.append(paper)
+        end = node.paper_offset + node.paper_limit if node.paper_limit is not None else None
+        return papers[node.paper_offset:end]
+    
+    @staticmethod
+    def _critical_path(
+        order: List[str],
+        nodes: Dict[str, SubAgentPlanNode],
+        timings: Dict[str, Tuple[float, float]],
+    ) -> Tuple[List[str], float]:
+        """The chain of dependencies with the longest total run time."""
+        lengths: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        for node_id in order:
+            start, end = timings.get(node_id, (0.0, 0.0))
+            longest = max(nodes[node_id].depends_on, key=lambda d: lengths[d], default=None)
+            previous[node_id] = longest
+            lengths[node_id] = (end - start) + (lengths[longest] if longest else 0.0)
+        
+        node_id = max(order, key=lambda n: lengths[n])
+        total = lengths[node_id]
+        path = []
+        while node_id is not None:
+            path.append(node_id)
+            node_id = previous[node_id]
+        return path[::-1], total
@@ -26,6 +26,8 @@ class SubAgentRegistry:
     _agents: Dict[str, SubAgentBase] = {}
     _dynamic_agents: Dict[str, DynamicSubAgent] = {}
     _agents_dir: Optional[Path] = None
+    # Bumped on every change, so caches derived from the agents know when to rebuild
+    _version: int = 0
     
     def __new__(cls):
         if cls._instance is None:
@@ -40,12 +42,14 @@ class SubAgentRegistry:
             name=agent_class.__name__,
         ))
         cls._agents[agent.id] = agent
+        cls._version += 1
         logger.info(f"Registered SubAgent: {agent.id}")
         return agent_class
     
     @classmethod
     def register_instance(cls, agent: SubAgentBase) -> None:
         cls._agents[agent.id] = agent
+        cls._version += 1
         logger.info(f"Registered SubAgent instance: {agent.id}")
     
     @classmethod
@@ -59,6 +63,7 @@ class SubAgentRegistry:
         agent = DynamicSubAgent(config)
         cls._agents[agent.id] = agent
         cls._dynamic_agents[agent.id] = agent
+        cls._version += 1
         logger.info(f"Registered dynamic SubAgent: {agent.id}")
         return agent
     
@@ -68,6 +73,7 @@ class SubAgentRegistry:
             del cls._agents[agent_id]
             if agent_id in cls._dynamic_agents:
                 del cls._dynamic_agents[agent_id]
+            cls._version += 1
             logger.info(f"Unregistered SubAgent: {agent_id}")
             return True
         return False
@@ -152,6 +158,7 @@ class SubAgentRegistry:
     def clear(cls) -> None:
         cls._agents.clear()
         cls._dynamic_agents.clear()
+        cls._version += 1
     
     @classmethod
     def count(cls) -> int:
@@ -160,6 +167,10 @@ class SubAgentRegistry:
     @classmethod
     def exists(cls, agent_id: str) -> bool:
         return agent_id in cls._agents
+    
+    @classmethod
+    def version(cls) -> int:
+        return cls._version
 
 
 from typing import Dict as _Dict
@@ -0,0 +1,129 @@
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .base import SubAgentBase
+from .registry import SubAgentRegistry
+from .tools import ToolRegistry
+
+logger = logging.getLogger(__name__)
+
+# Same signature as EmbeddingService.encode_batch: texts -> (embeddings, model_name)
+EncodeBatch = Callable[[List[str]], Tuple[List[List[float]], str]]
+
+
+class SubAgentRouter:
+    """
+    Picks the SubAgent best suited to an instruction by embedding similarity.
+    
+    Every available agent is described by a profile text (name,
+    description, skills and tool descriptions) that is embedded once and
+    kept as a row of a normalized matrix. The cache is checked against
+    ``SubAgentRegistry.version()``, so it is only rebuilt after agents are
+    loaded, reloaded or removed, and then only changed profiles are
+    embedded again. Routing an instruction costs one embedding and one
+    matrix-vector product over all agents, with no LLM call.
+    """
+    
+    def __init__(self, encode_batch: Optional[EncodeBatch] = None):
+        self._encode_batch = encode_batch
+        self._lock = threading.Lock()
+        self._version = -1
+        self._model = ""
+        self._vectors: Dict[str, Tuple[str, np.ndarray]] = {}
+        self._index: Tuple[List[str], Optional[np.ndarray]] = ([], None)
+        self._embedded = 0
+        self._routed = 0
+    
+    def _encode(self, texts: List[str]) -> Tuple[List[List[float]], str]:
+        if self._encode_batch is not None:
+            return self._encode_batch(texts)
+        from app.services.embedding_service import embedding_service
+        return embedding_service.encode_batch(texts)
+    
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return matrix / np.where(norms == 0, 1.0, norms)
+    
+    @staticmethod
+    def profile(agent: SubAgentBase) -> str:
+        """The text an agent is matched on."""
+        parts = [agent.name, agent.description]
+        if agent.skills:
+            parts.append("Skills: " + ", ".join(agent.skills))
+        for tool_name in agent.tools:
+            tool = ToolRegistry.get(tool_name)
+            description = tool.description if tool else ""
+            parts.append(f"Tool {tool_name}: {description}" if description else f"Tool {tool_name}")
+        return "\n".join(part for part in parts if part)
+    
+    def refresh(self, force: bool = False) -> int:
+        """Embed the profiles that changed since the last refresh; returns how many were embedded."""
+        with self._lock:
+            version = SubAgentRegistry.version()
+            if version == self._version and not force:
+                return 0
+            
+            profiles = {agent.id: self.profile(agent) for agent in SubAgentRegistry.get_available()}
+            vectors = {} if force else {
+                agent_id: cached for agent_id, cached in self._vectors.items()
+                if agent_id in profiles and cached[0] == profiles[agent_id]
+            }
+            stale = [agent_id for agent_id in profiles if agent_id not in vectors]
+            
+            if stale:
+                embeddings, model = self._encode([profiles[agent_id] for agent_id in stale])
+                if vectors and model != self._model:
+                    # The embedding model changed; vectors from the old one are not comparable
+                    vectors = {}
+                    stale = list(profiles)
+                    embeddings, model = self._encode([profiles[agent_id] for agent_id in stale])
+                for agent_id, row in zip(stale, self._normalize(embeddings)):
+                    vectors[agent_id] = (profiles[agent_id], row)
+                self._model = model
+                self._embedded += len(stale)
+                logger.info(f"[SubAgent Router] Embedded {len(stale)} of {len(profiles)} agent profiles with {model}")
+            
+            ids = list(vectors)
+            self._vectors = vectors
+            self._index = (ids, np.stack([vectors[agent_id][1] for agent_id in ids]) if ids else None)
+            self._version = version
+            return len(stale)
+    
+    def rank(self, instruction: str, top_k: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Return (agent_id, cosine similarity) pairs, best first."""
+        self.refresh()
+        ids, matrix = self._index
+        if matrix is None:
+            return []
+        
+        [query], model = self._encode([instruction])
+        if model != self._model:
+            self.refresh(force=True)
+            ids, matrix = self._index
+            [query], model = self._encode([instruction])
+            if model != self._model:
+                raise RuntimeError(f"Embedding model switched between {self._model} and {model}")
+        
+        scores = matrix @ self._normalize(query)
+        order = np.argsort(-scores, kind="stable")[:top_k]
+        self._routed += 1
+        return [(ids[i], float(scores[i])) for i in order]
+    
+    def route(self, instruction: str) -> Optional[str]:
+        """Return the ID of the best matching agent, or None if there are no agents."""
+        ranking = self.rank(instruction, top_k=1)
+        return ranking[0][0] if ranking else None
+    
+    def get_stats(self) -> Dict[str, object]:
+        ids, _ = self._index
+        return {
+            "agents": len(ids),
+            "model": self._model,
+            "embedded": self._embedded,
+            "routed": self._routed,
+        }
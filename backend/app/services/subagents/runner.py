@@ -0,0 +1,265 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+from .base import SubAgentBase
+from .executor import SubAgentExecutor
+from .types import SubAgentResult, SubAgentStatus, SubAgentTask
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = (SubAgentStatus.COMPLETED, SubAgentStatus.FAILED, SubAgentStatus.CANCELLED)
+
+
+class TaskQueueFullError(RuntimeError):
+    """Raised when the runner already holds as many unfinished tasks as it accepts."""
+
+
+class SubAgentRun:
+    """State and event history of one background SubAgent task."""
+    
+    def __init__(self, agent: SubAgentBase, task: SubAgentTask):
+        self.task_id = task.id
+        self.agent_id = agent.id
+        self.instruction = task.instruction
+        self.provider = task.provider or agent.provider
+        self.model = task.model or agent.model
+        self.status = SubAgentStatus.QUEUED
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.completed_at: Optional[datetime] = None
+        self.finished_monotonic: Optional[float] = None
+        self.turns_used = 0
+        self.result: Optional[SubAgentResult] = None
+        self.events: List[Dict[str, Any]] = []
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.task: Optional[asyncio.Task] = None
+    
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED_STATUSES
+    
+    def publish(self, event: Dict[str, Any]):
+        """Number an event, keep it in the history and hand it to every subscriber."""
+        event = {**event, "seq": len(self.events) + 1}
+        if event["type"] == "turn":
+            self.turns_used = event["turn"]
+        self.events.append(event)
+        for queue in self.subscribers:
+            queue.put_nowait(event)
+    
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        data = {
+            "task_id": self.task_id,
+            "agent_id": self.agent_id,
+            "status": self.status.value,
+            "instruction": self.instruction,
+            "provider": self.provider,
+            "model": self.model,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "turns_used": self.turns_used,
+            "events": len(self.events),
+        }
+        if include_result:
+            data["result"] = self.result.model_dump(mode="json") if self.result else None
+        return data
+
+
+class SubAgentTaskRunner:
+    """
+    Runs SubAgent tasks in the background of the API process.
+    
+    ``submit`` returns at once with a task ID. At most ``max_workers``
+    tasks execute concurrently and the rest wait their turn. Once
+    ``max_queued`` tasks are waiting, ``submit`` refuses new work.
+    Every turn, LLM response, tool call and tool result is recorded as a
+    numbered event, so a client can follow a run live, disconnect and
+    resume from the last event it saw. Finished runs are kept for
+    ``retention_seconds`` so their result can still be fetched.
+    """
+    
+    def __init__(
+        self,
+        executor: SubAgentExecutor,
+        max_workers: int = 4,
+        max_queued: int = 100,
+        retention_seconds: float = 3600,
+    ):
+        self.executor = executor
+        self.max_workers = max(1, max_workers)
+        self.max_queued = max(0, max_queued)
+        self.retention_seconds = retention_seconds
+        self._runs: Dict[str, SubAgentRun] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._completed = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._rejected = 0
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        return self._semaphore
+    
+    def _prune(self):
+        cutoff = time.monotonic() - self.retention_seconds
+        expired = [
+            task_id for task_id, run in self._runs.items()
+            if run.finished_monotonic is not None and run.finished_monotonic < cutoff
+        ]
+        for task_id in expired:
+            del self._runs[task_id]
+    
+    def submit(self, agent: SubAgentBase, task: SubAgentTask) -> SubAgentRun:
+        """Queue a task for background execution and return its run record."""
+        self._prune()
+        unfinished = sum(1 for run in self._runs.values() if not run.done)
+        if unfinished >= self.max_workers + self.max_queued:
+            self._rejected += 1
+            raise TaskQueueFullError(f"SubAgent task queue is full ({unfinished - self.max_workers} tasks waiting)")
+        
+        run = SubAgentRun(agent, task)
+        self._runs[run.task_id] = run
+        run.publish({"type": "queued", "agent_id": run.agent_id})
+        run.task = asyncio.create_task(self._run(run, agent, task))
+        run.task.add_done_callback(lambda t: self._finish(run, t))
+        logger.info(f"[SubAgent Runner] Queued task {run.task_id} for agent {run.agent_id}")
+        return run
+    
+    async def _run(self, run: SubAgentRun, agent: SubAgentBase, task: SubAgentTask) -> SubAgentResult:
+        async with self._get_semaphore():
+            run.status = SubAgentStatus.RUNNING
+            run.started_at = datetime.now()
+            run.publish({"type": "started", "agent_id": run.agent_id, "provider": run.provider, "model": run.model})
+            return await self.executor.execute(agent, task, on_event=run.publish)
+    
+    def _finish(self, run: SubAgentRun, task: asyncio.Task):
+        if run.done:
+            return
+        
+        if task.cancelled() or task.exception() is not None:
+            if task.cancelled():
+                status, error = SubAgentStatus.CANCELLED, "Task was cancelled"
+            else:
+                logger.error(f"[SubAgent Runner] Task {run.task_id} crashed: {task.exception()}")
+                status, error = SubAgentStatus.FAILED, str(task.exception())
+            result = SubAgentResult(
+                task_id=run.task_id,
+                agent_id=run.agent_id,
+                status=status,
+                error=error,
+                provider=run.provider,
+                model=run.model,
+                turns_used=run.turns_used,
+                started_at=run.started_at,
+                completed_at=datetime.now(),
+            )
+        else:
+            result = task.result()
+        
+        run.result = result
+        run.status = SubAgentStatus(result.status)
+        run.completed_at = result.completed_at or datetime.now()
+        run.finished_monotonic = time.monotonic()
+        run.turns_used = result.turns_used or run.turns_used
+        if run.status == SubAgentStatus.COMPLETED:
+            self._completed += 1
+        elif run.status == SubAgentStatus.CANCELLED:
+            self._cancelled += 1
+        else:
+            self._failed += 1
+        
+        run.publish({
+            "type": "done",
+            "status": run.status.value,
+            "output": result.output,
+            "error": result.error,
+            "turns_used": run.turns_used,
+        })
+        logger.info(f"[SubAgent Runner] Task {run.task_id} {run.status.value}")
+    
+    def get(self, task_id: str) -> Optional[SubAgentRun]:
+        return self._runs.get(task_id)
+    
+    def list(self, agent_id: Optional[str] = None) -> List[SubAgentRun]:
+        self._prune()
+        runs = [run for run in self._runs.values() if agent_id is None or run.agent_id == agent_id]
+        return sorted(runs, key=lambda run: run.created_at, reverse=True)
+    
+    async def cancel(self, task_id: str) -> Optional[SubAgentRun]:
+        """Cancel a queued or running task and wait until it has stopped."""
+        run = self._runs.get(task_id)
+        if run is None or run.done or run.task is None:
+            return run
+        
+        run.task.cancel()
+        await asyncio.wait({run.task})
+        self._finish(run, run.task)
+        return run
+    
+    async def events(
+        self,
+        task_id: str,
+        after: int = 0,
+        heartbeat: Optional[float] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield a run's events with a sequence number above ``after``.
+        
+        Recorded events are replayed first, then new ones are yielded as
+        they happen, up to and including the final ``done`` event. When
+        ``heartbeat`` is set, a ``ping`` event is yielded after that many
+        seconds without an event, so idle connections are not closed by
+        proxies while a long LLM call is in flight.
+        """
+        run = self._runs.get(task_id)
+        if run is None or (run.done and after >= len(run.events)):
+            return
+        
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in run.events:
+            queue.put_nowait(event)
+        run.subscribers.add(queue)
+        try:
+            last = after
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield {"type": "ping", "seq": last}
+                    continue
+                if event["seq"] <= last:
+                    continue
+                last = event["seq"]
+                yield event
+                if event["type"] == "done":
+                    return
+        finally:
+            run.subscribers.discard(queue)
+    
+    async def shutdown(self):
+        """Cancel every unfinished task; journaled ones are resumed on the next start."""
+        self.executor.shutting_down = True
+        tasks = [run.task for run in self._runs.values() if run.task is not None and not run.task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        statuses = [run.status for run in self._runs.values()]
+        return {
+            "workers": self.max_workers,
+            "max_queued": self.max_queued,
+            "running": statuses.count(SubAgentStatus.RUNNING),
+            "queued": statuses.count(SubAgentStatus.QUEUED),
+            "retained": len(statuses),
+            "completed": self._completed,
+            "failed": self._failed,
+            "cancelled": self._cancelled,
+            "rejected": self._rejected,
+        }
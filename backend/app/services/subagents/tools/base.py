@@ -44,6 +44,11 @@ class ToolProvider(ABC):
         """Example usage of the tool."""
         return []
     
+    @property
+    def timeout(self) -> Optional[float]:
+        """Seconds a call may take before it is abandoned; None uses SUBAGENTS_TOOL_TIMEOUT."""
+        return None
+    
     def get_definition(self) -> ToolDefinition:
         """Get the tool definition."""
         return ToolDefinition(
@@ -68,6 +73,36 @@ class ToolProvider(ABC):
             "examples": self.examples,
         }
     
+    def to_schema(self) -> Dict[str, Any]:
+        """
+        Describe the tool as a function for native tool calling.
+        
+        Returns the provider-neutral form used by llm_service: a name,
+        a description and a JSON schema of the arguments.
+        """
+        properties: Dict[str, Any] = {}
+        for param in self.parameters:
+            prop: Dict[str, Any] = {"type": param.type}
+            if param.description:
+                prop["description"] = param.description
+            if param.type == "array":
+                prop["items"] = {"type": "string"}
+            if param.enum:
+                prop["enum"] = param.enum
+            if param.default is not None:
+                prop["default"] = param.default
+            properties[param.name] = prop
+        
+        return {
+            "name": self.id,
+            "description": self.description or self.name,
+            "parameters": {
+                "type": "object",
+                "properties": properties,
+                "required": [param.name for param in self.parameters if param.required],
+            },
+        }
+    
     @abstractmethod
     async def execute(
         self,
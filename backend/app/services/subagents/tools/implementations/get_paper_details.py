@@ -48,9 +48,9 @@ class GetPaperDetailsTool(ToolProvider):
         if not paper_id:
             return "Error: Missing required argument 'paper_id'"
         
-        from app.services.paper_service import PaperService
+        from app.dependencies import get_paper_service
         
-        paper_service = PaperService()
+        paper_service = get_paper_service()
         paper = paper_service.get_paper_by_id(paper_id)
         
         if not paper:
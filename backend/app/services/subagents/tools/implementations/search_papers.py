@@ -56,9 +56,9 @@ class SearchPapersTool(ToolProvider):
         if not query:
             return "Error: Missing required argument 'query'"
         
-        from app.services.paper_service import PaperService
+        from app.dependencies import get_paper_service
         
-        paper_service = PaperService()
+        paper_service = get_paper_service()
         result = await paper_service.search_papers_semantic(query, top_k=top_k)
         
         papers = result.get("papers", [])
@@ -71,6 +71,11 @@ class ToolRegistry:
         """Get all tool definitions."""
         return [tool.get_definition() for tool in cls._tools.values()]
     
+    @classmethod
+    def get_schemas(cls, tool_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get native tool-calling schemas of the given registered tools, in order."""
+        return [cls._tools[tool_id].to_schema() for tool_id in tool_ids if tool_id in cls._tools]
+    
     @classmethod
     def get_by_category(cls, category: ToolCategory) -> List[ToolProvider]:
         """Get tools by category."""
@@ -9,6 +9,7 @@ AGENT_FILE_NAME = "AGENT.md"
 
 class SubAgentStatus(str, Enum):
     IDLE = "idle"
+    QUEUED = "queued"
     RUNNING = "running"
     COMPLETED = "completed"
     FAILED = "failed"
@@ -22,20 +23,22 @@ class SubAgentMessageRole(str, Enum):
     TOOL = "tool"
 
 
+class SubAgentToolCall(BaseModel):
+    id: str
+    name: str
+    arguments: Dict[str, Any]
+
+
 class SubAgentMessage(BaseModel):
     role: SubAgentMessageRole
     content: str
     name: Optional[str] = None
     tool_call_id: Optional[str] = None
+    # Native tool calls requested by an assistant message
+    tool_calls: List[SubAgentToolCall] = []
     timestamp: datetime = Field(default_factory=datetime.now)
 
 
-class SubAgentToolCall(BaseModel):
-    id: str
-    name: str
-    arguments: Dict[str, Any]
-
-
 class SubAgentConfig(BaseModel):
     id: str
     name: str
@@ -45,6 +48,7 @@ class SubAgentConfig(BaseModel):
     skills: List[str] = []
     tools: List[str] = []
     max_turns: int = 10
+    max_parallel_tools: Optional[int] = None
     temperature: float = 0.7
     model: Optional[str] = None
     provider: Optional[str] = None
@@ -77,10 +81,64 @@ class SubAgentResult(BaseModel):
     model: Optional[str] = None
     provider: Optional[str] = None
     turns_used: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cache_write_tokens: int = 0
+    papers: List[Dict[str, Any]] = []
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
 
 
+class SubAgentPlanNode(BaseModel):
+    """
+    One SubAgent task in a plan.
+    
+    The node runs once every node in ``depends_on`` has finished. Their
+    outputs are substituted for ``{{node_id}}`` placeholders in the
+    instruction, or appended to it when it has none, and their final
+    papers are handed on unless ``inherit_papers`` is off.
+    ``paper_offset`` and ``paper_limit`` pick a slice of those papers,
+    so several nodes can work on different subsets of one search.
+    """
+    id: str
+    agent_id: str
+    instruction: str
+    depends_on: List[str] = []
+    paper_ids: Optional[List[str]] = None
+    context: Dict[str, Any] = {}
+    provider: Optional[str] = None
+    model: Optional[str] = None
+    max_turns: Optional[int] = None
+    inherit_papers: bool = True
+    paper_offset: int = 0
+    paper_limit: Optional[int] = None
+
+
+class SubAgentPlan(BaseModel):
+    id: str = Field(default_factory=lambda: datetime.now().strftime("%Y%m%d%H%M%S%f"))
+    nodes: List[SubAgentPlanNode]
+    max_concurrency: Optional[int] = None
+
+
+class SubAgentPlanNodeResult(BaseModel):
+    node_id: str
+    depends_on: List[str] = []
+    result: SubAgentResult
+    # Seconds since the plan started
+    started_at: float = 0.0
+    completed_at: float = 0.0
+
+
+class SubAgentPlanResult(BaseModel):
+    plan_id: str
+    status: SubAgentStatus
+    nodes: List[SubAgentPlanNodeResult] = []
+    elapsed_seconds: float = 0.0
+    critical_path: List[str] = []
+    critical_path_seconds: float = 0.0
+
+
 class SubAgentExecutionContext(BaseModel):
     agent_id: str
     task_id: str
@@ -99,11 +157,23 @@ class SubAgentExecutionContext(BaseModel):
             **kwargs
         ))
     
-    def get_messages_for_llm(self) -> List[Dict[str, str]]:
-        return [
-            {"role": msg.role.value, "content": msg.content}
-            for msg in self.messages
-        ]
+    def get_messages_for_llm(self) -> List[Dict[str, Any]]:
+        """
+        Messages in the provider-neutral format of llm_service.
+        
+        Assistant messages carry their native tool calls as ``tool_calls``
+        and tool results the ``tool_call_id`` and ``name`` they answer.
+        """
+        messages = []
+        for msg in self.messages:
+            message: Dict[str, Any] = {"role": msg.role.value, "content": msg.content}
+            if msg.tool_calls:
+                message["tool_calls"] = [call.model_dump() for call in msg.tool_calls]
+            if msg.role == SubAgentMessageRole.TOOL and msg.tool_call_id:
+                message["tool_call_id"] = msg.tool_call_id
+                message["name"] = msg.name
+            messages.append(message)
+        return messages
     
     def to_dict(self) -> Dict[str, Any]:
         return {
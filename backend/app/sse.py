@@ -0,0 +1,40 @@
+import json
+import logging
+from typing import Any, AsyncIterator, Dict
+
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    # Stop reverse proxies such as nginx from buffering the stream
+    "X-Accel-Buffering": "no",
+}
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Encode one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+async def _encode(events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    try:
+        async for event in events:
+            payload = {k: v for k, v in event.items() if k != "type"}
+            yield format_sse(event.get("type", "message"), payload)
+    except Exception as e:
+        logger.error(f"Event stream failed: {e}")
+        yield format_sse("error", {"error": str(e)})
+
+
+def sse_response(events: AsyncIterator[Dict[str, Any]]) -> StreamingResponse:
+    """
+    Stream dicts as server-sent events.
+
+    Each dict's ``type`` becomes the SSE event name and the remaining keys
+    the JSON data. An exception raised by the iterator is sent as a final
+    ``error`` event, because the status code has already gone out.
+    """
+    return StreamingResponse(_encode(events), media_type="text/event-stream", headers=SSE_HEADERS)
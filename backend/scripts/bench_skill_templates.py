@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark SKILL.md prompt rendering: per-call regex rendering vs compiled templates.
+
+Renders every dynamic skill template once per paper, the way a batch skill
+run does, with the original renderer and with the compiled one.
+
+Usage:
+    python scripts/bench_skill_templates.py
+    python scripts/bench_skill_templates.py --papers 5000 --repeat 5
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.skills.loader import SkillLoader  # noqa: E402
+from app.services.skills.template import compile_template  # noqa: E402
+
+SKILLS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "skills")
+
+PARAMS = {
+    "citation-generator": {"format": "ieee"},
+    "paper-summary": {"detail_level": "detailed"},
+    "paper-translation": {"content_type": "full", "target_language": "Chinese"},
+    "related-papers": {"top_k": 5},
+}
+
+
+def legacy_render(template: str, context: dict) -> str:
+    """The renderer DynamicSkill used before templates were compiled."""
+    if_elif_else_pattern = re.compile(
+        r'\{if\s+(\w+)\s*==\s*"([^"]+)"\}(.*?)\{elif\s+\w+\s*==\s*"([^"]+)"\}(.*?)\{else\}(.*?)\{endif\}',
+        re.DOTALL
+    )
+
+    def replace_if_elif_else(match):
+        actual_value = context.get(match.group(1), "")
+        if actual_value == match.group(2):
+            return match.group(3)
+        elif actual_value == match.group(4):
+            return match.group(5)
+        return match.group(6)
+
+    template = if_elif_else_pattern.sub(replace_if_elif_else, template)
+
+    if_else_pattern = re.compile(r'\{if\s+(\w+)\s*==\s*"([^"]+)"\}(.*?)\{else\}(.*?)\{endif\}', re.DOTALL)
+    template = if_else_pattern.sub(
+        lambda m: m.group(3) if context.get(m.group(1), "") == m.group(2) else m.group(4), template
+    )
+
+    simple_if_pattern = re.compile(r'\{if\s+(\w+)\}(.*?)\{else\}(.*?)\{endif\}', re.DOTALL)
+    template = simple_if_pattern.sub(lambda m: m.group(2) if context.get(m.group(1)) else m.group(3), template)
+
+    for key, value in context.items():
+        if isinstance(value, dict):
+            for sub_key, sub_value in value.items():
+                template = template.replace(f"{{{key}.{sub_key}}}", str(sub_value or ""))
+        else:
+            template = template.replace(f"{{{key}}}", str(value or ""))
+    return template
+
+
+def make_context(i: int, params: dict) -> dict:
+    return {
+        "paper": {
+            "id": f"2401.{i:05d}v1",
+            "title": f"Scaling Sparse Attention for Long Documents, Part {i}",
+            "abstract": "We study sparse attention patterns for long inputs. " * 20,
+            "authors": "Ada Lovelace, Alan Turing, Grace Hopper",
+            "categories": "cs.CL, cs.LG",
+            "published": "2024-01-15T10:00:00",
+            "abs_url": f"https://arxiv.org/abs/2401.{i:05d}",
+            "pdf_url": f"https://arxiv.org/pdf/2401.{i:05d}v1.pdf",
+        },
+        **params,
+    }
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark skill template rendering")
+    parser.add_argument("--papers", type=int, default=2000, help="Papers rendered per skill")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per renderer; the fastest is reported")
+    parser.add_argument("--skills-dir", default=SKILLS_DIR)
+    args = parser.parse_args()
+
+    skills = SkillLoader(args.skills_dir).load_all_skills()
+    print(f"{'skill':<22}{'legacy ms':>12}{'compiled ms':>14}{'speedup':>10}")
+    for skill in sorted(skills, key=lambda s: s["id"]):
+        template = skill["template"]
+        contexts = [make_context(i, PARAMS.get(skill["id"], {})) for i in range(args.papers)]
+        compiled = compile_template(template)
+
+        legacy = best_of(args.repeat, lambda: [legacy_render(template, c) for c in contexts])
+        fast = best_of(args.repeat, lambda: [compiled.render(c) for c in contexts])
+        print(f"{skill['id']:<22}{legacy * 1000:>12.1f}{fast * 1000:>14.1f}{legacy / fast:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import json
 import pytest
 import sys
 from unittest.mock import MagicMock
@@ -46,3 +47,115 @@ def mock_paper():
         "pdf_url": "https://arxiv.org/pdf/2301.12345.pdf",
         "abs_url": "https://arxiv.org/abs/2301.12345",
     }
+
+
+def _escape_pdf_string(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def build_pdf(pages, compress=True, object_stream=False) -> bytes:
+    """
+    Build a small PDF with one Helvetica text line per list item on each page.
+
+    With ``object_stream`` the catalog, page tree and font dictionaries are
+    stored in a compressed object stream, as pdfTeX does for arXiv papers.
+    """
+    import zlib
+
+    objects = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")
+    pages_obj = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    page_ids = []
+    for lines in pages:
+        ops = ["BT", "/F1 11 Tf", "72 720 Td"]
+        for line in lines:
+            ops.append(f"({_escape_pdf_string(line)}) Tj")
+            ops.append("0 -14 Td")
+        ops.append("ET")
+        content = "\n".join(ops).encode("latin-1")
+        if compress:
+            data = zlib.compress(content)
+            stream = add(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(data) + data + b"\nendstream")
+        else:
+            stream = add(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] /Contents %d 0 R >>" % (pages_obj, stream)
+        ))
+
+    kids = b" ".join(b"%d 0 R" % pid for pid in page_ids)
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_obj
+    objects[pages_obj - 1] = (
+        b"<< /Type /Pages /Kids [%s] /Count %d /Resources << /Font << /F1 %d 0 R >> >> >>"
+        % (kids, len(page_ids), font)
+    )
+
+    packed = []
+    if object_stream:
+        packed = [num for num, body in enumerate(objects, start=1) if b"stream" not in body]
+        header, payload = b"", b""
+        for num in packed:
+            header += b"%d %d " % (num, len(payload))
+            payload += objects[num - 1] + b"\n"
+        data = zlib.compress(header + payload)
+        object_stream_num = add(
+            b"<< /Type /ObjStm /N %d /First %d /Length %d /Filter /FlateDecode >>\nstream\n"
+            % (len(packed), len(header), len(data)) + data + b"\nendstream"
+        )
+        for num in packed:
+            objects[num - 1] = None
+
+    out = bytearray(b"%PDF-1.5\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        if body is not None:
+            out += b"%d 0 obj\n" % num + body + b"\nendobj\n"
+    xref = len(out)
+    if object_stream:
+        # Objects inside an object stream can only be located through a cross-reference stream
+        entries = b"\x00\x00\x00\x00\x00\xff\xff"
+        for num, offset in enumerate(offsets, start=1):
+            if num in packed:
+                entries += b"\x02" + object_stream_num.to_bytes(4, "big") + packed.index(num).to_bytes(2, "big")
+            else:
+                entries += b"\x01" + offset.to_bytes(4, "big") + b"\x00\x00"
+        entries += b"\x01" + xref.to_bytes(4, "big") + b"\x00\x00"
+        size = len(objects) + 2
+        out += (
+            b"%d 0 obj\n<< /Type /XRef /Size %d /W [1 4 2] /Root %d 0 R /Length %d >>\nstream\n"
+            % (size - 1, size, catalog, len(entries)) + entries + b"\nendstream\nendobj\n"
+        )
+        out += b"startxref\n%d\n%%%%EOF\n" % xref
+        return bytes(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+    return bytes(out)
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    def _make(pages, name="paper.pdf", **kwargs):
+        path = tmp_path / name
+        path.write_bytes(build_pdf(pages, **kwargs))
+        return path
+    return _make
+
+
+@pytest.fixture
+def parse_sse():
+    """Parse a text/event-stream body into (event, data) pairs."""
+    def _parse(body):
+        events = []
+        for block in body.strip().split("\n\n"):
+            fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line)
+            events.append((fields.get("event"), json.loads(fields.get("data", "null"))))
+        return events
+    return _parse
@@ -1,7 +1,8 @@
 import pytest
-from unittest.mock import Mock, patch, AsyncMock
+from unittest.mock import Mock, MagicMock, patch, AsyncMock
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
+from app.dependencies import get_paper_service
 from app.routers.arxiv import router
 
 
@@ -18,9 +19,11 @@ def client(app):
 
 
 @pytest.fixture
-def mock_paper_service():
-    with patch('app.routers.arxiv._paper_service') as mock:
-        yield mock
+def mock_paper_service(app):
+    mock = MagicMock()
+    app.dependency_overrides[get_paper_service] = lambda: mock
+    yield mock
+    app.dependency_overrides.clear()
 
 
 @pytest.fixture
@@ -623,3 +626,120 @@ class TestGenerateEmbeddings:
             "batch_size": 501,
         })
         assert response.status_code == 422
+
+
+class TestPaperChunks:
+    def test_get_paper_chunks(self, client):
+        repo = Mock()
+        repo.get_chunks.return_value = [
+            {"chunk_id": "2301.12345#00000", "paper_id": "2301.12345", "chunk_index": 0, "page": 1, "text": "Intro", "embedding_model": "test"},
+            {"chunk_id": "2301.12345#00001", "paper_id": "2301.12345", "chunk_index": 1, "page": 2, "text": "Method", "embedding_model": "test"},
+        ]
+        
+        with patch('app.routers.arxiv.get_paper_chunk_repository', return_value=repo):
+            response = client.get("/arxiv/paper/2301.12345/chunks")
+        
+        assert response.status_code == 200
+        assert response.json()["total"] == 2
+        assert response.json()["chunks"][1]["text"] == "Method"
+        assert response.json()["indexing"] is False
+
+    def test_get_paper_chunks_error(self, client):
+        repo = Mock()
+        repo.get_chunks.side_effect = Exception("Milvus unavailable")
+        
+        with patch('app.routers.arxiv.get_paper_chunk_repository', return_value=repo):
+            response = client.get("/arxiv/paper/2301.12345/chunks")
+        
+        assert response.status_code == 200
+        assert response.json()["chunks"] == []
+        assert response.json()["error"] == "Milvus unavailable"
+
+
+class TestAsk:
+    @pytest.fixture
+    def mock_llm_service(self):
+        with patch('app.routers.arxiv.llm_service') as mock:
+            mock.ask_question = AsyncMock(return_value="Because of attention.")
+            mock.get_model_name.return_value = "test-model"
+            yield mock
+
+    def test_ask_passes_fulltext_passages(self, client, mock_paper_service, mock_llm_service, sample_paper_data):
+        mock_paper_service.search_papers_semantic = AsyncMock(return_value={"papers": [sample_paper_data]})
+        passages = [{"paper_id": sample_paper_data["id"], "chunk_index": 0, "text": "Excerpt", "similarity_score": 0.9}]
+        
+        with patch('app.routers.arxiv.fulltext_indexer') as indexer:
+            indexer.search = AsyncMock(return_value=passages)
+            response = client.post("/arxiv/ask", json={"question": "Why?"})
+        
+        assert response.status_code == 200
+        assert response.json()["answer"] == "Because of attention."
+        indexer.search.assert_awaited_once()
+        assert indexer.search.call_args.kwargs["paper_ids"] == [sample_paper_data["id"]]
+        assert mock_llm_service.ask_question.call_args.kwargs["passages"] == passages
+
+    def test_ask_falls_back_to_abstracts(self, client, mock_paper_service, mock_llm_service, sample_paper_data):
+        mock_paper_service.search_papers_semantic = AsyncMock(return_value={"papers": [sample_paper_data]})
+        
+        with patch('app.routers.arxiv.fulltext_indexer') as indexer:
+            indexer.search = AsyncMock(side_effect=Exception("Milvus unavailable"))
+            response = client.post("/arxiv/ask", json={"question": "Why?"})
+        
+        assert response.status_code == 200
+        assert response.json()["error"] is None
+        assert mock_llm_service.ask_question.call_args.kwargs["passages"] == []
+
+
+class TestAskStream:
+    @pytest.fixture
+    def mock_llm_service(self):
+        with patch('app.routers.arxiv.llm_service') as mock:
+            async def stream_question(**kwargs):
+                for delta in ["Because ", "of attention."]:
+                    yield delta
+            mock.stream_question = Mock(side_effect=stream_question)
+            mock.get_model_name.return_value = "test-model"
+            yield mock
+
+    @pytest.fixture(autouse=True)
+    def mock_indexer(self):
+        with patch('app.routers.arxiv.fulltext_indexer') as indexer:
+            indexer.search = AsyncMock(return_value=[])
+            yield indexer
+
+    def test_ask_stream_events(self, client, mock_paper_service, mock_llm_service, sample_paper_data, parse_sse):
+        sample_paper_data["similarity_score"] = 0.8
+        mock_paper_service.search_papers_semantic = AsyncMock(return_value={"papers": [sample_paper_data]})
+        
+        response = client.post("/arxiv/ask/stream", json={"question": "Why?"})
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = parse_sse(response.text)
+        assert [name for name, _ in events] == ["references", "delta", "delta", "done"]
+        assert events[0][1]["references"][0]["id"] == sample_paper_data["id"]
+        assert "".join(data["content"] for name, data in events if name == "delta") == "Because of attention."
+        assert events[-1][1] == {"model": "test-model"}
+        assert mock_llm_service.stream_question.call_args.kwargs["passages"] == []
+
+    def test_ask_stream_no_papers(self, client, mock_paper_service, mock_llm_service, parse_sse):
+        mock_paper_service.search_papers_semantic = AsyncMock(return_value={"papers": []})
+        
+        events = parse_sse(client.post("/arxiv/ask/stream", json={"question": "Why?"}).text)
+        
+        assert [name for name, _ in events] == ["references", "delta", "done"]
+        assert "couldn't find any relevant papers" in events[1][1]["content"]
+        mock_llm_service.stream_question.assert_not_called()
+
+    def test_ask_stream_llm_error(self, client, mock_paper_service, mock_llm_service, sample_paper_data, parse_sse):
+        mock_paper_service.search_papers_semantic = AsyncMock(return_value={"papers": [sample_paper_data]})
+        
+        async def failing(**kwargs):
+            yield "Partial"
+            raise ValueError("LLM down")
+        mock_llm_service.stream_question = Mock(side_effect=failing)
+        
+        events = parse_sse(client.post("/arxiv/ask/stream", json={"question": "Why?"}).text)
+        
+        assert [name for name, _ in events] == ["references", "delta", "error"]
+        assert events[-1][1] == {"error": "LLM down"}
@@ -0,0 +1,142 @@
+import pytest
+
+from app.services.context_builder import ContextBuilder, estimate_tokens, split_sentences
+
+
+def make_paper(paper_id, abstract, score=0.8, title=None):
+    return {
+        "id": paper_id,
+        "title": title or f"Paper {paper_id}",
+        "authors": ["A. Author", "B. Author", "C. Author", "D. Author"],
+        "published": "2024-01-15T00:00:00",
+        "abstract": abstract,
+        "similarity_score": score,
+    }
+
+
+ABSTRACT = (
+    "Large language models are expensive to serve. "
+    "We propose speculative decoding with a small draft model. "
+    "The draft model proposes tokens that the large model verifies in parallel. "
+    "Experiments on translation show a 2.5x speedup. "
+    "Code is available online."
+)
+
+
+class TestEstimateTokens:
+    def test_english_is_about_four_chars_per_token(self):
+        assert estimate_tokens("a" * 40) == 10
+        assert estimate_tokens("") == 0
+
+    def test_cjk_counts_one_token_per_character(self):
+        assert estimate_tokens("大型语言模型") == 6
+
+
+class TestSplitSentences:
+    def test_splits_on_sentence_boundaries(self):
+        assert split_sentences("First one. Second one!  Third?") == ["First one.", "Second one!", "Third?"]
+
+    def test_keeps_abbreviations_with_lowercase_continuation(self):
+        assert split_sentences("We use e.g. transformers. Done.") == ["We use e.g. transformers.", "Done."]
+
+
+class TestContextBuilder:
+    def test_no_papers(self):
+        assert ContextBuilder().build("question", []) == ContextBuilder.EMPTY
+
+    def test_keeps_relevant_sentences_within_budget(self):
+        builder = ContextBuilder(token_budget=90)
+
+        context = builder.build("How much speedup does speculative decoding give?", [make_paper("p1", ABSTRACT)])
+
+        assert "speculative decoding" in context
+        assert "2.5x speedup" in context
+        assert "Code is available online." not in context
+        assert estimate_tokens(context) <= 90 + 5
+
+    def test_gaps_between_sentences_are_marked(self):
+        builder = ContextBuilder(token_budget=95)
+
+        context = builder.build("speculative decoding speedup", [make_paper("p1", ABSTRACT)])
+
+        assert "small draft model. ... Experiments" in context
+
+    def test_budget_limits_papers(self):
+        papers = [make_paper(f"p{i}", ABSTRACT, score=1.0 - i / 10) for i in range(10)]
+
+        small = ContextBuilder(token_budget=300).build("speculative decoding", papers)
+        large = ContextBuilder(token_budget=3000).build("speculative decoding", papers)
+
+        assert estimate_tokens(small) <= 300
+        assert small.count("Title:") < large.count("Title:") == 10
+
+    def test_papers_keep_search_order(self):
+        papers = [
+            make_paper("p1", "Speculative decoding for speech models.", score=0.9, title="First"),
+            make_paper("p2", "Speculative decoding speeds up inference.", score=0.5, title="Second"),
+        ]
+
+        context = ContextBuilder().build("speculative decoding", papers)
+
+        assert context.index("Title: First") < context.index("Title: Second")
+        assert "Paper 1:" in context and "Paper 2:" in context
+        assert "A. Author, B. Author, C. Author et al." in context
+        assert "Year: 2024" in context
+
+    def test_weak_matches_are_left_out(self):
+        papers = [
+            make_paper("p1", "Speculative decoding speeds up inference.", score=0.6),
+            make_paper("p2", "Unrelated work on graph coloring.", score=0.7),
+        ]
+
+        context = ContextBuilder(token_budget=5000).build("speculative decoding", papers)
+
+        assert "graph coloring" not in context
+
+    def test_fulltext_passages_compete_with_abstract(self):
+        papers = [make_paper("p1", ABSTRACT)]
+        passages = [
+            {"paper_id": "p1", "chunk_index": 3, "page": 4, "text": "Acceptance rate of drafted tokens was 78%.", "similarity_score": 0.95},
+            {"paper_id": "p1", "chunk_index": 9, "page": 12, "text": "Appendix with hyperparameters.", "similarity_score": 0.1},
+            {"paper_id": "other", "chunk_index": 0, "page": 1, "text": "Not in the results.", "similarity_score": 0.99},
+        ]
+
+        context = ContextBuilder(token_budget=100).build("drafted token acceptance rate", papers, passages)
+
+        assert "Excerpt (p. 4): Acceptance rate of drafted tokens was 78%." in context
+        assert "Not in the results." not in context
+        assert "Appendix" not in context
+
+    def test_relevant_chunk_beats_weak_abstract_sentence(self):
+        papers = [make_paper("p1", "We measure GPU memory on several clusters. Results vary across vendors.")]
+        passages = [{
+            "paper_id": "p1", "chunk_index": 2, "page": 3,
+            "text": "Quantizing the KV cache to 4 bits cuts its memory by 4x with no quality loss.",
+            "similarity_score": 0.72,
+        }]
+        builder = ContextBuilder(token_budget=60)
+
+        chosen = builder.select("how does kv cache quantization reduce memory", papers, passages)
+
+        assert [p.source for p in chosen[0]] == ["fulltext"]
+        assert "Excerpt (p. 3): Quantizing the KV cache" in builder.build(
+            "how does kv cache quantization reduce memory", papers, passages
+        )
+
+    def test_single_term_match_scores_well_below_full_match(self):
+        papers = [make_paper("p1", "Our method improves training speed.")]
+        question = "How do transformer attention heads handle long context retrieval training?"
+
+        chosen = ContextBuilder().select(question, papers)
+
+        assert chosen[0][0].relevance < 0.2
+
+    def test_long_passages_are_truncated(self):
+        long_text = " ".join(["token"] * 2000)
+        passages = [{"paper_id": "p1", "chunk_index": 0, "text": long_text, "similarity_score": 0.9}]
+
+        context = ContextBuilder(token_budget=1000, max_passage_tokens=50).build("token", [make_paper("p1", "")], passages)
+
+        excerpt = next(line for line in context.splitlines() if line.startswith("Excerpt"))
+        assert excerpt.endswith("...")
+        assert estimate_tokens(excerpt) <= 60
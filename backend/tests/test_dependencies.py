@@ -0,0 +1,78 @@
+import sys
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+sys.modules["pymilvus"] = MagicMock()
+sys.modules["sentence_transformers"] = MagicMock()
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app import dependencies
+from app.dependencies import get_paper_service, init_dependencies, reset_dependencies
+from app.services.skills.implementations import RelatedPapersSkill
+from app.services.subagents.tools.implementations.get_paper_details import GetPaperDetailsTool
+from app.services.subagents.tools.implementations.search_papers import SearchPapersTool
+from app.services.subagents.types import SubAgentExecutionContext
+
+
+@pytest.fixture
+def paper_service_cls():
+    reset_dependencies()
+    service = MagicMock()
+    service.search_papers_semantic = AsyncMock(return_value={"papers": [
+        {"id": "2401.00001", "title": "Sparse Attention"},
+        {"id": "2401.00002", "title": "Dense Attention"},
+    ]})
+    service.get_paper_by_id.return_value = {"id": "2401.00001", "title": "Sparse Attention"}
+    with patch('app.dependencies.PaperService', return_value=service) as cls:
+        yield cls
+    reset_dependencies()
+
+
+class TestDependencies:
+    def test_paper_service_is_created_once(self, paper_service_cls):
+        first = get_paper_service()
+        
+        assert get_paper_service() is first
+        assert paper_service_cls.call_count == 1
+    
+    def test_init_creates_service_up_front(self, paper_service_cls):
+        init_dependencies()
+        
+        assert paper_service_cls.call_count == 1
+        assert dependencies._paper_service is not None
+    
+    def test_reset_creates_a_new_service(self, paper_service_cls):
+        get_paper_service()
+        reset_dependencies()
+        get_paper_service()
+        
+        assert paper_service_cls.call_count == 2
+    
+    async def test_tools_and_skills_share_the_service(self, paper_service_cls):
+        context = SubAgentExecutionContext(agent_id="tester", task_id="t1")
+        
+        for _ in range(3):
+            await SearchPapersTool().execute({"query": "attention"}, context)
+            await GetPaperDetailsTool().execute({"paper_id": "2401.00001"}, context)
+            result = await RelatedPapersSkill().execute({"papers": [{"id": "2401.00001", "title": "Sparse"}]})
+        
+        assert paper_service_cls.call_count == 1
+        assert result["related_papers"] == [{"id": "2401.00002", "title": "Dense Attention"}]
+    
+    def test_usable_as_fastapi_dependency(self, paper_service_cls):
+        app = FastAPI()
+        
+        @app.get("/paper/{paper_id}")
+        def read_paper(paper_id: str, paper_service=Depends(get_paper_service)):
+            return paper_service.get_paper_by_id(paper_id)
+        
+        client = TestClient(app)
+        assert client.get("/paper/2401.00001").json()["title"] == "Sparse Attention"
+        
+        override = MagicMock()
+        override.get_paper_by_id.return_value = {"title": "Override"}
+        app.dependency_overrides[get_paper_service] = lambda: override
+        assert client.get("/paper/2401.00001").json()["title"] == "Override"
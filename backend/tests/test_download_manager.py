@@ -0,0 +1,246 @@
+import pytest
+import hashlib
+import json
+import sys
+import httpx
+from unittest.mock import MagicMock, patch
+
+sys.modules["pymilvus"] = MagicMock()
+sys.modules["sentence_transformers"] = MagicMock()
+
+from app.config import Settings
+from app.download_manager import DownloadManager, DownloadSegment, DownloadTask
+from app.models import DownloadStatus
+
+
+PDF_URL = "https://arxiv.org/pdf/2401.00001v1"
+PDF_BYTES = b"%PDF-1.5\n" + bytes(range(256)) * 400
+
+
+class FakeArxivServer:
+    """Serves PDF_BYTES with optional range support and injected failures."""
+
+    def __init__(self, data=PDF_BYTES, accept_ranges=True, fail_after=None):
+        self.data = data
+        self.accept_ranges = accept_ranges
+        self.fail_after = fail_after
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        range_header = request.headers.get("range")
+        self.requests.append(range_header)
+        headers = {"content-disposition": 'attachment; filename="2401.00001v1.pdf"'}
+        if self.accept_ranges:
+            headers["accept-ranges"] = "bytes"
+
+        if range_header and self.accept_ranges:
+            start, end = range_header.removeprefix("bytes=").split("-")
+            start, end = int(start), int(end) if end else len(self.data) - 1
+            body = self.data[start:end + 1]
+            headers["content-range"] = f"bytes {start}-{end}/{len(self.data)}"
+            return httpx.Response(206, headers=headers, content=body)
+
+        body = self.data
+        if self.fail_after is not None:
+            cut, self.fail_after = self.fail_after, None
+            headers["content-length"] = str(len(body))
+            return httpx.Response(200, headers=headers, stream=_BrokenStream(body[:cut]))
+        return httpx.Response(200, headers=headers, content=body)
+
+
+class _BrokenStream(httpx.AsyncByteStream):
+    def __init__(self, data):
+        self.data = data
+
+    async def __aiter__(self):
+        yield self.data
+        raise httpx.ReadError("connection reset")
+
+
+@pytest.fixture
+def settings(tmp_path):
+    return Settings(
+        DOWNLOAD_DIR=str(tmp_path),
+        DOWNLOAD_SEGMENTS=4,
+        DOWNLOAD_SEGMENT_MIN_SIZE=32 * 1024,
+        DOWNLOAD_RETRY_BASE_DELAY=0,
+        FULLTEXT_INDEX_ENABLED=False,
+    )
+
+
+@pytest.fixture
+def manager():
+    manager = DownloadManager()
+    manager._tasks.clear()
+    return manager
+
+
+async def _run(manager, settings, server, task):
+    real_client = httpx.AsyncClient
+
+    def client_factory(**kwargs):
+        return real_client(transport=httpx.MockTransport(server), **kwargs)
+
+    with patch("app.download_manager.get_settings", return_value=settings), \
+         patch("app.download_manager.download_service"), \
+         patch("app.download_manager.httpx.AsyncClient", side_effect=client_factory):
+        await manager._download_worker(task)
+
+
+class TestDownloadSegment:
+    def test_offsets(self):
+        segment = DownloadSegment(100, 199, written=40)
+
+        assert segment.offset == 140
+        assert segment.remaining == 60
+        assert not segment.done
+
+        segment.written = 100
+        assert segment.done
+
+
+class TestDownloadWorker:
+    async def test_large_file_is_fetched_in_segments(self, manager, settings, tmp_path):
+        server = FakeArxivServer()
+        task = DownloadTask(task_id="t1", pdf_url=PDF_URL, paper_id="2401.00001")
+
+        await _run(manager, settings, server, task)
+
+        digest = hashlib.sha256(PDF_BYTES).hexdigest()
+        assert task.status == DownloadStatus.COMPLETED.value
+        assert task.file_path == str(tmp_path / "store" / digest[:2] / digest[2:4] / f"{digest}.pdf")
+        assert open(task.file_path, "rb").read() == PDF_BYTES
+        assert task.file_size == len(PDF_BYTES)
+        assert task.checksum == digest
+        assert len([r for r in server.requests if r]) == 4
+        assert not (tmp_path / "t1.part").exists()
+        assert not (tmp_path / "t1.part.json").exists()
+
+    async def test_small_file_uses_single_stream(self, manager, settings, tmp_path):
+        server = FakeArxivServer()
+        settings.DOWNLOAD_SEGMENT_MIN_SIZE = len(PDF_BYTES) + 1
+        task = DownloadTask(task_id="t2", pdf_url=PDF_URL, paper_id="2401.00001")
+
+        await _run(manager, settings, server, task)
+
+        assert task.status == DownloadStatus.COMPLETED.value
+        assert server.requests == [None]
+        assert open(task.file_path, "rb").read() == PDF_BYTES
+
+    async def test_dropped_connection_resumes_with_range(self, manager, settings, tmp_path):
+        server = FakeArxivServer(fail_after=70_000)
+        settings.DOWNLOAD_SEGMENT_MIN_SIZE = len(PDF_BYTES) + 1
+        task = DownloadTask(task_id="t3", pdf_url=PDF_URL, paper_id="2401.00001")
+
+        await _run(manager, settings, server, task)
+
+        assert task.status == DownloadStatus.COMPLETED.value
+        received = settings.DOWNLOAD_CHUNK_SIZE_MIN
+        assert server.requests == [None, f"bytes={received}-{len(PDF_BYTES) - 1}"]
+        assert open(task.file_path, "rb").read() == PDF_BYTES
+
+    async def test_retry_resumes_from_saved_partial(self, manager, settings, tmp_path):
+        server = FakeArxivServer()
+        half = len(PDF_BYTES) // 2
+        (tmp_path / "t4.part").write_bytes(PDF_BYTES[:half] + b"\0" * (len(PDF_BYTES) - half))
+        (tmp_path / "t4.part.json").write_text(json.dumps({
+            "pdf_url": PDF_URL,
+            "filename": "2401.00001v1.pdf",
+            "total": len(PDF_BYTES),
+            "content_md5": None,
+            "segments": [[0, len(PDF_BYTES) - 1, half]],
+        }))
+        task = DownloadTask(task_id="t4", pdf_url=PDF_URL, paper_id="2401.00001")
+
+        await _run(manager, settings, server, task)
+
+        assert task.status == DownloadStatus.COMPLETED.value
+        assert server.requests == [f"bytes={half}-{len(PDF_BYTES) - 1}"]
+        assert open(task.file_path, "rb").read() == PDF_BYTES
+
+    async def test_checksum_mismatch_fails(self, manager, settings, tmp_path):
+        class BadChecksumServer(FakeArxivServer):
+            def __call__(self, request):
+                response = super().__call__(request)
+                response.headers["content-md5"] = "AAAAAAAAAAAAAAAAAAAAAA=="
+                return response
+
+        settings.DOWNLOAD_SEGMENT_MIN_SIZE = len(PDF_BYTES) + 1
+        task = DownloadTask(task_id="t5", pdf_url=PDF_URL, paper_id="2401.00001")
+
+        await _run(manager, settings, BadChecksumServer(), task)
+
+        assert task.status == DownloadStatus.FAILED.value
+        assert "Checksum mismatch" in task.error_message
+        assert not list((tmp_path / "store").glob("*/*/*.pdf"))
+
+    def test_chunk_size_scales_with_file_size(self, manager, settings):
+        with patch("app.download_manager.get_settings", return_value=settings):
+            assert manager._chunk_size_for(0) == settings.DOWNLOAD_CHUNK_SIZE_MIN
+            assert manager._chunk_size_for(20 * 1024 * 1024) == 20 * 1024 * 1024 // 100
+            assert manager._chunk_size_for(10 ** 10) == settings.DOWNLOAD_CHUNK_SIZE_MAX
+
+
+class TestPDFStoreIntegration:
+    async def test_repeat_download_is_served_from_store(self, manager, settings, tmp_path):
+        server = FakeArxivServer()
+        first = DownloadTask(task_id="s1", pdf_url=PDF_URL, paper_id="2401.00001v1")
+        await _run(manager, settings, server, first)
+        requests_after_first = len(server.requests)
+
+        with patch("app.download_manager.get_settings", return_value=settings), \
+             patch("app.download_manager.download_service"):
+            started = await manager.start_download("s2", PDF_URL, "2401.00001v1")
+
+        second = manager.get_task("s2")
+        assert started is True
+        assert second.status == DownloadStatus.COMPLETED.value
+        assert second.file_path == first.file_path
+        assert len(server.requests) == requests_after_first
+        assert not manager.is_task_running("s2")
+
+    def test_release_file_keeps_shared_blob(self, manager, settings, tmp_path):
+        blob = tmp_path / "store" / "ab" / "cd" / "abcd.pdf"
+        task = {"id": "t1", "paper_id": "2401.00001v1", "file_path": str(blob)}
+
+        with patch("app.download_manager.get_settings", return_value=settings), \
+             patch("app.download_manager.download_service") as service:
+            store = manager.get_pdf_store()
+            store.remove = MagicMock()
+
+            service.get_all_tasks_by_paper_id.return_value = [task, {**task, "id": "t2"}]
+            manager.release_file(task)
+            store.remove.assert_not_called()
+
+            service.get_all_tasks_by_paper_id.return_value = [task]
+            manager.release_file(task)
+            store.remove.assert_called_once_with("2401.00001v1")
+
+    async def test_completed_download_is_queued_for_fulltext_indexing(self, manager, settings):
+        settings.FULLTEXT_INDEX_ENABLED = True
+        task = DownloadTask(task_id="f1", pdf_url=PDF_URL, paper_id="2401.00001v1")
+
+        with patch("app.download_manager.fulltext_indexer") as indexer:
+            await _run(manager, settings, FakeArxivServer(), task)
+
+        indexer.submit.assert_called_once_with("2401.00001v1", task.file_path, task.checksum)
+
+
+class TestProgressCallbacks:
+    async def test_callbacks_are_deduplicated_and_released(self, manager):
+        events = []
+
+        def callback(task_id, progress, status):
+            events.append((task_id, progress, status))
+
+        manager.add_progress_callback("t1", callback)
+        manager.add_progress_callback("t1", callback)
+        await manager._notify_progress("t1", 50, DownloadStatus.DOWNLOADING.value)
+        await manager._notify_progress("t1", 100, DownloadStatus.COMPLETED.value)
+        await manager._notify_progress("t1", 100, DownloadStatus.COMPLETED.value)
+
+        assert events == [
+            ("t1", 50, DownloadStatus.DOWNLOADING.value),
+            ("t1", 100, DownloadStatus.COMPLETED.value),
+        ]
+        assert "t1" not in manager._progress_callbacks
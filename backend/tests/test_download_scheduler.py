@@ -0,0 +1,166 @@
+import pytest
+import asyncio
+import sys
+from unittest.mock import MagicMock
+
+sys.modules["pymilvus"] = MagicMock()
+sys.modules["sentence_transformers"] = MagicMock()
+
+from app.download_scheduler import DownloadScheduler
+from app.models import DownloadPriority
+
+
+INTERACTIVE = DownloadPriority.INTERACTIVE.value
+BULK = DownloadPriority.BULK.value
+
+
+class Gate:
+    """Download factory that blocks until released and records start order."""
+
+    def __init__(self):
+        self.started = []
+        self.events = {}
+
+    def factory(self, key):
+        event = self.events.setdefault(key, asyncio.Event())
+
+        async def run():
+            self.started.append(key)
+            await event.wait()
+
+        return run
+
+    def release(self, key):
+        self.events[key].set()
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestDownloadScheduler:
+    async def test_global_limit(self):
+        scheduler = DownloadScheduler(max_concurrent=2, per_host_limit=10)
+        gate = Gate()
+
+        for i in range(5):
+            scheduler.submit(f"t{i}", f"https://host{i}.org/a.pdf", gate.factory(f"t{i}"))
+        await settle()
+
+        assert gate.started == ["t0", "t1"]
+        assert scheduler.active_count() == 2
+        assert scheduler.queued_count() == 3
+
+        gate.release("t0")
+        await settle()
+
+        assert gate.started == ["t0", "t1", "t2"]
+
+    async def test_per_host_limit_skips_saturated_host(self):
+        scheduler = DownloadScheduler(max_concurrent=3, per_host_limit=1)
+        gate = Gate()
+
+        scheduler.submit("a1", "https://arxiv.org/pdf/1", gate.factory("a1"))
+        scheduler.submit("a2", "https://arxiv.org/pdf/2", gate.factory("a2"))
+        scheduler.submit("b1", "https://export.arxiv.org/pdf/3", gate.factory("b1"))
+        await settle()
+
+        assert gate.started == ["a1", "b1"]
+        assert scheduler.get_metrics()["active_by_host"] == {"arxiv.org": 1, "export.arxiv.org": 1}
+
+        gate.release("a1")
+        await settle()
+
+        assert gate.started == ["a1", "b1", "a2"]
+
+    async def test_interactive_runs_before_bulk(self):
+        scheduler = DownloadScheduler(max_concurrent=1, per_host_limit=1)
+        gate = Gate()
+
+        scheduler.submit("first", "https://arxiv.org/pdf/0", gate.factory("first"), priority=BULK)
+        scheduler.submit("bulk", "https://arxiv.org/pdf/1", gate.factory("bulk"), priority=BULK)
+        scheduler.submit("click", "https://arxiv.org/pdf/2", gate.factory("click"), priority=INTERACTIVE)
+        await settle()
+        gate.release("first")
+        await settle()
+
+        assert gate.started == ["first", "click"]
+
+    async def test_bulk_is_not_starved(self):
+        scheduler = DownloadScheduler(max_concurrent=1, per_host_limit=1, interactive_burst=2)
+        gate = Gate()
+
+        scheduler.submit("bulk", "https://arxiv.org/pdf/b", gate.factory("bulk"), priority=BULK)
+        for i in range(4):
+            scheduler.submit(f"i{i}", f"https://arxiv.org/pdf/{i}", gate.factory(f"i{i}"))
+        # "bulk" started immediately because the scheduler was idle
+        gate.release("bulk")
+        scheduler.submit("bulk2", "https://arxiv.org/pdf/b2", gate.factory("bulk2"), priority=BULK)
+
+        for key in ["i0", "i1", "bulk2", "i2"]:
+            await settle()
+            gate.release(key)
+        await settle()
+
+        assert gate.started[:5] == ["bulk", "i0", "i1", "bulk2", "i2"]
+
+    async def test_bulk_round_robins_across_hosts(self):
+        scheduler = DownloadScheduler(max_concurrent=1, per_host_limit=1)
+        gate = Gate()
+
+        scheduler.submit("hold", "https://other.org/x", gate.factory("hold"))
+        for key, host in [("a1", "a.org"), ("a2", "a.org"), ("b1", "b.org")]:
+            scheduler.submit(key, f"https://{host}/x", gate.factory(key), priority=BULK)
+
+        for key in ["hold", "a1", "b1"]:
+            await settle()
+            gate.release(key)
+        await settle()
+
+        assert gate.started == ["hold", "a1", "b1", "a2"]
+
+    async def test_duplicate_submit_is_rejected(self):
+        scheduler = DownloadScheduler(max_concurrent=1)
+        gate = Gate()
+
+        assert scheduler.submit("t", "https://arxiv.org/pdf/1", gate.factory("t")) is True
+        assert scheduler.submit("t", "https://arxiv.org/pdf/1", gate.factory("t")) is False
+
+    async def test_cancel_removes_queued_entry(self):
+        scheduler = DownloadScheduler(max_concurrent=1)
+        gate = Gate()
+
+        scheduler.submit("running", "https://arxiv.org/pdf/1", gate.factory("running"))
+        scheduler.submit("queued", "https://arxiv.org/pdf/2", gate.factory("queued"))
+        await settle()
+
+        assert scheduler.cancel("queued") is True
+        assert scheduler.cancel("running") is False
+        gate.release("running")
+        await settle()
+
+        assert gate.started == ["running"]
+        assert scheduler.queued_count() == 0
+
+    async def test_metrics(self):
+        scheduler = DownloadScheduler(max_concurrent=1)
+        gate = Gate()
+
+        scheduler.submit("a", "https://arxiv.org/pdf/1", gate.factory("a"))
+        scheduler.submit("b", "https://arxiv.org/pdf/2", gate.factory("b"), priority=BULK)
+        await settle()
+
+        metrics = scheduler.get_metrics()
+        assert metrics["active"] == 1
+        assert metrics["queued"] == 1
+        assert metrics["queues"][BULK]["depth"] == 1
+        assert metrics["queues"][INTERACTIVE]["depth"] == 0
+        assert metrics["submitted_total"] == 2
+        assert metrics["started_total"] == 1
+
+    def test_unknown_priority(self):
+        scheduler = DownloadScheduler()
+
+        with pytest.raises(ValueError):
+            scheduler.submit("t", "https://arxiv.org/pdf/1", lambda: None, priority="urgent")
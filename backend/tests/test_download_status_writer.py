@@ -0,0 +1,82 @@
+import pytest
+import asyncio
+import sys
+from unittest.mock import MagicMock
+
+sys.modules["pymilvus"] = MagicMock()
+sys.modules["sentence_transformers"] = MagicMock()
+
+from app.download_status_writer import DownloadStatusWriter
+from app.models import DownloadStatus
+
+
+DOWNLOADING = DownloadStatus.DOWNLOADING.value
+COMPLETED = DownloadStatus.COMPLETED.value
+
+
+class RecordingStore:
+    def __init__(self, fail_times: int = 0):
+        self.batches = []
+        self.fail_times = fail_times
+
+    def write(self, batch):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise RuntimeError("database is locked")
+        self.batches.append([dict(entry) for entry in batch])
+
+
+class TestDownloadStatusWriter:
+    async def test_progress_updates_are_merged_per_task(self):
+        store = RecordingStore()
+        writer = DownloadStatusWriter(store.write, interval=0.05)
+
+        for progress in range(0, 60, 5):
+            await writer.update("t1", DOWNLOADING, progress=progress)
+        await writer.update("t2", DOWNLOADING, progress=10)
+
+        assert store.batches == []
+        await asyncio.sleep(0.1)
+
+        assert len(store.batches) == 1
+        batch = {entry["task_id"]: entry for entry in store.batches[0]}
+        assert batch["t1"]["progress"] == 55
+        assert batch["t2"]["progress"] == 10
+        assert writer.pending_count() == 0
+
+    async def test_terminal_state_is_flushed_immediately(self):
+        store = RecordingStore()
+        writer = DownloadStatusWriter(store.write, interval=60)
+
+        await writer.update("t1", DOWNLOADING, progress=40)
+        await writer.update("t1", COMPLETED, progress=100, file_path="/tmp/a.pdf", file_size=123)
+
+        assert store.batches == [[{
+            "task_id": "t1",
+            "status": COMPLETED,
+            "progress": 100,
+            "file_path": "/tmp/a.pdf",
+            "file_size": 123,
+        }]]
+        await writer.close()
+
+    async def test_failed_write_is_retried_with_newer_state(self):
+        store = RecordingStore(fail_times=1)
+        writer = DownloadStatusWriter(store.write, interval=60)
+
+        await writer.update("t1", DOWNLOADING, progress=40)
+        assert await writer.flush() == 0
+        await writer.update("t1", DOWNLOADING, progress=60)
+        assert await writer.flush() == 1
+
+        assert store.batches[0][0]["progress"] == 60
+        assert writer.get_stats()["errors"] == 1
+
+    async def test_close_flushes_pending(self):
+        store = RecordingStore()
+        writer = DownloadStatusWriter(store.write, interval=60)
+
+        await writer.update("t1", DOWNLOADING, progress=40)
+        await writer.close()
+
+        assert store.batches[0][0]["progress"] == 40
@@ -3,6 +3,7 @@ import os
 from unittest.mock import Mock, patch, MagicMock, AsyncMock
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
+from app.dependencies import get_paper_service
 from app.routers.downloads import router, ws_manager
 from app.models import DownloadTaskCreate, DownloadTaskResponse, DownloadStatus
 
@@ -30,7 +31,7 @@ def mock_download_manager():
     with patch('app.routers.downloads.download_manager') as mock:
         mock.is_task_running.return_value = False
         mock.get_running_count.return_value = 0
-        mock._running_tasks = {}
+        mock.get_running_task_ids.return_value = []
         yield mock
 
 
@@ -63,6 +64,16 @@ def sample_task_response():
 
 
 class TestCreateDownloadTask:
+    def test_create_task_passes_priority(self, client, mock_download_service, mock_download_manager, sample_task_data, sample_task_response):
+        mock_download_service.get_all_tasks.return_value = ([], 0)
+        mock_download_service.create_task.return_value = sample_task_response
+        mock_download_manager.start_download = AsyncMock()
+        
+        response = client.post("/downloads", json={**sample_task_data, "priority": "bulk"})
+        
+        assert response.status_code == 200
+        assert mock_download_manager.start_download.call_args.kwargs["priority"] == "bulk"
+
     def test_create_task_success(self, client, mock_download_service, mock_download_manager, sample_task_data, sample_task_response):
         mock_download_service.get_all_tasks.return_value = ([], 0)
         mock_download_service.create_task.return_value = sample_task_response
@@ -117,6 +128,143 @@ class TestCreateDownloadTask:
         assert "Database error" in response.json()["detail"]
 
 
+class TestCreateDownloadTasksBatch:
+    @pytest.fixture
+    def mock_paper_service(self, app):
+        mock = MagicMock()
+        app.dependency_overrides[get_paper_service] = lambda: mock
+        yield mock
+        app.dependency_overrides.clear()
+
+    @pytest.fixture
+    def mock_bookmark_service(self):
+        with patch('app.routers.downloads.bookmark_service') as mock:
+            yield mock
+
+    def _task(self, task_id, paper_id):
+        return {
+            "id": task_id,
+            "paper_id": paper_id,
+            "arxiv_id": paper_id.split("v")[0],
+            "title": f"Paper {paper_id}",
+            "pdf_url": f"https://arxiv.org/pdf/{paper_id}",
+            "status": DownloadStatus.PENDING.value,
+            "progress": 0,
+            "file_path": "",
+            "file_size": 0,
+            "error_message": "",
+            "created_at": "2024-01-03T00:00:00",
+            "updated_at": "2024-01-03T00:00:00",
+        }
+
+    def test_batch_by_paper_ids_dedupes_existing(self, client, mock_download_service, mock_download_manager, mock_paper_service):
+        mock_paper_service.get_papers_by_ids.return_value = [
+            {"id": "2301.00001v1", "title": "A", "pdf_url": "https://arxiv.org/pdf/2301.00001v1"},
+            {"id": "2301.00002v1", "title": "B", "pdf_url": "https://arxiv.org/pdf/2301.00002v1"},
+        ]
+        mock_download_service.get_active_tasks_by_paper_ids.return_value = {
+            "2301.00002v1": self._task("existing", "2301.00002v1"),
+        }
+        mock_download_service.create_tasks_batch.return_value = [self._task("new", "2301.00001v1")]
+        mock_download_manager.start_downloads = AsyncMock(return_value=1)
+
+        response = client.post("/downloads/batch", json={
+            "paper_ids": ["2301.00001v1", "2301.00002v1", "2301.00001v1", "9999.99999v1"],
+        })
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 1
+        assert data["existing"] == 1
+        assert data["not_found"] == ["9999.99999v1"]
+        assert {item["id"] for item in data["items"]} == {"new", "existing"}
+
+        mock_download_service.get_active_tasks_by_paper_ids.assert_called_once()
+        created_input = mock_download_service.create_tasks_batch.call_args[0][0]
+        assert [p["paper_id"] for p in created_input] == ["2301.00001v1"]
+        assert created_input[0]["arxiv_id"] == "2301.00001"
+        mock_download_manager.start_downloads.assert_awaited_once()
+        assert mock_download_manager.start_downloads.call_args.kwargs["priority"] == "bulk"
+
+    def test_batch_all_bookmarks(self, client, mock_download_service, mock_download_manager, mock_paper_service, mock_bookmark_service):
+        mock_bookmark_service.get_all_bookmarks.return_value = ([
+            {"paper_id": "2301.00001v1", "arxiv_id": "2301.00001", "title": "A",
+             "pdf_url": "https://arxiv.org/pdf/2301.00001v1"},
+            {"paper_id": "2301.00003v1", "arxiv_id": "2301.00003", "title": "No PDF", "pdf_url": ""},
+        ], 2)
+        mock_paper_service.get_papers_by_ids.return_value = []
+        mock_download_service.get_active_tasks_by_paper_ids.return_value = {}
+        mock_download_service.create_tasks_batch.return_value = [self._task("new", "2301.00001v1")]
+        mock_download_manager.start_downloads = AsyncMock(return_value=1)
+
+        response = client.post("/downloads/batch", json={"all_bookmarks": True, "priority": "interactive"})
+
+        assert response.status_code == 200
+        assert response.json()["created"] == 1
+        assert response.json()["not_found"] == ["2301.00003v1"]
+        assert mock_download_manager.start_downloads.call_args.kwargs["priority"] == "interactive"
+
+    def test_batch_by_search(self, client, mock_download_service, mock_download_manager, mock_paper_service):
+        mock_paper_service.paper_repo.get_paper_ids_by_filters.return_value = ["2301.00001v1"]
+        mock_paper_service.get_papers_by_ids.return_value = [
+            {"id": "2301.00001v1", "title": "A", "pdf_url": "https://arxiv.org/pdf/2301.00001v1"},
+        ]
+        mock_download_service.get_active_tasks_by_paper_ids.return_value = {}
+        mock_download_service.create_tasks_batch.return_value = [self._task("new", "2301.00001v1")]
+        mock_download_manager.start_downloads = AsyncMock(return_value=1)
+
+        response = client.post("/downloads/batch", json={
+            "search": {"category": "cs.AI", "date_from": "2023-01-01", "limit": 50},
+        })
+
+        assert response.status_code == 200
+        mock_paper_service.paper_repo.get_paper_ids_by_filters.assert_called_once_with(
+            category="cs.AI", date_from="2023-01-01", date_to=None, limit=50,
+        )
+
+    def test_batch_requires_a_source(self, client, mock_download_service):
+        response = client.post("/downloads/batch", json={})
+
+        assert response.status_code == 400
+
+
+class TestSQLiteDownloadRepositoryBatch:
+    def test_add_batch_and_active_lookup(self, tmp_path):
+        from app.db.sqlite.download_repo import SQLiteDownloadRepository
+
+        repo = SQLiteDownloadRepository(str(tmp_path / "test.db"))
+        tasks = repo.add_batch([
+            {"paper_id": "2301.00001v1", "title": "A", "pdf_url": "https://arxiv.org/pdf/2301.00001v1"},
+            {"paper_id": "2301.00002v1", "title": "B", "pdf_url": "https://arxiv.org/pdf/2301.00002v1"},
+        ])
+        repo.update_status(tasks[1]["id"], DownloadStatus.COMPLETED.value, progress=100)
+
+        assert repo.get_all()[1] == 2
+        active = repo.get_active_by_paper_ids(["2301.00001v1", "2301.00002v1", "missing"])
+        assert list(active.keys()) == ["2301.00001v1"]
+        assert active["2301.00001v1"]["id"] == tasks[0]["id"]
+
+    def test_update_status_batch(self, tmp_path):
+        from app.db.sqlite.download_repo import SQLiteDownloadRepository
+
+        repo = SQLiteDownloadRepository(str(tmp_path / "test.db"))
+        tasks = repo.add_batch([
+            {"paper_id": "2301.00001v1", "title": "A", "pdf_url": "https://arxiv.org/pdf/2301.00001v1"},
+            {"paper_id": "2301.00002v1", "title": "B", "pdf_url": "https://arxiv.org/pdf/2301.00002v1"},
+        ])
+
+        updated = repo.update_status_batch([
+            {"task_id": tasks[0]["id"], "status": DownloadStatus.DOWNLOADING.value, "progress": 45},
+            {"task_id": tasks[1]["id"], "status": DownloadStatus.COMPLETED.value, "progress": 100,
+             "file_path": "/tmp/b.pdf", "file_size": 2048},
+            {"task_id": "missing", "status": DownloadStatus.FAILED.value},
+        ])
+
+        assert updated == 2
+        assert repo.get(tasks[0]["id"])["progress"] == 45
+        assert repo.get(tasks[1]["id"])["file_size"] == 2048
+
+
 class TestGetDownloadTasks:
     def test_get_tasks_default_params(self, client, mock_download_service, sample_task_response):
         mock_download_service.get_all_tasks.return_value = ([sample_task_response], 1)
@@ -193,6 +341,7 @@ class TestDeleteDownloadTask:
         assert response.status_code == 200
         assert "deleted successfully" in response.json()["message"]
         mock_download_service.delete_task.assert_called_once_with("test-task-id-123")
+        mock_download_manager.release_file.assert_called_once()
 
     def test_delete_running_task(self, client, mock_download_service, mock_download_manager):
         mock_download_manager.is_task_running.return_value = True
@@ -294,12 +443,14 @@ class TestOpenDownloadFile:
         assert response.status_code == 404
         assert "File path not found" in response.json()["detail"]
 
-    def test_open_file_not_exists(self, client, mock_download_service):
+    def test_open_file_not_exists(self, client, mock_download_service, mock_download_manager):
         sample_task = {
             "id": "test-task-id-123",
+            "paper_id": "2301.12345v1",
             "file_path": "/path/to/nonexistent.pdf",
         }
         mock_download_service.get_task.return_value = sample_task
+        mock_download_manager.get_pdf_store.return_value.lookup.return_value = None
         
         with patch('os.path.exists', return_value=False):
             response = client.post("/downloads/test-task-id-123/open")
@@ -307,6 +458,24 @@ class TestOpenDownloadFile:
             assert response.status_code == 404
             assert "does not exist" in response.json()["detail"]
 
+    def test_open_file_falls_back_to_pdf_store(self, client, mock_download_service, mock_download_manager):
+        mock_download_service.get_task.return_value = {
+            "id": "test-task-id-123",
+            "paper_id": "2301.12345v1",
+            "file_path": "/old/location.pdf",
+        }
+        mock_download_manager.get_pdf_store.return_value.lookup.return_value = {
+            "path": "/downloads/store/ab/cd/abcd.pdf",
+        }
+        
+        with patch('os.path.exists', return_value=False):
+            with patch('platform.system', return_value='Linux'):
+                with patch('subprocess.run') as mock_run:
+                    response = client.post("/downloads/test-task-id-123/open")
+                    
+                    assert response.status_code == 200
+                    mock_run.assert_called_once_with(["xdg-open", "/downloads/store/ab/cd/abcd.pdf"])
+
     def test_open_file_on_macos(self, client, mock_download_service):
         sample_task = {
             "id": "test-task-id-123",
@@ -341,7 +510,7 @@ class TestOpenDownloadFile:
 class TestGetRunningStatus:
     def test_get_running_status_empty(self, client, mock_download_manager):
         mock_download_manager.get_running_count.return_value = 0
-        mock_download_manager._running_tasks = {}
+        mock_download_manager.get_running_task_ids.return_value = []
         
         response = client.get("/downloads/status/running")
         
@@ -354,10 +523,7 @@ class TestGetRunningStatus:
         mock_task = Mock()
         mock_task.paper_id = "2301.12345"
         mock_download_manager.get_task.return_value = mock_task
-        mock_download_manager._running_tasks = {
-            "task-1": Mock(),
-            "task-2": Mock(),
-        }
+        mock_download_manager.get_running_task_ids.return_value = ["task-1", "task-2"]
         
         response = client.get("/downloads/status/running")
         
@@ -365,6 +531,63 @@ class TestGetRunningStatus:
         assert response.json()["running_count"] == 2
 
 
+class TestLiveStatusOverlay:
+    def test_get_task_reports_in_memory_progress(self, client, mock_download_service, sample_task_response):
+        from app.download_manager import download_manager, DownloadTask
+
+        mock_download_service.get_task.return_value = dict(sample_task_response)
+        live = DownloadTask(
+            task_id=sample_task_response["id"],
+            pdf_url=sample_task_response["pdf_url"],
+            paper_id=sample_task_response["paper_id"],
+            status=DownloadStatus.DOWNLOADING.value,
+            progress=42,
+        )
+        with patch.dict(download_manager._tasks, {live.task_id: live}):
+            response = client.get(f"/downloads/{live.task_id}")
+
+        assert response.status_code == 200
+        assert response.json()["status"] == DownloadStatus.DOWNLOADING.value
+        assert response.json()["progress"] == 42
+
+
+class TestPDFStoreEndpoints:
+    def test_store_stats(self, client, mock_download_manager):
+        mock_download_manager.get_pdf_store.return_value.get_stats.return_value = {"entries": 3, "blobs": 2}
+        
+        response = client.get("/downloads/store/stats")
+        
+        assert response.status_code == 200
+        assert response.json()["blobs"] == 2
+
+    def test_store_verify_and_gc(self, client, mock_download_manager):
+        store = mock_download_manager.get_pdf_store.return_value
+        store.verify.return_value = {"entries": 1, "missing": [], "corrupt": []}
+        store.gc.return_value = {"removed_blobs": 4, "freed_bytes": 1024}
+        
+        verify = client.post("/downloads/store/verify?full=true")
+        gc = client.post("/downloads/store/gc")
+        
+        assert verify.status_code == 200
+        store.verify.assert_called_once_with(True)
+        assert gc.json()["removed_blobs"] == 4
+
+
+class TestGetQueueStatus:
+    def test_get_queue_status(self, client, mock_download_manager):
+        mock_download_manager.get_queue_metrics.return_value = {
+            "active": 2,
+            "queued": 5,
+            "queues": {"interactive": {"depth": 1}, "bulk": {"depth": 4}},
+        }
+        
+        response = client.get("/downloads/status")
+        
+        assert response.status_code == 200
+        assert response.json()["queued"] == 5
+        assert response.json()["queues"]["bulk"]["depth"] == 4
+
+
 class TestDownloadSorting:
     def test_tasks_sorted_by_created_at_descending(self, client, mock_download_service):
         task1 = {
@@ -224,12 +224,36 @@ class TestEmbeddingService:
         
         service._primary_provider = mock_primary
         service._fallback_provider = mock_fallback
-        
+
         embedding, model = service.encode("test text")
 
         assert embedding == [0.1, 0.2]
         assert model == "local:all-MiniLM-L6-v2"
 
+    @patch('app.services.embedding_service.get_settings')
+    def test_failing_primary_is_skipped_after_repeated_failures(self, mock_get_settings):
+        mock_get_settings.return_value = Mock()
+
+        service = EmbeddingService()
+        service._initialized = True
+
+        mock_primary = Mock()
+        mock_primary.encode_batch.side_effect = Exception("API Error")
+
+        mock_fallback = Mock()
+        mock_fallback.encode_batch.return_value = [[0.1, 0.2]]
+        mock_fallback.get_model_name.return_value = "local:all-MiniLM-L6-v2"
+
+        service._primary_provider = mock_primary
+        service._fallback_provider = mock_fallback
+
+        for _ in range(5):
+            embeddings, model = service.encode_batch(["test text"])
+
+        assert embeddings == [[0.1, 0.2]]
+        assert mock_primary.encode_batch.call_count == 3
+        assert mock_fallback.encode_batch.call_count == 5
+
     @patch('app.services.embedding_service.get_settings')
     def test_encode_batch_success(self, mock_get_settings):
         mock_settings = Mock()
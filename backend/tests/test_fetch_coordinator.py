@@ -0,0 +1,138 @@
+import pytest
+import asyncio
+import sys
+import sqlite3
+import time
+from unittest.mock import MagicMock, AsyncMock, patch
+
+sys.modules["pymilvus"] = MagicMock()
+sys.modules["sentence_transformers"] = MagicMock()
+
+from app.services.fetch_coordinator import SingleFlight, SQLiteAdvisoryLock
+
+
+class TestSingleFlight:
+    async def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"count": 3}
+
+        results = await asyncio.gather(*[flight.do("2024-01-15:cs*", work) for _ in range(10)])
+
+        assert calls == 1
+        assert all(r == {"count": 3} for r in results)
+        assert flight.inflight_count() == 0
+
+    async def test_different_keys_run_independently(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def work(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key
+
+        results = await asyncio.gather(
+            flight.do("a", lambda: work("a")),
+            flight.do("b", lambda: work("b")),
+        )
+
+        assert sorted(calls) == ["a", "b"]
+        assert results == ["a", "b"]
+
+    async def test_exception_propagates_to_all_waiters(self):
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("arXiv down")
+
+        results = await asyncio.gather(
+            flight.do("k", work), flight.do("k", work), return_exceptions=True
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert not flight.is_inflight("k")
+
+    async def test_key_is_released_after_completion(self):
+        flight = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        assert await flight.do("k", work) == 1
+        assert await flight.do("k", work) == 2
+
+
+class TestSQLiteAdvisoryLock:
+    def test_acquire_and_release(self, tmp_path):
+        lock = SQLiteAdvisoryLock(str(tmp_path / "locks.db"))
+
+        assert lock.try_acquire("2024-01-15:cs*", "worker-1", ttl=60) is True
+        assert lock.try_acquire("2024-01-15:cs*", "worker-2", ttl=60) is False
+        assert lock.release("2024-01-15:cs*", "worker-1") is True
+        assert lock.try_acquire("2024-01-15:cs*", "worker-2", ttl=60) is True
+
+    def test_release_by_non_owner_is_ignored(self, tmp_path):
+        lock = SQLiteAdvisoryLock(str(tmp_path / "locks.db"))
+        lock.try_acquire("k", "worker-1", ttl=60)
+
+        assert lock.release("k", "worker-2") is False
+        assert lock.try_acquire("k", "worker-2", ttl=60) is False
+
+    def test_expired_lock_is_taken_over(self, tmp_path):
+        lock = SQLiteAdvisoryLock(str(tmp_path / "locks.db"))
+        lock.try_acquire("k", "worker-1", ttl=-1)
+
+        assert lock.try_acquire("k", "worker-2", ttl=60) is True
+
+    def test_busy_table_does_not_block(self, tmp_path):
+        db_path = str(tmp_path / "locks.db")
+        lock = SQLiteAdvisoryLock(db_path, busy_timeout=0.05)
+        writer = sqlite3.connect(db_path, isolation_level=None)
+        writer.execute("BEGIN IMMEDIATE")
+
+        started = time.monotonic()
+        try:
+            assert lock.try_acquire("k", "worker-1", ttl=60) is False
+        finally:
+            writer.execute("ROLLBACK")
+            writer.close()
+
+        assert time.monotonic() - started < 1.0
+        assert lock.try_acquire("k", "worker-1", ttl=60) is True
+
+
+class TestPaperServiceFetchDeduplication:
+    async def test_concurrent_queries_fetch_date_once(self):
+        from app.services.paper_service import PaperService
+
+        paper_repo = MagicMock()
+        paper_repo.get_date_index.return_value = None
+        paper_repo.insert_papers_batch.return_value = 1
+        paper_repo.query_papers_by_date.return_value = ([], 0)
+
+        async def slow_fetch(date, category):
+            await asyncio.sleep(0.05)
+            return [{"id": "2401.00001", "title": "T"}]
+
+        with patch("app.services.paper_service.get_paper_repository", return_value=paper_repo), \
+             patch("app.services.paper_service.get_paper_embedding_repository", return_value=MagicMock()):
+            service = PaperService()
+            service.arxiv_client = MagicMock()
+            service.arxiv_client.fetch_all_papers_for_date = AsyncMock(side_effect=slow_fetch)
+
+            await asyncio.gather(*[
+                service.query_papers(date="2024-01-15") for _ in range(5)
+            ])
+
+        assert service.arxiv_client.fetch_all_papers_for_date.await_count == 1
+        assert paper_repo.insert_papers_batch.call_count == 1
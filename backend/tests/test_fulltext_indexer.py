@@ -0,0 +1,125 @@
+import pytest
+import asyncio
+import sys
+from unittest.mock import MagicMock, patch
+
+sys.modules["pymilvus"] = MagicMock()
+sys.modules["sentence_transformers"] = MagicMock()
+
+from app.fulltext_indexer import FulltextIndexer
+
+
+class FakeChunkRepository:
+    def __init__(self):
+        self.chunks = {}
+        self.sources = {}
+
+    def replace_chunks(self, paper_id, chunks, model_name, source_sha256=""):
+        self.chunks[paper_id] = [dict(c, embedding_model=model_name) for c in chunks]
+        self.sources[paper_id] = source_sha256
+        return len(chunks)
+
+    def get_source_checksum(self, paper_id):
+        return self.sources.get(paper_id)
+
+    def search_chunks(self, query_embedding, top_k=10, paper_ids=None):
+        return [c for pid, chunks in self.chunks.items() if not paper_ids or pid in paper_ids for c in chunks][:top_k]
+
+
+@pytest.fixture
+def repo():
+    return FakeChunkRepository()
+
+
+@pytest.fixture
+def embedder():
+    mock = MagicMock()
+    mock.encode_batch.side_effect = lambda texts: ([[float(len(t))] for t in texts], "test-model")
+    mock.encode.return_value = ([1.0], "test-model")
+    with patch("app.fulltext_indexer.embedding_service", mock):
+        yield mock
+
+
+@pytest.fixture
+async def indexer(repo):
+    indexer = FulltextIndexer(workers=1, chunk_words=3, chunk_overlap=1, embed_batch_size=2, repo_factory=lambda: repo)
+    yield indexer
+    await indexer.shutdown()
+
+
+class TestFulltextIndexer:
+    async def test_index_paper_extracts_embeds_and_stores(self, indexer, repo, embedder, make_pdf):
+        path = make_pdf([["one two three four"], ["five six"]])
+
+        result = await indexer.index_paper("2401.00001v1", str(path), checksum="abc")
+
+        assert result == {"paper_id": "2401.00001v1", "status": "indexed", "pages": 2, "chunks": 3}
+        stored = repo.chunks["2401.00001v1"]
+        assert [c["text"] for c in stored] == ["one two three", "three four five", "five six"]
+        assert [c["page"] for c in stored] == [1, 1, 2]
+        assert all(c["embedding_model"] == "test-model" and c["embedding"] for c in stored)
+        assert repo.sources["2401.00001v1"] == "abc"
+        # Three chunks in batches of two
+        assert embedder.encode_batch.call_count == 2
+
+    async def test_same_source_is_not_reindexed(self, indexer, repo, embedder, make_pdf):
+        path = make_pdf([["one two three"]])
+        await indexer.index_paper("p", str(path), checksum="abc")
+
+        result = await indexer.index_paper("p", str(path), checksum="abc")
+
+        assert result["status"] == "unchanged"
+        assert indexer.get_stats()["skipped"] == 1
+        assert embedder.encode_batch.call_count == 1
+
+    async def test_force_reindexes(self, indexer, repo, embedder, make_pdf):
+        path = make_pdf([["one two three"]])
+        await indexer.index_paper("p", str(path), checksum="abc")
+
+        result = await indexer.index_paper("p", str(path), checksum="abc", force=True)
+
+        assert result["status"] == "indexed"
+
+    async def test_max_chunks(self, repo, embedder, make_pdf):
+        indexer = FulltextIndexer(workers=1, chunk_words=2, chunk_overlap=0, max_chunks=2, repo_factory=lambda: repo)
+        path = make_pdf([["a b c d e f g h"]])
+        try:
+            result = await indexer.index_paper("p", str(path))
+        finally:
+            await indexer.shutdown()
+
+        assert result["chunks"] == 2
+        assert [c["text"] for c in repo.chunks["p"]] == ["a b", "c d"]
+
+    async def test_failure_is_counted(self, indexer, repo, embedder, tmp_path):
+        bad = tmp_path / "bad.pdf"
+        bad.write_bytes(b"not a pdf")
+
+        with pytest.raises(Exception):
+            await indexer.index_paper("p", str(bad))
+
+        assert indexer.get_stats()["failed"] == 1
+        assert "p" not in repo.chunks
+
+    async def test_submit_runs_in_background_once_per_paper(self, indexer, repo, embedder, make_pdf):
+        path = make_pdf([["one two three"]])
+
+        assert indexer.submit("p", str(path), "abc") is True
+        assert indexer.submit("p", str(path), "abc") is False
+        assert indexer.is_pending("p")
+
+        for _ in range(200):
+            if not indexer.is_pending("p"):
+                break
+            await asyncio.sleep(0.05)
+
+        assert repo.chunks["p"][0]["text"] == "one two three"
+        assert indexer.get_stats()["indexed"] == 1
+
+    async def test_search(self, indexer, repo, embedder, make_pdf):
+        await indexer.index_paper("p", str(make_pdf([["one two three"]])))
+
+        passages = await indexer.search("numbers", top_k=5, paper_ids=["p"])
+
+        embedder.encode.assert_called_once_with("numbers")
+        assert passages[0]["text"] == "one two three"
@@ -0,0 +1,69 @@
+import pytest
+from unittest.mock import patch
+
+from app.llm_cache import LLMResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMResponseCache(str(tmp_path / "cache" / "skill_cache.db"), ttl_seconds=60, max_entries=3)
+
+
+class TestLLMResponseCache:
+    def test_make_key(self):
+        key = LLMResponseCache.make_key("prompt", "gpt-4o-mini", 0.7)
+        
+        assert key == LLMResponseCache.make_key("prompt", "gpt-4o-mini", 0.7)
+        assert key != LLMResponseCache.make_key("prompt ", "gpt-4o-mini", 0.7)
+        assert key != LLMResponseCache.make_key("prompt", "gpt-4o", 0.7)
+        assert key != LLMResponseCache.make_key("prompt", "gpt-4o-mini", 0.2)
+    
+    def test_get_and_put(self, cache):
+        assert cache.get("k", "summary") is None
+        cache.put("k", "response", "summary", "gpt-4o-mini")
+        
+        assert cache.get("k", "summary") == "response"
+        stats = cache.get_stats()
+        assert stats["entries"] == 1
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["writes"] == 1
+    
+    def test_persists_across_instances(self, cache):
+        cache.put("k", "response")
+        
+        assert LLMResponseCache(cache.db_path).get("k") == "response"
+    
+    def test_expired_entry_is_a_miss(self, cache):
+        with patch("app.llm_cache.time.time", return_value=1000.0):
+            cache.put("k", "response")
+        with patch("app.llm_cache.time.time", return_value=1061.0):
+            assert cache.get("k") is None
+        
+        stats = cache.get_stats()
+        assert stats["entries"] == 0
+        assert stats["expired"] == 1
+    
+    def test_least_recently_used_is_evicted(self, cache):
+        with patch("app.llm_cache.time.time") as clock:
+            for i, key in enumerate(["a", "b", "c"]):
+                clock.return_value = 1000.0 + i
+                cache.put(key, key.upper())
+            clock.return_value = 1010.0
+            assert cache.get("a") == "A"
+            cache.put("d", "D")
+            
+            assert cache.get("b") is None
+            assert cache.get("a") == "A"
+            assert cache.get("d") == "D"
+        assert cache.get_stats()["evictions"] == 1
+    
+    def test_clear(self, cache):
+        cache.put("a", "A", "summary")
+        cache.put("b", "B", "translation")
+        
+        assert cache.clear("summary") == 1
+        assert cache.get("b") == "B"
+        assert cache.clear() == 1
+        assert cache.get_stats()["entries"] == 0
@@ -0,0 +1,320 @@
+import asyncio
+import sys
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+sys.modules["pymilvus"] = MagicMock()
+sys.modules["sentence_transformers"] = MagicMock()
+
+from app.services.llm_resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ProviderGuard,
+    TokenBucket,
+    is_retryable,
+    retry_after_of,
+)
+from app.services.llm_service import GuardedProvider, LLMCompletion, LLMProvider, LLMService, LLMUsage
+
+MESSAGES = [{"role": "user", "content": "Hi"}]
+
+
+def http_error(status, headers=None):
+    request = httpx.Request("POST", "https://api.example.com/v1/chat")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return httpx.HTTPStatusError(f"HTTP {status}", request=request, response=response)
+
+
+class StaticProvider(LLMProvider):
+    def __init__(self, text="fallback answer"):
+        self.text = text
+
+    async def generate(self, messages, **kwargs):
+        return self.text
+
+    def get_model_name(self) -> str:
+        return "static"
+
+
+class TestErrorClassification:
+    def test_retryable_errors(self):
+        assert is_retryable(http_error(429))
+        assert is_retryable(http_error(503))
+        assert is_retryable(httpx.ConnectError("refused"))
+        assert not is_retryable(http_error(400))
+        assert not is_retryable(ValueError("bad input"))
+
+    def test_retry_after(self):
+        assert retry_after_of(http_error(429, {"retry-after": "2"})) == 2.0
+        assert retry_after_of(http_error(429, {"retry-after-ms": "250"})) == 0.25
+        assert retry_after_of(http_error(429, {"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+        assert retry_after_of(http_error(429)) is None
+
+
+class TestTokenBucket:
+    async def test_waits_for_refill(self):
+        bucket = TokenBucket(tokens_per_minute=6000)
+        await bucket.acquire(6000)
+
+        started = time.monotonic()
+        waited = await bucket.acquire(10)
+
+        assert time.monotonic() - started >= 0.09
+        assert waited == pytest.approx(0.1, abs=0.02)
+
+    async def test_settle_charges_underestimates(self):
+        bucket = TokenBucket(tokens_per_minute=6000)
+        await bucket.acquire(100)
+
+        bucket.settle(reserved=100, used=1100)
+
+        assert bucket.tokens == pytest.approx(4900, abs=5)
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold_and_half_opens(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.05)
+
+        assert not breaker.record_failure()
+        assert breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow()
+
+        time.sleep(0.06)
+        assert breaker.allow()
+        # Only one trial call at a time
+        assert not breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_failed_trial_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        assert breaker.allow()
+
+        assert breaker.record_failure()
+        assert breaker.opened == 2
+
+
+class TestProviderGuard:
+    async def test_retries_honor_retry_after(self):
+        guard = ProviderGuard("openai", max_retries=3, base_delay=5.0)
+        fn = AsyncMock(side_effect=[
+            http_error(429, {"retry-after": "0.05"}),
+            http_error(429, {"retry-after": "0.05"}),
+            "ok",
+        ])
+
+        started = time.monotonic()
+        assert await guard.call(fn) == "ok"
+
+        assert time.monotonic() - started >= 0.1
+        stats = guard.get_stats()
+        assert (stats["retries"], stats["rate_limited"], stats["succeeded"]) == (2, 2, 1)
+        assert stats["circuit"] == "closed"
+
+    async def test_jittered_backoff_is_capped(self):
+        guard = ProviderGuard("openai", base_delay=1.0, max_delay=4.0)
+
+        delays = {guard.backoff(attempt, http_error(503)) for attempt in range(10) for _ in range(5)}
+
+        assert len(delays) > 1
+        assert all(0 <= delay <= 4.0 for delay in delays)
+
+    async def test_bad_request_is_not_retried(self):
+        guard = ProviderGuard("openai", max_retries=3, failure_threshold=1)
+        fn = AsyncMock(side_effect=http_error(400))
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await guard.call(fn)
+
+        assert fn.call_count == 1
+        assert guard.get_stats()["circuit"] == "closed"
+
+    async def test_circuit_opens_and_short_circuits(self):
+        guard = ProviderGuard("glm", max_retries=0, failure_threshold=2, reset_seconds=60)
+        fn = AsyncMock(side_effect=http_error(503))
+
+        for _ in range(2):
+            with pytest.raises(httpx.HTTPStatusError):
+                await guard.call(fn)
+        with pytest.raises(CircuitOpenError):
+            await guard.call(fn)
+
+        stats = guard.get_stats()
+        assert fn.call_count == 2
+        assert (stats["failed"], stats["short_circuited"], stats["circuit_opened"]) == (2, 1, 1)
+
+    async def test_concurrency_limit(self):
+        guard = ProviderGuard("ollama", concurrency=2)
+        in_flight = peak = 0
+
+        async def fn():
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.02)
+            in_flight -= 1
+            return "ok"
+
+        await asyncio.gather(*[guard.call(fn) for _ in range(6)])
+
+        assert peak == 2
+        assert guard.get_stats()["in_flight"] == 0
+
+    async def test_tokens_per_minute_limit(self):
+        guard = ProviderGuard("openai", tokens_per_minute=6000)
+        fn = AsyncMock(return_value="ok")
+
+        await guard.call(fn, estimated_tokens=6000)
+        await guard.call(fn, estimated_tokens=10)
+
+        assert guard.get_stats()["throttled_seconds"] >= 0.09
+
+
+class TestGuardedProvider:
+    async def test_falls_back_while_circuit_is_open(self):
+        primary = MagicMock()
+        primary.complete = AsyncMock(side_effect=http_error(503))
+        guard = ProviderGuard("openai", max_retries=0, failure_threshold=1, reset_seconds=60)
+        provider = GuardedProvider(primary, guard, fallback=lambda: StaticProvider())
+
+        assert (await provider.complete(MESSAGES)).text == "fallback answer"
+        assert await provider.generate(MESSAGES) == "fallback answer"
+
+        assert primary.complete.call_count == 1
+        assert guard.get_stats()["fallbacks"] == 2
+
+    async def test_reports_which_model_answered(self):
+        class Primary(StaticProvider):
+            def get_model_name(self) -> str:
+                return "gpt-4o"
+
+            async def stream(self, messages, **kwargs):
+                raise http_error(503)
+                yield
+
+        provider = GuardedProvider(Primary(), ProviderGuard("openai", max_retries=0), fallback=lambda: StaticProvider())
+        answered_by = []
+
+        await provider.complete(MESSAGES, answered_by=answered_by)
+        assert [delta async for delta in provider.stream(MESSAGES, answered_by=answered_by)] == ["fallback answer"]
+
+        assert answered_by == ["gpt-4o", "static"]
+
+    async def test_fallback_without_tools_gets_tool_turns_as_text(self):
+        class Primary(StaticProvider):
+            supports_tools = True
+
+            async def complete(self, messages, **kwargs):
+                raise http_error(503)
+
+            async def stream(self, messages, **kwargs):
+                raise http_error(503)
+                yield
+
+        requests = []
+
+        class Fallback(StaticProvider):
+            async def generate(self, messages, **kwargs):
+                requests.append((messages, kwargs))
+                return self.text
+
+        messages = [
+            {"role": "user", "content": "Find papers"},
+            {
+                "role": "assistant",
+                "content": "",
+                "tool_calls": [{"id": "call_1", "name": "search", "arguments": {"query": "rlhf"}}],
+            },
+            {"role": "tool", "tool_call_id": "call_1", "name": "search", "content": "3 papers"},
+        ]
+        tools = [{"name": "search", "description": "Search papers", "parameters": {"type": "object"}}]
+        provider = GuardedProvider(Primary(), ProviderGuard("openai", max_retries=0), fallback=lambda: Fallback())
+
+        await provider.complete(messages, tools=tools, temperature=0.2)
+        assert [delta async for delta in provider.stream(messages, tools=tools)] == ["fallback answer"]
+
+        expected = [
+            {"role": "user", "content": "Find papers"},
+            {"role": "assistant", "content": '[TOOL: search({"query": "rlhf"})]'},
+            {"role": "user", "content": "[search result]\n3 papers"},
+        ]
+        assert requests == [(expected, {"temperature": 0.2}), (expected, {})]
+
+    async def test_no_fallback_for_bad_requests(self):
+        primary = MagicMock()
+        primary.complete = AsyncMock(side_effect=http_error(400))
+        provider = GuardedProvider(primary, ProviderGuard("openai"), fallback=lambda: StaticProvider())
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await provider.complete(MESSAGES)
+
+    async def test_stream_retries_before_first_delta(self):
+        attempts = 0
+
+        class FlakyStream(StaticProvider):
+            async def stream(self, messages, **kwargs):
+                nonlocal attempts
+                attempts += 1
+                if attempts == 1:
+                    raise httpx.ConnectError("refused")
+                yield "Hel"
+                yield "lo"
+
+        guard = ProviderGuard("ollama", base_delay=0.01)
+        provider = GuardedProvider(FlakyStream(), guard)
+
+        assert [delta async for delta in provider.stream(MESSAGES)] == ["Hel", "lo"]
+        assert guard.get_stats()["retries"] == 1
+        assert guard.get_stats()["in_flight"] == 0
+
+    async def test_settles_tokens_with_reported_usage(self):
+        primary = MagicMock()
+        primary.max_tokens = 100
+        primary.complete = AsyncMock(return_value=LLMCompletion(
+            text="ok", usage=LLMUsage(prompt_tokens=10, completion_tokens=5, calls=1)
+        ))
+        guard = ProviderGuard("openai", tokens_per_minute=60000)
+        provider = GuardedProvider(primary, guard)
+
+        await provider.complete(MESSAGES)
+
+        assert guard.bucket.tokens == pytest.approx(60000 - 15, abs=5)
+
+
+class TestServiceGuards:
+    def test_models_of_a_provider_share_one_guard(self):
+        service = LLMService()
+
+        with patch.object(service, "_create_provider", side_effect=lambda name, model=None: StaticProvider()):
+            first = service._get_provider("openai", "gpt-4o")
+            second = service._get_provider("openai", "gpt-4o-mini")
+            other = service._get_provider("ollama")
+
+        assert isinstance(first, GuardedProvider)
+        assert first.guard is second.guard
+        assert other.guard is not first.guard
+        assert set(service.get_guard_stats()) == {"openai", "ollama"}
+        assert service.get_guard_stats()["ollama"]["concurrency"] == 2
+
+    async def test_fallback_provider_from_settings(self):
+        service = LLMService()
+        service.settings = service.settings.model_copy(update={
+            "LLM_FALLBACK_PROVIDER": "ollama", "LLM_MAX_RETRIES": 0, "LLM_CIRCUIT_FAILURE_THRESHOLD": 1,
+        })
+        failing = MagicMock()
+        failing.complete = AsyncMock(side_effect=http_error(529))
+
+        def create(name, model=None):
+            return failing if name == "anthropic" else StaticProvider()
+
+        with patch.object(service, "_create_provider", side_effect=create):
+            text = await service.generate_with_messages(MESSAGES, provider="anthropic")
+
+        assert text == "fallback answer"
+        assert service.get_guard_stats()["anthropic"]["fallbacks"] == 1
@@ -0,0 +1,466 @@
+import asyncio
+import json
+import sys
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+sys.modules["pymilvus"] = MagicMock()
+sys.modules["sentence_transformers"] = MagicMock()
+
+from app.services.llm_service import (
+    LLMCompletion,
+    LLMProvider,
+    LLMToolCall,
+    LLMUsage,
+    OpenAIProvider,
+    AnthropicProvider,
+    OllamaProvider,
+    LLMService,
+)
+
+MESSAGES = [{"role": "system", "content": "Be brief."}, {"role": "user", "content": "Hi"}]
+
+
+async def collect(stream):
+    return [delta async for delta in stream]
+
+
+class StaticProvider(LLMProvider):
+    async def generate(self, messages, **kwargs):
+        return "whole answer"
+
+    def get_model_name(self) -> str:
+        return "static"
+
+
+class TestProviderStreaming:
+    async def test_default_stream_yields_full_response(self):
+        assert await collect(StaticProvider().stream(MESSAGES)) == ["whole answer"]
+
+    async def test_openai_stream(self):
+        def chunk(content):
+            return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+        async def chunks():
+            for content in ["Hel", None, "lo"]:
+                yield chunk(content)
+
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(return_value=chunks())
+        provider = OpenAIProvider(api_key="key", model="gpt-4o-mini")
+        provider._client = client
+
+        assert await collect(provider.stream(MESSAGES, temperature=0.1)) == ["Hel", "lo"]
+        kwargs = client.chat.completions.create.call_args.kwargs
+        assert kwargs["stream"] is True
+        assert kwargs["temperature"] == 0.1
+
+    async def test_anthropic_stream(self):
+        async def text_stream():
+            for text in ["Hel", "lo"]:
+                yield text
+
+        response = MagicMock()
+        response.text_stream = text_stream()
+        manager = MagicMock()
+        manager.__aenter__ = AsyncMock(return_value=response)
+        manager.__aexit__ = AsyncMock(return_value=False)
+        client = MagicMock()
+        client.messages.stream.return_value = manager
+        provider = AnthropicProvider(api_key="key", model="claude-3-haiku-20240307")
+        provider._client = client
+
+        assert await collect(provider.stream(MESSAGES)) == ["Hel", "lo"]
+        params = client.messages.stream.call_args.kwargs
+        assert params["system"] == "Be brief."
+        assert params["messages"] == [{"role": "user", "content": "Hi"}]
+
+    @staticmethod
+    def ollama_provider(chat_lines, status_code=200):
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/api/tags":
+                return httpx.Response(200, json={"models": [{"name": "llama3:latest"}]})
+            assert json.loads(request.content)["stream"] is True
+            body = "".join(json.dumps(line) + "\n" for line in chat_lines)
+            return httpx.Response(status_code, content=body.encode())
+
+        provider = OllamaProvider(base_url="http://ollama:11434", model="llama3")
+        provider._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return provider
+
+    async def test_ollama_stream(self):
+        provider = self.ollama_provider([
+            {"message": {"content": "Hel"}, "done": False},
+            {"message": {"content": "lo"}, "done": False},
+            {"message": {"content": ""}, "done": True},
+        ])
+
+        assert await collect(provider.stream(MESSAGES)) == ["Hel", "lo"]
+        await provider.close()
+
+    async def test_ollama_stream_error_line(self):
+        provider = self.ollama_provider([{"message": {"content": "Hel"}}, {"error": "out of memory"}])
+
+        with pytest.raises(ValueError, match="out of memory"):
+            await collect(provider.stream(MESSAGES))
+        await provider.close()
+
+    async def test_ollama_stream_missing_model(self):
+        provider = self.ollama_provider([], status_code=404)
+
+        with pytest.raises(ValueError, match="ollama pull"):
+            await collect(provider.stream(MESSAGES))
+        await provider.close()
+
+
+class TestServiceStreaming:
+    async def test_stream_question_uses_ask_context(self):
+        service = LLMService()
+        provider = MagicMock()
+
+        async def stream(messages, **kwargs):
+            yield "Answer"
+
+        provider.stream = MagicMock(side_effect=stream)
+        papers = [{"id": "1", "title": "Attention", "abstract": "Attention is all you need."}]
+
+        with patch.object(service, "_get_provider", return_value=provider):
+            deltas = await collect(service.stream_question("What is attention?", papers))
+
+        assert deltas == ["Answer"]
+        messages = provider.stream.call_args.args[0]
+        assert messages[0] == {"role": "system", "content": LLMService.SYSTEM_PROMPT}
+        assert "Attention is all you need." in messages[1]["content"]
+        assert "What is attention?" in messages[1]["content"]
+
+
+HISTORY = [
+    {"role": "system", "content": "Be brief."},
+    {"role": "system", "content": "Papers: ..."},
+    {"role": "user", "content": "Find papers"},
+    {"role": "assistant", "content": "Searching"},
+    {"role": "user", "content": "Thanks"},
+]
+
+
+class TestPromptCaching:
+    async def test_anthropic_cache_breakpoints_and_usage(self):
+        response = SimpleNamespace(
+            content=[SimpleNamespace(type="text", text="Done")],
+            usage=SimpleNamespace(
+                input_tokens=20, output_tokens=5, cache_read_input_tokens=1500, cache_creation_input_tokens=30
+            ),
+        )
+        client = MagicMock()
+        client.messages.create = AsyncMock(return_value=response)
+        provider = AnthropicProvider(api_key="key", model="claude-3-haiku-20240307")
+        provider._client = client
+
+        completion = await provider.complete(HISTORY, cache_prefix=True)
+
+        assert completion.text == "Done"
+        assert completion.usage == LLMUsage(
+            prompt_tokens=1550, completion_tokens=5, cached_tokens=1500, cache_write_tokens=30, calls=1
+        )
+        params = client.messages.create.call_args.kwargs
+        assert params["system"] == [
+            {"type": "text", "text": "Be brief."},
+            {"type": "text", "text": "Papers: ...", "cache_control": {"type": "ephemeral"}},
+        ]
+        assert params["messages"][:2] == HISTORY[2:4]
+        assert params["messages"][-1]["content"] == [
+            {"type": "text", "text": "Thanks", "cache_control": {"type": "ephemeral"}},
+        ]
+
+    def test_anthropic_keeps_every_system_message(self):
+        provider = AnthropicProvider(api_key="key", model="claude-3-haiku-20240307")
+
+        params = provider._request_params(HISTORY)
+
+        assert params["system"] == "Be brief.\n\nPapers: ..."
+        assert params["messages"] == HISTORY[2:]
+
+    async def test_openai_cache_key_and_cached_tokens(self):
+        response = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="Done"))],
+            usage=SimpleNamespace(
+                prompt_tokens=2048, completion_tokens=12, prompt_tokens_details=SimpleNamespace(cached_tokens=1920)
+            ),
+        )
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(return_value=response)
+        provider = OpenAIProvider(api_key="key", model="gpt-4o-mini")
+        provider._client = client
+
+        completion = await provider.complete(HISTORY, cache_prefix=True, cache_key="agent-a")
+        usage = completion.usage
+
+        assert completion.text == "Done"
+        assert (usage.prompt_tokens, usage.cached_tokens, usage.completion_tokens) == (2048, 1920, 12)
+        kwargs = client.chat.completions.create.call_args.kwargs
+        assert kwargs["messages"] == HISTORY
+        assert kwargs["extra_body"] == {"prompt_cache_key": "agent-a"}
+
+        await provider.complete(HISTORY)
+        assert "extra_body" not in client.chat.completions.create.call_args.kwargs
+
+    async def test_ollama_keep_alive_and_usage(self):
+        payloads = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/api/tags":
+                return httpx.Response(200, json={"models": [{"name": "llama3:latest"}]})
+            payloads.append(json.loads(request.content))
+            return httpx.Response(200, json={
+                "message": {"content": "Done"}, "prompt_eval_count": 42, "eval_count": 7,
+            })
+
+        provider = OllamaProvider(base_url="http://ollama:11434", model="llama3", keep_alive="30m")
+        provider._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        completion = await provider.complete(MESSAGES)
+
+        assert completion.text == "Done"
+        assert (completion.usage.prompt_tokens, completion.usage.completion_tokens) == (42, 7)
+        assert payloads[0]["keep_alive"] == "30m"
+        await provider.close()
+
+    async def test_generate_with_messages_adds_usage(self):
+        service = LLMService()
+        provider = MagicMock()
+        provider.complete = AsyncMock(return_value=LLMCompletion(
+            text="Answer", usage=LLMUsage(prompt_tokens=100, cached_tokens=80, calls=1)
+        ))
+        usage = LLMUsage(prompt_tokens=50, calls=1)
+
+        with patch.object(service, "_get_provider", return_value=provider):
+            text = await service.generate_with_messages(MESSAGES, usage=usage, cache_prefix=True)
+
+        assert text == "Answer"
+        assert usage == LLMUsage(prompt_tokens=150, cached_tokens=80, calls=2)
+        assert provider.complete.call_args.kwargs == {"cache_prefix": True}
+
+    async def test_default_complete_reports_no_tokens(self):
+        completion = await StaticProvider().complete(MESSAGES)
+
+        assert completion == LLMCompletion(text="whole answer", usage=LLMUsage(calls=1))
+
+
+SEARCH_TOOL = {
+    "name": "search_papers",
+    "description": "Search for papers",
+    "parameters": {"type": "object", "properties": {"query": {"type": "string"}}, "required": ["query"]},
+}
+
+TOOL_HISTORY = [
+    {"role": "system", "content": "Be brief."},
+    {"role": "user", "content": "Find papers"},
+    {
+        "role": "assistant",
+        "content": "",
+        "tool_calls": [
+            {"id": "call_1", "name": "search_papers", "arguments": {"query": "attention"}},
+            {"id": "call_2", "name": "search_papers", "arguments": {"query": "sparsity"}},
+        ],
+    },
+    {"role": "tool", "content": "Found 3 papers", "tool_call_id": "call_1", "name": "search_papers"},
+    {"role": "tool", "content": "Found 1 paper", "tool_call_id": "call_2", "name": "search_papers"},
+]
+
+
+class TestNativeToolCalling:
+    async def test_openai_tools_and_tool_calls(self):
+        message = SimpleNamespace(content=None, tool_calls=[
+            SimpleNamespace(id="call_3", function=SimpleNamespace(name="search_papers", arguments='{"query": "moe"}')),
+            SimpleNamespace(id="call_4", function=SimpleNamespace(name="search_papers", arguments='{"query": ')),
+        ])
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(return_value=SimpleNamespace(
+            choices=[SimpleNamespace(message=message)], usage=None,
+        ))
+        provider = OpenAIProvider(api_key="key", model="gpt-4o-mini")
+        provider._client = client
+
+        completion = await provider.complete(TOOL_HISTORY, tools=[SEARCH_TOOL])
+
+        assert completion.text == ""
+        assert completion.tool_calls == [
+            LLMToolCall(id="call_3", name="search_papers", arguments={"query": "moe"}),
+            LLMToolCall(id="call_4", name="search_papers", arguments={"raw": '{"query": '}),
+        ]
+        kwargs = client.chat.completions.create.call_args.kwargs
+        assert kwargs["tools"] == [{"type": "function", "function": SEARCH_TOOL}]
+        assistant = kwargs["messages"][2]
+        assert assistant["content"] is None
+        assert assistant["tool_calls"][0] == {
+            "id": "call_1",
+            "type": "function",
+            "function": {"name": "search_papers", "arguments": '{"query": "attention"}'},
+        }
+        assert kwargs["messages"][3] == {"role": "tool", "tool_call_id": "call_1", "content": "Found 3 papers"}
+
+    def test_openai_text_protocol_results_become_user_messages(self):
+        from app.services.llm_service import _openai_messages
+
+        messages = _openai_messages([
+            {"role": "assistant", "content": "[TOOL: search_papers({})]"},
+            {"role": "tool", "content": "Found 3 papers", "tool_call_id": "c1", "name": "search_papers"},
+        ])
+
+        assert messages[1] == {"role": "user", "content": "[search_papers result]\nFound 3 papers"}
+
+    async def test_anthropic_tools_and_tool_calls(self):
+        client = MagicMock()
+        client.messages.create = AsyncMock(return_value=SimpleNamespace(
+            content=[
+                SimpleNamespace(type="text", text="Let me look."),
+                SimpleNamespace(type="tool_use", id="toolu_1", name="search_papers", input={"query": "moe"}),
+            ],
+            usage=SimpleNamespace(input_tokens=10, output_tokens=4),
+        ))
+        provider = AnthropicProvider(api_key="key", model="claude-3-haiku-20240307")
+        provider._client = client
+
+        completion = await provider.complete(TOOL_HISTORY, tools=[SEARCH_TOOL], cache_prefix=True)
+
+        assert completion.text == "Let me look."
+        assert completion.tool_calls == [LLMToolCall(id="toolu_1", name="search_papers", arguments={"query": "moe"})]
+        params = client.messages.create.call_args.kwargs
+        assert params["tools"] == [{
+            "name": "search_papers", "description": "Search for papers", "input_schema": SEARCH_TOOL["parameters"],
+        }]
+        assert params["messages"][1] == {"role": "assistant", "content": [
+            {"type": "tool_use", "id": "call_1", "name": "search_papers", "input": {"query": "attention"}},
+            {"type": "tool_use", "id": "call_2", "name": "search_papers", "input": {"query": "sparsity"}},
+        ]}
+        # Both results of the turn go back in one user message, the last one marked for caching
+        assert params["messages"][2] == {"role": "user", "content": [
+            {"type": "tool_result", "tool_use_id": "call_1", "content": "Found 3 papers"},
+            {
+                "type": "tool_result",
+                "tool_use_id": "call_2",
+                "content": "Found 1 paper",
+                "cache_control": {"type": "ephemeral"},
+            },
+        ]}
+
+    async def test_generate_with_messages_collects_tool_calls(self):
+        service = LLMService()
+        call = LLMToolCall(id="call_1", name="search_papers", arguments={"query": "moe"})
+        provider = MagicMock()
+        provider.complete = AsyncMock(return_value=LLMCompletion(text="", tool_calls=[call]))
+        tool_calls = []
+
+        with patch.object(service, "_get_provider", return_value=provider):
+            text = await service.generate_with_messages(MESSAGES, tools=[SEARCH_TOOL], tool_calls=tool_calls)
+
+        assert text == ""
+        assert tool_calls == [call]
+        assert provider.complete.call_args.kwargs == {"tools": [SEARCH_TOOL]}
+
+    def test_only_ollama_lacks_native_tools(self):
+        assert OpenAIProvider.supports_tools
+        assert AnthropicProvider.supports_tools
+        assert not OllamaProvider.supports_tools
+
+
+class TestOllamaHealthCache:
+    @staticmethod
+    def ollama_provider(tags=None, requests=None, **kwargs):
+        tags = tags if tags is not None else [httpx.Response(200, json={"models": [{"name": "llama3:latest"}]})]
+        requests = requests if requests is not None else []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request.url.path)
+            if request.url.path == "/api/tags":
+                return tags.pop(0) if len(tags) > 1 else tags[0]
+            if request.url.path == "/api/generate":
+                await asyncio.sleep(0.05)
+                requests.append("loaded")
+                return httpx.Response(200, json={"done": True})
+            return httpx.Response(200, json={"message": {"content": "Done"}})
+
+        provider = OllamaProvider(base_url="http://ollama:11434", model="llama3", **kwargs)
+        provider._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return provider
+
+    async def test_status_is_checked_once_per_ttl(self):
+        requests = []
+        provider = self.ollama_provider(requests=requests)
+
+        for _ in range(3):
+            await provider.complete(MESSAGES)
+
+        assert requests.count("/api/tags") == 1
+        assert provider.model == "llama3:latest"
+        assert await provider._get_available_models() == ["llama3:latest"]
+        assert requests.count("/api/tags") == 1
+        await provider.close()
+
+    async def test_stale_healthy_status_refreshes_in_background(self):
+        requests = []
+        provider = self.ollama_provider(requests=requests, health_ttl=0)
+        await provider.complete(MESSAGES)
+
+        await provider.complete(MESSAGES)
+        # The second call did not wait for the refresh it started
+        assert requests == ["/api/tags", "/api/chat", "/api/chat"]
+        await provider._refresh_task
+        assert requests.count("/api/tags") == 2
+        await provider.close()
+
+    async def test_unavailable_status_is_checked_again(self):
+        provider = self.ollama_provider(tags=[
+            httpx.Response(200, json={"models": []}),
+            httpx.Response(200, json={"models": [{"name": "llama3:latest"}]}),
+        ], health_ttl=0)
+
+        with pytest.raises(ValueError, match="not found"):
+            await provider.complete(MESSAGES)
+        assert (await provider.complete(MESSAGES)).text == "Done"
+        await provider.close()
+
+    async def test_connection_error_invalidates_status(self):
+        provider = self.ollama_provider()
+        await provider.check_available()
+
+        def refuse(request):
+            raise httpx.ConnectError("refused")
+
+        provider._client = httpx.AsyncClient(transport=httpx.MockTransport(refuse))
+        with pytest.raises(httpx.ConnectError):
+            await provider.complete(MESSAGES)
+
+        assert provider._status is None
+        available, error = await provider.check_available()
+        assert not available and "Cannot connect" in error
+        await provider.close()
+
+    async def test_generation_waits_for_warm_up(self):
+        requests = []
+        provider = self.ollama_provider(requests=requests, keep_alive="30m")
+
+        provider.start_warm_up()
+        assert not provider.ready
+        completion = await provider.complete(MESSAGES)
+
+        assert completion.text == "Done"
+        assert requests == ["/api/tags", "/api/generate", "loaded", "/api/chat"]
+        assert provider.ready
+        await provider.close()
+
+    async def test_service_warms_up_ollama_fallback(self):
+        service = LLMService()
+        service.settings = service.settings.model_copy(update={
+            "LLM_PROVIDER": "openai", "LLM_FALLBACK_PROVIDER": "ollama",
+        })
+        provider = MagicMock()
+        provider.start_warm_up = AsyncMock(return_value=True)
+
+        with patch.object(service, "_get_fallback_provider", return_value=provider):
+            await service.warm_up()
+
+        provider.start_warm_up.assert_awaited_once()
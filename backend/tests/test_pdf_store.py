@@ -0,0 +1,95 @@
+import hashlib
+import sys
+from unittest.mock import MagicMock
+
+sys.modules["pymilvus"] = MagicMock()
+sys.modules["sentence_transformers"] = MagicMock()
+
+from app.pdf_store import PDFStore, split_paper_version
+
+
+def write_pdf(path, content: bytes):
+    path.write_bytes(content)
+    return path, hashlib.sha256(content).hexdigest(), len(content)
+
+
+class TestSplitPaperVersion:
+    def test_versions(self):
+        assert split_paper_version("2301.12345v2") == ("2301.12345", "v2")
+        assert split_paper_version("2301.12345") == ("2301.12345", "")
+        assert split_paper_version("solv-int/9901001v1") == ("solv-int/9901001", "v1")
+
+
+class TestPDFStore:
+    def test_add_and_lookup(self, tmp_path):
+        store = PDFStore(str(tmp_path / "store"))
+        source, digest, size = write_pdf(tmp_path / "a.pdf", b"%PDF-1.5 paper a")
+
+        path = store.add("2301.00001v1", source, digest, size, "2301.00001v1.pdf")
+
+        assert path == store.blob_path(digest)
+        assert path.read_bytes() == b"%PDF-1.5 paper a"
+        assert not source.exists()
+        entry = store.lookup("2301.00001v1")
+        assert entry["sha256"] == digest
+        assert entry["version"] == "v1"
+        assert entry["path"] == str(path)
+        assert store.lookup("2301.00001v2") is None
+
+    def test_identical_content_is_stored_once(self, tmp_path):
+        store = PDFStore(str(tmp_path / "store"))
+        first, digest, size = write_pdf(tmp_path / "a.pdf", b"%PDF same")
+        second, _, _ = write_pdf(tmp_path / "b.pdf", b"%PDF same")
+
+        store.add("2301.00001v1", first, digest, size)
+        store.add("2301.00001", second, digest, size)
+
+        stats = store.get_stats()
+        assert stats["entries"] == 2
+        assert stats["blobs"] == 1
+        assert stats["stored_bytes"] == size
+        assert not second.exists()
+
+    def test_lookup_ignores_truncated_blob(self, tmp_path):
+        store = PDFStore(str(tmp_path / "store"))
+        source, digest, size = write_pdf(tmp_path / "a.pdf", b"%PDF-1.5 paper a")
+        path = store.add("2301.00001v1", source, digest, size)
+
+        path.write_bytes(b"%PDF")
+
+        assert store.lookup("2301.00001v1") is None
+
+    def test_verify_removes_missing_and_corrupt(self, tmp_path):
+        store = PDFStore(str(tmp_path / "store"))
+        a, digest_a, size_a = write_pdf(tmp_path / "a.pdf", b"%PDF aaaa")
+        b, digest_b, size_b = write_pdf(tmp_path / "b.pdf", b"%PDF bbbb")
+        c, digest_c, size_c = write_pdf(tmp_path / "c.pdf", b"%PDF cccc")
+        store.add("a", a, digest_a, size_a)
+        store.add("b", b, digest_b, size_b)
+        store.add("c", c, digest_c, size_c)
+
+        store.blob_path(digest_a).unlink()
+        store.blob_path(digest_b).write_bytes(b"%PDF xxxx")
+
+        quick = store.verify()
+        assert quick["missing"] == [digest_a]
+        assert quick["corrupt"] == []
+
+        full = store.verify(full=True)
+        assert full["corrupt"] == [digest_b]
+        assert [e["paper_id"] for e in store.list_entries()] == ["c"]
+
+    def test_gc_removes_unreferenced_blobs(self, tmp_path):
+        store = PDFStore(str(tmp_path / "store"))
+        a, digest_a, size_a = write_pdf(tmp_path / "a.pdf", b"%PDF aaaa")
+        b, digest_b, size_b = write_pdf(tmp_path / "b.pdf", b"%PDF bbbbbb")
+        store.add("a", a, digest_a, size_a)
+        store.add("b", b, digest_b, size_b)
+
+        store.remove("b")
+        result = store.gc()
+
+        assert result["removed_blobs"] == 1
+        assert result["freed_bytes"] == size_b
+        assert store.blob_path(digest_a).exists()
+        assert not store.blob_path(digest_b).parent.exists()
@@ -0,0 +1,72 @@
+import pytest
+import sys
+from unittest.mock import MagicMock
+
+sys.modules["pymilvus"] = MagicMock()
+sys.modules["sentence_transformers"] = MagicMock()
+
+from pypdf.errors import PdfReadError
+
+from app.pdf_text import chunk_pages, extract_pdf_chunks, extract_pdf_pages
+
+
+class TestExtractPdfPages:
+    def test_extracts_text_per_page(self, make_pdf):
+        path = make_pdf([["Attention Is All You Need", "Ashish Vaswani"], ["1 Introduction"]])
+
+        pages = extract_pdf_pages(str(path))
+
+        assert pages == ["Attention Is All You Need\nAshish Vaswani", "1 Introduction"]
+
+    def test_uncompressed_content_streams(self, make_pdf):
+        path = make_pdf([["Plain stream"]], compress=False)
+
+        assert extract_pdf_pages(str(path)) == ["Plain stream"]
+
+    def test_objects_in_object_stream(self, make_pdf):
+        path = make_pdf([["First page"], ["Second page"]], object_stream=True)
+
+        assert extract_pdf_pages(str(path)) == ["First page", "Second page"]
+
+    def test_escapes_and_hyphenation(self, make_pdf):
+        path = make_pdf([["Results (see Table 1) are", "signifi-", "cant"]])
+
+        assert extract_pdf_pages(str(path)) == ["Results (see Table 1) are\nsignificant"]
+
+    def test_rejects_non_pdf(self, tmp_path):
+        path = tmp_path / "page.html"
+        path.write_bytes(b"<html>Not found</html>")
+
+        with pytest.raises(PdfReadError):
+            extract_pdf_pages(str(path))
+
+
+class TestChunkPages:
+    def test_overlapping_windows(self):
+        pages = [" ".join(f"w{i}" for i in range(10))]
+
+        chunks = chunk_pages(pages, chunk_words=4, overlap_words=1)
+
+        assert [c["text"] for c in chunks] == ["w0 w1 w2 w3", "w3 w4 w5 w6", "w6 w7 w8 w9"]
+        assert [c["chunk_index"] for c in chunks] == [0, 1, 2]
+
+    def test_records_start_page(self):
+        chunks = chunk_pages(["a b c", "d e f"], chunk_words=2, overlap_words=0)
+
+        assert [(c["page"], c["text"]) for c in chunks] == [(1, "a b"), (1, "c d"), (2, "e f")]
+
+    def test_empty_text(self):
+        assert chunk_pages(["", "  "]) == []
+
+    def test_overlap_is_clamped(self):
+        chunks = chunk_pages(["a b c"], chunk_words=2, overlap_words=5)
+
+        assert [c["text"] for c in chunks] == ["a b", "b c"]
+
+    def test_extract_pdf_chunks(self, make_pdf):
+        path = make_pdf([["one two three"], ["four five"]])
+
+        result = extract_pdf_chunks(str(path), chunk_words=3, overlap_words=1)
+
+        assert result["pages"] == 2
+        assert [c["text"] for c in result["chunks"]] == ["one two three", "three four five"]
@@ -0,0 +1,138 @@
+import pytest
+import sys
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, AsyncMock, patch
+
+sys.modules["pymilvus"] = MagicMock()
+sys.modules["sentence_transformers"] = MagicMock()
+
+from app.services.prefetch_scheduler import PrefetchScheduler
+from app.services.graph_service import GraphService
+
+
+class TestPrefetchSchedule:
+    def test_next_run_later_today(self):
+        scheduler = PrefetchScheduler(run_at_utc="01:30")
+        now = datetime(2024, 1, 15, 0, 10, tzinfo=timezone.utc)
+
+        assert scheduler.next_run_time(now) == datetime(2024, 1, 15, 1, 30, tzinfo=timezone.utc)
+
+    def test_next_run_rolls_over_to_tomorrow(self):
+        scheduler = PrefetchScheduler(run_at_utc="01:30")
+        now = datetime(2024, 1, 15, 1, 30, tzinfo=timezone.utc)
+
+        assert scheduler.next_run_time(now) == datetime(2024, 1, 16, 1, 30, tzinfo=timezone.utc)
+
+    def test_target_date_is_previous_day(self):
+        now = datetime(2024, 3, 1, 1, 30, tzinfo=timezone.utc)
+
+        assert PrefetchScheduler.target_date(now) == "2024-02-29"
+
+    def test_invalid_time_rejected(self):
+        with pytest.raises(ValueError):
+            PrefetchScheduler(run_at_utc="25:00")
+
+
+class FakePaperRepo:
+    """In-memory paper store with the date index of the real repositories."""
+
+    def __init__(self):
+        self.papers = {}
+        self.date_index = {}
+
+    def get_date_index(self, date):
+        return self.date_index.get(date)
+
+    def insert_date_index(self, date, total_count):
+        self.date_index[date] = {"date": date, "total_count": total_count}
+
+    def insert_papers_batch(self, papers):
+        new = [p for p in papers if p["id"] not in self.papers]
+        self.papers.update({p["id"]: p for p in new})
+        return len(new)
+
+
+class TestPrefetchDate:
+    async def test_prefetch_fetches_each_category_and_warms_graph(self):
+        from app.services.paper_service import PaperService
+
+        repo = FakePaperRepo()
+        arxiv_papers = {
+            "cs*": [{"id": "2401.00001"}, {"id": "2401.00002"}],
+            # Cross-listed in cs.LG and stat.ML
+            "stat.ML": [{"id": "2401.00002"}, {"id": "2401.00003"}],
+        }
+
+        async def fetch(date, category):
+            return arxiv_papers[category]
+
+        with patch("app.services.paper_service.get_paper_repository", return_value=repo), \
+             patch("app.services.paper_service.get_paper_embedding_repository", return_value=MagicMock()):
+            paper_service = PaperService()
+        paper_service.arxiv_client = MagicMock()
+        paper_service.arxiv_client.fetch_all_papers_for_date = AsyncMock(side_effect=fetch)
+        paper_service.generate_embeddings = AsyncMock(return_value={"generated_count": 42})
+        graph = MagicMock()
+        graph.get_graph_data = AsyncMock()
+
+        scheduler = PrefetchScheduler(categories=["cs*", "stat.ML"])
+        with patch("app.dependencies.get_paper_service", return_value=paper_service), \
+             patch("app.services.paper_service.settings.FETCH_LOCK_ENABLED", False), \
+             patch("app.services.graph_service.graph_service", graph):
+            result = await scheduler.prefetch_date("2024-01-15")
+            second = await scheduler.prefetch_date("2024-01-15")
+
+        assert result["fetched"] == ["cs*", "stat.ML"]
+        assert set(repo.papers) == {"2401.00001", "2401.00002", "2401.00003"}
+        assert repo.date_index["2024-01-15"]["total_count"] == 3
+        # The main category is stored now, the extra one is asked for again
+        assert second["fetched"] == ["stat.ML"]
+        assert repo.date_index["2024-01-15"]["total_count"] == 3
+        assert result["embeddings_generated"] == 42
+        assert result["graph_warmed"] is True
+        paper_service.generate_embeddings.assert_awaited_with(date="2024-01-15")
+        graph.clear_cache.assert_called_with("2024-01-15")
+        graph.get_graph_data.assert_awaited_with(date="2024-01-15")
+        assert scheduler.get_status()["last_run"]["date"] == "2024-01-15"
+
+    async def test_failed_extra_category_keeps_date_index(self):
+        from app.services.paper_service import PaperService
+
+        repo = FakePaperRepo()
+        repo.insert_date_index("2024-01-15", 2)
+
+        with patch("app.services.paper_service.get_paper_repository", return_value=repo), \
+             patch("app.services.paper_service.get_paper_embedding_repository", return_value=MagicMock()), \
+             patch("app.services.paper_service.settings.FETCH_LOCK_ENABLED", False):
+            paper_service = PaperService()
+            paper_service.arxiv_client = MagicMock()
+            paper_service.arxiv_client.fetch_all_papers_for_date = AsyncMock(side_effect=Exception("timeout"))
+
+            result = await paper_service.add_category_for_date("2024-01-15", "stat.ML")
+
+        assert result["error"] == "timeout"
+        assert repo.date_index["2024-01-15"]["total_count"] == 2
+
+
+class TestGraphCache:
+    async def test_graph_data_is_served_from_cache(self):
+        with patch("app.services.graph_service.get_paper_repository"), \
+             patch("app.services.graph_service.get_paper_embedding_repository"):
+            service = GraphService()
+
+        papers = [
+            {"id": "1", "title": "A", "primary_category": "cs.AI"},
+            {"id": "2", "title": "B", "primary_category": "cs.LG"},
+        ]
+        service.get_papers_for_graph = AsyncMock(return_value=papers)
+        service.get_or_generate_embeddings = AsyncMock(return_value={"1": [1.0, 0.0], "2": [1.0, 0.1]})
+
+        first = await service.get_graph_data("2024-01-15")
+        second = await service.get_graph_data("2024-01-15")
+
+        assert first is second
+        assert service.get_papers_for_graph.await_count == 1
+
+        assert service.clear_cache("2024-01-15") == 1
+        await service.get_graph_data("2024-01-15")
+        assert service.get_papers_for_graph.await_count == 2
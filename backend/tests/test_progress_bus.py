@@ -0,0 +1,90 @@
+import pytest
+import asyncio
+import sys
+from unittest.mock import MagicMock
+
+sys.modules["pymilvus"] = MagicMock()
+sys.modules["sentence_transformers"] = MagicMock()
+
+from app.progress_bus import ProgressBus
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(message)
+
+
+def progress(task_id, value, status="downloading"):
+    return {"type": "progress", "task_id": task_id, "progress": value, "status": status}
+
+
+class TestProgressBus:
+    async def test_updates_for_same_task_are_coalesced(self):
+        bus = ProgressBus(interval=0.05)
+        ws = FakeWebSocket()
+        await bus.connect(ws)
+
+        for value in range(1, 51):
+            bus.publish(progress("t1", value))
+        bus.publish(progress("t2", 10))
+        await asyncio.sleep(0.02)
+
+        assert ws.sent == [progress("t1", 50), progress("t2", 10)]
+        bus.disconnect(ws)
+
+    async def test_frames_are_rate_limited(self):
+        bus = ProgressBus(interval=0.1)
+        ws = FakeWebSocket()
+        await bus.connect(ws)
+
+        bus.publish(progress("t1", 1))
+        await asyncio.sleep(0.02)
+        bus.publish(progress("t1", 2))
+        bus.publish(progress("t1", 3, "completed"))
+        await asyncio.sleep(0.02)
+        assert ws.sent == [progress("t1", 1)]
+
+        await asyncio.sleep(0.12)
+        assert ws.sent == [progress("t1", 1), progress("t1", 3, "completed")]
+        bus.disconnect(ws)
+
+    async def test_slow_client_does_not_block_others(self):
+        bus = ProgressBus(interval=0.01, send_timeout=5.0)
+        slow, fast = FakeWebSocket(delay=0.2), FakeWebSocket()
+        await bus.connect(slow)
+        await bus.connect(fast)
+
+        bus.publish(progress("t1", 5))
+        await asyncio.sleep(0.05)
+
+        assert fast.sent == [progress("t1", 5)]
+        assert slow.sent == []
+        bus.disconnect(slow)
+        bus.disconnect(fast)
+
+    async def test_stalled_client_is_dropped(self):
+        bus = ProgressBus(interval=0.01, send_timeout=0.05)
+        stalled = FakeWebSocket(delay=10)
+        await bus.connect(stalled)
+
+        bus.publish(progress("t1", 5))
+        await asyncio.sleep(0.15)
+
+        assert bus.active_connections == []
+        assert bus.get_stats()["dropped_clients"] == 1
+
+    async def test_publish_without_clients(self):
+        bus = ProgressBus()
+
+        bus.publish(progress("t1", 5))
+
+        assert bus.get_stats()["published"] == 1
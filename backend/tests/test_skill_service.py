@@ -250,6 +250,266 @@ class TestSkillServiceExecuteSkill:
         assert "failed to execute skill" in result["error"].lower()
 
 
+
+class TestSkillServiceStreamSkill:
+    @staticmethod
+    async def collect(stream):
+        return [event async for event in stream]
+    
+    @pytest.mark.asyncio
+    async def test_stream_skill_not_found(self, skill_service):
+        events = await self.collect(skill_service.stream_skill("nonexistent_skill"))
+        
+        assert len(events) == 1
+        assert events[0]["type"] == "error"
+        assert "not found" in events[0]["error"].lower()
+    
+    @pytest.mark.asyncio
+    async def test_stream_skill_default_sends_result(self, skill_service, mock_paper_service, sample_paper):
+        mock_paper_service.get_papers_by_ids.return_value = [sample_paper]
+        
+        with patch.object(SkillRegistry, 'get', return_value=MockSkillProvider()):
+            events = await self.collect(skill_service.stream_skill("mock_skill", paper_ids=["2301.12345"]))
+        
+        assert events == [{"type": "result", "data": {"success": True, "result": "mock_result"}}]
+    
+    @pytest.mark.asyncio
+    async def test_stream_skill_llm_deltas(self, skill_service, mock_paper_service, sample_paper):
+        from app.services.skills.implementations import SummarySkill
+        mock_paper_service.get_papers_by_ids.return_value = [sample_paper]
+        
+        async def stream(prompt, provider=None, model=None, **kwargs):
+            assert "Test Paper" in prompt
+            for delta in ["Short ", "summary."]:
+                yield delta
+        
+        with patch.object(SkillRegistry, 'get', return_value=SummarySkill()), \
+                patch('app.services.llm_service.llm_service.stream', side_effect=stream):
+            events = await self.collect(skill_service.stream_skill(
+                "summary", paper_ids=["2301.12345"], provider="openai", use_cache=False, detail_level="brief"
+            ))
+        
+        assert [e["type"] for e in events] == ["delta", "delta", "result"]
+        result = events[-1]["data"]
+        assert result["summary"] == "Short summary."
+        assert result["paper_id"] == "2301.12345"
+        assert result["success"] is True
+    
+    @pytest.mark.asyncio
+    async def test_stream_skill_execution_error(self, skill_service, mock_paper_service, sample_paper):
+        mock_paper_service.get_papers_by_ids.return_value = [sample_paper]
+        
+        class FailingSkill(MockSkillProvider):
+            async def stream(self, context, paper_ids=None, **kwargs):
+                yield {"type": "delta", "content": "Partial"}
+                raise Exception("Provider disconnected")
+        
+        with patch.object(SkillRegistry, 'get', return_value=FailingSkill()):
+            events = await self.collect(skill_service.stream_skill("failing_skill", paper_ids=["2301.12345"]))
+        
+        assert events[0] == {"type": "delta", "content": "Partial"}
+        assert events[-1]["type"] == "error"
+        assert "provider disconnected" in events[-1]["error"].lower()
+
+
+class TestSkillResponseCache:
+    @pytest.fixture
+    def cache(self, tmp_path):
+        from app.llm_cache import LLMResponseCache
+        cache = LLMResponseCache(str(tmp_path / "cache.db"))
+        with patch('app.llm_cache.get_llm_response_cache', return_value=cache):
+            yield cache
+    
+    @pytest.fixture
+    def mock_llm(self):
+        with patch('app.services.llm_service.llm_service') as mock:
+            mock.generate = AsyncMock(return_value="A summary.")
+            mock.get_model_name.return_value = "gpt-4o-mini"
+            mock.get_temperature.return_value = 0.7
+            yield mock
+    
+    @pytest.mark.asyncio
+    async def test_repeat_execution_is_served_from_cache(self, skill_service, mock_paper_service, sample_paper, cache, mock_llm):
+        from app.services.skills.implementations import SummarySkill
+        mock_paper_service.get_papers_by_ids.return_value = [sample_paper]
+        
+        with patch.object(SkillRegistry, 'get', return_value=SummarySkill()):
+            first = await skill_service.execute_skill("summary", paper_ids=["2301.12345"])
+            second = await skill_service.execute_skill("summary", paper_ids=["2301.12345"])
+        
+        assert first == second
+        assert mock_llm.generate.await_count == 1
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["by_skill"]["summary"] == {"hits": 1, "misses": 1}
+    
+    @pytest.mark.asyncio
+    async def test_params_change_the_key(self, skill_service, mock_paper_service, sample_paper, cache, mock_llm):
+        from app.services.skills.implementations import SummarySkill
+        mock_paper_service.get_papers_by_ids.return_value = [sample_paper]
+        
+        with patch.object(SkillRegistry, 'get', return_value=SummarySkill()):
+            await skill_service.execute_skill("summary", paper_ids=["2301.12345"], detail_level="brief")
+            await skill_service.execute_skill("summary", paper_ids=["2301.12345"], detail_level="detailed")
+            mock_llm.get_temperature.return_value = 0.2
+            await skill_service.execute_skill("summary", paper_ids=["2301.12345"], detail_level="brief")
+        
+        assert mock_llm.generate.await_count == 3
+    
+    @pytest.mark.asyncio
+    async def test_use_cache_false_bypasses_cache(self, skill_service, mock_paper_service, sample_paper, cache, mock_llm):
+        from app.services.skills.implementations import SummarySkill
+        mock_paper_service.get_papers_by_ids.return_value = [sample_paper]
+        
+        with patch.object(SkillRegistry, 'get', return_value=SummarySkill()):
+            await skill_service.execute_skill("summary", paper_ids=["2301.12345"])
+            await skill_service.execute_skill("summary", paper_ids=["2301.12345"], use_cache=False)
+        
+        assert mock_llm.generate.await_count == 2
+        assert cache.get_stats()["hits"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_skill_can_opt_out(self, skill_service, mock_paper_service, sample_paper, cache, mock_llm):
+        from app.services.skills.dynamic_skill import DynamicSkill
+        mock_paper_service.get_papers_by_ids.return_value = [sample_paper]
+        skill = DynamicSkill({"id": "related", "template": "Related to {paper.title}", "cache": False})
+        
+        with patch.object(SkillRegistry, 'get', return_value=skill):
+            await skill_service.execute_skill("related", paper_ids=["2301.12345"])
+            await skill_service.execute_skill("related", paper_ids=["2301.12345"])
+        
+        assert mock_llm.generate.await_count == 2
+        assert cache.get_stats()["entries"] == 0
+        assert skill.to_dict()["cache_enabled"] is False
+    
+    @pytest.mark.asyncio
+    async def test_fallback_answer_is_not_cached(self, skill_service, mock_paper_service, sample_paper, cache, mock_llm):
+        from app.services.skills.implementations import SummarySkill
+        mock_paper_service.get_papers_by_ids.return_value = [sample_paper]
+        
+        async def generate(prompt, provider=None, model=None, answered_by=None, **kwargs):
+            answered_by.append("ollama/llama3")
+            return "A fallback summary."
+        mock_llm.generate = AsyncMock(side_effect=generate)
+        
+        with patch.object(SkillRegistry, 'get', return_value=SummarySkill()):
+            result = await skill_service.execute_skill("summary", paper_ids=["2301.12345"])
+        
+        assert result["success"] is True
+        assert cache.get_stats()["entries"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_stream_stores_and_replays(self, skill_service, mock_paper_service, sample_paper, cache, mock_llm):
+        from app.services.skills.implementations import SummarySkill
+        mock_paper_service.get_papers_by_ids.return_value = [sample_paper]
+        
+        async def stream(prompt, provider=None, model=None, **kwargs):
+            for delta in ["A ", "summary."]:
+                yield delta
+        mock_llm.stream = Mock(side_effect=stream)
+        
+        with patch.object(SkillRegistry, 'get', return_value=SummarySkill()):
+            streamed = [e async for e in skill_service.stream_skill("summary", paper_ids=["2301.12345"])]
+            replayed = [e async for e in skill_service.stream_skill("summary", paper_ids=["2301.12345"])]
+            executed = await skill_service.execute_skill("summary", paper_ids=["2301.12345"])
+        
+        assert [e["type"] for e in streamed] == ["delta", "delta", "result"]
+        assert replayed == [{"type": "delta", "content": "A summary."}, streamed[-1]]
+        assert executed == streamed[-1]["data"]
+        assert mock_llm.stream.call_count == 1
+        mock_llm.generate.assert_not_awaited()
+
+
+class TestSkillServiceExecuteBatch:
+    class SlowSkill(MockSkillProvider):
+        """Takes longer for earlier papers and records how many run at once."""
+        
+        def __init__(self):
+            super().__init__()
+            self.running = 0
+            self.peak = 0
+        
+        async def execute(self, context, paper_ids=None, **kwargs):
+            import asyncio
+            paper = context["papers"][0]
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            await asyncio.sleep(0.01 * paper["delay"])
+            self.running -= 1
+            if paper["id"] == "bad":
+                raise Exception("LLM error")
+            return {"success": True, "paper_id": paper["id"], "style": kwargs.get("style")}
+    
+    @staticmethod
+    async def collect(stream):
+        return [event async for event in stream]
+    
+    @pytest.mark.asyncio
+    async def test_batch_streams_results_as_completed(self, skill_service, mock_paper_service):
+        ids = ["p0", "p1", "p2", "p3"]
+        mock_paper_service.get_papers_by_ids.return_value = [
+            {"id": pid, "delay": len(ids) - i} for i, pid in enumerate(ids)
+        ]
+        skill = self.SlowSkill()
+        
+        with patch.object(SkillRegistry, 'get', return_value=skill):
+            events = await self.collect(skill_service.execute_skill_batch(
+                "slow", ids, concurrency=4, style="short"
+            ))
+        
+        assert events[0] == {"type": "start", "skill_id": "slow", "total": 4}
+        results = [e for e in events if e["type"] == "result"]
+        assert [e["paper_id"] for e in results] == ["p3", "p2", "p1", "p0"]
+        assert [e["index"] for e in results] == [3, 2, 1, 0]
+        assert all(e["data"]["style"] == "short" for e in results)
+        assert events[-1]["type"] == "done"
+        assert events[-1]["succeeded"] == 4
+        mock_paper_service.get_papers_by_ids.assert_called_once_with(ids)
+    
+    @pytest.mark.asyncio
+    async def test_batch_concurrency_is_bounded(self, skill_service, mock_paper_service):
+        ids = [f"p{i}" for i in range(6)]
+        mock_paper_service.get_papers_by_ids.return_value = [{"id": pid, "delay": 1} for pid in ids]
+        skill = self.SlowSkill()
+        
+        with patch.object(SkillRegistry, 'get', return_value=skill):
+            await self.collect(skill_service.execute_skill_batch("slow", ids, concurrency=2))
+        
+        assert skill.peak == 2
+    
+    @pytest.mark.asyncio
+    async def test_batch_reports_failures_per_paper(self, skill_service, mock_paper_service):
+        mock_paper_service.get_papers_by_ids.return_value = [{"id": "ok", "delay": 0}, {"id": "bad", "delay": 0}]
+        
+        with patch.object(SkillRegistry, 'get', return_value=self.SlowSkill()):
+            events = await self.collect(skill_service.execute_skill_batch("slow", ["ok", "bad", "missing", "ok"]))
+        
+        results = {e["paper_id"]: e["data"] for e in events if e["type"] == "result"}
+        assert results["ok"]["success"] is True
+        assert "llm error" in results["bad"]["error"].lower()
+        assert "not found" in results["missing"]["error"].lower()
+        assert events[-1] | {"elapsed": 0} == {"type": "done", "total": 3, "succeeded": 1, "failed": 2, "elapsed": 0}
+    
+    @pytest.mark.asyncio
+    async def test_batch_rejects_invalid_requests(self, skill_service):
+        events = await self.collect(skill_service.execute_skill_batch("nonexistent_skill", ["p0"]))
+        assert events[0]["type"] == "error"
+        
+        events = await self.collect(skill_service.execute_skill_batch("summary", []))
+        assert events == [{"type": "error", "error": "No paper IDs provided"}]
+        
+        with patch.object(SkillRegistry, 'get', return_value=MockSkillProvider(requires_paper=False)):
+            events = await self.collect(skill_service.execute_skill_batch("mock_skill", ["p0"]))
+        assert "does not take papers" in events[0]["error"]
+    
+    def test_parse_provider_limits(self):
+        from app.services.llm_resilience import parse_provider_limits
+        
+        assert parse_provider_limits("openai=8, Ollama=1,bad,glm=x,anthropic=0") == {
+            "openai": 8, "ollama": 1, "anthropic": 1
+        }
+
 class TestSkillRegistry:
     def test_registry_singleton(self):
         registry1 = SkillRegistry()
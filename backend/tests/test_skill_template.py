@@ -0,0 +1,74 @@
+import pytest
+
+from app.services.skills.loader import SkillLoader
+from app.services.skills.template import compile_template, TemplateSyntaxError
+from scripts.bench_skill_templates import SKILLS_DIR, legacy_render, make_context
+
+
+@pytest.fixture(scope="module")
+def skill_templates():
+    return {skill["id"]: skill["template"] for skill in SkillLoader(SKILLS_DIR).load_all_skills()}
+
+
+class TestCompiledTemplate:
+    def test_placeholders(self):
+        template = compile_template("{paper.title} by {paper.authors} ({top_k}) {missing} {paper} {paper.nope}")
+        
+        rendered = template.render({"paper": {"title": "T", "authors": None}, "top_k": 0})
+        
+        assert rendered == "T by  () {missing} {paper} {paper.nope}"
+    
+    def test_literal_braces_are_kept(self):
+        source = "@article{key,\n  author = {...},\n}"
+        
+        assert compile_template(source).render({"key": "x"}) == source
+    
+    def test_conditionals(self):
+        template = compile_template(
+            '{if fmt == "apa"}A{elif fmt == "mla"}M{elif fmt == "ieee"}I{else}B{endif}'
+            '{if note} ({note}){endif}'
+        )
+        
+        assert template.render({"fmt": "apa"}) == "A"
+        assert template.render({"fmt": "mla", "note": "n"}) == "M (n)"
+        assert template.render({"fmt": "ieee"}) == "I"
+        assert template.render({}) == "B"
+    
+    def test_nested_conditionals(self):
+        template = compile_template('{if a}{if b == "x"}AX{else}A{endif}{else}{if paper.id}P{endif}-{endif}')
+        
+        assert template.render({"a": 1, "b": "x"}) == "AX"
+        assert template.render({"a": 1}) == "A"
+        assert template.render({"paper": {"id": "1"}}) == "P-"
+        assert template.render({}) == "-"
+    
+    def test_unbalanced_tags_stay_literal(self):
+        source = "{if a}open {else} {value}"
+        
+        assert compile_template(source).render({"a": 1, "value": "v"}) == "{if a}open {else} v"
+        with pytest.raises(TemplateSyntaxError):
+            compile_template(source, strict=True)
+    
+    @pytest.mark.parametrize("skill_id,params", [
+        ("paper-summary", {"detail_level": "detailed"}),
+        ("paper-summary", {"detail_level": "brief"}),
+        ("paper-translation", {"content_type": "full", "target_language": "Chinese"}),
+        ("paper-translation", {"content_type": "title", "target_language": "German"}),
+        ("paper-translation", {"content_type": "abstract", "target_language": "Chinese"}),
+        ("related-papers", {"top_k": 5}),
+        ("citation-generator", {"format": "apa"}),
+        ("citation-generator", {"format": "bibtex"}),
+    ])
+    def test_matches_legacy_renderer(self, skill_templates, skill_id, params):
+        context = make_context(7, params)
+        
+        assert compile_template(skill_templates[skill_id]).render(context) == legacy_render(skill_templates[skill_id], context)
+    
+    def test_every_elif_branch_is_reachable(self, skill_templates):
+        template = compile_template(skill_templates["citation-generator"])
+        
+        rendered = template.render(make_context(1, {"format": "ieee"}))
+        
+        assert "Use IEEE format" in rendered
+        assert "Use MLA" not in rendered
+        assert "{elif" not in rendered
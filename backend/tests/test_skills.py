@@ -441,3 +441,97 @@ class TestExecuteSkill:
         call_kwargs = mock_skill_service.execute_skill.call_args[1]
         assert call_kwargs["target_language"] == "Chinese"
         assert call_kwargs["content_type"] == "abstract"
+
+
+class TestExecuteSkillStream:
+    def test_execute_skill_stream(self, client, mock_skill_service, parse_sse):
+        async def stream_skill(**kwargs):
+            yield {"type": "delta", "content": "A short "}
+            yield {"type": "delta", "content": "summary."}
+            yield {"type": "result", "data": {"success": True, "summary": "A short summary."}}
+        mock_skill_service.stream_skill = MagicMock(side_effect=stream_skill)
+        
+        response = client.post(
+            "/skills/summary/execute/stream",
+            json={"paper_ids": ["2301.12345"], "params": {"detail_level": "brief"}},
+        )
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert parse_sse(response.text) == [
+            ("delta", {"content": "A short "}),
+            ("delta", {"content": "summary."}),
+            ("result", {"data": {"success": True, "summary": "A short summary."}}),
+        ]
+        call_kwargs = mock_skill_service.stream_skill.call_args[1]
+        assert call_kwargs["skill_id"] == "summary"
+        assert call_kwargs["detail_level"] == "brief"
+    
+    def test_execute_skill_stream_error(self, client, mock_skill_service, parse_sse):
+        async def stream_skill(**kwargs):
+            yield {"type": "error", "error": "Skill not found: missing"}
+        mock_skill_service.stream_skill = MagicMock(side_effect=stream_skill)
+        
+        response = client.post("/skills/missing/execute/stream", json={})
+        
+        assert response.status_code == 200
+        assert parse_sse(response.text) == [("error", {"error": "Skill not found: missing"})]
+
+
+class TestSkillCache:
+    def test_get_cache_stats(self, client, mock_skill_service):
+        mock_skill_service.get_cache_stats.return_value = {"enabled": True, "entries": 2, "hits": 3, "misses": 1}
+        
+        response = client.get("/skills/cache/stats")
+        
+        assert response.status_code == 200
+        assert response.json()["hits"] == 3
+    
+    def test_clear_cache(self, client, mock_skill_service):
+        mock_skill_service.clear_cache.return_value = {"success": True, "deleted": 2}
+        
+        response = client.delete("/skills/cache", params={"skill_id": "paper-summary"})
+        
+        assert response.status_code == 200
+        assert response.json()["deleted"] == 2
+        mock_skill_service.clear_cache.assert_called_once_with("paper-summary")
+    
+    def test_execute_skill_without_cache(self, client, mock_skill_service):
+        mock_skill_service.execute_skill = AsyncMock(return_value={"success": True})
+        
+        response = client.post("/skills/paper-summary/execute", json={"use_cache": False})
+        
+        assert response.status_code == 200
+        assert mock_skill_service.execute_skill.call_args[1]["use_cache"] is False
+
+
+class TestExecuteSkillBatch:
+    def test_execute_skill_batch(self, client, mock_skill_service, parse_sse):
+        async def execute_skill_batch(**kwargs):
+            yield {"type": "start", "skill_id": "paper-summary", "total": 2}
+            yield {"type": "result", "index": 1, "paper_id": "2301.2", "data": {"success": True}}
+            yield {"type": "result", "index": 0, "paper_id": "2301.1", "data": {"success": True}}
+            yield {"type": "done", "total": 2, "succeeded": 2, "failed": 0, "elapsed": 0.5}
+        mock_skill_service.execute_skill_batch = MagicMock(side_effect=execute_skill_batch)
+        
+        response = client.post(
+            "/skills/paper-summary/execute-batch",
+            json={"paper_ids": ["2301.1", "2301.2"], "concurrency": 4, "params": {"detail_level": "brief"}},
+        )
+        
+        assert response.status_code == 200
+        events = parse_sse(response.text)
+        assert [name for name, _ in events] == ["start", "result", "result", "done"]
+        assert events[1][1]["paper_id"] == "2301.2"
+        call_kwargs = mock_skill_service.execute_skill_batch.call_args[1]
+        assert call_kwargs["paper_ids"] == ["2301.1", "2301.2"]
+        assert call_kwargs["concurrency"] == 4
+        assert call_kwargs["detail_level"] == "brief"
+    
+    def test_execute_skill_batch_validation(self, client, mock_skill_service):
+        assert client.post("/skills/paper-summary/execute-batch", json={}).status_code == 422
+        response = client.post(
+            "/skills/paper-summary/execute-batch",
+            json={"paper_ids": ["2301.1"], "concurrency": 0},
+        )
+        assert response.status_code == 422
@@ -0,0 +1,150 @@
+import sys
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+sys.modules["pymilvus"] = MagicMock()
+sys.modules["sentence_transformers"] = MagicMock()
+
+from app.services.subagents.context import ContextSummarizer
+from app.services.subagents.types import SubAgentExecutionContext, SubAgentMessageRole
+
+PAPERS = [{"id": f"2401.{i:05d}", "title": f"Sparse Attention Study {i}"} for i in range(1, 6)]
+
+
+def paper_list(papers=PAPERS):
+    lines = [f"Found {len(papers)} papers:"]
+    for i, paper in enumerate(papers, 1):
+        lines.append(f"{i}. {paper['title']} (ID: {paper['id']})")
+        lines.append("Abstract: " + "We study long inputs with sparse attention patterns. " * 30)
+    return "\n".join(lines)
+
+
+def make_context(turns=3, papers=PAPERS):
+    context = SubAgentExecutionContext(agent_id="tester", task_id="t1", papers=papers)
+    context.add_message(SubAgentMessageRole.SYSTEM, "You are a research assistant.")
+    context.add_message(SubAgentMessageRole.USER, "Find papers about sparse attention")
+    for turn in range(turns):
+        context.add_message(SubAgentMessageRole.ASSISTANT, f'Turn {turn} [TOOL: search_papers({{"query": "q{turn}"}})]')
+        context.add_message(SubAgentMessageRole.TOOL, paper_list(), name="search_papers", tool_call_id=f"c{turn}")
+    return context
+
+
+class TestContextSummarizer:
+    def test_triggers_on_tokens_not_just_message_count(self):
+        summarizer = ContextSummarizer(token_budget=2000)
+        
+        assert not summarizer.should_summarize(make_context(turns=0))
+        assert summarizer.should_summarize(make_context(turns=2))
+    
+    async def test_answered_tool_results_collapse_to_paper_references(self):
+        summarizer = ContextSummarizer(token_budget=5000, tool_result_tokens=200)
+        context = make_context(turns=3)
+        
+        messages = await summarizer.compact(context)
+        
+        tools = [m for m in messages if m.role == SubAgentMessageRole.TOOL]
+        collapsed = [m for m in tools if m.content.startswith("[Earlier search_papers result collapsed")]
+        assert collapsed
+        assert "2401.00003: Sparse Attention Study 3" in collapsed[0].content
+        assert collapsed[0].name == "search_papers"
+        # The newest result has not been answered yet and stays intact
+        assert messages[-1].content == context.messages[-1].content
+        assert summarizer.count_tokens(messages) <= summarizer.token_budget
+    
+    async def test_instruction_and_system_prompt_are_pinned(self):
+        summarizer = ContextSummarizer(token_budget=1500, tool_result_tokens=100, summary_tokens=200)
+        context = make_context(turns=12)
+        
+        messages = await summarizer.compact(context)
+        
+        assert messages[0].content == "You are a research assistant."
+        assert messages[1].content == "Find papers about sparse attention"
+        assert messages[2].content.startswith("[Conversation History Summary]")
+        assert messages[3].role != SubAgentMessageRole.TOOL
+    
+    async def test_prompt_stays_bounded_as_conversation_grows(self):
+        summarizer = ContextSummarizer(token_budget=3000, tool_result_tokens=150, summary_tokens=300)
+        context = make_context(turns=0)
+        sizes = []
+        
+        for turn in range(40):
+            context.add_message(SubAgentMessageRole.ASSISTANT, f"Turn {turn} [TOOL: search_papers({{}})]")
+            context.add_message(SubAgentMessageRole.TOOL, paper_list(PAPERS[:2]), name="search_papers")
+            if summarizer.should_summarize(context):
+                context.messages = await summarizer.compact(context)
+            sizes.append(summarizer.count_tokens(context.messages))
+        
+        assert max(sizes) <= 3000 + summarizer.count_tokens(context.messages[-1:])
+        assert sizes[-1] < 3000
+    
+    async def test_repeated_compaction_carries_summary_forward(self):
+        summarizer = ContextSummarizer(token_budget=3000, tool_result_tokens=100, summary_tokens=1000)
+        context = make_context(turns=8)
+        context.messages = await summarizer.compact(context)
+        context.messages[2].content += "\nUser: Turn 99 marker"
+        for turn in range(8):
+            context.add_message(SubAgentMessageRole.ASSISTANT, f"Later turn {turn}")
+            context.add_message(SubAgentMessageRole.TOOL, paper_list(), name="search_papers")
+        
+        messages = await summarizer.compact(context)
+        
+        summaries = [m for m in messages if m.content.startswith("[Conversation History Summary]")]
+        assert len(summaries) == 1
+        assert "Turn 99 marker" in summaries[0].content
+    
+    async def test_message_count_limit_still_applies(self):
+        summarizer = ContextSummarizer(max_messages=10, token_budget=100000)
+        context = make_context(turns=0)
+        for i in range(30):
+            context.add_message(SubAgentMessageRole.ASSISTANT, f"short {i}")
+        
+        assert summarizer.should_summarize(context)
+        messages = await summarizer.compact(context)
+        
+        assert len(messages) <= 10
+        assert messages[-1].content == "short 29"
+    
+    async def test_oversized_latest_result_is_truncated(self):
+        summarizer = ContextSummarizer(token_budget=1000, tool_result_tokens=200)
+        context = make_context(turns=0)
+        context.add_message(SubAgentMessageRole.ASSISTANT, "[TOOL: search_papers({})]")
+        context.add_message(SubAgentMessageRole.TOOL, "word " * 5000, name="search_papers")
+        
+        messages = await summarizer.compact(context)
+        
+        assert summarizer.count_tokens(messages) <= summarizer.token_budget
+        assert messages[-1].content.endswith(" ...")
+    
+    async def test_summary_model_writes_summary(self):
+        summarizer = ContextSummarizer(
+            token_budget=1500, tool_result_tokens=100, summary_model="gpt-4o-mini", summary_provider="openai"
+        )
+        context = make_context(turns=12)
+        
+        with patch('app.services.llm_service.llm_service') as llm:
+            llm.generate_with_messages = AsyncMock(return_value="Searched sparse attention five times.")
+            messages = await summarizer.compact(context)
+        
+        assert messages[2].content == "[Conversation History Summary]\nSearched sparse attention five times."
+        kwargs = llm.generate_with_messages.call_args[1]
+        assert kwargs["model"] == "gpt-4o-mini"
+        assert kwargs["provider"] == "openai"
+    
+    async def test_summary_model_failure_falls_back_to_extractive(self):
+        summarizer = ContextSummarizer(token_budget=1500, tool_result_tokens=100, summary_model="gpt-4o-mini")
+        context = make_context(turns=12)
+        
+        with patch('app.services.llm_service.llm_service') as llm:
+            llm.generate_with_messages = AsyncMock(side_effect=RuntimeError("rate limited"))
+            messages = await summarizer.compact(context)
+        
+        assert messages[2].content.startswith("[Conversation History Summary]\nAssistant: Turn 0")
+    
+    async def test_chinese_labels(self):
+        summarizer = ContextSummarizer(token_budget=1500, tool_result_tokens=100, summary_tokens=300)
+        
+        messages = await summarizer.compact(make_context(turns=12), language="zh")
+        
+        assert messages[2].content.startswith("[历史对话摘要]")
+        assert "工具: [已折叠较早的 search_papers 工具结果" in messages[2].content
@@ -0,0 +1,283 @@
+import asyncio
+import sys
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+sys.modules["pymilvus"] = MagicMock()
+sys.modules["sentence_transformers"] = MagicMock()
+
+from app.services.llm_service import LLMToolCall, LLMUsage
+from app.services.subagents.executor import SubAgentExecutor
+from app.services.subagents.registry import DynamicSubAgent
+from app.services.subagents.tools import ToolRegistry, ToolProvider
+from app.services.subagents.types import SubAgentConfig, SubAgentTask, SubAgentMessageRole, SubAgentStatus
+
+
+class SleepTool(ToolProvider):
+    """Sleeps for args["delay"] seconds and tracks how many calls overlap."""
+    
+    running = 0
+    peak = 0
+    
+    @property
+    def id(self) -> str:
+        return "sleep"
+    
+    @property
+    def name(self) -> str:
+        return "Sleep"
+    
+    @property
+    def timeout(self):
+        return 0.5
+    
+    async def execute(self, args, context):
+        cls = type(self)
+        cls.running += 1
+        cls.peak = max(cls.peak, cls.running)
+        try:
+            await asyncio.sleep(args.get("delay", 0))
+        finally:
+            cls.running -= 1
+        if "paper" in args:
+            context.papers = [{"id": args["paper"]}]
+        if "var" in args:
+            context.variables[args["var"]] = args.get("delay")
+        return f"slept {args.get('delay', 0)}"
+
+
+@pytest.fixture(autouse=True)
+def sleep_tool():
+    SleepTool.running = 0
+    SleepTool.peak = 0
+    ToolRegistry.register(SleepTool)
+    yield
+    ToolRegistry.unregister("sleep")
+
+
+def make_agent(**config):
+    return DynamicSubAgent(SubAgentConfig(id="tester", name="Tester", tools=["sleep"], **config))
+
+
+def tool_turn(*calls):
+    return " ".join(f'[TOOL: {name}({args})]' for name, args in calls)
+
+
+async def run(agent, responses):
+    executor = SubAgentExecutor()
+    with patch('app.services.llm_service.llm_service') as llm:
+        llm.generate_with_messages = AsyncMock(side_effect=responses)
+        result = await executor.execute(agent, SubAgentTask(agent_id=agent.id, instruction="Go"))
+    return result
+
+
+class TestParallelToolExecution:
+    async def test_tool_calls_run_concurrently_in_call_order(self):
+        responses = [
+            tool_turn(("sleep", '{"delay": 0.2}'), ("sleep", '{"delay": 0.1}'), ("sleep", '{"delay": 0.15}')),
+            "All done [DONE]",
+        ]
+        
+        started = time.monotonic()
+        result = await run(make_agent(), responses)
+        elapsed = time.monotonic() - started
+        
+        assert result.status == SubAgentStatus.COMPLETED
+        tool_messages = [m.content for m in result.messages if m.role == SubAgentMessageRole.TOOL]
+        assert tool_messages == ["slept 0.2", "slept 0.1", "slept 0.15"]
+        assert SleepTool.peak == 3
+        assert elapsed < 0.4
+    
+    async def test_agent_cap_limits_concurrency(self):
+        responses = [tool_turn(*[("sleep", '{"delay": 0.02}')] * 5), "[DONE]"]
+        
+        await run(make_agent(max_parallel_tools=2), responses)
+        
+        assert SleepTool.peak == 2
+    
+    async def test_slow_tool_times_out(self):
+        responses = [tool_turn(("sleep", '{"delay": 5}'), ("sleep", '{"delay": 0}')), "[DONE]"]
+        
+        result = await run(make_agent(), responses)
+        
+        tool_messages = [m.content for m in result.messages if m.role == SubAgentMessageRole.TOOL]
+        assert tool_messages == ["Error: Tool 'sleep' timed out after 0.5s", "slept 0"]
+    
+    async def test_context_changes_merge_in_call_order(self):
+        executor = SubAgentExecutor()
+        agent = make_agent()
+        context = agent.create_context(SubAgentTask(agent_id=agent.id, instruction="Go"))
+        calls = executor._extract_tool_calls(tool_turn(
+            ("sleep", '{"delay": 0.05, "paper": "first", "var": "a"}'),
+            ("sleep", '{"delay": 0, "paper": "second"}'),
+            ("sleep", '{"delay": 0, "var": "b"}'),
+        ))
+        
+        await executor._execute_tools(agent, calls, context)
+        
+        assert context.papers == [{"id": "second"}]
+        assert context.variables == {"a": 0.05, "b": 0}
+    
+    async def test_unknown_and_forbidden_tools(self):
+        ToolRegistry.register(type("OtherTool", (SleepTool,), {"id": property(lambda self: "other")}))
+        try:
+            responses = [tool_turn(("missing", ""), ("other", ""), ("sleep", "")), "[DONE]"]
+            result = await run(make_agent(), responses)
+        finally:
+            ToolRegistry.unregister("other")
+        
+        tool_messages = [m.content for m in result.messages if m.role == SubAgentMessageRole.TOOL]
+        assert tool_messages[0] == "Error: Unknown tool 'missing'"
+        assert "does not have access" in tool_messages[1]
+        assert tool_messages[2] == "slept 0"
+
+
+class TestExecutionEvents:
+    async def test_events_follow_turns_and_tool_calls(self):
+        events = []
+        executor = SubAgentExecutor()
+        agent = make_agent()
+        responses = [tool_turn(("sleep", '{"delay": 0.05}'), ("sleep", '{"delay": 0}')), "All done [DONE]"]
+        
+        with patch('app.services.llm_service.llm_service') as llm:
+            llm.generate_with_messages = AsyncMock(side_effect=responses)
+            result = await executor.execute(
+                agent, SubAgentTask(agent_id=agent.id, instruction="Go"), on_event=events.append
+            )
+        
+        assert result.status == SubAgentStatus.COMPLETED
+        assert [e["type"] for e in events] == [
+            "turn", "llm_response", "tool_call", "tool_call", "tool_result", "tool_result",
+            "turn", "llm_response",
+        ]
+        assert events[0] == {"type": "turn", "turn": 1}
+        assert events[2]["arguments"] == {"delay": 0.05}
+        # The faster call reports first
+        assert [e["result"] for e in events[4:6]] == ["slept 0", "slept 0.05"]
+        assert events[4]["id"] == events[3]["id"]
+        assert events[-1]["content"] == "All done [DONE]"
+    
+    async def test_failing_callback_does_not_break_execution(self):
+        def on_event(event):
+            raise RuntimeError("listener gone")
+        
+        executor = SubAgentExecutor()
+        agent = make_agent()
+        with patch('app.services.llm_service.llm_service') as llm:
+            llm.generate_with_messages = AsyncMock(return_value="Answer")
+            result = await executor.execute(
+                agent, SubAgentTask(agent_id=agent.id, instruction="Go"), on_event=on_event
+            )
+        
+        assert result.status == SubAgentStatus.COMPLETED
+        assert result.output == "Answer"
+    
+    async def test_cancellation_removes_context(self):
+        executor = SubAgentExecutor()
+        agent = make_agent()
+        task = SubAgentTask(agent_id=agent.id, instruction="Go")
+        
+        with patch('app.services.llm_service.llm_service') as llm:
+            llm.generate_with_messages = AsyncMock(return_value=tool_turn(("sleep", '{"delay": 0.4}')))
+            running = asyncio.create_task(executor.execute(agent, task))
+            await asyncio.sleep(0.05)
+            running.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await running
+        
+        assert executor.context_manager.get_context(task.id) is None
+
+
+class TestPromptCacheUsage:
+    async def test_usage_is_summed_over_turns(self):
+        calls = []
+        responses = iter([tool_turn(("sleep", '{"delay": 0}')), "All done [DONE]"])
+        
+        async def generate_with_messages(messages, usage=None, **kwargs):
+            calls.append(kwargs)
+            # The second turn reads the first turn's prompt from the cache
+            usage.add(LLMUsage(
+                prompt_tokens=1000 * len(calls),
+                completion_tokens=10,
+                cached_tokens=900 * (len(calls) - 1),
+                calls=1,
+            ))
+            return next(responses)
+        
+        events = []
+        executor = SubAgentExecutor()
+        agent = make_agent()
+        with patch('app.services.llm_service.llm_service') as llm:
+            llm.generate_with_messages = generate_with_messages
+            result = await executor.execute(
+                agent, SubAgentTask(agent_id=agent.id, instruction="Go"), on_event=events.append
+            )
+        
+        assert result.status == SubAgentStatus.COMPLETED
+        assert (result.prompt_tokens, result.cached_tokens, result.completion_tokens) == (3000, 900, 20)
+        assert calls[0]["cache_prefix"] is True
+        assert calls[0]["cache_key"] == "xivmind-subagent-tester"
+        responses_usage = [e["usage"] for e in events if e["type"] == "llm_response"]
+        assert responses_usage[1]["cached_tokens"] == 900
+    
+    async def test_cache_hints_can_be_disabled(self):
+        executor = SubAgentExecutor()
+        agent = make_agent()
+        settings = MagicMock(LLM_PROMPT_CACHE_ENABLED=False)
+        with patch('app.services.llm_service.llm_service') as llm, \
+                patch('app.services.subagents.executor.get_settings', return_value=settings):
+            llm.generate_with_messages = AsyncMock(return_value="Answer")
+            result = await executor.execute(agent, SubAgentTask(agent_id=agent.id, instruction="Go"))
+        
+        assert result.output == "Answer"
+        assert "cache_prefix" not in llm.generate_with_messages.call_args.kwargs
+        assert result.cached_tokens == 0
+
+
+class TestNativeToolCalling:
+    def test_tool_schema(self):
+        schema = ToolRegistry.get_schemas(["sleep", "missing"])
+        
+        assert schema == [{"name": "sleep", "description": "Sleep", "parameters": {
+            "type": "object", "properties": {}, "required": [],
+        }}]
+    
+    async def test_structured_calls_skip_text_parsing(self):
+        requests = []
+        
+        async def generate_with_messages(messages, tool_calls=None, **kwargs):
+            requests.append({"messages": messages, "tool_calls": tool_calls, **kwargs})
+            if len(requests) == 1:
+                # Malformed text-protocol markup is ignored when the model calls tools natively
+                tool_calls.append(LLMToolCall(id="call_1", name="sleep", arguments={"delay": 0}))
+                return "[TOOL: sleep({bad json)]"
+            return "All done"
+        
+        executor = SubAgentExecutor()
+        agent = make_agent()
+        with patch('app.services.llm_service.llm_service') as llm:
+            llm.supports_tools.return_value = True
+            llm.generate_with_messages = generate_with_messages
+            result = await executor.execute(agent, SubAgentTask(agent_id=agent.id, instruction="Go"))
+        
+        assert result.status == SubAgentStatus.COMPLETED
+        assert result.output == "All done"
+        assert result.turns_used == 2
+        assert requests[0]["tools"][0]["name"] == "sleep"
+        assistant, tool = requests[1]["messages"][-2:]
+        assert assistant["tool_calls"] == [{"id": "call_1", "name": "sleep", "arguments": {"delay": 0}}]
+        assert tool == {"role": "tool", "content": "slept 0", "tool_call_id": "call_1", "name": "sleep"}
+    
+    async def test_text_protocol_without_native_support(self):
+        executor = SubAgentExecutor()
+        agent = make_agent()
+        with patch('app.services.llm_service.llm_service') as llm:
+            llm.supports_tools.return_value = False
+            llm.generate_with_messages = AsyncMock(side_effect=[tool_turn(("sleep", '{"delay": 0}')), "[DONE]"])
+            result = await executor.execute(agent, SubAgentTask(agent_id=agent.id, instruction="Go"))
+        
+        assert "tools" not in llm.generate_with_messages.call_args.kwargs
+        tool_messages = [m.content for m in result.messages if m.role == SubAgentMessageRole.TOOL]
+        assert tool_messages == ["slept 0"]
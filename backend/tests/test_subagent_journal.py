@@ -0,0 +1,310 @@
+import asyncio
+import sys
+import threading
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+sys.modules["pymilvus"] = MagicMock()
+sys.modules["sentence_transformers"] = MagicMock()
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers.subagents import router
+from app.services.subagents.executor import SubAgentExecutor
+from app.services.subagents.journal import SubAgentJournal
+from app.services.subagents.manager import SubAgentManager
+from app.services.subagents.registry import DynamicSubAgent, SubAgentRegistry
+from app.services.subagents.tools import ToolRegistry, ToolProvider
+from app.services.subagents.types import (
+    SubAgentConfig,
+    SubAgentExecutionContext,
+    SubAgentMessageRole,
+    SubAgentStatus,
+    SubAgentTask,
+)
+
+
+class EchoTool(ToolProvider):
+    @property
+    def id(self) -> str:
+        return "echo"
+    
+    @property
+    def name(self) -> str:
+        return "Echo"
+    
+    async def execute(self, args, context):
+        if args.get("text") == "slow":
+            await asyncio.sleep(1)
+        context.variables["echoed"] = args.get("text")
+        return f"echo {args.get('text')}"
+
+
+@pytest.fixture(autouse=True)
+def echo_tool():
+    ToolRegistry.register(EchoTool)
+    yield
+    ToolRegistry.unregister("echo")
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return SubAgentJournal(str(tmp_path / "data" / "journal.db"), retention_seconds=60)
+
+
+def make_agent():
+    return DynamicSubAgent(SubAgentConfig(
+        id="tester", name="Tester", tools=["echo"], system_prompt="You are a tester.",
+    ))
+
+
+def make_task(task_id="t1"):
+    task = SubAgentTask(agent_id="tester", instruction="Go", context={"papers": [{"id": "2401.00001"}]})
+    task.id = task_id
+    return task
+
+
+async def execute(executor, task, responses):
+    with patch('app.services.llm_service.llm_service') as llm:
+        llm.supports_tools.return_value = False
+        llm.generate_with_messages = AsyncMock(side_effect=responses)
+        result = await executor.execute(make_agent(), task)
+    return result, llm.generate_with_messages
+
+
+class TestSubAgentJournal:
+    def test_load_returns_context_as_of_last_checkpoint(self, journal):
+        task = make_task()
+        context = make_agent().create_context(task)
+        journal.start(task, context)
+        
+        context.current_turn = 1
+        context.add_message(SubAgentMessageRole.ASSISTANT, '[TOOL: echo({"text": "a"})]')
+        context.add_message(SubAgentMessageRole.TOOL, "echo a", name="echo", tool_call_id="c1")
+        journal.append("t1", 1, context.messages[-2:])
+        context.variables["echoed"] = "a"
+        journal.checkpoint(context)
+        # Turn 2 never finished
+        context.current_turn = 2
+        context.add_message(SubAgentMessageRole.ASSISTANT, '[TOOL: echo({"text": "b"})]')
+        journal.append("t1", 2, context.messages[-1:])
+        
+        restored_task, restored = journal.load("t1")
+        
+        assert restored_task.instruction == "Go"
+        assert restored_task.context["papers"] == [{"id": "2401.00001"}]
+        assert restored.current_turn == 1
+        assert [m.content for m in restored.messages][-2:] == ['[TOOL: echo({"text": "a"})]', "echo a"]
+        assert restored.messages[-1].tool_call_id == "c1"
+        assert restored.variables == {"echoed": "a"}
+        assert len(restored.messages) == len(context.messages) - 1
+    
+    def test_completed_task_is_folded_and_not_resumable(self, journal):
+        task = make_task()
+        context = make_agent().create_context(task)
+        journal.start(task, context)
+        
+        journal.finish("t1", SubAgentStatus.COMPLETED, output="Done")
+        
+        assert journal.load("t1") is None
+        assert [m.content for m in journal.get_transcript("t1")] == [m.content for m in context.messages]
+        assert journal.get_stats()["message_rows"] == 0
+        assert journal.list_resumable() == []
+    
+    def test_compaction_replaces_messages(self, journal):
+        task = make_task()
+        context = SubAgentExecutionContext(agent_id="tester", task_id="t1")
+        for i in range(5):
+            context.add_message(SubAgentMessageRole.USER, f"message {i}")
+        journal.start(task, context)
+        
+        context.current_turn = 1
+        journal.checkpoint(context)
+        context.messages = context.messages[:1] + context.messages[-1:]
+        journal.replace_messages("t1", 2, context.messages)
+        
+        _, restored = journal.load("t1")
+        assert [m.content for m in restored.messages] == ["message 0", "message 4"]
+    
+    def test_lists_and_purges_finished_tasks(self, journal):
+        for task_id, status in [("a", SubAgentStatus.FAILED), ("b", SubAgentStatus.CANCELLED), ("c", None)]:
+            task = make_task(task_id)
+            journal.start(task, make_agent().create_context(task))
+            if status:
+                journal.finish(task_id, status, error="boom")
+        
+        assert {t["task_id"]: t["status"] for t in journal.list_resumable()} == {
+            "a": "failed", "b": "cancelled", "c": "running",
+        }
+        
+        journal.retention_seconds = -1
+        assert journal.purge() == 2
+        assert [t["task_id"] for t in journal.list_resumable()] == ["c"]
+
+
+class TestExecutorResume:
+    async def test_failed_task_resumes_after_last_finished_turn(self, journal):
+        executor = SubAgentExecutor(journal=journal)
+        
+        result, _ = await execute(executor, make_task(), [
+            '[TOOL: echo({"text": "a"})]',
+            RuntimeError("rate limited"),
+        ])
+        assert result.status == SubAgentStatus.FAILED
+        
+        result, llm = await execute(executor, make_task(), ["All done [DONE]"])
+        
+        assert result.status == SubAgentStatus.COMPLETED
+        assert result.turns_used == 2
+        # Only the turn that failed is repeated
+        assert llm.call_count == 1
+        messages = llm.call_args.kwargs["messages"]
+        assert messages[-1]["content"] == "echo a"
+        assert sum(1 for m in messages if m["role"] == "assistant") == 1
+        assert journal.load("t1") is None
+    
+    async def test_cancelled_task_is_resumable(self, journal):
+        executor = SubAgentExecutor(journal=journal)
+        
+        async def slow(**kwargs):
+            await asyncio.sleep(1)
+            return "never"
+        
+        with patch('app.services.llm_service.llm_service') as llm:
+            llm.supports_tools.return_value = False
+            llm.generate_with_messages = slow
+            running = asyncio.create_task(executor.execute(make_agent(), make_task()))
+            await asyncio.sleep(0.05)
+            running.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await running
+        
+        assert [t["status"] for t in journal.list_resumable()] == ["cancelled"]
+        _, context = journal.load("t1")
+        assert context.current_turn == 0
+    
+    async def test_task_interrupted_by_shutdown_resumes_on_restart(self, journal):
+        SubAgentRegistry.register_instance(make_agent())
+        try:
+            with patch('app.services.subagents.manager.get_subagent_journal', return_value=journal), \
+                    patch('app.services.llm_service.llm_service') as llm:
+                llm.supports_tools.return_value = False
+                llm.generate_with_messages = AsyncMock(side_effect=[
+                    '[TOOL: echo({"text": "slow"})]',
+                    "All done [DONE]",
+                ])
+                before = SubAgentManager()
+                submitted = before.submit_task("tester", "Go")
+                await asyncio.sleep(0.1)
+                await before.shutdown()
+                
+                assert [t["status"] for t in journal.list_resumable()] == ["running"]
+                
+                after = SubAgentManager()
+                assert after.resume_interrupted_tasks() == 1
+                run = after._get_runner().get(submitted["task_id"])
+                await run.task
+        finally:
+            SubAgentRegistry.unregister("tester")
+        
+        assert "resumed" in [event["type"] for event in run.events]
+        assert run.result.status == SubAgentStatus.COMPLETED
+        assert run.result.output == "All done [DONE]"
+        assert journal.list_resumable() == []
+    
+    async def test_repeated_resumes_drop_the_unfinished_turn(self, journal):
+        executor = SubAgentExecutor(journal=journal)
+        
+        async def cancel_during_tools(responses):
+            with patch('app.services.llm_service.llm_service') as llm:
+                llm.supports_tools.return_value = False
+                llm.generate_with_messages = AsyncMock(side_effect=responses)
+                running = asyncio.create_task(executor.execute(make_agent(), make_task()))
+                await asyncio.sleep(0.1)
+                running.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await running
+        
+        await cancel_during_tools(['[TOOL: echo({"text": "a"})]', 'Attempt A [TOOL: echo({"text": "slow"})]'])
+        await cancel_during_tools(['Attempt B [TOOL: echo({"text": "slow"})]'])
+        _, context = journal.load("t1")
+        assert [m.content for m in context.messages if m.role == SubAgentMessageRole.ASSISTANT] == [
+            '[TOOL: echo({"text": "a"})]',
+        ]
+        
+        result, llm = await execute(executor, make_task(), ["All done [DONE]"])
+        
+        assert result.status == SubAgentStatus.COMPLETED
+        sent = [m["content"] for m in llm.call_args.kwargs["messages"] if m["role"] == "assistant"]
+        assert sent == ['[TOOL: echo({"text": "a"})]']
+        assert not any("Attempt" in m.content for m in journal.get_transcript("t1"))
+    
+    async def test_journal_writes_run_off_the_event_loop(self, journal):
+        executor = SubAgentExecutor(journal=journal)
+        threads = []
+        append = journal.append
+        
+        def recording_append(*args):
+            threads.append(threading.current_thread().name)
+            append(*args)
+        
+        journal.append = recording_append
+        result, _ = await execute(executor, make_task(), ['[TOOL: echo({"text": "a"})]', "Done [DONE]"])
+        
+        assert result.status == SubAgentStatus.COMPLETED
+        assert len(threads) == 3
+        assert all(name.startswith("subagent-journal") for name in threads)
+        assert [m.content for m in journal.get_transcript("t1")][-1] == "Done [DONE]"
+    
+    async def test_journal_errors_do_not_fail_the_task(self, journal):
+        executor = SubAgentExecutor(journal=journal)
+        journal.db_path = "/nonexistent/dir/journal.db"
+        
+        result, _ = await execute(executor, make_task(), ["Answer"])
+        
+        assert result.status == SubAgentStatus.COMPLETED
+        assert result.output == "Answer"
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+@pytest.fixture
+def mock_manager():
+    with patch('app.routers.subagents.subagent_manager') as mock:
+        yield mock
+
+
+class TestResumeRoutes:
+    def test_list_resumable(self, client, mock_manager):
+        mock_manager.list_resumable_tasks.return_value = [
+            {"task_id": "t1", "agent_id": "tester", "status": "failed", "instruction": "Go", "turns_used": 2},
+        ]
+        
+        response = client.get("/subagents/tasks/resumable")
+        
+        assert response.status_code == 200
+        assert response.json()["tasks"][0]["turns_used"] == 2
+    
+    def test_resume(self, client, mock_manager):
+        mock_manager.resume_task.return_value = {
+            "success": True, "task_id": "t1", "agent_id": "tester", "status": "queued",
+        }
+        
+        response = client.post("/subagents/tasks/t1/resume")
+        
+        assert response.status_code == 202
+        assert response.json()["status"] == "queued"
+    
+    def test_resume_unknown_or_running(self, client, mock_manager):
+        mock_manager.resume_task.return_value = None
+        assert client.post("/subagents/tasks/missing/resume").status_code == 404
+        
+        mock_manager.resume_task.return_value = {"success": False, "error": "Task 't1' is still running"}
+        assert client.post("/subagents/tasks/t1/resume").status_code == 409
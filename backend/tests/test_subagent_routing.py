@@ -0,0 +1,192 @@
+import sys
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+sys.modules["pymilvus"] = MagicMock()
+sys.modules["sentence_transformers"] = MagicMock()
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers.subagents import router
+from app.services.subagents.registry import SubAgentRegistry
+from app.services.subagents.routing import SubAgentRouter
+from app.services.subagents.types import SubAgentResult, SubAgentStatus
+
+VOCABULARY = ["summary", "summarize", "translate", "chinese", "search", "find", "papers", "citation"]
+
+
+class FakeEncoder:
+    """Bag-of-words vectors over a small vocabulary; counts how many texts it embeds."""
+    
+    def __init__(self, model="fake-bow"):
+        self.model = model
+        self.encoded = 0
+    
+    def __call__(self, texts):
+        self.encoded += len(texts)
+        vectors = []
+        for text in texts:
+            words = text.lower().replace(",", " ").replace(":", " ").split()
+            vectors.append([float(words.count(term)) for term in VOCABULARY])
+        return vectors, self.model
+
+
+@pytest.fixture(autouse=True)
+def registry():
+    agents, dynamic = dict(SubAgentRegistry._agents), dict(SubAgentRegistry._dynamic_agents)
+    SubAgentRegistry.clear()
+    for config in [
+        {"id": "summarizer", "name": "Summarizer", "description": "Write a summary of papers", "skills": ["summary"]},
+        {"id": "translator", "name": "Translator", "description": "Translate papers into Chinese"},
+        {"id": "researcher", "name": "Researcher", "description": "Search and find related papers"},
+    ]:
+        SubAgentRegistry.register_dynamic(config)
+    yield SubAgentRegistry
+    SubAgentRegistry.clear()
+    SubAgentRegistry._agents.update(agents)
+    SubAgentRegistry._dynamic_agents.update(dynamic)
+
+
+class TestSubAgentRouter:
+    def test_routes_to_most_similar_agent(self):
+        router = SubAgentRouter(encode_batch=FakeEncoder())
+        
+        assert router.route("Please translate this abstract to Chinese") == "translator"
+        assert router.route("Find papers on sparse attention") == "researcher"
+        assert router.route("Give me a short summary") == "summarizer"
+    
+    def test_rank_returns_sorted_scores(self):
+        router = SubAgentRouter(encode_batch=FakeEncoder())
+        
+        ranking = router.rank("translate to chinese", top_k=2)
+        
+        assert [agent_id for agent_id, _ in ranking] == ["translator", "summarizer"]
+        assert ranking[0][1] > ranking[1][1]
+        assert ranking[0][1] <= 1.0
+    
+    def test_profiles_are_embedded_once(self):
+        encoder = FakeEncoder()
+        router = SubAgentRouter(encode_batch=encoder)
+        
+        for _ in range(5):
+            router.route("search papers")
+        
+        # Three profiles, then one query per call
+        assert encoder.encoded == 3 + 5
+        assert router.get_stats()["agents"] == 3
+    
+    def test_reload_only_embeds_changed_agents(self, registry):
+        encoder = FakeEncoder()
+        router = SubAgentRouter(encode_batch=encoder)
+        router.refresh()
+        
+        registry.unregister("translator")
+        registry.register_dynamic({"id": "translator", "name": "Translator", "description": "Translate into Chinese"})
+        registry.register_dynamic({"id": "citer", "name": "Citer", "description": "Format a citation"})
+        
+        assert router.refresh() == 2
+        assert router.route("citation please") == "citer"
+    
+    def test_removed_agents_are_not_routed_to(self, registry):
+        router = SubAgentRouter(encode_batch=FakeEncoder())
+        router.refresh()
+        
+        registry.unregister("translator")
+        
+        assert "translator" not in [agent_id for agent_id, _ in router.rank("translate to chinese")]
+    
+    def test_model_change_reembeds_everything(self):
+        encoder = FakeEncoder()
+        router = SubAgentRouter(encode_batch=encoder)
+        router.refresh()
+        
+        encoder.model = "other-model"
+        
+        assert router.route("translate to chinese") == "translator"
+        assert router.get_stats()["model"] == "other-model"
+    
+    def test_no_agents(self, registry):
+        registry.clear()
+        router = SubAgentRouter(encode_batch=FakeEncoder())
+        
+        assert router.route("anything") is None
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+@pytest.fixture
+def mock_manager():
+    with patch('app.routers.subagents.subagent_manager') as mock:
+        yield mock
+
+
+class TestDelegateRouting:
+    def test_delegate_runs_routed_agent(self, client, mock_manager):
+        mock_manager.route_task = AsyncMock(return_value={
+            "agent_id": "translator", "method": "embedding", "scores": [{"agent_id": "translator", "score": 0.9}],
+        })
+        mock_manager.execute_agent = AsyncMock(return_value=SubAgentResult(
+            task_id="t1", agent_id="translator", status=SubAgentStatus.COMPLETED, output="译文",
+        ))
+        
+        response = client.post("/subagents/delegate", json={"instruction": "Translate to Chinese"})
+        
+        assert response.status_code == 200
+        assert response.json()["agent_id"] == "translator"
+        assert mock_manager.execute_agent.call_args[1]["agent_id"] == "translator"
+    
+    def test_delegate_without_agents(self, client, mock_manager):
+        mock_manager.route_task = AsyncMock(return_value={"agent_id": None, "method": "fallback", "scores": []})
+        
+        response = client.post("/subagents/delegate", json={"instruction": "Anything"})
+        
+        assert response.status_code == 404
+    
+    def test_route_preview(self, client, mock_manager):
+        mock_manager.route_task = AsyncMock(return_value={
+            "agent_id": "researcher",
+            "method": "embedding",
+            "scores": [{"agent_id": "researcher", "score": 0.8}, {"agent_id": "summarizer", "score": 0.2}],
+        })
+        
+        response = client.post("/subagents/route", json={"instruction": "Find papers", "top_k": 2})
+        
+        assert response.json()["agent_id"] == "researcher"
+        assert len(response.json()["scores"]) == 2
+        mock_manager.route_task.assert_called_once_with("Find papers", top_k=2)
+
+
+class TestManagerRouteTask:
+    async def test_falls_back_to_first_agent_when_embedding_fails(self):
+        from app.services.subagents.manager import SubAgentManager
+        
+        def broken(texts):
+            raise RuntimeError("model unavailable")
+        
+        manager = SubAgentManager()
+        manager._initialized = True
+        manager._router = SubAgentRouter(encode_batch=broken)
+        
+        route = await manager.route_task("Translate to Chinese")
+        
+        assert route == {"agent_id": "summarizer", "method": "fallback", "scores": []}
+    
+    async def test_returns_ranked_scores(self):
+        from app.services.subagents.manager import SubAgentManager
+        
+        manager = SubAgentManager()
+        manager._initialized = True
+        manager._router = SubAgentRouter(encode_batch=FakeEncoder())
+        
+        route = await manager.route_task("Translate to Chinese", top_k=2)
+        
+        assert route["agent_id"] == "translator"
+        assert route["method"] == "embedding"
+        assert [s["agent_id"] for s in route["scores"]] == ["translator", "summarizer"]
@@ -0,0 +1,287 @@
+import asyncio
+import sys
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+sys.modules["pymilvus"] = MagicMock()
+sys.modules["sentence_transformers"] = MagicMock()
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers.subagents import router
+from app.services.subagents.registry import DynamicSubAgent
+from app.services.subagents.runner import SubAgentTaskRunner, TaskQueueFullError
+from app.services.subagents.types import SubAgentConfig, SubAgentResult, SubAgentStatus, SubAgentTask
+
+
+class FakeExecutor:
+    """Emits one turn per step, sleeping ``delay`` seconds in each."""
+    
+    def __init__(self, steps=2, delay=0.0, fail=False):
+        self.steps = steps
+        self.delay = delay
+        self.fail = fail
+        self.running = 0
+        self.peak = 0
+    
+    async def execute(self, agent, task, on_event=None):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            for turn in range(1, self.steps + 1):
+                on_event({"type": "turn", "turn": turn})
+                await asyncio.sleep(self.delay)
+                on_event({"type": "llm_response", "turn": turn, "content": f"step {turn}"})
+            if self.fail:
+                raise RuntimeError("executor crashed")
+        finally:
+            self.running -= 1
+        return SubAgentResult(
+            task_id=task.id,
+            agent_id=agent.id,
+            status=SubAgentStatus.COMPLETED,
+            output=f"finished {task.instruction}",
+            turns_used=self.steps,
+        )
+
+
+def make_agent():
+    return DynamicSubAgent(SubAgentConfig(id="tester", name="Tester", provider="openai", model="gpt-4o"))
+
+
+def submit(runner, instruction="Go", task_id=None):
+    task = SubAgentTask(agent_id="tester", instruction=instruction)
+    if task_id:
+        task.id = task_id
+    return runner.submit(make_agent(), task)
+
+
+async def collect(runner, task_id, **kwargs):
+    return [event async for event in runner.events(task_id, **kwargs)]
+
+
+class TestSubAgentTaskRunner:
+    async def test_submit_returns_before_the_run_finishes(self):
+        runner = SubAgentTaskRunner(FakeExecutor(delay=0.05))
+        
+        run = submit(runner)
+        
+        assert run.status == SubAgentStatus.QUEUED
+        await run.task
+        await asyncio.sleep(0)
+        assert run.status == SubAgentStatus.COMPLETED
+        assert run.result.output == "finished Go"
+        assert run.turns_used == 2
+        assert run.to_dict()["result"]["status"] == "completed"
+    
+    async def test_events_stream_live_and_end_with_done(self):
+        runner = SubAgentTaskRunner(FakeExecutor(delay=0.02))
+        run = submit(runner)
+        
+        events = await collect(runner, run.task_id)
+        
+        assert [e["type"] for e in events] == [
+            "queued", "started", "turn", "llm_response", "turn", "llm_response", "done",
+        ]
+        assert [e["seq"] for e in events] == list(range(1, 8))
+        assert events[1]["model"] == "gpt-4o"
+        assert events[-1]["status"] == "completed"
+        assert events[-1]["output"] == "finished Go"
+    
+    async def test_resume_after_seq_and_replay_finished_run(self):
+        runner = SubAgentTaskRunner(FakeExecutor())
+        run = submit(runner)
+        await collect(runner, run.task_id)
+        
+        resumed = await collect(runner, run.task_id, after=4)
+        
+        assert [e["seq"] for e in resumed] == [5, 6, 7]
+        assert await collect(runner, run.task_id, after=7) == []
+        assert await collect(runner, "missing") == []
+    
+    async def test_worker_pool_bounds_concurrency(self):
+        executor = FakeExecutor(steps=1, delay=0.05)
+        runner = SubAgentTaskRunner(executor, max_workers=2)
+        
+        runs = [submit(runner, task_id=f"t{i}") for i in range(5)]
+        await asyncio.sleep(0.01)
+        stats = runner.get_stats()
+        await asyncio.gather(*(run.task for run in runs))
+        
+        assert executor.peak == 2
+        assert stats["running"] == 2
+        assert stats["queued"] == 3
+    
+    async def test_full_queue_rejects_new_tasks(self):
+        runner = SubAgentTaskRunner(FakeExecutor(steps=1, delay=0.05), max_workers=1, max_queued=1)
+        
+        first = submit(runner, task_id="a")
+        submit(runner, task_id="b")
+        with pytest.raises(TaskQueueFullError):
+            submit(runner, task_id="c")
+        
+        assert runner.get_stats()["rejected"] == 1
+        await runner.shutdown()
+        assert first.status == SubAgentStatus.CANCELLED
+    
+    async def test_cancel_running_task(self):
+        runner = SubAgentTaskRunner(FakeExecutor(steps=3, delay=1.0))
+        run = submit(runner)
+        await asyncio.sleep(0.05)
+        
+        listener = asyncio.create_task(collect(runner, run.task_id))
+        await asyncio.sleep(0)
+        cancelled = await runner.cancel(run.task_id)
+        events = await asyncio.wait_for(listener, timeout=1)
+        
+        assert cancelled.status == SubAgentStatus.CANCELLED
+        assert cancelled.result.error == "Task was cancelled"
+        assert cancelled.turns_used == 1
+        assert events[-1]["type"] == "done"
+        assert events[-1]["status"] == "cancelled"
+        assert runner.get_stats()["cancelled"] == 1
+    
+    async def test_cancel_queued_task(self):
+        runner = SubAgentTaskRunner(FakeExecutor(steps=1, delay=0.2), max_workers=1)
+        submit(runner, task_id="first")
+        queued = submit(runner, task_id="second")
+        
+        await runner.cancel("second")
+        
+        assert queued.status == SubAgentStatus.CANCELLED
+        assert queued.started_at is None
+        assert [e["type"] for e in queued.events] == ["queued", "done"]
+        await runner.shutdown()
+    
+    async def test_crashing_executor_marks_task_failed(self):
+        runner = SubAgentTaskRunner(FakeExecutor(steps=1, fail=True))
+        run = submit(runner)
+        
+        events = await collect(runner, run.task_id)
+        
+        assert run.status == SubAgentStatus.FAILED
+        assert events[-1]["error"] == "executor crashed"
+        assert runner.get_stats()["failed"] == 1
+    
+    async def test_heartbeat_pings_idle_stream(self):
+        runner = SubAgentTaskRunner(FakeExecutor(steps=1, delay=0.12))
+        run = submit(runner)
+        
+        events = await collect(runner, run.task_id, heartbeat=0.05)
+        
+        types = [e["type"] for e in events]
+        assert "ping" in types
+        assert types[-1] == "done"
+    
+    async def test_finished_runs_expire(self):
+        runner = SubAgentTaskRunner(FakeExecutor(steps=1), retention_seconds=0)
+        run = submit(runner)
+        await collect(runner, run.task_id)
+        
+        assert runner.list() == []
+        assert runner.get(run.task_id) is None
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+@pytest.fixture
+def mock_manager():
+    with patch('app.routers.subagents.subagent_manager') as mock:
+        mock.get_agent.return_value = {"id": "tester", "name": "Tester"}
+        yield mock
+
+
+def task_info(**overrides):
+    return {
+        "task_id": "t1",
+        "agent_id": "tester",
+        "status": "queued",
+        "instruction": "Go",
+        "created_at": "2024-01-01T00:00:00",
+        "events": 1,
+        **overrides,
+    }
+
+
+class TestSubAgentTaskRoutes:
+    def test_submit_task(self, client, mock_manager):
+        mock_manager.submit_task.return_value = {"success": True, **task_info()}
+        
+        response = client.post("/subagents/tester/tasks", json={"instruction": "Go", "paper_ids": ["2401.00001"]})
+        
+        assert response.status_code == 202
+        assert response.json()["task_id"] == "t1"
+        assert response.json()["status"] == "queued"
+        assert mock_manager.submit_task.call_args[1]["paper_ids"] == ["2401.00001"]
+    
+    def test_submit_task_unknown_agent(self, client, mock_manager):
+        mock_manager.get_agent.return_value = None
+        
+        response = client.post("/subagents/missing/tasks", json={"instruction": "Go"})
+        
+        assert response.status_code == 404
+        mock_manager.submit_task.assert_not_called()
+    
+    def test_submit_task_queue_full(self, client, mock_manager):
+        mock_manager.submit_task.side_effect = TaskQueueFullError("SubAgent task queue is full (100 tasks waiting)")
+        
+        response = client.post("/subagents/tester/tasks", json={"instruction": "Go"})
+        
+        assert response.status_code == 429
+    
+    def test_get_task_with_result(self, client, mock_manager):
+        mock_manager.get_task.return_value = task_info(
+            status="completed",
+            turns_used=2,
+            result={"task_id": "t1", "agent_id": "tester", "status": "completed", "output": "Done", "messages": []},
+        )
+        
+        response = client.get("/subagents/tasks/t1")
+        
+        assert response.status_code == 200
+        assert response.json()["result"]["output"] == "Done"
+    
+    def test_get_unknown_task(self, client, mock_manager):
+        mock_manager.get_task.return_value = None
+        
+        assert client.get("/subagents/tasks/missing").status_code == 404
+        assert client.get("/subagents/tasks/missing/events").status_code == 404
+    
+    def test_list_tasks(self, client, mock_manager):
+        mock_manager.list_tasks.return_value = [task_info(), task_info(task_id="t2", status="running")]
+        
+        response = client.get("/subagents/tasks?agent_id=tester")
+        
+        assert response.json()["total"] == 2
+        mock_manager.list_tasks.assert_called_once_with("tester")
+    
+    def test_stream_task_events(self, client, mock_manager, parse_sse):
+        async def events():
+            yield {"type": "turn", "turn": 1, "seq": 3}
+            yield {"type": "done", "status": "completed", "output": "Done", "seq": 4}
+        mock_manager.get_task.return_value = task_info()
+        mock_manager.stream_task_events.return_value = events()
+        
+        response = client.get("/subagents/tasks/t1/events?after=2")
+        
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert parse_sse(response.text) == [
+            ("turn", {"turn": 1, "seq": 3}),
+            ("done", {"status": "completed", "output": "Done", "seq": 4}),
+        ]
+        assert mock_manager.stream_task_events.call_args[1]["after"] == 2
+    
+    def test_cancel_task(self, client, mock_manager):
+        mock_manager.cancel_task = AsyncMock(return_value=task_info(status="cancelled"))
+        
+        response = client.post("/subagents/tasks/t1/cancel")
+        
+        assert response.status_code == 200
+        assert response.json()["status"] == "cancelled"